@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        TESTE DE CARGA DE PONTA A PONTA (PORTAIS E API SIMULADOS)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Sobe a API do Groq simulada e a fazenda de portais sintéticos (benchmarks/simuladores.py)
+# e roda o pipeline real — MotorAnalise.analisar_sites, com descoberta por sitemap/feed,
+# extração, deduplicação, empacotamento de tokens e agendador — contra eles. Informa
+# páginas/min, chamadas à LLM/min, latência p50/p95 de extração, de cada lote analisado e
+# da ida e volta à API (incluindo a espera na fila do agendador), taxas de erro e de 429, e
+# o tempo até o primeiro trecho não conforme e até o primeiro site concluído (resultados parciais).
+# Termina com código 1 se a taxa de falhas por link ou de erros nas chamadas à LLM passar dos
+# limites (--max-falhas, --max-erros-llm): um pipeline que não analisa nada não passa em silêncio.
+# Precisa das dependências do motor instaladas (trafilatura, lxml e groq). Uso:
+#   python benchmarks/bench_carga.py --portais 300 --taxa-429 0.1 --json carga.json
+#   python benchmarks/bench_carga.py --latencia-llm 2 --sigma 0.8 --chamadas-llm 8
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRETORIO)
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, DIRETORIO)
+
+from simuladores import (ConfigFazenda, ConfigGroqSimulado, FazendaPortais,  # noqa: E402
+                         ServidorGroqSimulado)
+
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+class Cronometros:
+    # Latências por etapa, coletadas de várias threads
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.amostras = {}
+        self.erros = {}
+
+    def envolver(self, etapa: str, funcao):
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.erros[etapa] = self.erros.get(etapa, 0) + 1
+                raise
+            finally:
+                with self._lock:
+                    self.amostras.setdefault(etapa, []).append(time.perf_counter() - inicio)
+        return medida
+
+    def resumo(self) -> dict:
+        with self._lock:
+            return {
+                etapa: {
+                    "n": len(valores),
+                    "erros": self.erros.get(etapa, 0),
+                    "p50_s": round(percentil(valores, 50), 3),
+                    "p95_s": round(percentil(valores, 95), 3),
+                    "max_s": round(max(valores), 3),
+                }
+                for etapa, valores in self.amostras.items()
+            }
+
+
+def executar(args) -> dict:
+    from electio.agendador import AgendadorGroq, LimitesModelo
+    from electio.duplicatas import ConfigDuplicatas
+    from electio.motor import ConfigAnalise, ConfigColeta, ConfigLLM, MotorAnalise
+    from electio.pipeline import ConfigConcorrencia
+
+    groq = ServidorGroqSimulado(config=ConfigGroqSimulado(
+        latencia_mediana_s=args.latencia_llm, latencia_sigma=args.sigma, taxa_429=args.taxa_429,
+        retry_after_s=args.retry_after, rpm=args.rpm, tpm=args.tpm, taxa_malformada=args.taxa_malformada)).iniciar()
+    fazenda = FazendaPortais(config=ConfigFazenda(
+        portais=args.portais, noticias_por_portal=args.noticias, taxa_erro=args.taxa_erro,
+        latencia_s=args.latencia_pagina)).iniciar()
+
+    with tempfile.TemporaryDirectory(prefix="electio-carga-") as diretorio:
+        motor = MotorAnalise(api_key="simulada", diretorio_cache=diretorio, base_url=groq.url_base)
+        # os limites do plano simulado substituem os do plano gratuito
+        motor.agendador.fechar()
+        motor.agendador = AgendadorGroq(api_key="simulada", base_url=groq.url_base,
+                                        limites={args.modelo: LimitesModelo(rpm=args.rpm, tpm=args.tpm)})
+
+        cronometros = Cronometros()
+        motor.extrair_texto = cronometros.envolver("extracao", motor.extrair_texto)
+        motor.analisar_com_llm = cronometros.envolver("analise_pagina", motor.analisar_com_llm)
+        motor.analisar_lote_com_llm = cronometros.envolver("analise_lote", motor.analisar_lote_com_llm)
+        motor.agendador.completar = cronometros.envolver("llm_ida_e_volta", motor.agendador.completar)
+
+        config = ConfigAnalise(
+            coleta=ConfigColeta(max_links=args.links, atraso_por_host=0.0),
+            llm=ConfigLLM(modelo=args.modelo, data_referencia=date(2026, 10, 4),
+                          resumo_base_legal="Vedada a publicidade institucional nos três meses anteriores ao pleito.",
+                          usar_cache=not args.sem_cache_veredictos, streaming=not args.sem_streaming),
+            concorrencia=ConfigConcorrencia(max_global=args.conexoes, max_por_host=args.por_site,
+                                            workers_descoberta=max(4, args.conexoes // 4),
+                                            workers_extracao=args.conexoes, workers_analise=args.chamadas_llm),
+            duplicatas=ConfigDuplicatas(ativo=not args.sem_deduplicacao),
+        )
+
+        def progresso(concluidos, total, url):
+            if not args.silencioso:
+                print(f"\r[{concluidos}/{total}] {url[:60]:<60}", end="", file=sys.stderr, flush=True)
+
+        primeiros = {}
+
+        def marcar(evento):
+            def callback(*args):
+                primeiros.setdefault(evento, round(time.perf_counter() - inicio, 2))
+            return callback
+
+        inicio = time.perf_counter()
+        resultados = motor.analisar_sites(fazenda.sementes(), config, ao_progredir=progresso,
+                                          ao_encontrar_trecho=marcar("primeiro_trecho_s"),
+                                          ao_concluir_pagina=marcar("primeira_pagina_s"),
+                                          ao_concluir_site=marcar("primeiro_site_s"))
+        duracao = time.perf_counter() - inicio
+        if not args.silencioso:
+            print(file=sys.stderr)
+        estatisticas_motor = motor.estatisticas()
+        motor.agendador.fechar()
+
+    groq.parar()
+    fazenda.parar()
+
+    minutos = duracao / 60
+    falhas = sum(r["falhas"] for r in resultados)
+    paginas = sum(len(r["paginas"]) for r in resultados)
+    links = paginas + falhas
+    latencias_api = groq.estatisticas.pop("latencias_s")
+    etapas = cronometros.resumo()
+    chamadas = etapas.get("llm_ida_e_volta", {})
+    return {
+        "parametros": vars(args),
+        "duracao_s": round(duracao, 2),
+        "sites": len(resultados),
+        "paginas_analisadas": paginas,
+        "paginas_por_min": round(paginas / minutos, 1) if minutos else 0.0,
+        "chamadas_llm": groq.estatisticas["requisicoes"],
+        "chamadas_llm_por_min": round(groq.estatisticas["requisicoes"] / minutos, 1) if minutos else 0.0,
+        "taxa_falhas_links": round(falhas / links, 3) if links else 0.0,
+        "taxa_erros_llm": round(chamadas["erros"] / chamadas["n"], 3) if chamadas.get("n") else 0.0,
+        "taxa_429": round(groq.estatisticas["recusadas_429"] / groq.estatisticas["requisicoes"], 3)
+        if groq.estatisticas["requisicoes"] else 0.0,
+        "resultados_parciais": primeiros,
+        "latencia_api": {"p50_s": round(percentil(latencias_api, 50), 3),
+                         "p95_s": round(percentil(latencias_api, 95), 3)},
+        "etapas": etapas,
+        "api_simulada": groq.estatisticas,
+        "portais": fazenda.estatisticas,
+        "motor": {"llm": estatisticas_motor["llm"], "duplicatas": estatisticas_motor["duplicatas"]},
+    }
+
+
+def imprimir(relatorio: dict):
+    print(f"{relatorio['sites']} portais em {relatorio['duracao_s']} s: "
+          f"{relatorio['paginas_analisadas']} páginas ({relatorio['paginas_por_min']}/min), "
+          f"{relatorio['chamadas_llm']} chamadas à LLM ({relatorio['chamadas_llm_por_min']}/min)")
+    print(f"falhas por link: {relatorio['taxa_falhas_links']:.1%} | erros da LLM: {relatorio['taxa_erros_llm']:.1%} | 429: {relatorio['taxa_429']:.1%} "
+          f"| erros 500 dos portais: {relatorio['portais']['erros_500']} "
+          f"| quase duplicatas: {relatorio['motor']['duplicatas']['taxa']:.0%} "
+          f"| espera média no agendador: {relatorio['motor']['llm']['espera_media_s']} s")
+    parciais = relatorio["resultados_parciais"]
+    print(f"primeiro trecho: {parciais.get('primeiro_trecho_s', '—')} s | primeira página: "
+          f"{parciais.get('primeira_pagina_s', '—')} s | primeiro site: {parciais.get('primeiro_site_s', '—')} s")
+    print(f"{'etapa':<18}{'n':>7}{'erros':>7}{'p50 s':>9}{'p95 s':>9}{'máx s':>9}")
+    for etapa, medida in relatorio["etapas"].items():
+        print(f"{etapa:<18}{medida['n']:>7}{medida['erros']:>7}{medida['p50_s']:>9}{medida['p95_s']:>9}{medida['max_s']:>9}")
+    print(f"{'api (servidor)':<18}{relatorio['api_simulada']['respostas']:>7}{'':>7}"
+          f"{relatorio['latencia_api']['p50_s']:>9}{relatorio['latencia_api']['p95_s']:>9}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do pipeline contra portais e API simulados.")
+    parser.add_argument("--portais", type=int, default=200)
+    parser.add_argument("--noticias", type=int, default=30, help="notícias por portal")
+    parser.add_argument("--links", type=int, default=5, help="links analisados por portal")
+    parser.add_argument("--taxa-erro", type=float, default=0.02, help="fração das notícias que respondem 500")
+    parser.add_argument("--latencia-pagina", type=float, default=0.02)
+    parser.add_argument("--latencia-llm", type=float, default=0.8, help="mediana da latência da API, em segundos")
+    parser.add_argument("--sigma", type=float, default=0.5, help="dispersão (log-normal) da latência da API")
+    parser.add_argument("--taxa-429", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--taxa-malformada", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=300000)
+    parser.add_argument("--modelo", default="llama-3.3-70b-versatile")
+    parser.add_argument("--conexoes", type=int, default=16)
+    parser.add_argument("--por-site", type=int, default=2)
+    parser.add_argument("--chamadas-llm", type=int, default=4)
+    parser.add_argument("--sem-cache-veredictos", action="store_true")
+    parser.add_argument("--sem-deduplicacao", action="store_true")
+    parser.add_argument("--sem-streaming", action="store_true", help="espera a resposta completa de cada chamada")
+    parser.add_argument("--max-falhas", type=float, default=0.1,
+                        help="taxa de falhas por link acima da qual o teste termina com erro")
+    parser.add_argument("--max-erros-llm", type=float, default=0.1,
+                        help="taxa de chamadas à LLM que falharam (após as novas tentativas) acima da qual o teste termina com erro")
+    parser.add_argument("--silencioso", action="store_true", help="não mostra o progresso")
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    args = parser.parse_args(argv)
+
+    relatorio = executar(args)
+    relatorio["registrado_em"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    imprimir(relatorio)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    reprovado = False
+    if relatorio["taxa_falhas_links"] > args.max_falhas:
+        print(f"[CARGA] falhas por link {relatorio['taxa_falhas_links']:.1%} acima do limite de {args.max_falhas:.1%}",
+              file=sys.stderr)
+        reprovado = True
+    if relatorio["taxa_erros_llm"] > args.max_erros_llm:
+        print(f"[CARGA] erros da LLM {relatorio['taxa_erros_llm']:.1%} acima do limite de {args.max_erros_llm:.1%}",
+              file=sys.stderr)
+        reprovado = True
+    if not relatorio["paginas_analisadas"]:
+        print("[CARGA] nenhuma página analisada", file=sys.stderr)
+        reprovado = True
+    return 1 if reprovado else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
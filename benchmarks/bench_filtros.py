@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        BENCHMARK DOS FILTROS DE CONTEÚDO ESTRUTURAL
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Compara limpar_texto e filtrar_conteudo_relevante atuais (padrões compilados, uma passada
+# por documento) com a implementação anterior (um lower() por termo e por parágrafo, e
+# regex preguiçosa com lookahead), em páginas sintéticas de vários tamanhos. Informa a
+# vazão em MB/s e quantos parágrafos cada versão descartou (a versão atual usa limites de
+# palavra, então "tab" deixa de descartar parágrafos com "tabela" ou "estabelece"). Uso:
+#   python benchmarks/bench_filtros.py --repeticoes 5 --json filtros.json
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from electio.motor import RE_LINHAS_VAZIAS, RE_PARAGRAFOS, filtrar_conteudo_relevante, limpar_texto  # noqa: E402
+
+TAMANHOS_KB = [10, 100, 1000]
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ IMPLEMENTAÇÃO ANTERIOR (REFERÊNCIA) ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+RE_BLOCOS_INSTITUCIONAIS_ANTERIOR = re.compile(
+    r'(?is)(política de (cookies|privacidade|lgpd)|acessibilidade|transparência ativa|ouvidoria|contato).*?(?=\n{2,}|$)')
+
+TERMOS_ANTERIORES = [
+    "política de privacidade", "cookies", "lgpd", "acessibilidade", "navegação", "teclas", "tab", "enter",
+    "rolagem", "ctrl", "command", "razão social", "cnpj", "endereço", "contato", "login", "termos de uso",
+    "sobre nós", "rodapé", "footer", "header", "menu", "navegador", "privacidade", "segurança", "captcha",
+    "WhatsApp"
+]
+
+
+def limpar_texto_anterior(text: str) -> str:
+    if not text:
+        return ""
+    text = RE_BLOCOS_INSTITUCIONAIS_ANTERIOR.sub('', text)
+    text = RE_LINHAS_VAZIAS.sub('\n\n', text)
+    return text.strip()
+
+
+def filtrar_conteudo_relevante_anterior(texto: str) -> str:
+    if not texto:
+        return ""
+    blocos = RE_PARAGRAFOS.split(texto)
+    blocos_filtrados = []
+    for bloco in blocos:
+        if not any(k.lower() in bloco.lower() for k in TERMOS_ANTERIORES):
+            blocos_filtrados.append(bloco)
+    return "\n\n".join(blocos_filtrados).strip()
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ PÁGINAS SINTÉTICAS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+FRASES_NOTICIA = [
+    "A prefeitura inaugurou nesta segunda-feira a nova unidade básica de saúde do bairro Centro.",
+    "O secretário de obras apresentou o cronograma de pavimentação previsto para o próximo semestre.",
+    "A tabela de horários do transporte escolar foi atualizada e estabelece novas rotas para a zona rural.",
+    "Segundo a administração, o investimento ultrapassa dois milhões de reais com recursos próprios.",
+    "As inscrições para os cursos de capacitação seguem abertas até o fim do mês na sede da secretaria.",
+    "O evento contou com a presença de servidores, lideranças comunitárias e representantes do estado.",
+]
+
+BLOCOS_ESTRUTURAIS = [
+    "Política de Privacidade | Termos de Uso | Acessibilidade | Mapa do site",
+    "Use as teclas TAB e ENTER para navegar pelo menu principal.",
+    "Este site utiliza cookies para melhorar a sua experiência de navegação.",
+    "Ouvidoria: atendimento de segunda a sexta-feira, das 8h às 17h.\nEndereço: Rua Principal, 100 - Centro",
+    "Razão social: Município Exemplo | CNPJ 00.000.000/0001-00",
+    "Fale conosco pelo WhatsApp oficial da prefeitura.",
+]
+
+
+def gerar_pagina(tamanho_kb: int, semente: int = 42) -> str:
+    aleatorio = random.Random(semente)
+    paragrafos, tamanho = [], 0
+    while tamanho < tamanho_kb * 1024:
+        if aleatorio.random() < 0.3:
+            paragrafo = aleatorio.choice(BLOCOS_ESTRUTURAIS)
+        else:
+            paragrafo = " ".join(aleatorio.choice(FRASES_NOTICIA) for _ in range(aleatorio.randint(2, 5)))
+        paragrafos.append(paragrafo)
+        tamanho += len(paragrafo.encode("utf-8")) + 2
+    return "\n\n".join(paragrafos)
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ MEDIÇÃO ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def medir(funcao, texto: str, repeticoes: int) -> float:
+    # Mediana, em segundos, de `repeticoes` chamadas (com uma chamada de aquecimento)
+    funcao(texto)
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(texto)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def contar_paragrafos(texto: str) -> int:
+    return len([p for p in RE_PARAGRAFOS.split(texto) if p.strip()])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vazão dos filtros de conteúdo estrutural.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--tamanhos-kb", type=int, nargs="+", default=TAMANHOS_KB)
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    args = parser.parse_args(argv)
+
+    funcoes = {
+        "limpar_texto": (limpar_texto_anterior, limpar_texto),
+        "filtrar_conteudo_relevante": (filtrar_conteudo_relevante_anterior, filtrar_conteudo_relevante),
+    }
+    relatorio = {"python": sys.version.split()[0], "resultados": [],
+                 "registrado_em": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    print(f"{'função':<28}{'KB':>7}{'anterior MB/s':>15}{'atual MB/s':>12}{'ganho':>8}{'parágrafos ant./atual':>24}")
+    for tamanho_kb in args.tamanhos_kb:
+        pagina = gerar_pagina(tamanho_kb)
+        megabytes = len(pagina.encode("utf-8")) / 1e6
+        for nome, (anterior, atual) in funcoes.items():
+            t_anterior = medir(anterior, pagina, args.repeticoes)
+            t_atual = medir(atual, pagina, args.repeticoes)
+            resultado = {
+                "funcao": nome,
+                "tamanho_kb": tamanho_kb,
+                "anterior_mb_s": round(megabytes / t_anterior, 2),
+                "atual_mb_s": round(megabytes / t_atual, 2),
+                "ganho": round(t_anterior / t_atual, 1),
+                "paragrafos_anterior": contar_paragrafos(anterior(pagina)),
+                "paragrafos_atual": contar_paragrafos(atual(pagina)),
+            }
+            relatorio["resultados"].append(resultado)
+            print(f"{nome:<28}{tamanho_kb:>7}{resultado['anterior_mb_s']:>15}{resultado['atual_mb_s']:>12}"
+                  f"{resultado['ganho']:>7}x{resultado['paragrafos_anterior']:>13}/{resultado['paragrafos_atual']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
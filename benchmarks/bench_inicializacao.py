@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        BENCHMARK DE INICIALIZAÇÃO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Mede, em interpretadores novos, o tempo de importação do motor e das bibliotecas pesadas,
+# e (se o Streamlit estiver instalado) o tempo da primeira execução e de uma reexecução do
+# prime.py via streamlit.testing. Uso:
+#   python benchmarks/bench_inicializacao.py --repeticoes 5 --json inicializacao.json
+#   python benchmarks/bench_inicializacao.py --limite-motor-ms 300   (falha se o motor ficar mais lento)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = [
+    "electio.motor",
+    "streamlit",
+    "pandas",
+    "trafilatura",
+    "bs4",
+    "lxml.html",
+    "groq",
+    "matplotlib.pyplot",
+    "playwright.sync_api",
+]
+
+SCRIPT_APP = """
+import os, time, json
+from streamlit.testing.v1 import AppTest
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+app = AppTest.from_file("prime.py", default_timeout=120)
+app.secrets["GROQ_API_KEY"] = "benchmark"
+inicio = time.perf_counter()
+app.run()
+primeira = time.perf_counter() - inicio
+inicio = time.perf_counter()
+app.run()
+reexecucao = time.perf_counter() - inicio
+print(json.dumps({"primeira_execucao_ms": primeira * 1000, "reexecucao_ms": reexecucao * 1000}))
+"""
+
+
+def medir_importacao(modulo: str, repeticoes: int):
+    # Tempo de "import modulo" em um interpretador novo, sem o custo de subir o próprio Python
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print((time.perf_counter() - t) * 1000)"
+    tempos = []
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True)
+        if processo.returncode != 0:
+            return None
+        tempos.append(float(processo.stdout.strip().splitlines()[-1]))
+    return tempos
+
+
+def medir_app(repeticoes: int):
+    primeiras, reexecucoes = [], []
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, "-c", SCRIPT_APP], cwd=RAIZ, capture_output=True, text=True)
+        if processo.returncode != 0:
+            return None
+        resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+        primeiras.append(resultado["primeira_execucao_ms"])
+        reexecucoes.append(resultado["reexecucao_ms"])
+    return {"primeira_execucao": primeiras, "reexecucao": reexecucoes}
+
+
+def resumir(tempos: list) -> dict:
+    return {"mediana_ms": round(statistics.median(tempos), 1), "min_ms": round(min(tempos), 1),
+            "max_ms": round(max(tempos), 1)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo de inicialização do ELECTIO.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    parser.add_argument("--limite-motor-ms", type=float,
+                        help="falha (código 1) se a mediana de 'import electio.motor' passar deste valor")
+    args = parser.parse_args(argv)
+
+    relatorio = {"python": sys.version.split()[0], "importacoes": {}, "aplicativo": None,
+                 "registrado_em": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    print(f"{'módulo':<24}{'mediana (ms)':>14}{'mín':>10}{'máx':>10}")
+    for modulo in MODULOS:
+        tempos = medir_importacao(modulo, args.repeticoes)
+        if tempos is None:
+            print(f"{modulo:<24}{'não instalado':>14}")
+            continue
+        resumo = resumir(tempos)
+        relatorio["importacoes"][modulo] = resumo
+        print(f"{modulo:<24}{resumo['mediana_ms']:>14}{resumo['min_ms']:>10}{resumo['max_ms']:>10}")
+
+    app = medir_app(args.repeticoes) if "streamlit" in relatorio["importacoes"] else None
+    if app:
+        relatorio["aplicativo"] = {k: resumir(v) for k, v in app.items()}
+        for etapa, resumo in relatorio["aplicativo"].items():
+            print(f"prime.py {etapa:<15}{resumo['mediana_ms']:>14}{resumo['min_ms']:>10}{resumo['max_ms']:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+    motor = relatorio["importacoes"].get("electio.motor")
+    if args.limite_motor_ms and motor and motor["mediana_ms"] > args.limite_motor_ms:
+        print(f"REGRESSÃO: import electio.motor levou {motor['mediana_ms']} ms (limite {args.limite_motor_ms} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from html.parser import HTMLParser
+from types import SimpleNamespace
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        MICRO-BENCHMARKS OFFLINE (EXTRAÇÃO, FILTROS, LINKS E RESPOSTAS DA LLM)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Roda as funções do motor sobre o corpus de benchmarks/fixtures (páginas de portais
+# municipais e estaduais, sitemaps, feed e respostas do modelo, inclusive malformadas),
+# sem rede e sem a API do Groq, e informa por função: latência (mediana e p95), vazão
+# (chamadas/s e MB/s de entrada) e pico de memória (tracemalloc, em uma passada separada).
+# Funções cujas dependências não estão instaladas aparecem como indisponíveis. Uso:
+#   python benchmarks/bench_offline.py --json atual.json
+#   python benchmarks/bench_offline.py --comparar HEAD~1 HEAD        (falha se houver regressão)
+#   python benchmarks/bench_offline.py --comparar-json antes.json depois.json --tolerancia 0.15
+#   python benchmarks/bench_offline.py --gravar https://www.exemplo.mg.gov.br/noticias/   (amplia o corpus)
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRETORIO)
+FIXTURES = os.path.join(DIRETORIO, "fixtures")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0"
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ CORPUS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def carregar_corpus(diretorio: str) -> dict:
+    with open(os.path.join(diretorio, "manifesto.json"), encoding="utf-8") as arquivo:
+        manifesto = json.load(arquivo)
+
+    def ler(caminho):
+        with open(os.path.join(diretorio, caminho), "rb") as arquivo:
+            return arquivo.read()
+
+    respostas = {}
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "respostas", "*.txt"))):
+        with open(caminho, encoding="utf-8") as arquivo:
+            respostas[os.path.basename(caminho)] = arquivo.read()
+    return {
+        "paginas": [(p["url"], ler(p["arquivo"])) for p in manifesto["paginas"]],
+        "sites": [(s["semente"], {url: ler(c) for url, c in s["arquivos"].items()}) for s in manifesto["sites"]],
+        "respostas": respostas,
+    }
+
+
+class _TextoHTML(HTMLParser):
+    # Texto visível aproximado, usado como entrada dos filtros quando o trafilatura não está instalado
+
+    def __init__(self):
+        super().__init__()
+        self.partes, self._ignorar = [], 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript"):
+            self._ignorar += 1
+        elif tag in ("p", "div", "li", "h1", "h2", "h3", "article", "section", "footer", "header"):
+            self.partes.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript"):
+            self._ignorar -= 1
+
+    def handle_data(self, data):
+        if not self._ignorar and data.strip():
+            self.partes.append(data.strip() + " ")
+
+
+def texto_aproximado(html: bytes) -> str:
+    extrator = _TextoHTML()
+    extrator.feed(html.decode("utf-8", errors="replace"))
+    return re.sub(r'\n\s*\n\s*', '\n\n', "".join(extrator.partes)).strip()
+
+
+class CacheFixtures:
+    # Substitui o CacheHTTP: serve o corpus da memória e não guarda derivados, para que
+    # cada repetição refaça a extração
+    def __init__(self, arquivos: dict):
+        from electio.cache_http import ORIGEM_CACHE, RespostaCache
+        try:
+            from electio.urls import normalizar_url
+        except ImportError:   # revisões anteriores à fronteira de rastreamento
+            from electio.cache_http import normalizar_url
+        self._normalizar = normalizar_url
+        self._respostas = {
+            normalizar_url(url): RespostaCache(url, corpo, {}, 200, ORIGEM_CACHE, time.time())
+            for url, corpo in arquivos.items()
+        }
+        self.idade_fresca = 600
+
+    def obter(self, url, **kwargs):
+        return self._respostas.get(self._normalizar(url))
+
+    def obter_derivado(self, *args, **kwargs):
+        return None
+
+    def salvar_derivado(self, *args, **kwargs):
+        pass
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ CASOS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def preparar_casos(corpus: dict) -> dict:
+    # {nome: (função de um argumento, [entradas], bytes de cada entrada)} ou {nome: "motivo"} se indisponível
+    from electio import motor as modulo_motor
+
+    casos = {}
+    diretorio_cache = tempfile.mkdtemp(prefix="electio-bench-")
+    motor = modulo_motor.MotorAnalise(api_key="benchmark", diretorio_cache=diretorio_cache)
+    motor.cache_http = CacheFixtures(dict(corpus["paginas"]))
+    motor.renderizador.renderizar = lambda url: ""     # sem navegador: o fallback devolve vazio
+
+    urls = [url for url, _ in corpus["paginas"]]
+    tamanhos = [len(corpo) for _, corpo in corpus["paginas"]]
+    try:
+        import bs4  # noqa: F401
+        import trafilatura  # noqa: F401
+        casos["extrair_texto"] = (lambda url: motor.extrair_texto(url, 250), urls, tamanhos)
+        textos = [motor.extrair_texto(url, 250) or texto_aproximado(corpo) for url, corpo in corpus["paginas"]]
+    except ImportError as e:
+        casos["extrair_texto"] = f"indisponível ({e.name} não instalado)"
+        textos = [texto_aproximado(corpo) for _, corpo in corpus["paginas"]]
+
+    tamanhos_texto = [len(t.encode("utf-8")) for t in textos]
+    casos["limpar_texto"] = (modulo_motor.limpar_texto, textos, tamanhos_texto)
+    casos["filtrar_conteudo_relevante"] = (modulo_motor.filtrar_conteudo_relevante, textos, tamanhos_texto)
+
+    respostas = list(corpus["respostas"].values())
+    tamanhos_respostas = [len(r.encode("utf-8")) for r in respostas]
+    if hasattr(modulo_motor, "interpretar_ids_llm"):
+        casos["interpretar_ids_llm"] = (lambda resposta: modulo_motor.interpretar_ids_llm(resposta, 8), respostas,
+                                        tamanhos_respostas)
+    else:   # revisões anteriores às respostas em JSON com os números dos parágrafos
+        casos["interpretar_resposta_llm"] = (modulo_motor.interpretar_resposta_llm, respostas, tamanhos_respostas)
+
+    # analisar_com_llm sem a API: o agendador devolve as respostas gravadas, em rodízio
+    # (respostas cujo arquivo começa com "truncada" voltam com finish_reason == "length")
+    gravadas = list(corpus["respostas"].items())
+    proxima = iter(range(10 ** 9))
+
+    def completar(**kwargs):
+        nome, conteudo = gravadas[next(proxima) % len(gravadas)]
+        escolha = SimpleNamespace(message=SimpleNamespace(content=conteudo),
+                                  finish_reason="length" if nome.startswith("truncada") else "stop")
+        return SimpleNamespace(choices=[escolha], usage=SimpleNamespace(prompt_tokens=1500, completion_tokens=120))
+
+    motor.agendador.completar = completar
+    config_llm = modulo_motor.ConfigLLM(usar_cache=False, resumo_base_legal="Resumo da base legal.")
+    casos["analisar_com_llm"] = (lambda texto: motor.analisar_com_llm(texto, config_llm), textos, tamanhos_texto)
+
+    try:
+        import lxml  # noqa: F401
+        sementes, tamanhos_sites = [], []
+        arquivos = {}
+        for semente, arquivos_site in corpus["sites"]:
+            arquivos.update(arquivos_site)
+            sementes.append(semente)
+            tamanhos_sites.append(sum(len(c) for c in arquivos_site.values()))
+        motor_links = modulo_motor.MotorAnalise(api_key="benchmark", diretorio_cache=diretorio_cache)
+        motor_links.cache_http = CacheFixtures(arquivos)
+        if hasattr(motor_links, "cortesia"):
+            motor_links.cortesia.aguardar = lambda url: None
+        casos["coletar_links_internos"] = (lambda url: coletar_links(modulo_motor, motor_links, url),
+                                           sementes, tamanhos_sites)
+    except ImportError as e:
+        casos["coletar_links_internos"] = f"indisponível ({e.name} não instalado)"
+    return casos
+
+
+def coletar_links(modulo_motor, motor, url):
+    # A assinatura mudou entre revisões: (url, max_links) → (url, ConfigColeta)
+    if hasattr(modulo_motor.ConfigColeta, "profundidade"):
+        return motor.coletar_links_internos(url, modulo_motor.ConfigColeta(max_links=10, atraso_por_host=0))
+    return motor.coletar_links_internos(url, 10)
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ MEDIÇÃO ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def medir_caso(funcao, entradas: list, tamanhos: list, repeticoes: int) -> dict:
+    for entrada in entradas:          # aquecimento (padrões compilados, imports preguiçosos)
+        funcao(entrada)
+
+    latencias = []
+    inicio_total = time.perf_counter()
+    for _ in range(repeticoes):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcao(entrada)
+            latencias.append(time.perf_counter() - inicio)
+    duracao = time.perf_counter() - inicio_total
+
+    tracemalloc.start()
+    for entrada in entradas:
+        funcao(entrada)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "chamadas": len(latencias),
+        "mediana_ms": round(statistics.median(latencias) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 0.95) * 1000, 3),
+        "chamadas_s": round(len(latencias) / duracao, 1),
+        "mb_s": round(sum(tamanhos) * repeticoes / 1e6 / duracao, 2),
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def executar(fixtures: str, repeticoes: int) -> dict:
+    casos = preparar_casos(carregar_corpus(fixtures))
+    relatorio = {"python": sys.version.split()[0], "repeticoes": repeticoes, "casos": {},
+                 "revisao": revisao_atual(), "registrado_em": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    for nome, caso in casos.items():
+        if isinstance(caso, str):
+            relatorio["casos"][nome] = {"indisponivel": caso}
+            continue
+        funcao, entradas, tamanhos = caso
+        relatorio["casos"][nome] = medir_caso(funcao, entradas, tamanhos, repeticoes)
+    return relatorio
+
+
+def revisao_atual():
+    processo = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True)
+    return processo.stdout.strip() or None
+
+
+def imprimir(relatorio: dict):
+    print(f"{'função':<28}{'mediana ms':>12}{'p95 ms':>10}{'chamadas/s':>12}{'MB/s':>9}{'pico KB':>10}")
+    for nome, r in relatorio["casos"].items():
+        if "indisponivel" in r:
+            print(f"{nome:<28}  {r['indisponivel']}")
+            continue
+        print(f"{nome:<28}{r['mediana_ms']:>12}{r['p95_ms']:>10}{r['chamadas_s']:>12}{r['mb_s']:>9}"
+              f"{r['pico_memoria_kb']:>10}")
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ COMPARAÇÃO ENTRE REVISÕES ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def comparar(antes: dict, depois: dict, tolerancia: float) -> list:
+    # Imprime a variação por função e devolve as regressões (latência ou memória acima da tolerância)
+    regressoes = []
+    print(f"{'função':<28}{'mediana antes':>14}{'depois':>10}{'variação':>10}{'pico KB antes':>15}{'depois':>10}")
+    for nome, depois_caso in depois["casos"].items():
+        antes_caso = antes["casos"].get(nome, {})
+        if "mediana_ms" not in antes_caso or "mediana_ms" not in depois_caso:
+            continue
+        variacao = depois_caso["mediana_ms"] / antes_caso["mediana_ms"] - 1 if antes_caso["mediana_ms"] else 0.0
+        variacao_memoria = (depois_caso["pico_memoria_kb"] / antes_caso["pico_memoria_kb"] - 1
+                            if antes_caso["pico_memoria_kb"] else 0.0)
+        marca = ""
+        if variacao > tolerancia:
+            regressoes.append(f"{nome}: latência +{variacao:.0%}")
+            marca = "  ← mais lenta"
+        if variacao_memoria > tolerancia:
+            regressoes.append(f"{nome}: memória +{variacao_memoria:.0%}")
+            marca += "  ← mais memória"
+        print(f"{nome:<28}{antes_caso['mediana_ms']:>14}{depois_caso['mediana_ms']:>10}{variacao:>+10.0%}"
+              f"{antes_caso['pico_memoria_kb']:>15}{depois_caso['pico_memoria_kb']:>10}{marca}")
+    return regressoes
+
+
+def medir_revisao(revisao: str, repeticoes: int, fixtures: str) -> dict:
+    # Mede a revisão em uma worktree temporária, com este script e este corpus
+    destino = tempfile.mkdtemp(prefix="electio-rev-")
+    subprocess.run(["git", "worktree", "add", "--detach", destino, revisao], cwd=RAIZ, check=True,
+                   capture_output=True)
+    try:
+        saida = os.path.join(destino, "bench.json")
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--raiz", destino, "--fixtures", fixtures,
+                        "--repeticoes", str(repeticoes), "--json", saida], cwd=destino, check=True)
+        with open(saida, encoding="utf-8") as arquivo:
+            relatorio = json.load(arquivo)
+        relatorio["revisao"] = revisao
+        return relatorio
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", destino], cwd=RAIZ, capture_output=True)
+        shutil.rmtree(destino, ignore_errors=True)
+
+
+def ler_relatorio(caminho: str) -> dict:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ GRAVAÇÃO DE NOVAS PÁGINAS NO CORPUS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def gravar(urls: list, fixtures: str):
+    import urllib.request
+
+    caminho_manifesto = os.path.join(fixtures, "manifesto.json")
+    with open(caminho_manifesto, encoding="utf-8") as arquivo:
+        manifesto = json.load(arquivo)
+    for url in urls:
+        requisicao = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(requisicao, timeout=30) as resposta:
+            corpo = resposta.read()
+        nome = re.sub(r'[^a-z0-9]+', '_', url.lower().split("://", 1)[-1]).strip("_")[:80] + ".html"
+        with open(os.path.join(fixtures, "paginas", nome), "wb") as arquivo:
+            arquivo.write(corpo)
+        manifesto["paginas"] = [p for p in manifesto["paginas"] if p["url"] != url]
+        manifesto["paginas"].append({"arquivo": f"paginas/{nome}", "url": url})
+        print(f"gravada {url} → paginas/{nome} ({len(corpo):,} bytes)")
+    with open(caminho_manifesto, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, indent=2, ensure_ascii=False)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks offline do motor de análise.")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--json", help="grava o relatório neste arquivo")
+    parser.add_argument("--fixtures", default=FIXTURES)
+    parser.add_argument("--raiz", default=RAIZ, help="diretório de onde o pacote electio é importado")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"), help="duas revisões do git")
+    parser.add_argument("--comparar-json", nargs=2, metavar=("ANTES", "DEPOIS"), help="dois relatórios salvos")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="variação tolerada antes de acusar regressão")
+    parser.add_argument("--gravar", nargs="+", metavar="URL", help="baixa páginas reais para o corpus")
+    args = parser.parse_args(argv)
+
+    if args.gravar:
+        gravar(args.gravar, args.fixtures)
+        return 0
+
+    if args.comparar or args.comparar_json:
+        if args.comparar:
+            antes, depois = (medir_revisao(r, args.repeticoes, args.fixtures) for r in args.comparar)
+        else:
+            antes, depois = (ler_relatorio(c) for c in args.comparar_json)
+        print(f"\nantes: {antes.get('revisao')} | depois: {depois.get('revisao')}")
+        regressoes = comparar(antes, depois, args.tolerancia)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as arquivo:
+                json.dump({"antes": antes, "depois": depois, "regressoes": regressoes}, arquivo, indent=2,
+                          ensure_ascii=False)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        return 1 if regressoes else 0
+
+    sys.path.insert(0, args.raiz)
+    relatorio = executar(args.fixtures, args.repeticoes)
+    imprimir(relatorio)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        SIMULADORES LOCAIS: API DO GROQ E FAZENDA DE PORTAIS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# ServidorGroqSimulado responde em /openai/v1/chat/completions (e /v1/chat/completions) no
+# formato da API do Groq/OpenAI, com latência sorteada de uma log-normal, 429 injetados com
+# retry-after, cabeçalhos x-ratelimit-* e campo usage (com stream=True, em eventos SSE com o
+# uso em x_groq.usage no último pedaço, como a API real). Uma mensagem de sistema já vista
+# conta como cache de prefixo (usage.prompt_tokens_details.cached_tokens). A resposta segue o formato pedido
+# pelo prompt_padrao: o objeto JSON com os números dos parágrafos que têm frases de promoção pessoal.
+#
+# FazendaPortais serve centenas de portais sintéticos em um único servidor: cada portal
+# responde em um endereço de loopback próprio (127.0.x.y, todos roteados para a interface
+# local no Linux), para que os limites por domínio do pipeline se comportem como na vida
+# real. Cada portal tem robots.txt, sitemap, feed RSS, página inicial, listagem e notícias,
+# parte delas replicadas de uma agência estadual (quase duplicatas entre portais).
+# Uso isolado:
+#   python benchmarks/simuladores.py --porta-groq 8081 --porta-sites 8080 --portais 200
+
+RE_TEXTO_PROMPT = re.compile(r'Texto para análise[^:]*:\s*"""(.*?)"""', re.S)
+RE_PARAGRAFO_NUMERADO = re.compile(r'^\[(\d+)\]\s*(.*)$', re.M)
+
+FRASES_PROMOCIONAIS = [
+    "O prefeito, que faz a maior gestão da história da cidade, garantiu que se reeleito vai ampliar o programa.",
+    "Vote certo e continue avançando: a cidade no rumo certo com a atual administração.",
+    "Durante o evento foram distribuídas camisetas com o número do candidato da situação.",
+]
+MARCADORES_PROMOCIONAIS = ("reeleito", "vote certo", "número do candidato")
+
+FRASES_INFORMATIVAS = [
+    "A Secretaria Municipal de Saúde informa que a campanha de vacinação segue até o fim do mês nas unidades básicas.",
+    "As obras de pavimentação do bairro Centro foram concluídas dentro do prazo previsto no contrato.",
+    "O calendário escolar foi atualizado e as aulas do segundo semestre começam na primeira semana de agosto.",
+    "A coleta seletiva passa a atender mais doze bairros a partir da próxima segunda-feira.",
+    "O edital do processo seletivo simplificado está disponível na área de concursos do portal.",
+    "A prefeitura firmou convênio com o governo estadual para a reforma de três unidades de saúde.",
+    "O atendimento ao contribuinte para emissão de guias do IPTU ocorre de segunda a sexta-feira.",
+    "A feira do produtor rural acontece todos os sábados na praça da matriz, das 6h às 12h.",
+]
+
+NOTICIAS_ESTADUAIS = [
+    "O Governo do Estado anunciou a liberação de recursos para a recuperação de rodovias estaduais em diversas regiões.",
+    "A Secretaria de Estado de Educação divulgou o resultado do programa de transporte escolar para os municípios.",
+    "O estado ampliou o número de leitos de UTI na rede regional com investimento em equipamentos e contratação de equipes.",
+]
+
+
+def _rng(*partes) -> random.Random:
+    return random.Random(int(hashlib.md5("|".join(map(str, partes)).encode()).hexdigest()[:12], 16))
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ API DO GROQ SIMULADA ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+@dataclass
+class ConfigGroqSimulado:
+    latencia_mediana_s: float = 0.8     # mediana da log-normal
+    latencia_sigma: float = 0.5         # dispersão da log-normal (cauda longa com valores maiores)
+    taxa_429: float = 0.05              # fração de requisições recusadas com 429
+    retry_after_s: float = 1.0
+    rpm: int = 600                      # informado nos cabeçalhos x-ratelimit-*
+    tpm: int = 300000
+    taxa_malformada: float = 0.0        # fração de respostas fora do formato esperado
+
+
+def resposta_canonica(prompt: str) -> str:
+    # Classifica cada parágrafo numerado do texto enviado: os que têm marcadores de promoção pessoal são não conformes
+    encontrado = RE_TEXTO_PROMPT.search(prompt)
+    texto = encontrado.group(1) if encontrado else prompt
+    nao_conformes = [int(numero) for numero, paragrafo in RE_PARAGRAFO_NUMERADO.findall(texto)
+                     if any(m in paragrafo.lower() for m in MARCADORES_PROMOCIONAIS)]
+    return json.dumps({"nao_conformes": nao_conformes})
+
+
+class ServidorGroqSimulado:
+
+    def __init__(self, porta: int = 0, config: ConfigGroqSimulado = None, semente: int = 0):
+        self.config = config or ConfigGroqSimulado()
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._janela = deque()            # (instante, tokens) das requisições atendidas no último minuto
+        self._prefixos = set()            # mensagens de sistema já processadas (cache de prefixo simulado)
+        self.estatisticas = {"requisicoes": 0, "respostas": 0, "recusadas_429": 0, "malformadas": 0,
+                             "tokens_enviados": 0, "tokens_recebidos": 0, "tokens_em_cache": 0, "latencias_s": []}
+        simulador = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._enviar(404, {"error": {"message": "rota desconhecida"}})
+                    return
+                pedido = json.loads(corpo or b"{}")
+                status, dados, cabecalhos = simulador.atender(pedido)
+                pausa = dados.pop("_pausa_s", 0.0)
+                if status == 200 and pedido.get("stream"):
+                    self._enviar_fluxo(dados, cabecalhos, pausa)
+                else:
+                    self._enviar(status, dados, cabecalhos)
+
+            def _enviar_fluxo(self, dados, cabecalhos, pausa):
+                # a primeira parte da latência já passou em atender(); o resto é dividido entre os pedaços
+                pedacos = simulador.pedacos_streaming(dados)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                for nome, valor in cabecalhos.items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                for pedaco in pedacos:
+                    time.sleep(pausa)
+                    self.wfile.write(f"data: {json.dumps(pedaco, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _enviar(self, status, dados, cabecalhos=None):
+                conteudo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(conteudo)))
+                for nome, valor in (cabecalhos or {}).items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), Manipulador)
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_address[1]
+        self.url_base = f"http://127.0.0.1:{self.porta}"
+
+    def iniciar(self):
+        threading.Thread(target=self._servidor.serve_forever, name="groq-simulado", daemon=True).start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _cabecalhos_limite(self, agora: float) -> dict:
+        while self._janela and agora - self._janela[0][0] > 60:
+            self._janela.popleft()
+        usados = sum(t for _, t in self._janela)
+        reset = 60 - (agora - self._janela[0][0]) if self._janela else 0
+        return {
+            "x-ratelimit-limit-requests": str(self.config.rpm),
+            "x-ratelimit-remaining-requests": str(max(0, self.config.rpm - len(self._janela))),
+            "x-ratelimit-reset-requests": f"{reset:.2f}s",
+            "x-ratelimit-limit-tokens": str(self.config.tpm),
+            "x-ratelimit-remaining-tokens": str(max(0, self.config.tpm - usados)),
+            "x-ratelimit-reset-tokens": f"{reset:.2f}s",
+        }
+
+    def atender(self, pedido: dict):
+        prompt = "\n".join(str(m.get("content", "")) for m in pedido.get("messages", []))
+        with self._lock:
+            self.estatisticas["requisicoes"] += 1
+            recusar = self._aleatorio.random() < self.config.taxa_429
+            malformada = self._aleatorio.random() < self.config.taxa_malformada
+            latencia = self._aleatorio.lognormvariate(0, self.config.latencia_sigma) * self.config.latencia_mediana_s
+
+        if recusar:
+            with self._lock:
+                self.estatisticas["recusadas_429"] += 1
+                cabecalhos = self._cabecalhos_limite(time.monotonic())
+            cabecalhos["retry-after"] = str(self.config.retry_after_s)
+            return 429, {"error": {"message": "Rate limit reached (simulado)", "type": "tokens",
+                                   "code": "rate_limit_exceeded"}}, cabecalhos
+
+        # em streaming, o primeiro pedaço sai com 30% da latência e o restante é distribuído entre os demais
+        time.sleep(latencia * 0.3 if pedido.get("stream") else latencia)
+        conteudo = "Não foi possível analisar o texto." if malformada else resposta_canonica(prompt)
+        tokens_enviados = len(prompt) // 4
+        sistema = "".join(str(m.get("content", "")) for m in pedido.get("messages", []) if m.get("role") == "system")
+        with self._lock:
+            tokens_em_cache = len(sistema) // 4 if sistema and sistema in self._prefixos else 0
+            self._prefixos.add(sistema)
+        tokens_recebidos = min(len(conteudo) // 4, pedido.get("max_tokens") or 10 ** 6)
+        truncada = len(conteudo) // 4 > (pedido.get("max_tokens") or 10 ** 6)
+        if truncada:
+            conteudo = conteudo[:tokens_recebidos * 4]
+
+        with self._lock:
+            agora = time.monotonic()
+            self._janela.append((agora, tokens_enviados + tokens_recebidos))
+            self.estatisticas["respostas"] += 1
+            self.estatisticas["malformadas"] += int(malformada)
+            self.estatisticas["tokens_enviados"] += tokens_enviados
+            self.estatisticas["tokens_recebidos"] += tokens_recebidos
+            self.estatisticas["tokens_em_cache"] += tokens_em_cache
+            self.estatisticas["latencias_s"].append(latencia)
+            cabecalhos = self._cabecalhos_limite(agora)
+
+        return 200, {
+            "id": f"chatcmpl-{self.estatisticas['respostas']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": pedido.get("model", "simulado"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": conteudo},
+                         "finish_reason": "length" if truncada else "stop"}],
+            "usage": {"prompt_tokens": tokens_enviados, "completion_tokens": tokens_recebidos,
+                      "total_tokens": tokens_enviados + tokens_recebidos,
+                      "prompt_tokens_details": {"cached_tokens": tokens_em_cache}},
+            "_pausa_s": latencia * 0.7 / max(1, len(conteudo) // 8),
+        }, cabecalhos
+
+    def pedacos_streaming(self, dados: dict) -> list:
+        # chat.completion.chunk com ~8 caracteres cada; o último traz finish_reason e x_groq.usage
+        conteudo = dados["choices"][0]["message"]["content"]
+        base = {"id": dados["id"], "object": "chat.completion.chunk", "created": dados["created"],
+                "model": dados["model"]}
+        pedacos = [dict(base, choices=[{"index": 0, "delta": {"content": conteudo[i:i + 8]}, "finish_reason": None}])
+                   for i in range(0, len(conteudo), 8)]
+        pedacos.append(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": dados["choices"][0]["finish_reason"]}],
+                            x_groq={"usage": dados["usage"]}))
+        return pedacos
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ FAZENDA DE PORTAIS SINTÉTICOS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+@dataclass
+class ConfigFazenda:
+    portais: int = 200
+    noticias_por_portal: int = 30
+    taxa_promocional: float = 0.2       # notícias com frases de promoção pessoal
+    taxa_replicada: float = 0.15        # notícias copiadas da agência estadual (quase duplicatas)
+    taxa_erro: float = 0.02             # páginas que respondem 500
+    latencia_s: float = 0.02            # atraso de cada resposta
+
+
+def endereco_portal(indice: int) -> str:
+    # 127.0.1.1, 127.0.1.2, ...: um domínio distinto por portal, todos na interface de loopback
+    return f"127.0.{1 + indice // 250}.{1 + indice % 250}"
+
+
+class FazendaPortais:
+
+    def __init__(self, porta: int = 0, config: ConfigFazenda = None, semente: int = 0):
+        self.config = config or ConfigFazenda()
+        self.semente = semente
+        self._lock = threading.Lock()
+        self._indices = {endereco_portal(i): i for i in range(self.config.portais)}
+        self.estatisticas = {"requisicoes": 0, "erros_500": 0, "nao_encontradas": 0, "nao_modificadas": 0}
+        fazenda = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                endereco = (self.headers.get("Host") or "").split(":")[0]
+                status, tipo, conteudo = fazenda.pagina(endereco, self.path)
+                etag = '"' + hashlib.md5(conteudo).hexdigest() + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    fazenda._contar("nao_modificadas")
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(conteudo)))
+                if status == 200:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+        # 0.0.0.0 para aceitar conexões em qualquer endereço 127.x.y.z; o portal vem do cabeçalho Host
+        self._servidor = ThreadingHTTPServer(("0.0.0.0", porta), Manipulador)
+        self._servidor.daemon_threads = True
+        self.porta = self._servidor.server_address[1]
+
+    def iniciar(self):
+        threading.Thread(target=self._servidor.serve_forever, name="fazenda-portais", daemon=True).start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def sementes(self) -> list:
+        return [f"http://{endereco_portal(i)}:{self.porta}/" for i in range(self.config.portais)]
+
+    def _contar(self, chave: str):
+        with self._lock:
+            self.estatisticas[chave] += 1
+
+    # ◆━━━━━━━ CONTEÚDO DOS PORTAIS ━━━━━━━◆
+
+    def _data(self, portal: int, noticia: int) -> str:
+        # Notícias mais novas têm número menor; uma a cada três dias, a partir de 16/08/2026
+        dia = 228 - 3 * noticia
+        return time.strftime("%Y-%m-%d", time.strptime(f"2026 {max(1, dia)}", "%Y %j"))
+
+    def _caminho_noticia(self, portal: int, noticia: int) -> str:
+        data = self._data(portal, noticia)
+        return f"/{data[:4]}/{data[5:7]}/{data[8:10]}/noticia-{noticia}-do-municipio-{portal}/"
+
+    def _paragrafos(self, portal: int, noticia: int) -> list:
+        aleatorio = _rng(self.semente, portal, noticia)
+        if aleatorio.random() < self.config.taxa_replicada:
+            # texto da agência estadual, igual em todos os portais, com uma linha local
+            base = _rng(self.semente, "estadual", noticia % len(NOTICIAS_ESTADUAIS))
+            paragrafos = [NOTICIAS_ESTADUAIS[noticia % len(NOTICIAS_ESTADUAIS)]]
+            paragrafos += [" ".join(base.sample(FRASES_INFORMATIVAS, 3)) for _ in range(5)]
+            return paragrafos + [f"Com informações da Agência Estadual. Publicado pelo Município {portal}."]
+        paragrafos = [" ".join(aleatorio.sample(FRASES_INFORMATIVAS, 3)) for _ in range(aleatorio.randint(4, 8))]
+        if aleatorio.random() < self.config.taxa_promocional:
+            paragrafos.insert(aleatorio.randrange(len(paragrafos)), aleatorio.choice(FRASES_PROMOCIONAIS))
+        return paragrafos
+
+    def _html(self, portal: int, titulo: str, corpo: str) -> bytes:
+        menu = "".join(f'<li><a href="/{s}/">{s.title()}</a></li>'
+                       for s in ("a-prefeitura", "secretarias", "servicos", "noticias", "ouvidoria", "contato"))
+        return f"""<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>{titulo} – Município {portal}</title>
+<link rel="alternate" type="application/rss+xml" href="/feed/"></head><body>
+<header><nav><ul>{menu}</ul></nav><div class="acessibilidade"><a href="#conteudo">Ir para o conteúdo</a></div></header>
+<main id="conteudo">{corpo}</main>
+<footer><p>Prefeitura do Município {portal} | CNPJ 00.000.{portal:03d}/0001-00 | Política de Privacidade</p></footer>
+</body></html>""".encode("utf-8")
+
+    def pagina(self, endereco: str, caminho: str):
+        self._contar("requisicoes")
+        time.sleep(self.config.latencia_s)
+        portal = self._indices.get(endereco)
+        caminho = caminho.split("?")[0]
+        if portal is None:
+            return self._nao_encontrada()
+
+        if caminho == "/robots.txt":
+            texto = f"User-agent: *\nDisallow: /login/\nSitemap: http://{endereco}:{self.porta}/sitemap.xml\n"
+            return 200, "text/plain; charset=utf-8", texto.encode()
+
+        noticias = range(self.config.noticias_por_portal)
+        if caminho == "/sitemap.xml":
+            urls = "".join(f"<url><loc>http://{endereco}:{self.porta}{self._caminho_noticia(portal, n)}</loc>"
+                           f"<lastmod>{self._data(portal, n)}</lastmod></url>" for n in noticias)
+            xml = f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+            return 200, "application/xml", xml.encode()
+
+        if caminho == "/feed/":
+            itens = "".join(f"<item><title>Notícia {n}</title><link>http://{endereco}:{self.porta}"
+                            f"{self._caminho_noticia(portal, n)}</link><pubDate>"
+                            f"{time.strftime('%a, %d %b %Y 10:00:00 -0300', time.strptime(self._data(portal, n), '%Y-%m-%d'))}"
+                            f"</pubDate></item>" for n in list(noticias)[:10])
+            return 200, "application/rss+xml", f'<?xml version="1.0"?><rss version="2.0"><channel>{itens}</channel></rss>'.encode()
+
+        if caminho in ("/", "/noticias/"):
+            cartoes = "".join(f'<article><a href="{self._caminho_noticia(portal, n)}">Notícia {n} do município</a></article>'
+                              for n in list(noticias)[:15])
+            return 200, "text/html; charset=utf-8", self._html(portal, "Notícias", f"<h1>Notícias</h1>{cartoes}")
+
+        for n in noticias:
+            if caminho == self._caminho_noticia(portal, n):
+                if _rng(self.semente, "erro", portal, n).random() < self.config.taxa_erro:
+                    self._contar("erros_500")
+                    return 500, "text/plain", b"erro interno simulado"
+                corpo = "".join(f"<p>{p}</p>" for p in self._paragrafos(portal, n))
+                return 200, "text/html; charset=utf-8", self._html(
+                    portal, f"Notícia {n}", f"<article><h1>Notícia {n} do município</h1>"
+                                            f"<time datetime=\"{self._data(portal, n)}\"></time>{corpo}</article>")
+        return self._nao_encontrada()
+
+    def _nao_encontrada(self):
+        self._contar("nao_encontradas")
+        return 404, "text/plain", b"nao encontrada"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sobe a API do Groq simulada e a fazenda de portais.")
+    parser.add_argument("--porta-groq", type=int, default=8081)
+    parser.add_argument("--porta-sites", type=int, default=8080)
+    parser.add_argument("--portais", type=int, default=200)
+    parser.add_argument("--taxa-429", type=float, default=0.05)
+    parser.add_argument("--latencia-mediana", type=float, default=0.8)
+    args = parser.parse_args(argv)
+
+    groq = ServidorGroqSimulado(args.porta_groq, ConfigGroqSimulado(latencia_mediana_s=args.latencia_mediana,
+                                                                     taxa_429=args.taxa_429)).iniciar()
+    fazenda = FazendaPortais(args.porta_sites, ConfigFazenda(portais=args.portais)).iniciar()
+    print(f"API simulada: {groq.url_base} | portais: {fazenda.sementes()[0]} … {fazenda.sementes()[-1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        groq.parar()
+        fazenda.parar()
+
+
+if __name__ == "__main__":
+    main()
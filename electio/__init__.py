@@ -0,0 +1,6 @@
+# Componentes do ELECTIO reutilizados pelo aplicativo Streamlit (prime.py).
+
+import logging
+
+# As mensagens dos módulos só aparecem se a aplicação configurar o logging (ver cli.main e tarefas.main)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,325 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        AGENDADOR DE CHAMADAS À API DO GROQ
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Todas as chamadas passam por um cliente assíncrono que roda em um event loop próprio
+# (thread dedicada). Cada modelo tem uma janela deslizante de 60 s com o orçamento de
+# requisições (RPM) e tokens (TPM); os cabeçalhos x-ratelimit-* devolvidos pelo Groq
+# corrigem esse orçamento a cada resposta. Erros 429, 5xx, timeouts e falhas de rede (inclusive
+# no meio de um fluxo) são repetidos com backoff exponencial; quando as tentativas acabam, ou
+# diante de qualquer outro erro, é levantado ErroLLM em vez de uma contagem zerada. Com
+# stream=True a resposta chega em pedaços: ao_receber(texto) é chamado (na thread do agendador)
+# com o texto acumulado a cada pedaço, e o retorno tem o mesmo formato da resposta completa
+# (choices[0].message.content, finish_reason e usage).
+
+
+@dataclass
+class LimitesModelo:
+    rpm: int = 30        # requisições por minuto
+    tpm: int = 6000      # tokens por minuto
+
+
+# Limites do plano gratuito do Groq; ajuste conforme o plano contratado
+LIMITES_PADRAO = {
+    "llama-3.3-70b-versatile": LimitesModelo(rpm=30, tpm=12000),
+    "mixtral-8x7b-32768": LimitesModelo(rpm=30, tpm=5000),
+    "openai/gpt-oss-120b": LimitesModelo(rpm=30, tpm=8000),
+    "llama-3.1-8b-instant": LimitesModelo(rpm=30, tpm=6000),     # modelo rápido da triagem em cascata
+}
+
+JANELA_S = 60.0
+
+RE_DURACAO = re.compile(r'([\d.]+)\s*(ms|h|m|s)')
+
+
+class ErroLLM(Exception):
+    # Chamada à LLM que falhou mesmo após as novas tentativas
+    pass
+
+
+def converter_duracao(valor) -> float:
+    # Converte os formatos do Groq ("2m59.56s", "7.66s", "120ms", "1h2m") para segundos
+    if valor is None:
+        return 0.0
+    valor = str(valor).strip()
+    try:
+        return float(valor)
+    except ValueError:
+        pass
+    total = 0.0
+    for numero, unidade in RE_DURACAO.findall(valor):
+        fator = {"ms": 0.001, "h": 3600.0, "m": 60.0, "s": 1.0}[unidade]
+        total += float(numero) * fator
+    return total
+
+
+def estimar_tokens(messages, max_tokens: int) -> int:
+    # Estimativa grosseira (≈ 4 caracteres por token) usada antes de conhecer o uso real
+    caracteres = sum(len(str(m.get("content", ""))) for m in messages)
+    return caracteres // 4 + (max_tokens or 0)
+
+
+class _EstadoModelo:
+
+    def __init__(self, limites: LimitesModelo):
+        self.limites = limites
+        self.janela = deque()             # [instante, tokens] das requisições nos últimos 60 s
+        self.bloqueado_ate = 0.0          # definido pelos cabeçalhos (remaining = 0) ou por 429
+        self.restante_requisicoes = None
+        self.restante_tokens = None
+        self.fila = 0
+        self.lock = None                  # criado dentro do event loop
+
+    def _limpar(self, agora: float):
+        while self.janela and agora - self.janela[0][0] >= JANELA_S:
+            self.janela.popleft()
+
+    def espera_necessaria(self, tokens: int, agora: float) -> float:
+        self._limpar(agora)
+        espera = max(0.0, self.bloqueado_ate - agora)
+        if len(self.janela) >= self.limites.rpm:
+            espera = max(espera, self.janela[0][0] + JANELA_S - agora)
+        usados = sum(t for _, t in self.janela)
+        if self.janela and usados + tokens > self.limites.tpm:
+            # espera até sair da janela tokens suficientes para caber a nova requisição
+            liberados = 0
+            for instante, t in self.janela:
+                liberados += t
+                if usados - liberados + tokens <= self.limites.tpm:
+                    espera = max(espera, instante + JANELA_S - agora)
+                    break
+            else:
+                espera = max(espera, self.janela[-1][0] + JANELA_S - agora)
+        return espera
+
+    def aplicar_cabecalhos(self, headers, agora: float):
+        def ler_int(nome):
+            try:
+                return int(headers.get(nome))
+            except (TypeError, ValueError):
+                return None
+
+        limite_req = ler_int("x-ratelimit-limit-requests")
+        limite_tok = ler_int("x-ratelimit-limit-tokens")
+        self.restante_requisicoes = ler_int("x-ratelimit-remaining-requests")
+        self.restante_tokens = ler_int("x-ratelimit-remaining-tokens")
+        if limite_tok:
+            self.limites.tpm = limite_tok
+        if limite_req and limite_req < self.limites.rpm:
+            self.limites.rpm = limite_req
+
+        if self.restante_requisicoes == 0:
+            reset = converter_duracao(headers.get("x-ratelimit-reset-requests"))
+            self.bloqueado_ate = max(self.bloqueado_ate, agora + reset)
+        if self.restante_tokens is not None and self.restante_tokens <= 0:
+            reset = converter_duracao(headers.get("x-ratelimit-reset-tokens"))
+            self.bloqueado_ate = max(self.bloqueado_ate, agora + reset)
+
+
+class AgendadorGroq:
+
+    def __init__(self,
+                 api_key: str,
+                 limites: dict = None,
+                 max_tentativas: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 timeout: float = 60.0,
+                 base_url: str = None):
+        self._api_key = api_key
+        self._base_url = base_url
+        self._timeout = timeout
+        self._limites = {m: LimitesModelo(l.rpm, l.tpm) for m, l in (limites or LIMITES_PADRAO).items()}
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._estados = {}
+        self._lock_estatisticas = threading.Lock()
+        self._chamadas = 0
+        self._repeticoes = 0
+        self._falhas = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._em_andamento = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agendador-groq", daemon=True)
+        self._thread.start()
+        self._cliente = None
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ INTERFACE SÍNCRONA ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def completar(self, ao_receber=None, **kwargs):
+        # Enfileira a chamada no event loop do agendador e bloqueia até a resposta
+        futuro = asyncio.run_coroutine_threadsafe(self.completar_async(ao_receber=ao_receber, **kwargs), self._loop)
+        return futuro.result()
+
+    def estatisticas(self) -> dict:
+        with self._lock_estatisticas:
+            chamadas = self._chamadas
+            return {
+                "fila": sum(e.fila for e in self._estados.values()),
+                "em_andamento": self._em_andamento,
+                "chamadas": chamadas,
+                "repeticoes": self._repeticoes,
+                "falhas": self._falhas,
+                "espera_total_s": round(self._espera_total, 3),
+                "espera_media_s": round(self._espera_total / chamadas, 2) if chamadas else 0.0,
+                "espera_max_s": round(self._espera_max, 2),
+                "modelos": {
+                    modelo: {
+                        "fila": e.fila,
+                        "rpm": e.limites.rpm,
+                        "tpm": e.limites.tpm,
+                        "restante_requisicoes": e.restante_requisicoes,
+                        "restante_tokens": e.restante_tokens,
+                    }
+                    for modelo, e in self._estados.items()
+                },
+            }
+
+    def limites(self, modelo: str) -> LimitesModelo:
+        return self._limites.get(modelo, LimitesModelo())
+
+    def fechar(self):
+        if self._cliente is not None:
+            asyncio.run_coroutine_threadsafe(self._cliente.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ EXECUÇÃO NO EVENT LOOP ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def _estado(self, modelo: str) -> _EstadoModelo:
+        if modelo not in self._estados:
+            estado = _EstadoModelo(self._limites.get(modelo, LimitesModelo()))
+            estado.lock = asyncio.Lock()
+            with self._lock_estatisticas:
+                self._estados[modelo] = estado
+        return self._estados[modelo]
+
+    def _get_cliente(self):
+        if self._cliente is None:
+            from groq import AsyncGroq  # o SDK só é carregado na primeira chamada
+            # sem repetições internas do SDK: quem repete é o agendador
+            self._cliente = AsyncGroq(api_key=self._api_key, base_url=self._base_url,
+                                      timeout=self._timeout, max_retries=0)
+        return self._cliente
+
+    async def _aguardar_vez(self, estado: _EstadoModelo, tokens: int):
+        # O lock por modelo é a fila: as chamadas são liberadas em ordem de chegada e no ritmo do orçamento
+        estado.fila += 1
+        try:
+            async with estado.lock:
+                while True:
+                    espera = estado.espera_necessaria(tokens, time.monotonic())
+                    if espera <= 0:
+                        break
+                    await asyncio.sleep(espera)
+                estado.janela.append([time.monotonic(), tokens])
+                return estado.janela[-1]
+        finally:
+            estado.fila -= 1
+
+    def _backoff(self, tentativa: int, erro) -> float:
+        retry_after = None
+        resposta = getattr(erro, "response", None)
+        if resposta is not None:
+            retry_after = resposta.headers.get("retry-after")
+        if retry_after:
+            return min(converter_duracao(retry_after), self.backoff_max)
+        espera = min(self.backoff_base * (2 ** tentativa), self.backoff_max)
+        return espera * (0.5 + random.random() / 2)
+
+    async def _ler_fluxo(self, fluxo, ao_receber):
+        # Junta os pedaços de uma resposta em streaming; o uso vem no último pedaço (x_groq.usage no Groq)
+        partes, finalizacao, uso = [], None, None
+        async for pedaco in fluxo:
+            uso = getattr(pedaco, "usage", None) or getattr(getattr(pedaco, "x_groq", None), "usage", None) or uso
+            if not pedaco.choices:
+                continue
+            escolha = pedaco.choices[0]
+            finalizacao = escolha.finish_reason or finalizacao
+            conteudo = getattr(escolha.delta, "content", None)
+            if conteudo:
+                partes.append(conteudo)
+                if ao_receber:
+                    ao_receber("".join(partes))
+        mensagem = SimpleNamespace(role="assistant", content="".join(partes))
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=mensagem, finish_reason=finalizacao)],
+                               usage=uso)
+
+    async def completar_async(self, ao_receber=None, **kwargs):
+        import groq
+        import httpx
+        modelo = kwargs["model"]
+        estado = self._estado(modelo)
+        tokens_estimados = estimar_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        inicio = time.monotonic()
+        espera_registrada = False
+
+        for tentativa in range(self.max_tentativas):
+            registro = await self._aguardar_vez(estado, tokens_estimados)
+            if not espera_registrada:
+                espera = time.monotonic() - inicio
+                with self._lock_estatisticas:
+                    self._espera_total += espera
+                    self._espera_max = max(self._espera_max, espera)
+                espera_registrada = True
+
+            with self._lock_estatisticas:
+                self._em_andamento += 1
+            try:
+                bruto = await self._get_cliente().chat.completions.with_raw_response.create(**kwargs)
+                estado.aplicar_cabecalhos(bruto.headers, time.monotonic())
+                resposta = await bruto.parse()   # AsyncAPIResponse.parse é uma corrotina
+                if kwargs.get("stream"):
+                    # uma falha no meio do fluxo repete a chamada inteira; o texto acumulado recomeça
+                    resposta = await self._ler_fluxo(resposta, ao_receber)
+                uso = getattr(resposta, "usage", None)
+                if uso is not None and getattr(uso, "total_tokens", None):
+                    registro[1] = uso.total_tokens    # troca a estimativa pelo uso real
+                with self._lock_estatisticas:
+                    self._chamadas += 1
+                return resposta
+
+            except groq.RateLimitError as e:
+                estado.aplicar_cabecalhos(e.response.headers, time.monotonic())
+                espera = self._backoff(tentativa, e)
+                estado.bloqueado_ate = max(estado.bloqueado_ate, time.monotonic() + espera)
+                ultimo_erro = e
+            except groq.APIStatusError as e:
+                if e.status_code < 500:
+                    with self._lock_estatisticas:
+                        self._falhas += 1
+                    raise ErroLLM(f"{modelo}: {e}") from e
+                ultimo_erro = e
+                await asyncio.sleep(self._backoff(tentativa, e))
+            except (groq.APITimeoutError, groq.APIConnectionError, httpx.TransportError) as e:
+                # httpx.TransportError: erro de rede na leitura do fluxo, que o SDK não converte
+                ultimo_erro = e
+                await asyncio.sleep(self._backoff(tentativa, e))
+            except Exception as e:
+                # qualquer outro erro vira ErroLLM, para que quem chama divida o lote ou marque a falha
+                with self._lock_estatisticas:
+                    self._falhas += 1
+                raise ErroLLM(f"{modelo}: {type(e).__name__}: {e}") from e
+            finally:
+                with self._lock_estatisticas:
+                    self._em_andamento -= 1
+
+            if tentativa < self.max_tentativas - 1:
+                with self._lock_estatisticas:
+                    self._repeticoes += 1
+
+        with self._lock_estatisticas:
+            self._falhas += 1
+        raise ErroLLM(f"{modelo}: {self.max_tentativas} tentativas sem sucesso ({ultimo_erro})")
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from electio.cache_http import DIRETORIO_PADRAO
+from electio.orcamento import contar_tokens, planejar_blocos
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        ÍNDICE DA BASE LEGAL (DISPOSITIVOS RELEVANTES POR CHAMADA)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Em vez de levar o resumo da base legal inteira em toda chamada, a base é dividida em
+# dispositivos (um por artigo; artigos longos são fatiados por parágrafo/inciso) e indexada
+# com BM25. Cada chamada recebe só os k dispositivos mais relevantes para o texto enviado
+# (ex.: o art. 73 da Lei 9.504/97 para uma notícia de publicidade institucional). O índice
+# é construído uma vez por base (chave = hash do texto) e guardado em SQLite, de modo que a
+# base pode ter várias leis, resoluções e cartilhas sem aumentar o custo de cada chamada.
+
+K1 = 1.5
+B = 0.75
+TOKENS_MAX_PASSAGEM = 400       # dispositivos maiores são fatiados
+
+RE_FONTE = re.compile(r'^=== Conteúdo de: (.+?) ===\s*$', re.M)     # cabeçalho dos arquivos juntados no app
+# aceita o artigo em markdown (documentos convertidos pelo docling): "## Art. 73", "- Art. 73", "**Art. 73.**"
+RE_ARTIGO = re.compile(r'^[ \t#>*-]*(art(?:igo)?\.?[ \t]*\d+(?:\.\d+)*[ \t]*[º°o]?(?:[ \t]*-[ \t]*[A-Z]\b)?)',
+                       re.I | re.M)
+RE_LINHAS = re.compile(r'\n+')
+RE_PALAVRAS = re.compile(r'\w+')
+
+PALAVRAS_VAZIAS = frozenset("""
+a ao aos as até com como da das de dela dele deles do dos e é ela elas ele eles em entre era essa esse
+esta este eu foi for há isso isto já la lhe mais mas me mesmo na nas nem no nos o os ou para pela
+pelas pelo pelos por qual quando que se sem ser seu seus sua suas são também te um uma umas uns
+""".split())
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Passagem:
+    fonte: str          # arquivo ou documento de origem
+    titulo: str         # "Art. 73", "Art. 73 (cont.)" ou "Preâmbulo"
+    texto: str
+
+    def formatar(self) -> str:
+        origem = f"{self.fonte} — " if self.fonte else ""
+        return f"[{origem}{self.titulo}]\n{self.texto}"
+
+
+def termos(texto: str) -> list:
+    # minúsculas, sem acentos e sem palavras vazias; "publicitária" e "publicitaria" viram o mesmo termo
+    texto = unicodedata.normalize("NFKD", (texto or "").lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return [p for p in RE_PALAVRAS.findall(texto) if p not in PALAVRAS_VAZIAS and len(p) > 1]
+
+
+def _fatiar(fonte: str, titulo: str, texto: str) -> list:
+    # Dispositivo longo: linhas consecutivas (parágrafos, incisos) reunidas até TOKENS_MAX_PASSAGEM
+    linhas = [linha.strip() for linha in RE_LINHAS.split(texto) if linha.strip()]
+    if not linhas:
+        return []
+    blocos = planejar_blocos([contar_tokens(linha) for linha in linhas], TOKENS_MAX_PASSAGEM)
+    return [Passagem(fonte, titulo if numero == 0 else f"{titulo} (cont.)", "\n".join(linhas[i] for i in bloco))
+            for numero, bloco in enumerate(blocos)]
+
+
+def dividir_dispositivos(texto: str, fonte: str = "") -> list:
+    # Um dispositivo por artigo; o que vem antes do primeiro artigo (ementa, preâmbulo) é outro.
+    # Textos sem artigos (cartilhas, julgados) são fatiados por linhas.
+    partes = RE_FONTE.split(texto or "")
+    if len(partes) > 1:
+        # arquivos juntados: [antes, fonte1, texto1, fonte2, texto2, ...]
+        passagens = dividir_dispositivos(partes[0], fonte) if partes[0].strip() else []
+        for indice in range(1, len(partes), 2):
+            passagens.extend(dividir_dispositivos(partes[indice + 1], partes[indice].strip()))
+        return passagens
+
+    inicios = [m.start() for m in RE_ARTIGO.finditer(texto)]
+    if not inicios:
+        return _fatiar(fonte, "Trecho", texto)
+    passagens = _fatiar(fonte, "Preâmbulo", texto[:inicios[0]])
+    for inicio, fim in zip(inicios, inicios[1:] + [len(texto)]):
+        trecho = texto[inicio:fim].strip()
+        titulo = RE_ARTIGO.match(trecho).group(1)
+        titulo = "Art. " + re.sub(r'^\D+', '', titulo).strip()
+        passagens.extend(_fatiar(fonte, titulo, trecho))
+    return passagens
+
+
+class IndiceBaseLegal:
+    # BM25 sobre os dispositivos de uma base legal; imutável depois de construído
+
+    def __init__(self, passagens: list, hash_base: str):
+        self.passagens = passagens
+        self.hash = hash_base
+        self._termos = [Counter(termos(f"{p.titulo} {p.texto}")) for p in passagens]
+        self._tokens_passagens = [contar_tokens(p.formatar()) for p in passagens]
+        self._tamanhos = [sum(contagem.values()) for contagem in self._termos]
+        self._media = sum(self._tamanhos) / len(self._tamanhos) if self._tamanhos else 0.0
+        frequencias = Counter(termo for contagem in self._termos for termo in contagem)
+        total = len(passagens)
+        self._idf = {termo: math.log(1 + (total - n + 0.5) / (n + 0.5)) for termo, n in frequencias.items()}
+        self._postagens = {}
+        for indice, contagem in enumerate(self._termos):
+            for termo in contagem:
+                self._postagens.setdefault(termo, []).append(indice)
+
+    def __len__(self):
+        return len(self.passagens)
+
+    def tokens_maximos(self, k: int) -> int:
+        # Pior caso de tokens de k dispositivos: reservado no orçamento de cada requisição
+        return sum(sorted(self._tokens_passagens, reverse=True)[:k])
+
+    def buscar(self, consulta: str, k: int = 5) -> list:
+        # Os k dispositivos de maior pontuação BM25 (cada termo distinto da consulta conta uma vez)
+        pontuacoes = {}
+        for termo in set(termos(consulta)):
+            idf = self._idf.get(termo)
+            if idf is None:
+                continue
+            for indice in self._postagens[termo]:
+                frequencia = self._termos[indice][termo]
+                normalizacao = K1 * (1 - B + B * self._tamanhos[indice] / (self._media or 1))
+                pontuacoes[indice] = pontuacoes.get(indice, 0.0) + idf * frequencia * (K1 + 1) / (frequencia + normalizacao)
+        melhores = sorted(pontuacoes, key=lambda i: (-pontuacoes[i], i))[:k]
+        return [self.passagens[i] for i in sorted(melhores)]   # na ordem da base, que é a ordem de leitura
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ ÍNDICES PERSISTIDOS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+class CacheIndices:
+    # Dispositivos de cada base já indexada, por hash do texto; o BM25 é remontado em memória
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memoria = {}
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "base_legal.sqlite"), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS indices (
+                hash TEXT PRIMARY KEY,
+                passagens TEXT,
+                criado_em REAL
+            )
+        """)
+
+    def carregar(self, hash_base: str):
+        # Índice já construído, pelo hash do texto da base (None se nunca foi indexado neste diretório)
+        with self._lock:
+            if hash_base in self._memoria:
+                return self._memoria[hash_base]
+            linha = self._conexao.execute("SELECT passagens FROM indices WHERE hash = ?", (hash_base,)).fetchone()
+        if not linha:
+            return None
+        indice = IndiceBaseLegal([Passagem(**p) for p in json.loads(linha[0])], hash_base)
+        with self._lock:
+            self._memoria[hash_base] = indice
+        return indice
+
+    def indexar(self, texto: str) -> IndiceBaseLegal:
+        hash_base = hashlib.sha256((texto or "").encode("utf-8")).hexdigest()
+        indice = self.carregar(hash_base)
+        if indice is not None:
+            return indice
+
+        passagens = dividir_dispositivos(texto)
+        log.info(f"{len(passagens)} dispositivo(s) da base legal indexado(s)")
+        indice = IndiceBaseLegal(passagens, hash_base)
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO indices (hash, passagens, criado_em) VALUES (?, ?, ?)",
+                (hash_base, json.dumps([p.__dict__ for p in passagens], ensure_ascii=False), time.time()))
+            self._conexao.commit()
+            self._memoria[hash_base] = indice
+        return indice
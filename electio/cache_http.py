@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from electio.cliente_http import ClienteHTTP, ErroRede
+from electio.urls import normalizar_url
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CACHE EM DISCO DAS PÁGINAS BAIXADAS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# As páginas ficam em um SQLite (corpo, cabeçalhos, ETag/Last-Modified e instante do download).
+# Dentro de idade_fresca a página é servida sem acessar a rede; depois disso é revalidada
+# com GET condicional (If-None-Match / If-Modified-Since) e um 304 reaproveita o corpo salvo.
+# Resultados derivados da página (texto extraído, texto renderizado pelo Playwright) ficam
+# guardados junto, atrelados ao hash do corpo, para evitar reextração de páginas inalteradas.
+
+DIRETORIO_PADRAO = os.getenv("ELECTIO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "electio"))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0"
+
+ORIGEM_CACHE = "cache"            # servida do disco, sem acesso à rede
+ORIGEM_REVALIDADA = "revalidada"  # servidor respondeu 304
+ORIGEM_REDE = "rede"              # download completo
+
+log = logging.getLogger(__name__)
+
+
+def hash_corpo(corpo: bytes) -> str:
+    return hashlib.sha256(corpo).hexdigest()
+
+
+@dataclass
+class RespostaCache:
+    url: str
+    corpo: bytes
+    cabecalhos: dict
+    status: int
+    origem: str
+    baixado_em: float
+
+    @property
+    def validador(self) -> str:
+        return hash_corpo(self.corpo)
+
+
+class CacheHTTP:
+
+    def __init__(self,
+                 diretorio: str = DIRETORIO_PADRAO,
+                 idade_fresca: float = 600,               # segundos sem revalidar
+                 idade_max: float = 7 * 24 * 3600,        # entradas mais antigas são descartadas
+                 tamanho_max: int = 512 * 1024 * 1024,    # bytes ocupados pelos corpos
+                 cliente: ClienteHTTP = None,             # pool de conexões compartilhado (ver cliente_http.py)
+                 cortesia=None):                          # objeto com aguardar(url), chamado antes de cada acesso à rede
+        os.makedirs(diretorio, exist_ok=True)
+        self.cortesia = cortesia
+        self.idade_fresca = idade_fresca
+        self.idade_max = idade_max
+        self.tamanho_max = tamanho_max
+        self._lock = threading.Lock()
+        self._gravacoes = 0
+        self._estatisticas = {ORIGEM_CACHE: 0, ORIGEM_REVALIDADA: 0, ORIGEM_REDE: 0, "falhas": 0}
+
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "paginas.sqlite"), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                chave TEXT PRIMARY KEY,
+                url TEXT,
+                status INTEGER,
+                cabecalhos TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                corpo BLOB,
+                tamanho INTEGER,
+                baixado_em REAL,
+                acessado_em REAL
+            );
+            CREATE TABLE IF NOT EXISTS derivados (
+                chave TEXT,
+                tipo TEXT,
+                validador TEXT,
+                valor TEXT,
+                criado_em REAL,
+                PRIMARY KEY (chave, tipo)
+            );
+        """)
+        self.cliente = cliente or ClienteHTTP(user_agent=USER_AGENT)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ DOWNLOAD COM REVALIDAÇÃO ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def obter(self, url: str, propagar_erro_rede: bool = False):
+        # Devolve RespostaCache ou None se a página não pôde ser baixada; com propagar_erro_rede,
+        # uma falha de rede persistente levanta ErroRede em vez de devolver None
+        chave = normalizar_url(url)
+        agora = time.time()
+        salvo = self._ler(chave)
+
+        if salvo and agora - salvo.baixado_em < self.idade_fresca:
+            self._tocar(chave, agora)
+            self._contar(ORIGEM_CACHE)
+            return salvo
+
+        cabecalhos_condicionais = {}
+        if salvo:
+            if salvo.cabecalhos.get("etag"):
+                cabecalhos_condicionais["If-None-Match"] = salvo.cabecalhos["etag"]
+            if salvo.cabecalhos.get("last-modified"):
+                cabecalhos_condicionais["If-Modified-Since"] = salvo.cabecalhos["last-modified"]
+
+        if self.cortesia is not None:
+            self.cortesia.aguardar(url)
+        try:
+            resposta = self.cliente.get(url, headers=cabecalhos_condicionais)
+        except ErroRede as e:
+            log.warning(f"falha ao baixar {url} → {str(e)[:90]}")
+            self._contar("falhas")
+            if propagar_erro_rede:
+                raise
+            return None
+
+        if resposta.status == 304 and salvo:
+            with self._lock:
+                self._conexao.execute(
+                    "UPDATE paginas SET baixado_em = ?, acessado_em = ? WHERE chave = ?", (agora, agora, chave))
+                self._conexao.commit()
+            salvo.origem = ORIGEM_REVALIDADA
+            salvo.baixado_em = agora
+            self._contar(ORIGEM_REVALIDADA)
+            return salvo
+
+        if resposta.status != 200 or not resposta.data:
+            self._contar("falhas")
+            return None
+
+        cabecalhos = {k.lower(): v for k, v in resposta.headers.items()}
+        self._gravar(chave, url, resposta.status, cabecalhos, resposta.data, agora)
+        self._contar(ORIGEM_REDE)
+        return RespostaCache(url, resposta.data, cabecalhos, resposta.status, ORIGEM_REDE, agora)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ RESULTADOS DERIVADOS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def obter_derivado(self, url: str, tipo: str, validador: str = None, idade_max: float = None):
+        # validador: hash do corpo de onde o valor foi derivado; sem validador vale só a idade
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT validador, valor, criado_em FROM derivados WHERE chave = ? AND tipo = ?",
+                (normalizar_url(url), tipo)).fetchone()
+        if not linha:
+            return None
+        salvo_validador, valor, criado_em = linha
+        if validador is not None and salvo_validador != validador:
+            return None
+        if time.time() - criado_em > (idade_max or self.idade_max):
+            return None
+        return valor
+
+    def salvar_derivado(self, url: str, tipo: str, valor: str, validador: str = None):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO derivados (chave, tipo, validador, valor, criado_em) VALUES (?, ?, ?, ?, ?)",
+                (normalizar_url(url), tipo, validador, valor, time.time()))
+            self._conexao.commit()
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ POLÍTICA DE DESCARTE ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def despejar(self):
+        # Remove entradas mais velhas que idade_max e, se ainda passar de tamanho_max,
+        # as menos acessadas recentemente até voltar ao limite
+        limite = time.time() - self.idade_max
+        with self._lock:
+            self._conexao.execute("DELETE FROM paginas WHERE baixado_em < ?", (limite,))
+            self._conexao.execute("DELETE FROM derivados WHERE criado_em < ?", (limite,))
+            total = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM paginas").fetchone()[0]
+            if total > self.tamanho_max:
+                excesso = total - self.tamanho_max
+                removidas = []
+                for chave, tamanho in self._conexao.execute(
+                        "SELECT chave, tamanho FROM paginas ORDER BY acessado_em ASC"):
+                    if excesso <= 0:
+                        break
+                    removidas.append((chave,))
+                    excesso -= tamanho
+                self._conexao.executemany("DELETE FROM paginas WHERE chave = ?", removidas)
+                self._conexao.executemany("DELETE FROM derivados WHERE chave = ?", removidas)
+            self._conexao.commit()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return dict(self._estatisticas)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ ACESSO AO SQLITE ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def _ler(self, chave: str):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT url, status, cabecalhos, corpo, baixado_em FROM paginas WHERE chave = ?",
+                (chave,)).fetchone()
+        if not linha:
+            return None
+        url, status, cabecalhos, corpo, baixado_em = linha
+        return RespostaCache(url, corpo, json.loads(cabecalhos), status, ORIGEM_CACHE, baixado_em)
+
+    def _gravar(self, chave, url, status, cabecalhos, corpo, agora):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO paginas "
+                "(chave, url, status, cabecalhos, etag, last_modified, corpo, tamanho, baixado_em, acessado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave, url, status, json.dumps(cabecalhos), cabecalhos.get("etag"),
+                 cabecalhos.get("last-modified"), corpo, len(corpo), agora, agora))
+            self._conexao.commit()
+            self._gravacoes += 1
+            despejar = self._gravacoes % 100 == 0
+        if despejar:
+            self.despejar()
+
+    def _tocar(self, chave: str, agora: float):
+        with self._lock:
+            self._conexao.execute("UPDATE paginas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+            self._conexao.commit()
+
+    def _contar(self, origem: str):
+        with self._lock:
+            self._estatisticas[origem] += 1
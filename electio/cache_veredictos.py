@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from electio.cache_http import DIRETORIO_PADRAO
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CACHE DE VEREDICTOS POR PARÁGRAFO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Portais repetem os mesmos parágrafos (textos institucionais, notícias replicadas de
+# órgãos estaduais). Cada parágrafo já julgado fica guardado com o seu veredicto, e a
+# chave inclui tudo o que pode mudar o julgamento: prompt, modelo, temperatura, data de
+# referência e resumo da base legal. Só os parágrafos inéditos são enviados à LLM.
+
+VEREDICTO_CONFORME = "conforme"
+VEREDICTO_NAO_CONFORME = "nao_conforme"
+
+RE_ESPACOS = re.compile(r'\s+')
+RE_PARAGRAFOS = re.compile(r'\n\s*\n')
+
+
+def normalizar_paragrafo(paragrafo: str) -> str:
+    texto = unicodedata.normalize("NFKC", paragrafo).lower()
+    return RE_ESPACOS.sub(' ', texto).strip()
+
+
+def hash_texto(texto) -> str:
+    return hashlib.sha256((texto or "").encode("utf-8")).hexdigest()
+
+
+def dividir_paragrafos(texto: str) -> list:
+    return [p.strip() for p in RE_PARAGRAFOS.split(texto or "") if p.strip()]
+
+
+def chave_paragrafo(paragrafo: str, hash_prompt: str, modelo: str, temperatura: float,
+                    data_referencia: str, hash_resumo: str) -> str:
+    return hash_texto(json.dumps([
+        hash_texto(normalizar_paragrafo(paragrafo)),
+        hash_prompt,
+        modelo,
+        round(float(temperatura), 3),
+        data_referencia,
+        hash_resumo,
+    ]))
+
+
+class CacheVeredictos:
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._acertos = 0
+        self._faltas = 0
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "veredictos.sqlite"), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS veredictos (
+                chave TEXT PRIMARY KEY,
+                veredicto TEXT,
+                trechos TEXT,
+                criado_em REAL
+            )
+        """)
+
+    def obter_muitos(self, chaves: list) -> dict:
+        # {chave: (veredicto, trechos)} apenas para as chaves já julgadas
+        encontrados = {}
+        unicas = list(dict.fromkeys(chaves))
+        with self._lock:
+            for inicio in range(0, len(unicas), 500):
+                lote = unicas[inicio:inicio + 500]
+                marcadores = ",".join("?" * len(lote))
+                for chave, veredicto, trechos in self._conexao.execute(
+                        f"SELECT chave, veredicto, trechos FROM veredictos WHERE chave IN ({marcadores})", lote):
+                    encontrados[chave] = (veredicto, json.loads(trechos))
+            self._acertos += len(encontrados)
+            self._faltas += len(unicas) - len(encontrados)
+        return encontrados
+
+    def salvar_muitos(self, veredictos: dict):
+        # veredictos: {chave: (veredicto, trechos)}
+        agora = time.time()
+        with self._lock:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO veredictos (chave, veredicto, trechos, criado_em) VALUES (?, ?, ?, ?)",
+                [(chave, veredicto, json.dumps(trechos, ensure_ascii=False), agora)
+                 for chave, (veredicto, trechos) in veredictos.items()])
+            self._conexao.commit()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"acertos": self._acertos, "faltas": self._faltas}
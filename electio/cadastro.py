@@ -0,0 +1,173 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from electio.cache_http import DIRETORIO_PADRAO
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CADASTRO DE SITES (IMPORTAÇÃO EM LOTE E REGISTRO INDEXADO)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Para monitorar todos os portais municipais de um conjunto de estados (milhares de URLs),
+# os sites são importados de CSV/JSON com normalização e validação vetorizadas (pandas),
+# guardados em SQLite (persistem entre sessões) e indexados por uma chave do endereço:
+# verificar duplicatas é uma consulta a um conjunto em memória, não uma varredura da lista.
+# A chave ignora esquema, "www.", maiúsculas no domínio e barra final, de modo que
+# http://www.x.go.gov.br/noticias/ e https://x.go.gov.br/noticias são o mesmo site.
+
+COLUNAS_URL = ("url", "site", "endereco", "endereço", "link")
+COLUNAS_NOME = ("nome do site", "nome", "municipio", "município")
+
+RE_URL = (r'^(?P<esquema>(?i:https?))://(?P<host>[^/?#:\s]+)(?::(?P<porta>\d+))?'
+          r'(?P<caminho>/[^?#\s]*)?(?P<query>\?[^#\s]*)?(?:#.*)?$')
+
+
+def subdominios_gov(hosts: pd.Series) -> pd.Series:
+    # Versão vetorizada de motor.extrair_subdominio_gov (mun.uf ou uf), para hosts já em minúsculas e .gov.br
+    partes = hosts.str.replace(r'^www\.', '', regex=True).str[:-len(".gov.br")].str.split(".")
+    return partes.str[-2:].str.join(".")
+
+
+def normalizar_sites(urls: pd.Series, nomes: pd.Series = None):
+    # Devolve (válidos, inválidos): válidos com URL, Nome do Site e chave, sem duplicatas internas;
+    # inválidos com URL e Motivo. Endereços sem esquema recebem https://
+    bruto = urls.fillna("").astype(str).str.strip()
+    com_esquema = bruto.where(bruto.str.match(r'(?i)^https?://'), "https://" + bruto)
+    partes = com_esquema.str.extract(RE_URL)
+    esquema = partes["esquema"].fillna("").str.lower()
+    host = partes["host"].fillna("").str.lower()
+    porta = (":" + partes["porta"]).fillna("")
+    caminho = (partes["caminho"].fillna("").str.rstrip("/") + partes["query"].fillna(""))
+    chave = host.str.replace(r'^www\.', '', regex=True) + porta + caminho
+
+    motivo = pd.Series("", index=bruto.index)
+    motivo = motivo.mask(partes["host"].isna() & (bruto != ""), "URL com espaços ou caracteres inválidos")
+    motivo = motivo.mask(~host.str.endswith(".gov.br") & (host != ""), "o domínio não termina com .gov.br")
+    motivo = motivo.mask(host.str.fullmatch(r'(www\.)?gov\.br'), "domínio sem órgão (gov.br)")
+    motivo = motivo.mask(bruto == "", "URL vazia")
+
+    validos = motivo == ""
+    tabela = pd.DataFrame({"URL": (esquema + "://" + host + porta + caminho)[validos]})
+    tabela["chave"] = chave[validos].map(lambda c: hashlib.sha1(c.encode("utf-8")).hexdigest()[:16])
+    nome = subdominios_gov(host[validos])
+    if nomes is not None:
+        informado = nomes.fillna("").astype(str).str.strip()[validos]
+        nome = informado.where(informado != "", nome)
+    tabela["Nome do Site"] = nome
+    tabela = tabela.drop_duplicates("chave")
+
+    invalidos = pd.DataFrame({"URL": bruto[~validos], "Motivo": motivo[~validos]})
+    return tabela[["URL", "Nome do Site", "chave"]], invalidos
+
+
+def ler_arquivo_sites(nome: str, conteudo: bytes):
+    # CSV (com cabeçalho URL/site/link e, opcional, nome) ou JSON (lista de URLs ou de objetos); devolve (urls, nomes)
+    if nome.lower().endswith(".json"):
+        dados = json.loads(conteudo.decode("utf-8-sig"))
+        if isinstance(dados, dict):
+            dados = dados.get("sites") or dados.get("urls") or []
+        tabela = pd.DataFrame([{"url": item} if isinstance(item, str) else item for item in dados])
+    else:
+        # o separador é detectado só entre vírgula, ponto e vírgula e tabulação (":" das URLs não conta)
+        try:
+            separador = csv.Sniffer().sniff(conteudo[:4096].decode("utf-8-sig", "ignore"), ",;\t").delimiter
+        except csv.Error:
+            separador = ","
+        tabela = pd.read_csv(io.BytesIO(conteudo), dtype=str, sep=separador, encoding="utf-8-sig")
+        if not any(str(c).strip().lower() in COLUNAS_URL for c in tabela.columns):
+            # sem cabeçalho: a primeira linha também é uma URL
+            tabela = pd.read_csv(io.BytesIO(conteudo), dtype=str, header=None, sep=separador, encoding="utf-8-sig")
+            tabela.columns = ["url"] + [f"coluna_{i}" for i in range(1, len(tabela.columns))]
+    if tabela.empty:
+        return pd.Series(dtype=str), None
+    colunas = {str(c).strip().lower(): c for c in tabela.columns}
+    coluna_url = next((colunas[c] for c in COLUNAS_URL if c in colunas), tabela.columns[0])
+    coluna_nome = next((colunas[c] for c in COLUNAS_NOME if c in colunas), None)
+    return tabela[coluna_url], tabela[coluna_nome] if coluna_nome is not None else None
+
+
+class CadastroSites:
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "sites.sqlite"), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS sites (
+                chave TEXT PRIMARY KEY,
+                url TEXT,
+                nome TEXT,
+                criado_em REAL
+            )
+        """)
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS sites_nome ON sites (nome, url)")
+        self._chaves = {chave for (chave,) in self._conexao.execute("SELECT chave FROM sites")}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._chaves)
+
+    def __contains__(self, chave: str):
+        with self._lock:
+            return chave in self._chaves
+
+    def importar(self, urls: pd.Series, nomes: pd.Series = None) -> dict:
+        # Normaliza, valida e grava de uma vez; devolve as contagens e a tabela de inválidos
+        tabela, invalidos = normalizar_sites(urls, nomes)
+        with self._lock:
+            novos = tabela[~tabela["chave"].isin(self._chaves)]
+            agora = time.time()
+            self._conexao.executemany(
+                "INSERT OR IGNORE INTO sites (chave, url, nome, criado_em) VALUES (?, ?, ?, ?)",
+                [(chave, url, nome, agora) for url, nome, chave in novos.itertuples(index=False)])
+            self._conexao.commit()
+            self._chaves.update(novos["chave"])
+        return {"adicionados": len(novos), "duplicados": len(urls) - len(invalidos) - len(novos),
+                "invalidos": invalidos}
+
+    def adicionar(self, url: str, nome: str = None) -> dict:
+        return self.importar(pd.Series([url]), pd.Series([nome]) if nome else None)
+
+    def remover(self, chaves: list):
+        with self._lock:
+            self._conexao.executemany("DELETE FROM sites WHERE chave = ?", [(c,) for c in chaves])
+            self._conexao.commit()
+            self._chaves.difference_update(chaves)
+
+    def limpar(self):
+        with self._lock:
+            self._conexao.execute("DELETE FROM sites")
+            self._conexao.commit()
+            self._chaves.clear()
+
+    def pagina(self, filtro: str = "", pagina: int = 1, por_pagina: int = 50):
+        # (DataFrame com chave, URL e Nome do Site da página pedida, total de sites que passam no filtro)
+        condicao, parametros = "", []
+        if filtro.strip():
+            condicao = "WHERE url LIKE ? OR nome LIKE ?"
+            parametros = [f"%{filtro.strip()}%"] * 2
+        with self._lock:
+            total = self._conexao.execute(f"SELECT COUNT(*) FROM sites {condicao}", parametros).fetchone()[0]
+            linhas = self._conexao.execute(
+                f"SELECT chave, url, nome FROM sites {condicao} ORDER BY nome, url LIMIT ? OFFSET ?",
+                parametros + [por_pagina, (max(1, pagina) - 1) * por_pagina]).fetchall()
+        return pd.DataFrame(linhas, columns=["chave", "URL", "Nome do Site"]), total
+
+    def urls(self) -> list:
+        with self._lock:
+            return [url for (url,) in self._conexao.execute("SELECT url FROM sites ORDER BY criado_em, rowid")]
+
+    def renomear(self, nomes: dict):
+        # {chave: novo nome}
+        with self._lock:
+            self._conexao.executemany("UPDATE sites SET nome = ? WHERE chave = ?",
+                                      [(nome, chave) for chave, nome in nomes.items()])
+            self._conexao.commit()
@@ -0,0 +1,331 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+from electio.agendador import ErroLLM
+from electio.cache_http import DIRETORIO_PADRAO
+from electio.cliente_http import ConfigHTTP
+from electio.datas import ORIGENS_DATA, ConfigJanela
+from electio.documentos import EXTENSOES_DOCLING, ORIGEM_CONVERSAO, extensao
+from electio.duplicatas import ConfigDuplicatas
+from electio.metricas import servir_prometheus
+from electio.motor import (GROQ_MODELS, TERMOS_INSTITUCIONAIS, TERMOS_IRRELEVANTES, ConfigAnalise, ConfigColeta,
+                           ConfigLLM, MotorAnalise, prompt_padrao)
+from electio.pipeline import ConfigConcorrencia
+from electio.snapshots import ConfigMonitoramento
+from electio.triagem import ConfigTriagem, resumo_triagem
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        ANÁLISE EM LOTE PELA LINHA DE COMANDO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Exemplo (execução noturna via cron):
+#   GROQ_API_KEY=... python -m electio --sites sites.csv --base-legal lei_9504.txt \
+#       --data 04/10/2026 --saida resultados.jsonl --csv resultados.csv --conexoes 64
+# Com uma base legal grande, cada chamada pode levar só os dispositivos relevantes para o texto:
+#   ... --base-legal lei_9504.txt res_23610.txt cartilha_agu.txt --dispositivos 5
+
+
+def ler_sites(caminho: str) -> list:
+    # CSV com a coluna "URL" (mesmo formato da tabela de sites do aplicativo) ou uma URL por linha
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        linhas = list(csv.reader(arquivo))
+    if not linhas:
+        return []
+    cabecalho = [c.strip().lower() for c in linhas[0]]
+    if "url" in cabecalho:
+        coluna = cabecalho.index("url")
+        linhas = linhas[1:]
+    else:
+        coluna = 0
+    urls = []
+    for linha in linhas:
+        if len(linha) > coluna and linha[coluna].strip():
+            url = linha[coluna].strip().rstrip("/")
+            if url not in urls:
+                urls.append(url)
+    return urls
+
+
+def ler_data(valor: str):
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"data inválida: {valor} (use DD/MM/AAAA ou AAAA-MM-DD)")
+
+
+def ler_termos(caminho: str) -> tuple:
+    # Um termo por linha; linhas vazias e iniciadas por # são ignoradas
+    with open(caminho, encoding="utf-8") as arquivo:
+        return tuple(linha.strip() for linha in arquivo if linha.strip() and not linha.startswith("#"))
+
+
+def ler_base_legal(caminhos: list, conversor) -> str:
+    # Arquivos juntados com o mesmo cabeçalho usado pelo aplicativo (o índice identifica a fonte de cada dispositivo).
+    # PDF, DOCX e HTML passam pelo docling (conversor: documentos.ConversorDocumentos), com cache por hash do arquivo
+    partes = []
+    for caminho in caminhos:
+        nome = os.path.basename(caminho)
+        with open(caminho, "rb") as arquivo:
+            conteudo = arquivo.read()
+
+        def progresso(feitas, total, nome=nome):
+            print(f"\r[{nome}] {feitas}/{total} página(s) convertida(s)", end="", file=sys.stderr, flush=True)
+
+        documento = conversor.converter(nome, conteudo, ao_progredir=progresso).result()
+        if documento.origem == ORIGEM_CONVERSAO and extensao(nome) in EXTENSOES_DOCLING:
+            print(file=sys.stderr)
+        partes.append(f"\n\n=== Conteúdo de: {nome} ===\n{documento.texto}")
+    return "\n".join(partes)
+
+
+def gravar_jsonl(caminho: str, resultados: list):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        for resultado in resultados:
+            arquivo.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+
+def gravar_csv(caminho: str, resultados: list):
+    # Uma linha por trecho não conforme, como a tabela baixada no aplicativo; sites sem trechos ficam com uma linha vazia
+    campos = ["url", "conformidade", "total_trechos", "conformes", "nao_coformes", "falhas", "trecho"]
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=campos)
+        escritor.writeheader()
+        for resultado in resultados:
+            base = {c: resultado.get(c) for c in campos if c != "trecho"}
+            for trecho in resultado.get("trechos_nao_conformes") or [""]:
+                escritor.writerow({**base, "trecho": trecho})
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m electio",
+                                     description="Análise de conformidade de sites .gov.br em lote.")
+    parser.add_argument("--sites", required=True, help="CSV com a coluna URL (ou uma URL por linha)")
+    parser.add_argument("--base-legal", nargs="+",
+                        help="arquivo(s) com a base legal de referência (.txt, .pdf, .docx ou .html)")
+    parser.add_argument("--dispositivos", type=int, default=0,
+                        help="envia em cada chamada só os K dispositivos (artigos) da base legal mais relevantes "
+                             "para o texto, em vez do resumo da base inteira (0 = resumo)")
+    parser.add_argument("--data", type=ler_data, help="data do pleito (DD/MM/AAAA)")
+    parser.add_argument("--saida", required=True, help="arquivo JSONL com um resultado por site")
+    parser.add_argument("--csv", help="arquivo CSV com os trechos não conformes")
+    parser.add_argument("--modelo", default=GROQ_MODELS[0], help="modelo do Groq")
+    parser.add_argument("--temperatura", type=float, default=0.1)
+    parser.add_argument("--prompt", help="arquivo com um prompt personalizado (mesmas variáveis e resposta em JSON, como o prompt padrão)")
+    parser.add_argument("--max-links", type=int, default=5)
+    parser.add_argument("--min-caracteres", type=int, default=250)
+    parser.add_argument("--profundidade", type=int, default=1, help="níveis de páginas de listagem seguidos")
+    parser.add_argument("--atraso-por-site", type=float, default=0.5,
+                        help="segundos entre requisições ao mesmo site (o Crawl-delay do robots.txt prevalece se maior)")
+    parser.add_argument("--sem-sitemaps", action="store_true", help="não consulta sitemaps")
+    parser.add_argument("--sem-feeds", action="store_true", help="não consulta feeds RSS, Atom e JSON Feed")
+    parser.add_argument("--conexoes", type=int, default=32, help="conexões de rede simultâneas (total)")
+    parser.add_argument("--por-site", type=int, default=2, help="conexões simultâneas por site")
+    parser.add_argument("--chamadas-llm", type=int, default=8, help="chamadas simultâneas à LLM")
+    parser.add_argument("--conexoes-abertas-por-site", type=int, default=ConfigHTTP.conexoes_por_host,
+                        help="conexões mantidas no pool (keep-alive) para um mesmo domínio")
+    parser.add_argument("--timeout-conexao", type=float, default=ConfigHTTP.timeout_conexao,
+                        help="segundos para abrir uma conexão")
+    parser.add_argument("--timeout-leitura", type=float, default=ConfigHTTP.timeout_leitura,
+                        help="segundos sem receber dados de uma resposta")
+    parser.add_argument("--tentativas-http", type=int, default=ConfigHTTP.tentativas,
+                        help="tentativas por requisição em erros transitórios (timeout, 429, 5xx)")
+    parser.add_argument("--sem-cache-veredictos", action="store_true",
+                        help="reenvia à LLM parágrafos já julgados em análises anteriores")
+    parser.add_argument("--tokens-por-requisicao", type=int, default=6000,
+                        help="tokens de texto das páginas por chamada à LLM (páginas pequenas são reunidas)")
+    parser.add_argument("--termos-irrelevantes", type=ler_termos,
+                        help="arquivo com os termos (um por linha) que descartam um parágrafo antes da LLM")
+    parser.add_argument("--termos-institucionais", type=ler_termos,
+                        help="arquivo com os termos (um por linha) que marcam blocos institucionais removidos do texto")
+    parser.add_argument("--sem-deduplicacao", action="store_true",
+                        help="analisa separadamente páginas quase idênticas")
+    parser.add_argument("--delta", action="store_true",
+                        help="envia à LLM só as páginas novas ou alteradas desde a última execução com a mesma "
+                             "configuração; as demais herdam o veredicto anterior")
+    parser.add_argument("--sem-snapshot", action="store_true",
+                        help="não grava o snapshot desta execução (usado pelo --delta e pelo relatório de mudanças)")
+    parser.add_argument("--manter-snapshots", type=int, default=ConfigMonitoramento.manter_execucoes,
+                        help="snapshots guardados por site; os mais antigos são apagados a cada execução")
+    parser.add_argument("--triagem", action="store_true",
+                        help="triagem em cascata: pontuação léxica local e um modelo rápido antes do modelo principal")
+    parser.add_argument("--modelo-triagem", default=ConfigTriagem.modelo_rapido, help="modelo rápido da triagem")
+    parser.add_argument("--limiar-triagem", type=float, default=ConfigTriagem.limiar_lexico,
+                        help="pontuação léxica abaixo da qual a página é conforme sem chamar a LLM")
+    parser.add_argument("--limiar-direto", type=float, default=ConfigTriagem.limiar_direto,
+                        help="pontuação léxica a partir da qual a página vai direto ao modelo principal")
+    parser.add_argument("--sem-modelo-rapido", action="store_true",
+                        help="na triagem, envia ao modelo principal tudo o que passar do limiar léxico")
+    parser.add_argument("--candidatos", type=ler_termos,
+                        help="arquivo com nomes de candidatos e autoridades (um por linha) que elevam o risco na triagem")
+    parser.add_argument("--meses-janela", type=int, default=ConfigJanela.meses,
+                        help="com --data, páginas publicadas mais de N meses antes do pleito não são analisadas")
+    parser.add_argument("--manter-fora-da-janela", action="store_true",
+                        help="analisa as páginas fora da janela do defeso, só as deixando para o fim da seleção de links")
+    parser.add_argument("--sem-janela", action="store_true",
+                        help="não lê a data das páginas nem considera a janela do defeso")
+    parser.add_argument("--relatorio", help="arquivo JSON com os tempos por etapa (p50/p95), camadas de extração "
+                                            "e sites mais lentos")
+    parser.add_argument("--metricas-porta", type=int, default=0,
+                        help="serve /metrics (formato do Prometheus) e /relatorio nesta porta durante a execução")
+    parser.add_argument("--diretorio-cache", default=DIRETORIO_PADRAO)
+    parser.add_argument("--verboso", action="store_true",
+                        help="mostra também as mensagens informativas do motor (repetições, respostas truncadas...)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+    # o motor só registra mensagens (logging); é a linha de comando que decide mostrá-las no stderr
+    logging.basicConfig(level=logging.INFO if args.verboso else logging.WARNING, stream=sys.stderr,
+                        format="[%(name)s] %(message)s")
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        print("Chave da API do Groq não encontrada. Defina a variável de ambiente GROQ_API_KEY.", file=sys.stderr)
+        return 2
+
+    urls = ler_sites(args.sites)
+    if not urls:
+        print(f"Nenhuma URL encontrada em {args.sites}.", file=sys.stderr)
+        return 2
+
+    prompt = prompt_padrao
+    if args.prompt:
+        with open(args.prompt, encoding="utf-8") as arquivo:
+            prompt = arquivo.read()
+
+    motor = MotorAnalise(api_key=api_key, diretorio_cache=args.diretorio_cache)
+    if args.metricas_porta:
+        servir_prometheus(motor.metricas, args.metricas_porta)
+
+    resumo_base_legal = indice_base_legal = base_legal = None
+    if args.base_legal:
+        try:
+            base_legal = ler_base_legal(args.base_legal, motor.documentos)
+        except Exception as e:   # docling ausente, arquivo corrompido ou .txt fora de UTF-8
+            print(f"Erro ao ler a base legal: {e}", file=sys.stderr)
+            return 2
+
+    if base_legal is not None and args.dispositivos > 0:
+        indice_base_legal = motor.indexar_base_legal(base_legal)
+        print(f"Base legal indexada: {len(indice_base_legal)} dispositivo(s); "
+              f"{args.dispositivos} por chamada.", file=sys.stderr)
+    elif base_legal is not None:
+        data_str = args.data.strftime('%d/%m/%Y') if args.data else "não informada"
+        print("Analisando a base legal...", file=sys.stderr)
+        try:
+            resumo_base_legal = motor.analisar_base_legal(base_legal, data_str, args.modelo)
+        except ErroLLM as e:
+            print(f"Erro ao resumir base legal: {e}", file=sys.stderr)
+            resumo_base_legal = base_legal[:8000] + " [resumo truncado devido a erro]"
+
+    config = ConfigAnalise(
+        coleta=ConfigColeta(max_links=args.max_links, min_caracteres=args.min_caracteres,
+                            profundidade=args.profundidade, atraso_por_host=args.atraso_por_site,
+                            usar_sitemaps=not args.sem_sitemaps, usar_feeds=not args.sem_feeds,
+                            termos_institucionais=args.termos_institucionais or TERMOS_INSTITUCIONAIS),
+        llm=ConfigLLM(
+            modelo=args.modelo,
+            temperatura=args.temperatura,
+            prompt=prompt,
+            data_referencia=args.data,
+            resumo_base_legal=resumo_base_legal,
+            indice_base_legal=indice_base_legal,
+            dispositivos_por_chamada=args.dispositivos,
+            usar_cache=not args.sem_cache_veredictos,
+            max_tokens_entrada=args.tokens_por_requisicao,
+            termos_irrelevantes=args.termos_irrelevantes or TERMOS_IRRELEVANTES
+        ),
+        concorrencia=ConfigConcorrencia(
+            max_global=args.conexoes,
+            max_por_host=args.por_site,
+            workers_descoberta=max(4, args.conexoes // 4),
+            workers_extracao=args.conexoes,
+            workers_analise=args.chamadas_llm
+        ),
+        duplicatas=ConfigDuplicatas(ativo=not args.sem_deduplicacao),
+        monitoramento=ConfigMonitoramento(gravar=not args.sem_snapshot, delta=args.delta,
+                                          manter_execucoes=args.manter_snapshots),
+        triagem=ConfigTriagem(ativa=args.triagem, limiar_lexico=args.limiar_triagem,
+                              limiar_direto=args.limiar_direto, usar_modelo_rapido=not args.sem_modelo_rapido,
+                              modelo_rapido=args.modelo_triagem, candidatos=args.candidatos or ()),
+        janela=ConfigJanela(ativa=not args.sem_janela, meses=args.meses_janela,
+                            descartar=not args.manter_fora_da_janela),
+        http=ConfigHTTP(timeout_conexao=args.timeout_conexao, timeout_leitura=args.timeout_leitura,
+                        tentativas=args.tentativas_http, conexoes_por_host=args.conexoes_abertas_por_site)
+    )
+
+    def progresso(concluidos, total, url):
+        print(f"\r[{concluidos}/{total}] {url[:70]:<70}", end="", file=sys.stderr, flush=True)
+
+    try:
+        resultados = motor.analisar_sites(urls, config, ao_progredir=progresso)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(file=sys.stderr)
+
+    gravar_jsonl(args.saida, resultados)
+    if args.csv:
+        gravar_csv(args.csv, resultados)
+
+    estatisticas = motor.estatisticas()
+    print(f"{len(resultados)} site(s) analisado(s); falhas: {sum(r['falhas'] for r in resultados)}; "
+          f"chamadas à LLM: {estatisticas['llm']['chamadas']}; "
+          f"tokens enviados/recebidos: {sum(r['tokens_enviados'] for r in resultados)}/"
+          f"{sum(r['tokens_recebidos'] for r in resultados)} "
+          f"({sum(r['tokens_em_cache'] for r in resultados)} enviados do cache de prefixo); "
+          f"quase duplicatas: {estatisticas['duplicatas']['duplicatas']} de {estatisticas['duplicatas']['textos']} "
+          f"páginas ({estatisticas['duplicatas']['taxa']:.0%})", file=sys.stderr)
+    http = estatisticas["http"]
+    print(f"HTTP: {http['requisicoes']} requisição(ões) a {http['hosts']} domínio(s); "
+          f"conexões abertas: {http['conexoes_abertas']}, reaproveitadas: {http['conexoes_reaproveitadas']}; "
+          f"novas tentativas: {http['repeticoes']}; falhas: {http['falhas']}; "
+          f"{http['bytes'] / 1024 / 1024:.1f} MB em {http['tempo_total_s']:.0f} s", file=sys.stderr)
+    if args.triagem:
+        triagem = estatisticas["triagem"]
+        resumo = resumo_triagem(triagem)
+        print(f"triagem: {triagem['paginas']} página(s); {resumo['taxa_lexico']:.0%} conformes pelo léxico, "
+              f"{triagem['ja_julgadas']} já julgada(s); modelo rápido: {triagem['triadas_modelo_rapido']} triada(s), "
+              f"{resumo['taxa_modelo_rapido']:.0%} resolvida(s); modelo principal: {triagem['escaladas']} "
+              f"({triagem['escaladas_direto']} direto), {resumo['taxa_confirmacao']:.0%} confirmada(s); "
+              f"economia estimada: {resumo['tokens_economizados']} tokens, {resumo['tempo_economizado_s']:.0f} s",
+              file=sys.stderr)
+    datas = estatisticas["datas"]
+    if datas["paginas"]:
+        print(f"datas: {datas['datadas']} de {datas['paginas']} página(s) datada(s) ("
+              + ", ".join(f"{origem} {datas[f'origem_{origem}']}" for origem in ORIGENS_DATA if datas[f"origem_{origem}"])
+              + f"); fora da janela do defeso: {datas['fora_da_janela']} página(s) ({datas['descartadas']} descartada(s)) "
+              f"e {datas['links_fora_da_janela']} link(s) na seleção", file=sys.stderr)
+    truncamento = estatisticas["truncamento"]
+    if truncamento["respostas_truncadas"]:
+        print(f"respostas truncadas da LLM: {truncamento['respostas_truncadas']} "
+              f"({truncamento['blocos_divididos']} bloco(s) dividido(s), {truncamento['reenvios_max_tokens']} "
+              f"reenvio(s) com mais max_tokens); {sum(r['paragrafos_reenviados'] for r in resultados)} "
+              f"parágrafo(s) reenviado(s)", file=sys.stderr)
+    relatorio = motor.metricas.relatorio()
+    print("etapas (p50/p95/total, s): " + "; ".join(
+        f"{etapa} {dados['p50_s']}/{dados['p95_s']}/{dados['total_s']:.0f}"
+        for etapa, dados in sorted(relatorio["etapas"].items(), key=lambda item: -item[1]["total_s"])), file=sys.stderr)
+    if relatorio["eventos"]:
+        print("eventos: " + ", ".join(f"{evento} {n}" for evento, n in sorted(relatorio["eventos"].items())),
+              file=sys.stderr)
+    if args.relatorio:
+        motor.metricas.exportar_json(args.relatorio)
+    mudancas = [r["mudancas"] for r in resultados if r.get("mudancas")]
+    if mudancas:
+        print(f"desde o snapshot anterior ({len(mudancas)} site(s)): "
+              f"{sum(len(m['novas']) for m in mudancas)} página(s) nova(s), "
+              f"{sum(len(m['alteradas']) for m in mudancas)} alterada(s), "
+              f"{sum(m['inalteradas'] for m in mudancas)} inalterada(s) "
+              f"({sum(m['reaproveitadas'] for m in mudancas)} sem nova análise), "
+              f"{sum(len(m['ausentes']) for m in mudancas)} ausente(s); "
+              f"{sum(len(m['trechos_novos']) for m in mudancas)} trecho(s) não conforme(s) novo(s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,200 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from electio.metricas import EVENTO_HTTP_REPETICAO
+from electio.urls import host
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CLIENTE HTTP COMPARTILHADO (POOL DE CONEXÕES)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Um único pool urllib3 atende robots.txt, sitemaps, feeds, sementes e páginas: as conexões
+# ficam abertas (keep-alive) e são reaproveitadas entre as threads de descoberta e extração,
+# com no máximo conexoes_por_host conexões para o mesmo domínio (as demais threads esperam
+# uma conexão livre). Respostas gzip/deflate (e brotli/zstd, se os pacotes estiverem instalados)
+# são descompactadas pelo urllib3. Erros transitórios (conexão recusada, timeout, 429 e 5xx)
+# são repetidos com espera exponencial e jitter aleatório; um Retry-After do servidor é respeitado
+# até espera_max_s. Esgotadas as tentativas por erro de rede, ErroRede é levantado: quem chama
+# distingue um portal fora do ar (não adianta abrir o navegador) de uma resposta HTTP recusada.
+
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ConfigHTTP:
+    timeout_conexao: float = 5.0      # segundos para abrir a conexão
+    timeout_leitura: float = 20.0     # segundos sem receber dados da resposta
+    tentativas: int = 3               # total de tentativas por requisição (1 = sem repetição)
+    espera_base_s: float = 0.5        # espera da primeira repetição; dobra a cada nova tentativa
+    espera_max_s: float = 10.0        # teto da espera, inclusive para Retry-After
+    conexoes_por_host: int = 4        # conexões abertas simultaneamente para um mesmo domínio
+    hosts_no_pool: int = 128          # domínios com conexões mantidas abertas (os menos usados são fechados)
+    max_redirecionamentos: int = 5
+
+
+class ErroRede(Exception):
+    # Falha de rede persistente (DNS, conexão, timeout) depois de todas as tentativas
+    pass
+
+
+def _retry_after(valor: str):
+    # Segundos pedidos pelo cabeçalho Retry-After (número ou data HTTP); None se ausente ou inválido
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClienteHTTP:
+
+    def __init__(self, config: ConfigHTTP = None, user_agent: str = None, metricas=None):
+        self.config = config or ConfigHTTP()
+        self.user_agent = user_agent
+        self.metricas = metricas   # RegistroMetricas opcional: cada nova tentativa conta como evento
+        self._lock = threading.Lock()
+        self._http = None          # criado na primeira requisição (urllib3 só é importado quando há rede)
+        self._pools = {}           # host → {chave do pool: pool vivo}, para contar conexões abertas e reaproveitadas
+        self._por_host = {}        # host → contadores (inclusive as conexões dos pools já fechados)
+
+    def configurar(self, config: ConfigHTTP):
+        # Troca a configuração entre análises: o pool é recriado na próxima requisição (os contadores continuam)
+        with self._lock:
+            if config == self.config:
+                return
+            self.config = config
+            if self._http is not None:
+                self._http.clear()
+                self._http = None
+            self._arquivar_pools()
+
+    def _get_http(self):
+        with self._lock:
+            if self._http is None:
+                import urllib3
+                cabecalhos = urllib3.util.make_headers(accept_encoding=True)   # gzip/deflate e, se disponíveis, br/zstd
+                if self.user_agent:
+                    cabecalhos["User-Agent"] = self.user_agent
+                self._http = urllib3.PoolManager(
+                    num_pools=self.config.hosts_no_pool,
+                    maxsize=self.config.conexoes_por_host,
+                    block=True,
+                    headers=cabecalhos,
+                    timeout=urllib3.Timeout(connect=self.config.timeout_conexao, read=self.config.timeout_leitura),
+                    # só os redirecionamentos ficam com o urllib3; as repetições são feitas aqui, com jitter
+                    retries=urllib3.Retry(total=None, connect=0, read=0, other=0, status=0,
+                                          redirect=self.config.max_redirecionamentos,
+                                          raise_on_redirect=False, raise_on_status=False),
+                )
+            return self._http
+
+    def get(self, url: str, headers: dict = None):
+        # Resposta urllib3 (corpo já lido e descompactado em .data), inclusive com status de erro;
+        # ErroRede se a rede falhar em todas as tentativas
+        import urllib3
+
+        http = self._get_http()
+        dominio = host(url)
+        with self._lock:
+            pool = http.connection_from_url(url)
+            pools = self._pools.setdefault(dominio, {})
+            chave = (pool.scheme, pool.host, pool.port)
+            anterior = pools.get(chave)
+            if anterior is not pool:
+                # o PoolManager fechou o pool anterior deste endereço (hosts_no_pool excedido)
+                if anterior is not None:
+                    self._arquivar(dominio, anterior)
+                pools[chave] = pool
+
+        tentativas = max(1, self.config.tentativas)
+        inicio = time.perf_counter()
+        for tentativa in range(1, tentativas + 1):
+            espera = None
+            try:
+                resposta = http.request("GET", url, headers=headers)
+            except urllib3.exceptions.HTTPError as e:
+                motivo = getattr(e, "reason", None) or e
+                # nome que não resolve não melhora com nova tentativa
+                if tentativa == tentativas or \
+                        isinstance(motivo, getattr(urllib3.exceptions, "NameResolutionError", ())):
+                    self._contar(dominio, inicio, falha=True, repeticoes=tentativa - 1)
+                    raise ErroRede(f"{type(motivo).__name__}: {str(motivo)[:120]}") from e
+            else:
+                if resposta.status not in STATUS_TRANSITORIOS or tentativa == tentativas:
+                    self._contar(dominio, inicio, tamanho=len(resposta.data or b""),
+                                 falha=resposta.status >= 400, repeticoes=tentativa - 1)
+                    return resposta
+                espera = _retry_after(resposta.headers.get("Retry-After"))
+
+            # full jitter: espera aleatória entre zero e o teto exponencial, para não sincronizar as threads
+            teto = min(self.config.espera_max_s, self.config.espera_base_s * 2 ** (tentativa - 1))
+            espera = min(self.config.espera_max_s, espera) if espera is not None else random.uniform(0, teto)
+            if self.metricas is not None:
+                self.metricas.contar(EVENTO_HTTP_REPETICAO)
+            log.info(f"tentativa {tentativa} falhou para {url}; nova tentativa em {espera:.1f} s")
+            time.sleep(espera)
+
+    def _contadores(self, dominio: str) -> dict:
+        # chamado com o lock; conexoes_abertas e enviadas_pool acumulam os pools já fechados
+        return self._por_host.setdefault(
+            dominio, {"requisicoes": 0, "repeticoes": 0, "falhas": 0, "bytes": 0, "tempo_total_s": 0.0,
+                      "conexoes_abertas": 0, "enviadas_pool": 0})
+
+    def _arquivar(self, dominio: str, pool):
+        # Soma as conexões de um pool fechado aos contadores do domínio, para soltar a referência a ele
+        contadores = self._contadores(dominio)
+        contadores["conexoes_abertas"] += pool.num_connections
+        contadores["enviadas_pool"] += pool.num_requests
+
+    def _arquivar_pools(self):
+        # chamado com o lock, quando o PoolManager é descartado
+        for dominio, pools in self._pools.items():
+            for pool in pools.values():
+                self._arquivar(dominio, pool)
+        self._pools.clear()
+
+    def _contar(self, dominio: str, inicio: float, tamanho: int = 0, falha: bool = False, repeticoes: int = 0):
+        with self._lock:
+            contadores = self._contadores(dominio)
+            contadores["requisicoes"] += 1
+            contadores["repeticoes"] += repeticoes
+            contadores["falhas"] += int(falha)
+            contadores["bytes"] += tamanho
+            contadores["tempo_total_s"] += time.perf_counter() - inicio
+
+    def estatisticas(self) -> dict:
+        # Totais e, por domínio, requisições, repetições, falhas, bytes, tempo e conexões abertas;
+        # conexões reaproveitadas = requisições enviadas pelo pool - conexões abertas (keep-alive)
+        with self._lock:
+            por_host = {}
+            for dominio, contadores in self._por_host.items():
+                contadores = dict(contadores)
+                pools = self._pools.get(dominio, {}).values()
+                abertas = contadores["conexoes_abertas"] + sum(pool.num_connections for pool in pools)
+                enviadas = contadores.pop("enviadas_pool") + sum(pool.num_requests for pool in pools)
+                por_host[dominio] = {**contadores, "tempo_total_s": round(contadores["tempo_total_s"], 3),
+                                     "conexoes_abertas": abertas,
+                                     "conexoes_reaproveitadas": max(0, enviadas - abertas)}
+        totais = {chave: sum(h[chave] for h in por_host.values())
+                  for chave in ("requisicoes", "repeticoes", "falhas", "bytes", "tempo_total_s",
+                                "conexoes_abertas", "conexoes_reaproveitadas")}
+        totais["tempo_total_s"] = round(totais["tempo_total_s"], 3)
+        return {**totais, "hosts": len(por_host), "por_host": por_host}
+
+    def fechar(self):
+        with self._lock:
+            if self._http is not None:
+                self._http.clear()
+                self._http = None
+            self._arquivar_pools()
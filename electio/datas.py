@@ -0,0 +1,163 @@
+import calendar
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from electio.fronteira import converter_data, data_da_url
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        DATA DE PUBLICAÇÃO DAS PÁGINAS E JANELA DO DEFESO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# O prompt manda ignorar fatos anteriores aos períodos do defeso, mas uma notícia de anos atrás
+# ainda custa download, extração, às vezes o Playwright, e tokens. Com a janela ativa, a data de
+# cada página é lida logo depois do download, antes da extração: JSON-LD (datePublished/dateModified),
+# tags <meta>/<time> (article:published_time, DC, itemprop...), o "Publicado em 12/03/2024" dos
+# portais gov.br, os metadados do trafilatura e, por último, a data no caminho da URL. Páginas
+# datadas fora da janela (de `meses` meses antes do pleito até o dia do pleito) são descartadas
+# antes de qualquer chamada à LLM; páginas sem data seguem normalmente. A data encontrada fica no
+# cache de derivados e alimenta a seleção de links das execuções seguintes (FronteiraRastreamento).
+
+TIPO_DERIVADO_DATAS = "datas"
+
+ORIGEM_JSONLD = "jsonld"
+ORIGEM_META = "meta"
+ORIGEM_TEXTO = "texto"
+ORIGEM_TRAFILATURA = "trafilatura"
+ORIGEM_URL = "url"
+ORIGENS_DATA = (ORIGEM_JSONLD, ORIGEM_META, ORIGEM_TEXTO, ORIGEM_TRAFILATURA, ORIGEM_URL)
+
+# chaves (em minúsculas) de <meta name|property|itemprop> e <time itemprop>
+META_PUBLICACAO = {
+    "article:published_time", "og:article:published_time", "og:published_time", "datepublished", "datecreated",
+    "date", "dc.date", "dc.date.issued", "dc.date.created", "dcterms.issued", "dcterms.created", "dcterms.date",
+    "pubdate", "publishdate", "publish-date", "publication_date", "citation_publication_date",
+    "parsely-pub-date", "sailthru.date", "created",
+}
+META_MODIFICACAO = {
+    "article:modified_time", "og:updated_time", "datemodified", "dc.date.modified", "dcterms.modified",
+    "last-modified", "modified",
+}
+JSONLD_PUBLICACAO = ("datePublished", "dateCreated", "uploadDate")
+JSONLD_MODIFICACAO = ("dateModified",)
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6, "julho": 7,
+    "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+RE_JSONLD = re.compile(r'<script[^>]+application/ld\+json[^>]*>(.*?)</script>', re.I | re.S)
+RE_TAG_DATA = re.compile(r'<(?:meta|time)\b[^>]*>', re.I)
+RE_ATRIBUTO = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+RE_TAGS = re.compile(r'<[^>]+>')
+RE_PUBLICADO = re.compile(
+    r'\b(publicad[oa]|postad[oa]|criad[oa]|atualizad[oa]|modificad[oa])\s+em\s*:?\s*'
+    r'(?:(\d{1,2})/(\d{1,2})/(\d{4})|(\d{1,2})\s+de\s+([a-zç]+)\s+de\s+(\d{4}))', re.I)
+
+
+@dataclass
+class ConfigJanela:
+    ativa: bool = True          # só vale com a data do pleito informada
+    meses: int = 6              # a janela vai de `meses` meses antes do pleito até o dia do pleito
+    descartar: bool = True      # fora da janela: descarta a página (False: só a deixa para o fim da seleção de links)
+
+
+def janela_defeso(data_referencia: date, meses: int = 6):
+    # (início, fim) da janela em datetime UTC, ou None sem data do pleito
+    if not data_referencia:
+        return None
+    ano, mes = divmod(data_referencia.year * 12 + data_referencia.month - 1 - max(0, meses), 12)
+    dia = min(data_referencia.day, calendar.monthrange(ano, mes + 1)[1])
+    return (datetime(ano, mes + 1, dia, tzinfo=timezone.utc),
+            datetime(data_referencia.year, data_referencia.month, data_referencia.day, 23, 59, 59,
+                     tzinfo=timezone.utc))
+
+
+def fora_da_janela(data: datetime, janela) -> bool:
+    return janela is not None and data is not None and not (janela[0] <= data <= janela[1])
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░ LEITURA DA DATA DA PÁGINA ░░░░░░░░░░░░░░░░░░░░░░░░░
+
+
+def _datas_jsonld(html: str):
+    # (publicação, modificação) do primeiro objeto JSON-LD que as tiver (inclusive dentro de @graph)
+    publicada = modificada = None
+    for bloco in RE_JSONLD.findall(html):
+        try:
+            pendentes = [json.loads(bloco.strip())]
+        except ValueError:
+            continue
+        while pendentes and not publicada:
+            item = pendentes.pop(0)
+            if isinstance(item, list):
+                pendentes.extend(item)
+            elif isinstance(item, dict):
+                publicada = publicada or next(
+                    (converter_data(str(item[c])) for c in JSONLD_PUBLICACAO if item.get(c)), None)
+                modificada = modificada or next(
+                    (converter_data(str(item[c])) for c in JSONLD_MODIFICACAO if item.get(c)), None)
+                pendentes.extend(v for v in item.values() if isinstance(v, (dict, list)))
+        if publicada:
+            break
+    return publicada, modificada
+
+
+def _datas_meta(html: str):
+    publicada = modificada = None
+    for tag in RE_TAG_DATA.findall(html):
+        atributos = {nome.lower(): a or b or c for nome, a, b, c in RE_ATRIBUTO.findall(tag)}
+        chave = (atributos.get("property") or atributos.get("name") or atributos.get("itemprop") or "").lower()
+        if not chave and tag[1:5].lower() == "time" and "pubdate" in tag.lower():
+            chave = "pubdate"
+        valor = atributos.get("content") or atributos.get("datetime")
+        if chave in META_PUBLICACAO and not publicada:
+            publicada = converter_data(valor)
+        elif chave in META_MODIFICACAO and not modificada:
+            modificada = converter_data(valor)
+    return publicada, modificada
+
+
+def _datas_texto(html: str):
+    # "Publicado em 12/03/2024 10h30, atualizado em ..." (gov.br/Plone) e "Postado em 5 de março de 2024"
+    publicada = modificada = None
+    for encontrado in RE_PUBLICADO.finditer(RE_TAGS.sub(" ", html)):
+        verbo, dia, mes, ano = encontrado.group(1).lower(), encontrado.group(2), encontrado.group(3), encontrado.group(4)
+        if dia is None:
+            dia, mes, ano = encontrado.group(5), MESES.get(encontrado.group(6).lower()), encontrado.group(7)
+        try:
+            data = datetime(int(ano), int(mes), int(dia), tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            continue
+        if verbo.startswith(("atualizad", "modificad")):
+            modificada = modificada or data
+        else:
+            publicada = publicada or data
+        if publicada:
+            break
+    return publicada, modificada
+
+
+def _data_trafilatura(html: str):
+    import trafilatura
+
+    try:
+        metadados = trafilatura.extract_metadata(html)
+    except Exception:
+        return None
+    return converter_data(metadados.date) if metadados is not None and metadados.date else None
+
+
+def data_publicacao(url: str, html: str = None):
+    # (data, origem) da página: publicação ou, se não houver, a última modificação; (None, None) se não houver data
+    if html:
+        for origem, leitor in ((ORIGEM_JSONLD, _datas_jsonld), (ORIGEM_META, _datas_meta), (ORIGEM_TEXTO, _datas_texto)):
+            publicada, modificada = leitor(html)
+            if publicada or modificada:
+                return publicada or modificada, origem
+        data = _data_trafilatura(html)
+        if data:
+            return data, ORIGEM_TRAFILATURA
+    data = data_da_url(url)
+    return (data, ORIGEM_URL) if data else (None, None)
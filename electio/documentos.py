@@ -0,0 +1,202 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from electio.cache_http import DIRETORIO_PADRAO
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CONVERSÃO DE DOCUMENTOS DA BASE LEGAL (PDF, DOCX, HTML) COM DOCLING
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Resoluções do TSE e cartilhas chegam em PDF de centenas de páginas. A conversão roda em
+# uma thread dedicada (o docling carrega modelos de layout e é pesado: um documento por vez),
+# PDFs são convertidos em faixas de páginas para que o progresso possa ser acompanhado, e o
+# resultado (texto em markdown e títulos das seções) fica em SQLite, com chave no hash do
+# arquivo: reenviar o mesmo documento não converte de novo. Arquivos .txt não passam pelo docling.
+
+PAGINAS_POR_FAIXA = 20
+EXTENSOES_DOCLING = {".pdf", ".docx", ".html", ".htm"}
+EXTENSOES_ACEITAS = sorted(EXTENSOES_DOCLING | {".txt"})
+
+ORIGEM_CACHE = "cache"
+ORIGEM_CONVERSAO = "conversao"
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class DocumentoConvertido:
+    nome: str
+    hash: str
+    texto: str                                  # markdown (ou o próprio .txt)
+    secoes: list = field(default_factory=list)  # [(nível, título)] na ordem do documento
+    paginas: int = 0
+    origem: str = ORIGEM_CONVERSAO
+
+
+def hash_arquivo(conteudo: bytes) -> str:
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def extensao(nome: str) -> str:
+    return os.path.splitext(nome or "")[1].lower()
+
+
+def _contar_paginas_pdf(conteudo: bytes) -> int:
+    import pypdfium2  # dependência do docling
+
+    documento = pypdfium2.PdfDocument(conteudo)
+    try:
+        return len(documento)
+    finally:
+        documento.close()
+
+
+def _secoes(documento) -> list:
+    secoes = []
+    for item, nivel in documento.iterate_items():
+        if getattr(item, "label", None) in ("title", "section_header"):
+            secoes.append((getattr(item, "level", nivel), item.text))
+    return secoes
+
+
+class ConversorDocumentos:
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO, paginas_por_faixa: int = PAGINAS_POR_FAIXA):
+        os.makedirs(diretorio, exist_ok=True)
+        self.paginas_por_faixa = paginas_por_faixa
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="docling")
+        self._conversor = None          # DocumentConverter, criado na primeira conversão (na thread do docling)
+        self._lock = threading.Lock()
+        self._em_andamento = {}         # hash → Future
+        self._progresso = {}            # hash → (páginas convertidas, total)
+        self._convertidos = 0
+        self._do_cache = 0
+        self._paginas = 0
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "documentos.sqlite"), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS documentos (
+                hash TEXT PRIMARY KEY,
+                nome TEXT,
+                texto TEXT,
+                secoes TEXT,
+                paginas INTEGER,
+                criado_em REAL
+            )
+        """)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ INTERFACE ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def converter(self, nome: str, conteudo: bytes, ao_progredir=None) -> Future:
+        # Future com o DocumentoConvertido. O mesmo arquivo enviado de novo enquanto converte recebe
+        # o mesmo Future. ao_progredir(paginas_convertidas, total) roda na thread do docling.
+        chave = hash_arquivo(conteudo)
+        salvo = self._obter(chave, nome)
+        if salvo is not None:
+            futuro = Future()
+            futuro.set_result(salvo)
+            return futuro
+        if extensao(nome) not in EXTENSOES_DOCLING:
+            futuro = Future()
+            try:
+                futuro.set_result(DocumentoConvertido(nome, chave, conteudo.decode("utf-8")))
+            except UnicodeDecodeError as e:
+                futuro.set_exception(ValueError(f"{nome}: o arquivo .txt deve estar em UTF-8 ({e})"))
+            return futuro
+        with self._lock:
+            if chave not in self._em_andamento:
+                self._progresso[chave] = (0, 0)
+                self._em_andamento[chave] = self._executor.submit(self._converter, nome, conteudo, chave, ao_progredir)
+            return self._em_andamento[chave]
+
+    def progresso(self, conteudo_ou_hash) -> tuple:
+        # (páginas convertidas, total) da conversão em andamento; (0, 0) se não houver
+        chave = conteudo_ou_hash if isinstance(conteudo_ou_hash, str) else hash_arquivo(conteudo_ou_hash)
+        with self._lock:
+            return self._progresso.get(chave, (0, 0))
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"convertidos": self._convertidos, "do_cache": self._do_cache, "paginas": self._paginas,
+                    "em_andamento": len(self._em_andamento)}
+
+    def fechar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ CONVERSÃO (THREAD DO DOCLING) ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def _obter(self, chave: str, nome: str):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT texto, secoes, paginas FROM documentos WHERE hash = ?", (chave,)).fetchone()
+            if linha:
+                self._do_cache += 1
+        if not linha:
+            return None
+        texto, secoes, paginas = linha
+        return DocumentoConvertido(nome, chave, texto, [tuple(s) for s in json.loads(secoes)], paginas, ORIGEM_CACHE)
+
+    def _get_conversor(self):
+        if self._conversor is None:
+            from docling.document_converter import DocumentConverter  # só carregado quando há documento a converter
+
+            self._conversor = DocumentConverter()
+        return self._conversor
+
+    def _converter(self, nome: str, conteudo: bytes, chave: str, ao_progredir):
+        try:
+            inicio = time.perf_counter()
+            documento = self._converter_documento(nome, conteudo, chave, ao_progredir)
+            log.info(f"{nome}: {documento.paginas} página(s) em {time.perf_counter() - inicio:.1f}s")
+            with self._lock:
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO documentos (hash, nome, texto, secoes, paginas, criado_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (chave, nome, documento.texto, json.dumps(documento.secoes, ensure_ascii=False),
+                     documento.paginas, time.time()))
+                self._conexao.commit()
+                self._convertidos += 1
+                self._paginas += documento.paginas
+            return documento
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+                self._progresso.pop(chave, None)
+
+    def _converter_documento(self, nome: str, conteudo: bytes, chave: str, ao_progredir) -> DocumentoConvertido:
+        from docling.datamodel.base_models import DocumentStream
+
+        conversor = self._get_conversor()
+        if extensao(nome) != ".pdf":
+            resultado = conversor.convert(DocumentStream(name=nome, stream=io.BytesIO(conteudo)))
+            documento = resultado.document
+            paginas = len(getattr(documento, "pages", None) or {}) or 1
+            self._avancar(chave, paginas, paginas, ao_progredir)
+            return DocumentoConvertido(nome, chave, documento.export_to_markdown(), _secoes(documento), paginas)
+
+        # PDF: faixas de páginas, cada uma um documento do docling, concatenadas na ordem
+        total = _contar_paginas_pdf(conteudo)
+        self._avancar(chave, 0, total, ao_progredir)
+        partes, secoes = [], []
+        for primeira in range(1, total + 1, self.paginas_por_faixa):
+            ultima = min(total, primeira + self.paginas_por_faixa - 1)
+            resultado = conversor.convert(DocumentStream(name=nome, stream=io.BytesIO(conteudo)),
+                                          page_range=(primeira, ultima))
+            partes.append(resultado.document.export_to_markdown())
+            secoes.extend(_secoes(resultado.document))
+            self._avancar(chave, ultima, total, ao_progredir)
+        return DocumentoConvertido(nome, chave, "\n\n".join(partes), secoes, total)
+
+    def _avancar(self, chave: str, feitas: int, total: int, ao_progredir):
+        with self._lock:
+            self._progresso[chave] = (feitas, total)
+        if ao_progredir:
+            ao_progredir(feitas, total)
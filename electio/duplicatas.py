@@ -0,0 +1,114 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        AGRUPAMENTO DE PÁGINAS QUASE DUPLICADAS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Listagens paginadas, versões para impressão, páginas de tags e notícias estaduais
+# replicadas em vários portais municipais produzem textos quase idênticos. Cada texto
+# extraído recebe uma assinatura SimHash de 64 bits (sobre trios de palavras); textos a
+# até `distancia_max` bits de distância caem no mesmo grupo, e só o primeiro de cada grupo
+# (o representante) é enviado à LLM. A busca usa um índice por faixas de bits: com
+# distancia_max < faixas, dois textos próximos coincidem em pelo menos uma faixa inteira.
+
+BITS = 64
+TAMANHO_TRIO = 3
+
+RE_PALAVRAS = re.compile(r'\w+')
+
+
+@dataclass
+class ConfigDuplicatas:
+    ativo: bool = True
+    distancia_max: int = 3          # bits diferentes tolerados entre assinaturas (de 64)
+    min_palavras: int = 20          # textos mais curtos só se agrupam com cópias exatas
+
+
+def _palavras(texto: str) -> list:
+    texto = unicodedata.normalize("NFKC", texto or "").lower()
+    return RE_PALAVRAS.findall(texto)
+
+
+def _hash64(valor: str) -> int:
+    return int.from_bytes(hashlib.blake2b(valor.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(texto: str) -> int:
+    palavras = _palavras(texto)
+    if len(palavras) < TAMANHO_TRIO:
+        trios = palavras
+    else:
+        trios = [" ".join(palavras[i:i + TAMANHO_TRIO]) for i in range(len(palavras) - TAMANHO_TRIO + 1)]
+    pesos = [0] * BITS
+    for trio in set(trios):
+        h = _hash64(trio)
+        for bit in range(BITS):
+            pesos[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if pesos[bit] > 0)
+
+
+def distancia_hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class AgrupadorDuplicatas:
+    # Índice em memória válido para uma execução (todos os sites); seguro entre threads
+
+    def __init__(self, config: ConfigDuplicatas = None):
+        self.config = config or ConfigDuplicatas()
+        self._faixas = self.config.distancia_max + 1
+        self._largura = BITS // self._faixas
+        self._lock = threading.Lock()
+        self._exatos = {}          # hash do texto normalizado → grupo
+        self._indice = {}          # (faixa, valor da faixa) → [grupos]
+        self._assinaturas = []     # grupo → simhash (None para textos curtos)
+        self._textos = 0
+
+    def _chaves_faixas(self, assinatura: int):
+        mascara = (1 << self._largura) - 1
+        return [(faixa, assinatura >> (faixa * self._largura) & mascara) for faixa in range(self._faixas)]
+
+    def agrupar(self, texto: str):
+        # Devolve (grupo, novo): novo=True quando o texto abre um grupo e deve ser analisado
+        palavras = _palavras(texto)
+        exato = hashlib.sha256(" ".join(palavras).encode("utf-8")).hexdigest()
+        assinatura = simhash(texto) if len(palavras) >= self.config.min_palavras else None
+
+        with self._lock:
+            self._textos += 1
+            if exato in self._exatos:
+                return self._exatos[exato], False
+
+            grupo = None
+            if assinatura is not None:
+                for chave in self._chaves_faixas(assinatura):
+                    for candidato in self._indice.get(chave, ()):
+                        if distancia_hamming(assinatura, self._assinaturas[candidato]) <= self.config.distancia_max:
+                            grupo = candidato
+                            break
+                    if grupo is not None:
+                        break
+
+            novo = grupo is None
+            if novo:
+                grupo = len(self._assinaturas)
+                self._assinaturas.append(assinatura)
+                if assinatura is not None:
+                    for chave in self._chaves_faixas(assinatura):
+                        self._indice.setdefault(chave, []).append(grupo)
+            self._exatos[exato] = grupo
+            return grupo, novo
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            grupos = len(self._assinaturas)
+            return {
+                "textos": self._textos,
+                "grupos": grupos,
+                "duplicatas": self._textos - grupos,
+                "taxa": round((self._textos - grupos) / self._textos, 3) if self._textos else 0.0,
+            }
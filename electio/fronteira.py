@@ -0,0 +1,379 @@
+import gzip
+import json
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+from electio.urls import host, normalizar_url
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        FRONTEIRA DE RASTREAMENTO (SITEMAPS, RSS E ÂNCORAS)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Para cada site, os candidatos vêm de três fontes: sitemaps declarados no robots.txt,
+# feeds RSS/Atom/JSON Feed anunciados na página inicial e âncoras da própria página (seguidas até a
+# profundidade configurada). As URLs são normalizadas e deduplicadas, e o orçamento de
+# links é gasto primeiro nas notícias mais recentes; âncoras sem data são ordenadas por
+# uma pontuação que favorece páginas de notícia em relação a links de menu. Com a janela do
+# defeso (datas.py), candidatos datados fora dela vão para o fim da fila (ou são descartados);
+# a data vem do sitemap, do feed, da URL ou, para links já extraídos antes, da própria página.
+
+# ◆━━━━  CAMINHOS IRRELEVANTES PARA A BUSCA DE LINKS ━━━━━━━◆
+
+LISTA_1 = [
+    '/login', '/cadastro', '/conta', '/privacidade',
+    '/contato', '/sobre', '/equipe', '/assinatura',
+    '/webmail', '/galeria', '/simbolos'
+          ]  # palavras-chave para exclusão na busca de links
+
+RE_ARQUIVOS = re.compile(r'\.(pdf|jpg|jpeg|png|gif|zip|docx?|xlsx?|odt|ods|mp3|mp4|xml|rss)$')
+RE_LISTA_1 = re.compile("|".join(re.escape(caminho) for caminho in LISTA_1))
+RE_DATA_URL = re.compile(r'/(20\d{2})[/-](0?[1-9]|1[0-2])(?:[/-](0?[1-9]|[12]\d|3[01]))?(?=[/-]|$)')
+RE_NOTICIA = re.compile(r'noticia|news|imprensa|comunicado|release|informe|agencia', re.I)
+
+TIPOS_FEED = ("application/rss+xml", "application/atom+xml", "application/feed+json")
+
+ORIGEM_SITEMAP = "sitemap"
+ORIGEM_FEED = "feed"
+ORIGEM_ANCORA = "ancora"
+
+
+@dataclass
+class Candidato:
+    url: str
+    origem: str
+    data: datetime = None
+    profundidade: int = 1
+    pontuacao: float = 0.0
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        INTERVALO MÍNIMO ENTRE REQUISIÇÕES AO MESMO SITE
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+class Cortesia:
+    # Reserva horários espaçados por `atraso` segundos para cada domínio; o Crawl-delay do
+    # robots.txt, quando maior, substitui o atraso padrão daquele domínio
+
+    def __init__(self, atraso_padrao: float = 0.5):
+        self.atraso_padrao = atraso_padrao
+        self._atrasos = {}
+        self._proximo = {}
+        self._lock = threading.Lock()
+
+    def definir_atraso(self, url: str, atraso: float):
+        with self._lock:
+            self._atrasos[host(url)] = max(self.atraso_padrao, atraso)
+
+    def aguardar(self, url: str):
+        dominio = host(url)
+        with self._lock:
+            agora = time.monotonic()
+            inicio = max(agora, self._proximo.get(dominio, 0.0))
+            self._proximo[dominio] = inicio + self._atrasos.get(dominio, self.atraso_padrao)
+        if inicio > agora:
+            time.sleep(inicio - agora)
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ LEITURA DE DATAS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def converter_data(valor):
+    # Aceita ISO 8601 (sitemaps, Atom) e RFC 822 (RSS); devolve datetime com fuso (UTC se ausente)
+    if not valor:
+        return None
+    valor = valor.strip()
+    try:
+        data = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            data = parsedate_to_datetime(valor)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return data
+
+
+def data_da_url(url: str):
+    # Datas no caminho, como /2026/03/15/ ou /2026-03/
+    encontrado = RE_DATA_URL.search(urlparse(url).path)
+    if not encontrado:
+        return None
+    ano, mes, dia = encontrado.group(1), encontrado.group(2), encontrado.group(3) or "1"
+    try:
+        return datetime(int(ano), int(mes), int(dia), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _sem_namespace(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _filhos(elemento, nome: str):
+    return [filho for filho in elemento if _sem_namespace(filho.tag) == nome]
+
+
+def _texto_filho(elemento, *nomes):
+    # Texto do primeiro descendente com um dos nomes, na ordem de preferência dos nomes
+    textos = {}
+    for filho in elemento.iter():
+        nome = _sem_namespace(filho.tag)
+        if nome in nomes and nome not in textos and filho.text and filho.text.strip():
+            textos[nome] = filho.text.strip()
+    return next((textos[nome] for nome in nomes if nome in textos), None)
+
+
+def interpretar_sitemap(corpo: bytes):
+    # Devolve (sitemaps_filhos, urls), ambos listas de (url, data)
+    if corpo[:2] == b"\x1f\x8b":
+        corpo = gzip.decompress(corpo)
+    raiz = ET.fromstring(corpo)
+    filhos, urls = [], []
+    if _sem_namespace(raiz.tag) == "sitemapindex":
+        for sitemap in _filhos(raiz, "sitemap"):
+            loc = _texto_filho(sitemap, "loc")
+            if loc:
+                filhos.append((loc, converter_data(_texto_filho(sitemap, "lastmod"))))
+    else:
+        for item in _filhos(raiz, "url"):
+            loc = _texto_filho(item, "loc")
+            if loc:
+                # a data de publicação do Google News, quando existe, é mais precisa que lastmod
+                urls.append((loc, converter_data(_texto_filho(item, "publication_date", "lastmod"))))
+    return filhos, urls
+
+
+def _interpretar_feed_json(corpo: bytes, url_feed: str):
+    # JSON Feed 1.x: items[].url (ou external_url), date_published/date_modified
+    dados = json.loads(corpo)
+    itens = []
+    for item in (dados.get("items") if isinstance(dados, dict) else None) or []:
+        if not isinstance(item, dict):
+            continue
+        link = item.get("url") or item.get("external_url")
+        if isinstance(link, str) and link.strip():
+            data = converter_data(item.get("date_published") or item.get("date_modified"))
+            itens.append((urljoin(url_feed, link.strip()), data))
+    return itens
+
+
+def interpretar_feed(corpo: bytes, url_feed: str):
+    # RSS 2.0 (item/link, pubDate), Atom (entry/link@href, published/updated) e JSON Feed; lista de (url, data).
+    # Levanta ET.ParseError (XML) ou ValueError (JSON) para um corpo que não é feed
+    if corpo.lstrip()[:1] == b"{":
+        return _interpretar_feed_json(corpo, url_feed)
+    raiz = ET.fromstring(corpo)
+    itens = []
+    for elemento in raiz.iter():
+        nome = _sem_namespace(elemento.tag)
+        if nome == "item":
+            link = _texto_filho(elemento, "link", "guid")
+            data = converter_data(_texto_filho(elemento, "pubdate", "date", "published", "updated"))
+        elif nome == "entry":
+            link = None
+            for filho in _filhos(elemento, "link"):
+                if filho.get("rel", "alternate") == "alternate" and filho.get("href"):
+                    link = filho.get("href")
+                    break
+            data = converter_data(_texto_filho(elemento, "published", "updated"))
+        else:
+            continue
+        if link:
+            itens.append((urljoin(url_feed, link), data))
+    return itens
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ FRONTEIRA ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+class FronteiraRastreamento:
+
+    def __init__(self, cache_http, cortesia: Cortesia = None, profundidade: int = 1,
+                 usar_sitemaps: bool = True, usar_feeds: bool = True, max_sitemaps: int = 5,
+                 janela: tuple = None, descartar_fora: bool = False, data_conhecida=None):
+        self.cache_http = cache_http
+        self.cortesia = cortesia
+        self.profundidade = max(1, profundidade)
+        self.usar_sitemaps = usar_sitemaps
+        self.usar_feeds = usar_feeds
+        self.max_sitemaps = max_sitemaps
+        self.janela = janela                    # (início, fim) em datetime com fuso, ou None
+        self.descartar_fora = descartar_fora
+        self.data_conhecida = data_conhecida    # data_conhecida(link) -> datetime lida numa extração anterior, ou None
+        self.fora_da_janela = 0                 # candidatos datados fora da janela na última coleta
+
+    def coletar(self, url: str, max_links: int) -> list:
+        # Devolve a semente seguida dos candidatos mais prioritários, até max_links URLs
+        candidatos = {}
+        robots = self._ler_robots(url)
+
+        def adicionar(link, origem, data=None, profundidade=1, pontuacao=0.0):
+            if not self._link_valido(url, link, robots):
+                return
+            chave = normalizar_url(link)
+            if chave == normalizar_url(url):
+                return
+            atual = candidatos.get(chave)
+            data = data or data_da_url(link)
+            if atual is None:
+                candidatos[chave] = Candidato(link, origem, data, profundidade, pontuacao)
+            else:
+                # a mesma URL vinda de fontes diferentes fica com a melhor data e pontuação
+                atual.data = atual.data or data
+                atual.pontuacao = max(atual.pontuacao, pontuacao)
+
+        if self.usar_sitemaps:
+            for link, data in self._urls_sitemaps(url, robots):
+                adicionar(link, ORIGEM_SITEMAP, data, pontuacao=self._pontuar(url, link))
+
+        # Âncoras (e feeds anunciados) da semente e, se configurado, das páginas de listagem seguintes
+        nivel = [url]
+        visitadas = {normalizar_url(url)}
+        for profundidade in range(1, self.profundidade + 1):
+            proximo_nivel = []
+            for pagina in nivel:
+                ancoras, feeds = self._ler_pagina(pagina)
+                if self.usar_feeds and profundidade == 1:
+                    for url_feed in feeds:
+                        for link, data in self._urls_feed(url_feed):
+                            adicionar(link, ORIGEM_FEED, data, pontuacao=self._pontuar(url, link) + 1)
+                for link in ancoras:
+                    adicionar(link, ORIGEM_ANCORA, profundidade=profundidade, pontuacao=self._pontuar(url, link))
+                    if normalizar_url(link) not in visitadas:
+                        proximo_nivel.append(link)
+            # só páginas de listagem (sem data e com cara de notícia) são expandidas no nível seguinte
+            nivel = [
+                link for link in proximo_nivel
+                if candidatos.get(normalizar_url(link)) and candidatos[normalizar_url(link)].data is None
+                and RE_NOTICIA.search(urlparse(link).path)
+            ][:max_links]
+            visitadas.update(normalizar_url(link) for link in nivel)
+            if not nivel:
+                break
+
+        if self.data_conhecida is not None:
+            for candidato in candidatos.values():
+                candidato.data = candidato.data or self.data_conhecida(candidato.url)
+        selecionaveis = list(candidatos.values())
+        self.fora_da_janela = sum(self._fora(c) for c in selecionaveis)
+        if self.descartar_fora:
+            selecionaveis = [c for c in selecionaveis if not self._fora(c)]
+        ordenados = sorted(selecionaveis, key=self._prioridade)
+        return [url] + [c.url for c in ordenados[:max(0, max_links - 1)]]
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ PRIORIZAÇÃO ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def _fora(self, candidato: Candidato) -> bool:
+        return self.janela is not None and candidato.data is not None and \
+            not (self.janela[0] <= candidato.data <= self.janela[1])
+
+    def _prioridade(self, candidato: Candidato):
+        # Mais recentes primeiro; sem data, maior pontuação e menor profundidade primeiro;
+        # datados fora da janela do defeso por último
+        if candidato.data is not None and not self._fora(candidato):
+            return (0, -candidato.data.timestamp(), -candidato.pontuacao)
+        if candidato.data is None:
+            return (1, -candidato.pontuacao, candidato.profundidade)
+        return (2, -candidato.data.timestamp(), -candidato.pontuacao)
+
+    @staticmethod
+    def _pontuar(semente: str, link: str) -> float:
+        caminho = urlparse(link).path.lower()
+        segmentos = [s for s in caminho.split("/") if s]
+        pontuacao = 0.0
+        if RE_NOTICIA.search(caminho):
+            pontuacao += 2
+        caminho_semente = urlparse(semente).path.lower().rstrip("/")
+        if caminho_semente and caminho.startswith(caminho_semente + "/"):
+            pontuacao += 1
+        if segmentos and segmentos[-1].count("-") >= 3:
+            pontuacao += 1          # slug longo: típico de notícia
+        if len(segmentos) <= 1:
+            pontuacao -= 2          # links de primeiro nível: típicos de menu
+        return pontuacao
+
+    @staticmethod
+    def _link_valido(semente: str, link: str, robots) -> bool:
+        parsed = urlparse(link)
+        if parsed.scheme not in ("http", "https"):
+            return False
+        if host(link) != host(semente):  # ignora links externos
+            return False
+        path = parsed.path.lower()
+        if RE_LISTA_1.search(path) or RE_ARQUIVOS.search(path):
+            return False
+        if not robots.can_fetch("*", link):
+            return False
+        return True
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ FONTES DE CANDIDATOS ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def _baixar(self, url: str):
+        resposta = self.cache_http.obter(url)
+        return resposta.corpo if resposta else None
+
+    def _ler_robots(self, url: str):
+        parsed = urlparse(url)
+        url_robots = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        corpo = self._baixar(url_robots)
+        robots = RobotFileParser(url_robots)
+        robots.parse(corpo.decode("utf-8", errors="replace").splitlines() if corpo else [])
+        atraso = robots.crawl_delay("*")
+        if atraso and self.cortesia is not None:
+            self.cortesia.definir_atraso(url, float(atraso))
+        return robots
+
+    def _urls_sitemaps(self, url: str, robots) -> list:
+        parsed = urlparse(url)
+        pendentes = list(robots.site_maps() or []) or [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+        urls, lidos = [], 0
+        while pendentes and lidos < self.max_sitemaps:
+            url_sitemap = pendentes.pop(0)
+            corpo = self._baixar(url_sitemap)
+            lidos += 1
+            if not corpo:
+                continue
+            try:
+                filhos, encontrados = interpretar_sitemap(corpo)
+            except (ET.ParseError, OSError, EOFError):
+                continue
+            urls.extend(encontrados)
+            # sitemaps de notícias e os atualizados mais recentemente são lidos primeiro
+            filhos.sort(key=lambda item: (not RE_NOTICIA.search(item[0]),
+                                          -(item[1].timestamp() if item[1] else 0)))
+            pendentes.extend(loc for loc, _ in filhos)
+        return urls
+
+    def _urls_feed(self, url_feed: str) -> list:
+        corpo = self._baixar(url_feed)
+        if not corpo:
+            return []
+        try:
+            return interpretar_feed(corpo, url_feed)
+        except (ET.ParseError, ValueError):
+            return []
+
+    def _ler_pagina(self, url: str):
+        # Devolve (âncoras, feeds anunciados) da página
+        from lxml import html
+
+        corpo = self._baixar(url)
+        if not corpo:
+            return [], []
+        try:
+            tree = html.fromstring(corpo) # converte em uma árvore de dados hierárquicos
+        except Exception:
+            return [], []
+        ancoras = [urljoin(url, href.strip()) for href in tree.xpath("//a/@href")]
+        feeds = [
+            urljoin(url, link.get("href"))
+            for link in tree.xpath("//link[@rel='alternate'][@href]")
+            if (link.get("type") or "").lower() in TIPOS_FEED
+        ]
+        return ancoras, feeds
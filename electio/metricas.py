@@ -0,0 +1,225 @@
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        MEDIÇÃO POR ETAPA E RELATÓRIO DA EXECUÇÃO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Cada etapa do trabalho (coleta de links, download, data da página, camadas de extração, filtragem,
+# triagem, montagem do prompt, chamada à LLM e leitura da resposta) é medida por um intervalo: duração e atributos
+# (bytes, tokens da LLM, camada de extração usada, origem do download). Os intervalos de uma
+# execução viram um relatório com p50/p95 por etapa, contagem por camada de extração e os sites
+# mais lentos, exportável em JSON ou em texto no formato do Prometheus (servido opcionalmente por HTTP).
+# O tempo de um site soma os intervalos atribuídos a ele (coleta de links e extração de cada página,
+# que já inclui download e camadas); as chamadas à LLM reúnem páginas de vários sites e entram só
+# no total da etapa, inclusive a espera pelo limite de tokens do plano. Ocorrências sem duração própria
+# (repetições de requisições HTTP, falhas de uma etapa do pipeline, blocos que a LLM não analisou)
+# são contadas como eventos e entram no mesmo relatório.
+
+ETAPA_COLETA = "coleta_links"
+ETAPA_DOWNLOAD = "download"
+ETAPA_DATA = "data_publicacao"            # com a origem da data (jsonld, meta, texto, trafilatura, url) na camada
+ETAPA_TRAFILATURA = "extracao_trafilatura"
+ETAPA_BEAUTIFULSOUP = "extracao_beautifulsoup"
+ETAPA_PLAYWRIGHT = "extracao_playwright"
+ETAPA_EXTRACAO = "extracao"              # a página inteira, com a camada que produziu o texto
+ETAPA_FILTRAGEM = "filtragem"
+ETAPA_TRIAGEM = "triagem_lexica"          # com a camada para onde a página foi encaminhada
+ETAPA_PROMPT = "montagem_prompt"
+ETAPA_LLM = "chamada_llm"
+ETAPA_RESPOSTA = "interpretacao_resposta"
+
+EVENTO_HTTP_REPETICAO = "http_repeticoes"                 # nova tentativa de uma requisição HTTP
+EVENTO_BLOCO_NAO_ANALISADO = "blocos_nao_analisados"      # bloco de parágrafos perdido por erro da LLM
+EVENTO_RESPOSTA_FORA_DO_FORMATO = "respostas_fora_do_formato"
+EVENTO_RESPOSTA_TRUNCADA = "respostas_truncadas"          # finish_reason == "length"
+EVENTO_BLOCO_DIVIDIDO = "blocos_divididos"                # bloco truncado reenviado em duas metades
+EVENTO_REENVIO_MAX_TOKENS = "reenvios_max_tokens"         # parágrafo truncado reenviado com o dobro de max_tokens
+EVENTO_PIPELINE_CANCELADO = "pipeline_cancelado"
+PREFIXO_EVENTO_FALHA = "falhas_"                          # + etapa do pipeline (descoberta, extracao, analise)
+
+ATRIBUTOS_SOMADOS = ("bytes", "tokens_enviados", "tokens_recebidos", "tokens_em_cache")
+ATRIBUTOS_CONTADOS = ("camada", "origem", "modelo")
+
+log = logging.getLogger(__name__)
+
+
+def percentil(valores_ordenados: list, fracao: float) -> float:
+    # Percentil pelo posto mais próximo, em uma lista já ordenada
+    if not valores_ordenados:
+        return 0.0
+    posto = min(max(1, math.ceil(fracao * len(valores_ordenados))), len(valores_ordenados))
+    return valores_ordenados[posto - 1]
+
+
+class RegistroMetricas:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        # Começa uma nova execução: o relatório passa a cobrir só o que for medido daqui em diante
+        with self._lock:
+            self._inicio = time.time()
+            self._inicio_relogio = time.perf_counter()
+            self._duracoes = {}      # etapa → [segundos]
+            self._somas = {}         # etapa → {atributo: total}
+            self._contagens = {}     # etapa → {atributo: {valor: n}}
+            self._erros = {}         # etapa → intervalos que terminaram em exceção
+            self._sites = {}         # site → {"tempo_s", "etapas"}
+            self._eventos = {}       # evento → ocorrências
+
+    @contextmanager
+    def medir(self, etapa: str, site: str = None, **atributos):
+        # with registro.medir(ETAPA_DOWNLOAD, site) as intervalo: intervalo["bytes"] = ...
+        intervalo = dict(atributos)
+        inicio = time.perf_counter()
+        try:
+            yield intervalo
+        except BaseException:
+            intervalo["erro"] = True
+            raise
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio, site, intervalo)
+
+    def registrar(self, etapa: str, duracao: float, site: str = None, atributos: dict = None):
+        atributos = atributos or {}
+        with self._lock:
+            self._duracoes.setdefault(etapa, []).append(duracao)
+            somas = self._somas.setdefault(etapa, {})
+            for chave in ATRIBUTOS_SOMADOS:
+                if atributos.get(chave):
+                    somas[chave] = somas.get(chave, 0) + atributos[chave]
+            contagens = self._contagens.setdefault(etapa, {})
+            for chave in ATRIBUTOS_CONTADOS:
+                if atributos.get(chave):
+                    por_valor = contagens.setdefault(chave, {})
+                    por_valor[atributos[chave]] = por_valor.get(atributos[chave], 0) + 1
+            if atributos.get("erro"):
+                self._erros[etapa] = self._erros.get(etapa, 0) + 1
+            if site:
+                dados_site = self._sites.setdefault(site, {"tempo_s": 0.0, "etapas": {}})
+                dados_site["tempo_s"] += duracao
+                dados_site["etapas"][etapa] = dados_site["etapas"].get(etapa, 0.0) + duracao
+
+    def contar(self, evento: str, quantidade: int = 1):
+        with self._lock:
+            self._eventos[evento] = self._eventos.get(evento, 0) + quantidade
+
+    def relatorio(self, sites_mais_lentos: int = 10) -> dict:
+        with self._lock:
+            etapas = {}
+            for etapa, duracoes in self._duracoes.items():
+                ordenadas = sorted(duracoes)
+                etapas[etapa] = {
+                    "intervalos": len(ordenadas),
+                    "erros": self._erros.get(etapa, 0),
+                    "total_s": round(sum(ordenadas), 3),
+                    "p50_s": round(percentil(ordenadas, 0.5), 3),
+                    "p95_s": round(percentil(ordenadas, 0.95), 3),
+                    "max_s": round(ordenadas[-1], 3),
+                    **self._somas.get(etapa, {}),
+                    **self._contagens.get(etapa, {}),
+                }
+            lentos = sorted(self._sites.items(), key=lambda item: item[1]["tempo_s"], reverse=True)
+            return {
+                "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self._inicio)),
+                "duracao_s": round(time.perf_counter() - self._inicio_relogio, 3),
+                "etapas": etapas,
+                "camadas_extracao": dict(self._contagens.get(ETAPA_EXTRACAO, {}).get("camada", {})),
+                "eventos": dict(self._eventos),
+                "sites_mais_lentos": [
+                    {"site": site, "tempo_s": round(dados["tempo_s"], 3),
+                     "etapas": {etapa: round(t, 3) for etapa, t in dados["etapas"].items()}}
+                    for site, dados in lentos[:sites_mais_lentos]
+                ],
+            }
+
+    def exportar_json(self, caminho: str):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(self.relatorio(), arquivo, ensure_ascii=False, indent=2)
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░ FORMATO DO PROMETHEUS ░░░░░░░░░░░░░░░░░░░░░░░░░
+
+
+def _rotulo(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def texto_prometheus(relatorio: dict) -> str:
+    # Relatório no formato de exposição em texto do Prometheus (p50/p95 como quantis de um summary)
+    linhas = [
+        "# HELP electio_etapa_duracao_segundos Duração dos intervalos de cada etapa na execução atual.",
+        "# TYPE electio_etapa_duracao_segundos summary",
+    ]
+    for etapa, dados in relatorio["etapas"].items():
+        rotulo = f'etapa="{_rotulo(etapa)}"'
+        linhas += [
+            f'electio_etapa_duracao_segundos{{{rotulo},quantile="0.5"}} {dados["p50_s"]}',
+            f'electio_etapa_duracao_segundos{{{rotulo},quantile="0.95"}} {dados["p95_s"]}',
+            f'electio_etapa_duracao_segundos_sum{{{rotulo}}} {dados["total_s"]}',
+            f'electio_etapa_duracao_segundos_count{{{rotulo}}} {dados["intervalos"]}',
+        ]
+    linhas += ["# HELP electio_etapa_erros_total Intervalos que terminaram em erro.",
+               "# TYPE electio_etapa_erros_total counter"]
+    linhas += [f'electio_etapa_erros_total{{etapa="{_rotulo(etapa)}"}} {dados["erros"]}'
+               for etapa, dados in relatorio["etapas"].items()]
+    linhas += ["# HELP electio_etapa_bytes_total Bytes processados por etapa.",
+               "# TYPE electio_etapa_bytes_total counter"]
+    linhas += [f'electio_etapa_bytes_total{{etapa="{_rotulo(etapa)}"}} {dados["bytes"]}'
+               for etapa, dados in relatorio["etapas"].items() if "bytes" in dados]
+    linhas += ["# HELP electio_tokens_total Tokens da LLM por tipo.", "# TYPE electio_tokens_total counter"]
+    for etapa, dados in relatorio["etapas"].items():
+        for tipo in ("enviados", "recebidos", "em_cache"):
+            if f"tokens_{tipo}" in dados:
+                linhas.append(f'electio_tokens_total{{etapa="{_rotulo(etapa)}",tipo="{tipo}"}} {dados[f"tokens_{tipo}"]}')
+    linhas += ["# HELP electio_extracao_camada_total Páginas por camada de extração que produziu o texto.",
+               "# TYPE electio_extracao_camada_total counter"]
+    linhas += [f'electio_extracao_camada_total{{camada="{_rotulo(camada)}"}} {n}'
+               for camada, n in relatorio["camadas_extracao"].items()]
+    linhas += ["# HELP electio_eventos_total Ocorrências contadas na execução (repetições, falhas, blocos perdidos).",
+               "# TYPE electio_eventos_total counter"]
+    linhas += [f'electio_eventos_total{{evento="{_rotulo(evento)}"}} {n}'
+               for evento, n in relatorio["eventos"].items()]
+    linhas += ["# HELP electio_site_tempo_segundos Tempo de coleta e extração dos sites mais lentos.",
+               "# TYPE electio_site_tempo_segundos gauge"]
+    linhas += [f'electio_site_tempo_segundos{{site="{_rotulo(s["site"])}"}} {s["tempo_s"]}'
+               for s in relatorio["sites_mais_lentos"]]
+    return "\n".join(linhas) + "\n"
+
+
+def servir_prometheus(registro: RegistroMetricas, porta: int, endereco: str = "127.0.0.1"):
+    # Servidor HTTP em uma thread daemon com /metrics (texto do Prometheus) e /relatorio (JSON); devolve o servidor
+
+    class Manipulador(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.startswith("/metrics"):
+                corpo = texto_prometheus(registro.relatorio()).encode("utf-8")
+                tipo = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path.startswith("/relatorio"):
+                corpo = json.dumps(registro.relatorio(), ensure_ascii=False).encode("utf-8")
+                tipo = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((endereco, porta), Manipulador)
+    threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+    log.info(f"métricas em http://{endereco}:{servidor.server_port}/metrics")
+    return servidor
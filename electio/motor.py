@@ -0,0 +1,1090 @@
+import json
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from datetime import date
+from urllib.parse import urlparse
+
+from electio.agendador import AgendadorGroq, ErroLLM
+from electio.cache_http import CacheHTTP, DIRETORIO_PADRAO, USER_AGENT
+from electio.base_legal import CacheIndices
+from electio.cliente_http import ClienteHTTP, ConfigHTTP
+from electio.cache_veredictos import (CacheVeredictos, VEREDICTO_CONFORME, VEREDICTO_NAO_CONFORME,
+                                      chave_paragrafo, dividir_paragrafos, hash_texto, normalizar_paragrafo)
+from electio.datas import (ORIGENS_DATA, TIPO_DERIVADO_DATAS, ConfigJanela, data_publicacao, fora_da_janela,
+                           janela_defeso)
+from electio.documentos import ConversorDocumentos
+from electio.duplicatas import AgrupadorDuplicatas, ConfigDuplicatas
+from electio.fronteira import Cortesia, FronteiraRastreamento, converter_data
+from electio.metricas import (ETAPA_BEAUTIFULSOUP, ETAPA_COLETA, ETAPA_DATA, ETAPA_DOWNLOAD, ETAPA_EXTRACAO, ETAPA_FILTRAGEM,
+                              ETAPA_LLM, ETAPA_PLAYWRIGHT, ETAPA_PROMPT, ETAPA_RESPOSTA, ETAPA_TRAFILATURA, ETAPA_TRIAGEM,
+                              EVENTO_BLOCO_DIVIDIDO, EVENTO_BLOCO_NAO_ANALISADO, EVENTO_REENVIO_MAX_TOKENS,
+                              EVENTO_RESPOSTA_FORA_DO_FORMATO, EVENTO_RESPOSTA_TRUNCADA, RegistroMetricas)
+from electio.navegador import RenderizadorPlaywright
+from electio.orcamento import capacidade_entrada, contar_tokens, fatiar_paragrafo, planejar_blocos, ratear_uso
+from electio.pipeline import ConfigConcorrencia, executar_pipeline
+from electio.snapshots import ConfigMonitoramento, MonitorExecucao, RepositorioSnapshots
+from electio.triagem import (CAMADA_JA_JULGADA, CAMADA_LEXICO, CAMADA_MODELO_GRANDE, CAMADA_MODELO_RAPIDO,
+                             ConfigTriagem, estatisticas_zeradas, pontuar_risco)
+from electio.urls import host
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        MOTOR DE ANÁLISE (SEM DEPENDÊNCIA DO STREAMLIT)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Coleta de links, extração de texto e análise pela LLM usados tanto pelo aplicativo
+# Streamlit (prime.py) quanto pela linha de comando (python -m electio).
+
+# ◆━━━━━━━━━━━━━━  LISTA DE MODELOS DE IA ━━━━━━━━━━━━━━━━━━◆
+
+# É possível incluir mais modelos que estão disponíveis no site
+
+GROQ_MODELS = [
+    "llama-3.3-70b-versatile",
+    "mixtral-8x7b-32768",
+    "openai/gpt-oss-120b"
+]
+
+# ◆━━━━  EXPRESSÕES REGULARES (compiladas uma vez por processo) ━━━━━━━◆
+
+# Bibliotecas pesadas (trafilatura, bs4, lxml, playwright, groq) são importadas apenas
+# dentro das funções que as usam, para não pesar na inicialização do aplicativo.
+
+RE_LINHAS_VAZIAS = re.compile(r'\n\s*\n\s*\n+')
+RE_QUEBRAS_TRIPLAS = re.compile(r'\n{3,}')
+RE_PARAGRAFOS = re.compile(r'\n\s*\n')
+RE_OBJETO_JSON = re.compile(r'\{.*\}', re.DOTALL)
+RE_LISTA_PARCIAL = re.compile(r'"nao_conformes"\s*:\s*\[([^\]]*)')
+RE_ID_COMPLETO = re.compile(r'"?(\d+)"?\s*[,\]]')
+TOKENS_NUMERACAO = 4   # "[n] " e a linha em branco que precedem cada parágrafo enviado
+RE_NUNCA = re.compile(r'(?!)')   # lista de termos vazia: nada é removido
+
+log = logging.getLogger(__name__)
+
+# ◆━━━━  TERMOS DE CONTEÚDO ESTRUTURAL (ajustáveis por análise) ━━━━━━━◆
+
+# Blocos que vazam em .gov.br: removidos de onde o termo aparece até o fim do parágrafo (limpar_texto)
+TERMOS_INSTITUCIONAIS = (
+    "política de cookies", "política de privacidade", "política de lgpd", "acessibilidade",
+    "transparência ativa", "ouvidoria", "contato",
+)
+
+# Parágrafos que contêm qualquer um destes termos (palavras inteiras) não vão para a LLM
+TERMOS_IRRELEVANTES = (
+    "política de privacidade", "cookies", "lgpd", "acessibilidade", "navegação", "teclas", "tab", "enter",
+    "rolagem", "ctrl", "command", "razão social", "cnpj", "endereço", "contato", "login", "termos de uso",
+    "sobre nós", "rodapé", "footer", "header", "menu", "navegador", "privacidade", "segurança", "captcha",
+    "WhatsApp",
+)
+
+
+def _alternativas(termos) -> str:
+    # Termos mais longos primeiro, para que "política de privacidade" vença "privacidade"
+    return "|".join(re.escape(t.lower()) for t in sorted(set(termos), key=len, reverse=True))
+
+
+def _iniciais(termos) -> str:
+    # Classe com as letras iniciais dos termos: descarta rápido as posições que não podem casar
+    return "".join(re.escape(c) for c in sorted({t[0].lower() for t in termos if t}))
+
+
+@lru_cache(maxsize=16)
+def compilar_termos_irrelevantes(termos: tuple):
+    # Uma única alternância com limites de palavra ("tab" não casa com "tabela" nem "estabelece"),
+    # aplicada sobre o parágrafo já em minúsculas (mais rápido que IGNORECASE)
+    if not termos:
+        return RE_NUNCA
+    return re.compile(rf'\b(?=[{_iniciais(termos)}])(?:{_alternativas(termos)})\b')
+
+
+@lru_cache(maxsize=16)
+def compilar_termos_institucionais(termos: tuple):
+    # Do termo até o fim do parágrafo (linha em branco), sem busca preguiçosa com lookahead
+    if not termos:
+        return RE_NUNCA
+    return re.compile(rf'\b(?=[{_iniciais(termos)}])(?:{_alternativas(termos)})[^\n]*(?:\n(?!\n)[^\n]*)*',
+                      re.IGNORECASE)
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ PROMPT PARA ANÁLISE DE CONTEÚDO DOS SITES ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+# O prompt é enviado em duas mensagens: tudo o que vem antes do bloco com {texto} (persona, regras,
+# resumo da base legal e data de referência) vai como mensagem de sistema, idêntica em todas as
+# chamadas de uma execução, e o bloco com o texto da página vai como mensagem do usuário. Com o
+# prefixo estável, o provedor reaproveita o processamento dele (cache de prompt) entre as chamadas.
+
+prompt_padrao = """
+Você é um jurista especializado em compliance, com larga experiência em Direito Administrativo, Direito Eleitoral e 
+ética na Administração Pública Federal.
+
+Atue de forma técnica, objetiva, fundamentada e neutra, sem emitir juízos políticos ou valorativos.
+[/PERSONA]
+
+[CONTEXTO]
+Durante o período eleitoral, é essencial que a Administração Pública observe rigorosamente as normas legais e éticas aplicáveis
+às comunicações institucionais, bem como as condutas que são vedadas por lei, regulamento, norma etc. 
+
+Para fins desta análise de conformidade, são considerados, EXCLUSIVAMENTE: 
+1 - O texto passado pelo usuário por meio da variável "texto";
+2 - a data do pleito passada por meio da variável "data_referencia"; e 
+3 - O RESUMO PRÉVIO DA BASE LEGAL processado na etapa resumo da base legal.
+
+[FLUXO]
+O texto já vem dividido em parágrafos numerados ([1], [2], ...). Com base nele, execute rigorosamente as seguintes etapas: 
+1 - Analise a conformidade de cada parágrafo numerado com relação ao RESUMO PRÉVIO DA BASE LEGAL.
+2 - Observe rigorosamente a data de início do pleito (data de referência informada pelo usuário) e as vedações correspondentes aos períodos de 3 e 6 meses que antecedem o pleito. As regras estão 
+na resultado do processamento da base legal. 
+
+RESUMO DA BASE LEGAL (referência única para julgar conformidade):
+\"\"\"{resumo_base_legal}\"\"\"
+
+Data de referência:
+\"\"\"{data_referencia}\"\"\"
+
+INSTRUÇÕES:
+- Foque apenas em notícias, comunicados ou textos institucionais relevantes; parágrafos estruturais (menus, rodapés,
+  avisos de cookies, acessibilidade, contato) são conformes.
+- Classifique cada parágrafo como conforme ou não conforme com base no resumo. Seja muito rigoroso nessa parte.
+- Atenção na data de referencia informada pelo usuário, pois, a partir dela é que se considera os períodos do defeso eleitoral. 
+  Não negligencie essa parte, é indispensável classificar a conformidade com relação aos períodos de defeso. 
+  Exemplo: eventos, acontecimentos ou ações anteriores aos períodos de defeso informados na base legal podem ser desconsiderados. 
+- NÃO repita o texto dos parágrafos e NÃO escreva nenhum texto explicativo, introdução, conclusão ou comentário.
+
+---------------------- RESULTADO ---------------------------------
+
+Responda com um objeto JSON com uma única chave, nao_conformes, contendo a lista dos números dos parágrafos não conformes:
+{{"nao_conformes": [2, 5]}}
+
+Se nenhum parágrafo for não conforme:
+{{"nao_conformes": []}}
+
+
+Texto para análise (parágrafos numerados):
+\"\"\"{texto}\"\"\"
+
+Responda SOMENTE com o objeto JSON. Nada mais.
+"""
+
+# Com o índice da base legal, o lugar do resumo na mensagem de sistema (estável) recebe este aviso e os
+# dispositivos recuperados para cada requisição vão na mensagem do usuário, antes do texto
+AVISO_DISPOSITIVOS = ("Os dispositivos da base legal aplicáveis a cada texto acompanham o próprio texto, "
+                      "na seção DISPOSITIVOS RELEVANTES DA BASE LEGAL.")
+CABECALHO_DISPOSITIVOS = "DISPOSITIVOS RELEVANTES DA BASE LEGAL (recuperados para este texto):"
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ CONFIGURAÇÕES DA ANÁLISE ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+
+@dataclass
+class ConfigColeta:
+    max_links: int = 5              # links internos por site
+    min_caracteres: int = 250       # tamanho mínimo do texto extraído para aceitar uma tentativa
+    profundidade: int = 1           # níveis de páginas de listagem seguidos a partir da semente
+    usar_sitemaps: bool = True      # sitemaps declarados no robots.txt (ou /sitemap.xml)
+    usar_feeds: bool = True         # feeds RSS, Atom e JSON Feed anunciados na página
+    atraso_por_host: float = 0.5    # segundos entre requisições ao mesmo site
+    termos_institucionais: tuple = TERMOS_INSTITUCIONAIS
+
+
+@dataclass
+class ConfigLLM:
+    modelo: str = GROQ_MODELS[0]
+    temperatura: float = 0.1
+    prompt: str = prompt_padrao
+    data_referencia: date = None
+    resumo_base_legal: str = None
+    # Com um índice (base_legal.IndiceBaseLegal), cada requisição leva só os dispositivos mais relevantes
+    # para o seu texto, em vez do resumo da base inteira
+    indice_base_legal: object = None
+    dispositivos_por_chamada: int = 5
+    usar_cache: bool = True         # reaproveita veredictos de parágrafos já analisados
+    max_tokens_entrada: int = 6000  # tokens de texto das páginas por requisição (limitado também pelo modelo)
+    max_tokens_saida: int = 256     # a resposta é só a lista de números; dobrado (até 4x) se vier truncada
+    termos_irrelevantes: tuple = TERMOS_IRRELEVANTES
+    streaming: bool = True          # com quem acompanhe a análise, avisa cada trecho não conforme assim que chega
+
+    @property
+    def data_referencia_str(self) -> str:
+        return self.data_referencia.strftime('%d/%m/%Y') if self.data_referencia else "não informada"
+
+    @property
+    def resumo_no_prompt(self) -> str:
+        # O que ocupa {resumo_base_legal} na mensagem de sistema
+        if self.indice_base_legal is not None:
+            return AVISO_DISPOSITIVOS
+        return self.resumo_base_legal
+
+
+@dataclass
+class ConfigAnalise:
+    coleta: ConfigColeta = field(default_factory=ConfigColeta)
+    llm: ConfigLLM = field(default_factory=ConfigLLM)
+    concorrencia: ConfigConcorrencia = field(default_factory=ConfigConcorrencia)
+    duplicatas: ConfigDuplicatas = field(default_factory=ConfigDuplicatas)
+    monitoramento: ConfigMonitoramento = field(default_factory=ConfigMonitoramento)
+    triagem: ConfigTriagem = field(default_factory=ConfigTriagem)
+    janela: ConfigJanela = field(default_factory=ConfigJanela)
+    http: ConfigHTTP = field(default_factory=ConfigHTTP)
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ FUNÇÕES AUXILIARES ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+# ◆━━━━━━ EXTRAÇÃO DO SUBDOMÍNIO: MUN.UF.GOV.BR OU UF.GOV.BR ━━━━━━◆
+
+def extrair_subdominio_gov(url: str) -> str:   # extrai o subdominio para facilitar a visualização
+
+    parsed = urlparse(url.strip()) # limpa os espaços e desmonta a URL
+    netloc = parsed.netloc.lower()
+
+    if ':' in netloc:
+        netloc = netloc.split(':')[0]
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    if not netloc.endswith('.gov.br'):
+        raise ValueError(f"A URL não termina com .gov.br: {url}")
+    dominio_sem_gov = netloc[:-7]
+    partes = dominio_sem_gov.split('.')
+    if len(partes) >= 2:
+        resultado = '.'.join(partes[-2:])
+    else:
+        resultado = partes[-1]
+    return resultado
+
+
+def limpar_texto(text: str, termos: tuple = TERMOS_INSTITUCIONAIS) -> str:
+    if not text:
+        return ""
+    # Remove blocos comuns que vazam em .gov.br
+    text = compilar_termos_institucionais(tuple(termos)).sub('', text)
+    text = RE_LINHAS_VAZIAS.sub('\n\n', text)
+    return text.strip()
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ FUNÇÃO PARA FILTRAR CONTEÚDO IRRELEVANTE ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# O objetivo do é filtrar os conteúdos que não correspondem a conteúdos estruturais da página
+
+def filtrar_conteudo_relevante(texto: str, termos: tuple = TERMOS_IRRELEVANTES) -> str:
+    if not texto:
+        return ""
+    # Remove seções inteiras que contenham palavras-chave; o padrão é compilado uma vez por lista de termos
+    padrao = compilar_termos_irrelevantes(tuple(termos))
+    blocos = RE_PARAGRAFOS.split(texto)  # separa por parágrafos duplos
+    blocos_filtrados = [bloco for bloco in blocos if not padrao.search(bloco.lower())]  # o que não está em bloco irrelevante passa.
+    return "\n\n".join(blocos_filtrados).strip()
+
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ LEITURA DA RESPOSTA DA LLM ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+def numerar_paragrafos(paragrafos: list) -> str:
+    # Texto enviado à LLM: os parágrafos segmentados localmente, numerados a partir de 1
+    return "\n\n".join(f"[{numero}] {paragrafo}" for numero, paragrafo in enumerate(paragrafos, 1))
+
+
+def interpretar_ids_llm(content: str, total: int):
+    # Índices (a partir de 0) dos parágrafos não conformes, ou None se a resposta não é o objeto JSON pedido.
+    # Números fora de 1..total são descartados; a contagem é calculada por quem chamou.
+    try:
+        dados = json.loads(content)
+    except json.JSONDecodeError:
+        # sem o modo JSON alguns modelos cercam o objeto com texto ou com ```json
+        encontrado = RE_OBJETO_JSON.search(content or "")
+        if not encontrado:
+            return None
+        try:
+            dados = json.loads(encontrado.group(0))
+        except json.JSONDecodeError:
+            return None
+
+    ids = dados.get("nao_conformes") if isinstance(dados, dict) else None
+    if not isinstance(ids, list):
+        return None
+    indices = set()
+    for valor in ids:
+        try:
+            numero = int(valor)
+        except (TypeError, ValueError):
+            continue
+        if 1 <= numero <= total:
+            indices.add(numero - 1)
+    return sorted(indices)
+
+
+def ids_parciais(parcial: str, total: int) -> list:
+    # Índices (a partir de 0) já completos em uma resposta ainda em streaming: um número só conta
+    # depois da vírgula ou do colchete que o fecha ("1" pode ser o começo de "12")
+    encontrado = RE_LISTA_PARCIAL.search(parcial or "")
+    if not encontrado:
+        return []
+    lista = encontrado.group(1) + ("]" if encontrado.end() < len(parcial) else "")
+    return [int(n) - 1 for n in RE_ID_COMPLETO.findall(lista) if 1 <= int(n) <= total]
+
+
+def _uso_zerado() -> dict:
+    # reenviados: parágrafos da página que voltaram à LLM porque a resposta veio truncada
+    return {"enviados": 0, "recebidos": 0, "em_cache": 0, "reenviados": 0}
+
+
+def _somar_uso(destino: dict, parcela: dict):
+    for chave in destino:
+        destino[chave] += parcela.get(chave, 0)
+
+
+def _uso_da_resposta(response) -> dict:
+    # em_cache: tokens enviados que o provedor reaproveitou do cache de prefixo (prompt_tokens_details)
+    uso = getattr(response, "usage", None)
+    detalhes = getattr(uso, "prompt_tokens_details", None)
+    if isinstance(detalhes, dict):
+        em_cache = detalhes.get("cached_tokens")
+    else:
+        em_cache = getattr(detalhes, "cached_tokens", None)
+    return {
+        "enviados": getattr(uso, "prompt_tokens", 0) or 0,
+        "recebidos": getattr(uso, "completion_tokens", 0) or 0,
+        "em_cache": em_cache or 0,
+    }
+
+
+def dividir_prompt(prompt: str):
+    # (prefixo, bloco do texto): o corte é a linha em branco que antecede o bloco com {texto}
+    posicao = prompt.index("{texto}")
+    corte = prompt.rfind("\n\n", 0, posicao)
+    corte = 0 if corte < 0 else corte + 1
+    return prompt[:corte], prompt[corte:]
+
+
+def montar_mensagens(prompt: str, texto: str, data_referencia: str, resumo_base_legal: str,
+                     dispositivos: list = None) -> list:
+    # Mensagem de sistema estável na execução (persona, regras, base legal, data) + mensagem com a página.
+    # dispositivos (base_legal.Passagem), se informados, vão na mensagem do usuário: mudam a cada requisição
+    prefixo, bloco_texto = dividir_prompt(prompt)
+    variaveis = {"data_referencia": data_referencia, "resumo_base_legal": resumo_base_legal}
+    mensagens = []
+    if prefixo.strip():
+        mensagens.append({"role": "system", "content": prefixo.format(texto="", **variaveis).strip()})
+    conteudo = bloco_texto.format(texto=texto, **variaveis).strip()
+    if dispositivos is not None:
+        trechos = "\n\n".join(p.formatar() for p in dispositivos) or "Nenhum dispositivo relacionado a este texto."
+        conteudo = f'{CABECALHO_DISPOSITIVOS}\n"""{trechos}"""\n\n{conteudo}'
+    mensagens.append({"role": "user", "content": conteudo})
+    return mensagens
+
+
+def prefixo_estavel(mensagens: list) -> str:
+    # Conteúdo da mensagem de sistema (o prefixo estável da execução); "" se o prompt personalizado não tem
+    # texto antes do bloco com {texto} e tudo vai na mensagem do usuário, que muda a cada requisição
+    return mensagens[0]["content"] if mensagens and mensagens[0]["role"] == "system" else ""
+
+
+def validar_prompt(prompt: str):
+    # Levanta ValueError se o prompt não aceitar as variáveis usadas na análise
+    try:
+        prompt.format(texto="", data_referencia="", resumo_base_legal="")
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"Erro no formato do prompt: {e}") from e
+    if "{texto}" not in prompt:
+        raise ValueError("Erro no formato do prompt: a variável {texto} é obrigatória")
+    # o modo JSON da API exige que o prompt peça a resposta em JSON
+    if "json" not in prompt.lower():
+        raise ValueError("Erro no formato do prompt: a resposta deve ser pedida em JSON ({\"nao_conformes\": [...]})")
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ MOTOR DE ANÁLISE ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+
+class MotorAnalise:
+    # Reúne os recursos compartilhados por todas as análises de um processo:
+    # agendador da API do Groq, cache de páginas, cache de veredictos e thread do Playwright.
+
+    def __init__(self, api_key: str, diretorio_cache: str = DIRETORIO_PADRAO, base_url: str = None,
+                 contextos_playwright: int = 3):
+        self.agendador = AgendadorGroq(api_key=api_key, base_url=base_url)
+        self.cortesia = Cortesia()
+        # Intervalos por etapa e eventos da execução em andamento (relatório com p50/p95 e sites mais lentos)
+        self.metricas = RegistroMetricas()
+        # Um só pool de conexões para descoberta de links e extração, em todas as análises do processo
+        # (timeouts, tentativas e conexões por domínio vêm de ConfigAnalise.http a cada análise)
+        self.cliente_http = ClienteHTTP(user_agent=USER_AGENT, metricas=self.metricas)
+        self.cache_http = CacheHTTP(diretorio_cache, cliente=self.cliente_http, cortesia=self.cortesia)
+        self.cache_veredictos = CacheVeredictos(diretorio_cache)
+        self.indices_base_legal = CacheIndices(diretorio_cache)
+        # PDFs/DOCX/HTML da base legal: convertidos pelo docling em uma thread própria, com cache por hash do arquivo
+        self.documentos = ConversorDocumentos(diretorio_cache)
+        self.snapshots = RepositorioSnapshots(diretorio_cache)
+        # O navegador só é iniciado na primeira página que precisar de renderização
+        self.renderizador = RenderizadorPlaywright(contextos=contextos_playwright)
+        self._lock = threading.Lock()
+        self._duplicatas = {"textos": 0, "grupos": 0, "duplicatas": 0}   # acumulado das execuções
+        self._prefixos = {}    # hash do prefixo do prompt → chamadas e tokens enviados/em cache
+        self._triagem = estatisticas_zeradas()   # acumulado das execuções em cascata
+        self._truncamento = {"respostas_truncadas": 0, "blocos_divididos": 0, "reenvios_max_tokens": 0}
+        self._datas = {"paginas": 0, "datadas": 0, "fora_da_janela": 0, "descartadas": 0, "links_fora_da_janela": 0,
+                       **{f"origem_{origem}": 0 for origem in ORIGENS_DATA}}
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ ANÁLISE COMPLETA DOS SITES ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def analisar_sites(self, urls: list, config: ConfigAnalise, ao_progredir=None, inicializador_thread=None,
+                       ao_concluir_pagina=None, ao_concluir_site=None, ao_encontrar_trecho=None,
+                       cancelado=None) -> list:
+        # Os callbacks de resultados parciais e cancelado() são os de executar_pipeline e rodam na thread que chamou
+        validar_prompt(config.llm.prompt)
+        prefixo = self.hash_prefixo(config.llm)
+        log.info(f"prefixo do prompt {prefixo}: "
+                 f"{contar_tokens(prefixo_estavel(self._mensagens(config.llm, '')))} tokens estáveis nesta execução")
+        self.cortesia.atraso_padrao = config.coleta.atraso_por_host
+        self.cliente_http.configurar(config.http)
+        self.metricas.reiniciar()
+        # O agrupador vale para a execução inteira: quase duplicatas são detectadas dentro e entre sites
+        agrupador = AgrupadorDuplicatas(config.duplicatas) if config.duplicatas.ativo else None
+
+        # Snapshot da execução e, no modo delta, veredictos herdados das páginas que não mudaram
+        monitor = None
+        if config.monitoramento.gravar or config.monitoramento.delta:
+            monitor = MonitorExecucao(self.snapshots, self.chave_snapshot(config.llm, config.triagem),
+                                      config.monitoramento,
+                                      lambda texto: self.impressao_texto(texto, config.llm))
+
+            def concluir_pagina(url, link, analise):
+                monitor.concluir_pagina(url, link, analise)
+                if ao_concluir_pagina:
+                    ao_concluir_pagina(url, link, analise)
+
+            def concluir_site(indice, resultado):
+                resultado["mudancas"] = monitor.relatorio(urls[indice], resultado)
+                if ao_concluir_site:
+                    ao_concluir_site(indice, resultado)
+        else:
+            concluir_pagina, concluir_site = ao_concluir_pagina, ao_concluir_site
+
+        # Janela do defeso: sem a data do pleito não há janela, e as datas das páginas nem são lidas
+        janela = janela_defeso(config.llm.data_referencia, config.janela.meses) if config.janela.ativa else None
+        descartar_fora = janela is not None and config.janela.descartar
+
+        def analisar_lote(textos, ao_encontrar=None):
+            # veredictos por parágrafo: páginas pequenas de sites diferentes dividem a mesma requisição
+            if config.triagem.ativa:
+                return self.analisar_lote_em_cascata(textos, config.llm, config.triagem, ao_encontrar)
+            return self.analisar_lote_com_llm(textos, config.llm, ao_encontrar)
+
+        try:
+            resultados = executar_pipeline(
+                urls,
+                coletar_links=lambda url: self.coletar_links_internos(url, config.coleta, janela, descartar_fora),
+                extrair=lambda link: self.extrair_texto(link, config.coleta.min_caracteres,
+                                                    config.coleta.termos_institucionais, janela, descartar_fora),
+                analisar=lambda texto: self.analisar_com_llm(texto, config.llm),
+                config=config.concorrencia,
+                ao_progredir=ao_progredir,
+                inicializador_thread=inicializador_thread,
+                agrupador=agrupador,
+                analisar_lote=analisar_lote,
+                medir=contar_tokens,
+                capacidade_lote=self.capacidade_entrada(config.llm),
+                ao_concluir_pagina=concluir_pagina,
+                ao_concluir_site=concluir_site,
+                ao_encontrar_trecho=ao_encontrar_trecho if config.llm.streaming else None,
+                cancelado=cancelado,
+                reaproveitar=monitor.reaproveitar if monitor else None,
+                metricas=self.metricas
+            )
+            if monitor:
+                for url, resultado in zip(urls, resultados):
+                    resultado["mudancas"] = monitor.relatorio(url, resultado)
+            return resultados
+        finally:
+            if agrupador is not None:
+                estatisticas = agrupador.estatisticas()
+                with self._lock:
+                    for chave in self._duplicatas:
+                        self._duplicatas[chave] += estatisticas[chave]
+
+    def estatisticas(self) -> dict:
+        return {
+            "llm": self.agendador.estatisticas(),
+            "cache_http": self.cache_http.estatisticas(),
+            "http": self.cliente_http.estatisticas(),
+            "cache_veredictos": self.cache_veredictos.estatisticas(),
+            "playwright": self.renderizador.estatisticas(),
+            "documentos": self.documentos.estatisticas(),
+            "duplicatas": self.estatisticas_duplicatas(),
+            "prefixos": self.estatisticas_prefixos(),
+            "triagem": self.estatisticas_triagem(),
+            "datas": self.estatisticas_datas(),
+            "truncamento": self.estatisticas_truncamento(),
+        }
+
+    def estatisticas_duplicatas(self) -> dict:
+        with self._lock:
+            estatisticas = dict(self._duplicatas)
+        textos = estatisticas["textos"]
+        estatisticas["taxa"] = round(estatisticas["duplicatas"] / textos, 3) if textos else 0.0
+        return estatisticas
+
+    def estatisticas_datas(self) -> dict:
+        with self._lock:
+            return dict(self._datas)
+
+    def estatisticas_truncamento(self) -> dict:
+        with self._lock:
+            return dict(self._truncamento)
+
+    def _contar_truncamento(self, chave: str, evento: str):
+        with self._lock:
+            self._truncamento[chave] += 1
+        self.metricas.contar(evento)
+
+    def _contar_datas(self, **incrementos):
+        with self._lock:
+            for chave, valor in incrementos.items():
+                self._datas[chave] += valor
+
+    def estatisticas_triagem(self) -> dict:
+        with self._lock:
+            return {chave: round(valor, 3) if isinstance(valor, float) else valor
+                    for chave, valor in self._triagem.items()}
+
+    def estatisticas_prefixos(self) -> dict:
+        with self._lock:
+            return {prefixo: dict(valores) for prefixo, valores in self._prefixos.items()}
+
+    def _registrar_prefixo(self, prefixo: str, uso: dict):
+        with self._lock:
+            valores = self._prefixos.setdefault(prefixo, {"chamadas": 0, "tokens_enviados": 0, "tokens_em_cache": 0})
+            valores["chamadas"] += 1
+            valores["tokens_enviados"] += uso["enviados"]
+            valores["tokens_em_cache"] += uso["em_cache"]
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ BASE LEGAL ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def indexar_base_legal(self, base_legal: str):
+        # Índice BM25 dos dispositivos da base (construído uma vez por texto e guardado em disco)
+        return self.indices_base_legal.indexar(base_legal)
+
+    def analisar_base_legal(self, base_legal: str, data_referencia: str, modeloIA: str) -> str:
+        # Levanta ErroLLM se a API falhar; quem chama decide como degradar
+        if not base_legal.strip():
+            return "Nenhuma base legal fornecida."
+
+        prompt_base_legal = f"""
+        
+        [PERSONA] 
+          Você é um jurista especializado em compliance, com experiência em Direito Administrativo, Direito Eleitoral e ética na Administração Pública Federal brasileira. 
+        [/PERSONA] 
+    
+        [CONTEXTO] 
+          Dada a base legal completa de referência e considerando como data do pleito a seguinte data informada pelo usuário \"\"\"{data_referencia}\"\"\", 
+        [/CONTEXTO] 
+    
+        [TAREFA] 
+          Elabore uma análise jurídica estruturada, hierárquica e densa e das vedações, proibições e condutas vedadas aos agentes públicos no período eleitoral. 
+            1. Calcule e indique expressamente: 
+              - o período de defeso iniciado 6 meses antes da data do pleito; 
+              - o período de defeso iniciado 3 meses antes da data do pleito. 
+            2. Analise rigorosamente as condutas vedadas aplicáveis a cada um desses períodos, tais como: 
+             - propaganda institucional; 
+             - uso de bens e serviços públicos; 
+             - outras vedações previstas na legislação eleitoral. 
+           3. Não considere turnos eleitorais. Todos os prazos devem ser calculados exclusivamente em relação à data do pleito informada. 
+           4. Utilize exatamente a seguinte estrutura de formato markdown (para facilitar parsing): 
+            - **Parágrafos com as Vedações principais** (liste com bullets numerados ou -) 
+            - **Indicações dos Períodos de incidência** (datas relativas à eleição) 
+            - **Parágrafos destacando as Exceções e condutas permitidas** 
+            - **Parágrafos indicando as Sanções típicas** (breve) 
+           5. A análise deve ser fiel à base legal fornecida, eliminando apenas redundâncias e linguagem prolixa, sem prejuízo da precisão jurídica. 
+           Destaque as vedações correspondentes aos dois períodos do defeso eleitoral que antecedem a data do pleito (data_referencia). 
+    
+     
+        Base legal completa: 
+        \"\"\"{base_legal}\"\"\" 
+        Responda exclusivamente com o documento da análise estruturada, sem introdução, contextualização inicial ou conclusão. 
+        [/TAREFA] 
+        """ 
+        # Carrega o prompt que será passado para análise pela LLM
+        messages = [{"role": "user", "content": prompt_base_legal}]
+
+        #Parâmetros utilizados pela LLM via API
+        response = self.agendador.completar(
+            model=modeloIA,
+            messages=messages,
+            temperature=0.1,  # baixa criatividade para fidelidade
+            max_tokens=1000
+        )
+        return response.choices[0].message.content.strip()
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ FUNÇÃO PARA COLETA DE LINKS DO SITE ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def coletar_links_internos(self, url: str, config: ConfigColeta, janela: tuple = None,
+                               descartar_fora: bool = False) -> list:
+        # Semente seguida das notícias mais prioritárias (sitemaps, feeds e âncoras); a semente fica no cache para a extração.
+        # Com a janela do defeso, links datados fora dela ficam para o fim (ou saem da seleção); links sem data
+        # usam a data lida da página numa extração anterior
+        fronteira = FronteiraRastreamento(
+            self.cache_http,
+            self.cortesia,
+            profundidade=config.profundidade,
+            usar_sitemaps=config.usar_sitemaps,
+            usar_feeds=config.usar_feeds,
+            janela=janela,
+            descartar_fora=descartar_fora,
+            data_conhecida=self.data_conhecida if janela is not None else None
+        )
+        with self.metricas.medir(ETAPA_COLETA, host(url)) as intervalo:
+            links = fronteira.coletar(url, config.max_links)
+            intervalo["links"] = len(links)
+        if fronteira.fora_da_janela:
+            self._contar_datas(links_fora_da_janela=fronteira.fora_da_janela)
+        return links
+
+    def data_conhecida(self, url: str):
+        # Data da página lida numa extração anterior (cache de derivados), sem acessar a rede
+        salvo = self.cache_http.obter_derivado(url, TIPO_DERIVADO_DATAS)
+        return converter_data(json.loads(salvo)[0]) if salvo else None
+
+    def data_da_pagina(self, url: str, resposta=None):
+        # (data, origem) da página baixada (ou só da URL, sem resposta); guardada com o validador do corpo
+        if resposta is not None:
+            salvo = self.cache_http.obter_derivado(url, TIPO_DERIVADO_DATAS, resposta.validador)
+            if salvo is not None:
+                data, origem = json.loads(salvo)
+                return converter_data(data), origem
+        from trafilatura.utils import decode_file
+
+        with self.metricas.medir(ETAPA_DATA) as intervalo:
+            data, origem = data_publicacao(url, decode_file(resposta.corpo) if resposta is not None else None)
+            intervalo["camada"] = origem or "sem_data"
+        if resposta is not None:
+            self.cache_http.salvar_derivado(url, TIPO_DERIVADO_DATAS,
+                                            json.dumps([data.isoformat() if data else None, origem]),
+                                            resposta.validador)
+        return data, origem
+
+    def _fora_da_janela(self, url: str, resposta, janela: tuple, descartar_fora: bool) -> bool:
+        # Lê a data da página e diz se ela deve ser descartada antes da extração
+        data, origem = self.data_da_pagina(url, resposta)
+        fora = fora_da_janela(data, janela)
+        self._contar_datas(paginas=1, datadas=int(data is not None), fora_da_janela=int(fora),
+                           descartadas=int(fora and descartar_fora), **({f"origem_{origem}": 1} if origem else {}))
+        if fora and descartar_fora:
+            log.debug(f"fora da janela do defeso ({data:%d/%m/%Y}, {origem}) → {url}")
+        return fora and descartar_fora
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ FUNÇÃO PARA EXTRAÇÃO DE TEXTO ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def extrair_texto(self, url: str, min_length, termos: tuple = TERMOS_INSTITUCIONAIS, janela: tuple = None,
+                      descartar_fora: bool = False) -> str:
+        from trafilatura.utils import decode_file
+
+        # Extração robusta para portais .gov.br:
+        # Prioriza velocidade → fallback playwright só se necessário
+        # O texto fica no cache antes da limpeza, que depende dos termos configurados
+
+        # Primeira tentativa -> leve e rápida (cache em disco com revalidação condicional).
+        # Portal fora do ar (ErroRede) é falha do link: o navegador também não chegaria lá;
+        # só uma resposta recusada ou vazia (403, página montada por JavaScript) vai ao Playwright
+        # A camada que produziu o texto (cache, trafilatura, beautifulsoup, playwright ou nenhuma)
+        # vai para o intervalo da extração, que conta no tempo do site; cada camada tentada
+        # (e o download) tem também o seu próprio intervalo
+        # Com a janela do defeso, a data da página é lida logo depois do download: uma página datada
+        # fora da janela é descartada (camada "fora_da_janela") sem extração, Playwright nem LLM
+        with self.metricas.medir(ETAPA_EXTRACAO, host(url), camada="nenhuma") as extracao:
+            with self.metricas.medir(ETAPA_DOWNLOAD) as download:
+                resposta = self.cache_http.obter(url, propagar_erro_rede=True)
+                if resposta:
+                    download["bytes"], download["origem"] = len(resposta.corpo), resposta.origem
+            if janela is not None and self._fora_da_janela(url, resposta, janela, descartar_fora):
+                extracao["camada"] = "fora_da_janela"
+                return ""
+            if not resposta:
+                return limpar_texto(self.tentar_playwright(url, min_length, extracao=extracao), termos)
+
+            # Página inalterada desde a última extração → reaproveita o texto sem reprocessar
+            tipo = f"texto:{min_length}"
+            texto_salvo = self.cache_http.obter_derivado(url, tipo, resposta.validador)
+            if texto_salvo is not None:
+                extracao["camada"] = "cache"
+                return limpar_texto(texto_salvo, termos)
+
+            text = self._extrair_do_html(url, decode_file(resposta.corpo), min_length, resposta.validador, extracao)
+            if text:
+                self.cache_http.salvar_derivado(url, tipo, text, resposta.validador)
+            extracao["bytes"] = len(text or "")
+            return limpar_texto(text, termos)
+
+    def _extrair_do_html(self, url: str, downloaded: str, min_length, validador: str, extracao: dict = None) -> str:
+        import trafilatura
+        from bs4 import BeautifulSoup
+
+        extracao = extracao if extracao is not None else {}
+
+        # A. Trafilatura otimizado (melhor recall em notícias)
+        with self.metricas.medir(ETAPA_TRAFILATURA, bytes=len(downloaded)):
+            text = trafilatura.extract(
+                downloaded,
+                favor_recall=True,
+                favor_precision=True,
+                include_comments=False,
+                include_tables=False,
+                include_formatting=False,
+                output_format="txt",
+                no_fallback=False
+            )
+        if text and len(text.strip()) >= min_length:
+            extracao["camada"] = "trafilatura"
+            return text
+
+        try:
+            with self.metricas.medir(ETAPA_BEAUTIFULSOUP, bytes=len(downloaded)):
+                soup = BeautifulSoup(downloaded, "lxml")
+                for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside", "form"]):
+                    tag.decompose()
+                text = soup.get_text(separator="\n", strip=True)
+                text = RE_QUEBRAS_TRIPLAS.sub('\n\n', text).strip()
+            if len(text) >= min_length:
+                extracao["camada"] = "beautifulsoup"
+                return text
+        except:
+            pass
+
+        # Último recurso: browser real (Playwright)
+        return self.tentar_playwright(url, min_length, validador, extracao)
+
+    def tentar_playwright(self, url: str, min_length: int, validador: str = None, extracao: dict = None) -> str:
+        # A renderização é reaproveitada enquanto o HTML de origem não mudar (validador = hash do corpo);
+        # sem HTML de origem, vale apenas dentro da janela de frescor do cache
+        tipo = f"playwright:{min_length}"
+        idade_max = None if validador else self.cache_http.idade_fresca
+        texto_salvo = self.cache_http.obter_derivado(url, tipo, validador, idade_max=idade_max)
+        if texto_salvo is not None:
+            if extracao is not None:
+                extracao["camada"] = "playwright"
+            return texto_salvo
+
+        # Chamado pelas threads do pipeline; a renderização roda no event loop do renderizador,
+        # com até `contextos` páginas em paralelo
+        with self.metricas.medir(ETAPA_PLAYWRIGHT) as intervalo:
+            conteudo = self.renderizador.renderizar(url)
+            intervalo["bytes"] = len(conteudo or "")
+        texto = conteudo if conteudo and len(conteudo) >= min_length else ""
+        if texto:
+            self.cache_http.salvar_derivado(url, tipo, texto, validador)
+            if extracao is not None:
+                extracao["camada"] = "playwright"
+        return texto
+
+    # ░░░░░░░░░░░░░░░ FUNÇÃO PARA ANÁLISE COM LLM - chamada da API do Groq ░░░░░░░░░░░░░░░░░░░░░
+
+    def _mensagens(self, config: ConfigLLM, texto: str) -> list:
+        return montar_mensagens(config.prompt, texto, config.data_referencia_str, config.resumo_no_prompt)
+
+    def hash_prefixo(self, config: ConfigLLM) -> str:
+        # Identifica a mensagem de sistema da execução (prompt, base legal e data já preenchidos)
+        return hash_texto(prefixo_estavel(self._mensagens(config, "")))[:16]
+
+    def capacidade_entrada(self, config: ConfigLLM) -> int:
+        # Tokens de texto de página por requisição, descontados o prompt, o resumo (ou os maiores
+        # dispositivos que podem ser recuperados) e a resposta
+        fixo = sum(contar_tokens(mensagem["content"]) for mensagem in self._mensagens(config, ""))
+        if config.indice_base_legal is not None:
+            fixo += contar_tokens(CABECALHO_DISPOSITIVOS) + 8 + \
+                config.indice_base_legal.tokens_maximos(config.dispositivos_por_chamada)
+        return capacidade_entrada(config.modelo, fixo, config.max_tokens_saida,
+                                  config.max_tokens_entrada, self.agendador.limites(config.modelo).tpm)
+
+    def analisar_com_llm(self, texto: str, config: ConfigLLM):
+        # Devolve (trechos, contagem, uso) ou None se a LLM não julgou a página
+        return self.analisar_lote_com_llm([texto], config)[0]
+
+    def analisar_lote_com_llm(self, textos: list, config: ConfigLLM, ao_encontrar=None) -> list:
+        # Analisa várias páginas com o menor número de requisições. Cada página é segmentada aqui em
+        # parágrafos, que são a unidade de contagem: os já julgados reaproveitam o veredicto (usar_cache) e
+        # os inéditos de todas as páginas são numerados e distribuídos em blocos que cabem no orçamento de
+        # tokens. A LLM devolve só os números dos não conformes; a contagem é calculada localmente e cada
+        # veredicto (e os tokens gastos) volta para a sua página.
+        # Devolve, por página, (trechos, contagem, uso) ou None se algum parágrafo ficou sem veredicto.
+        # ao_encontrar(indice_pagina, trecho), se informado, é chamado (em qualquer thread) para cada trecho
+        # não conforme assim que o número dele chega no streaming, antes do fim da requisição.
+        data_ref_str = config.data_referencia_str
+        capacidade = self.capacidade_entrada(config)
+        paginas = self._segmentar(textos, config, capacidade)
+
+        veredictos = {}
+        if config.usar_cache:
+            veredictos = self.cache_veredictos.obter_muitos([chave for pagina in paginas for chave, _ in pagina])
+
+        # cada parágrafo inédito é enviado uma vez e seus tokens são cobrados da primeira página que o contém
+        ineditos, donos = {}, {}
+        for indice, pagina in enumerate(paginas):
+            for chave, paragrafo in pagina:
+                if chave not in veredictos and chave not in ineditos:
+                    ineditos[chave] = paragrafo
+                    donos[chave] = indice
+
+        paginas_da_chave = {}
+        for indice, pagina in enumerate(paginas):
+            for chave, _ in pagina:
+                paginas_da_chave.setdefault(chave, []).append(indice)
+        avisadas = set()
+
+        def avisar(chave):
+            # um mesmo parágrafo pode reaparecer em novas tentativas e em blocos divididos
+            if chave in avisadas:
+                return
+            avisadas.add(chave)
+            for indice in dict.fromkeys(paginas_da_chave[chave]):
+                ao_encontrar(indice, ineditos[chave])
+
+        custos = {}
+        chaves_ineditas = list(ineditos)
+        tokens = {chave: contar_tokens(paragrafo) + TOKENS_NUMERACAO for chave, paragrafo in ineditos.items()}
+        for bloco in planejar_blocos([tokens[c] for c in chaves_ineditas], capacidade):
+            chaves_bloco = [chaves_ineditas[i] for i in bloco]
+            try:
+                respostas = self._consultar_bloco(
+                    [ineditos[c] for c in chaves_bloco], config, data_ref_str,
+                    ao_encontrar=(lambda posicao, chaves=chaves_bloco: avisar(chaves[posicao])) if ao_encontrar else None)
+            except (ErroLLM, ValueError) as e:
+                self.metricas.contar(EVENTO_BLOCO_NAO_ANALISADO)
+                log.warning(f"bloco com {len(chaves_bloco)} parágrafo(s) não foi analisado → {str(e)[:90]}")
+                continue
+            novos = {}
+            for inicio, fim, nao_conformes, uso, reenviada in respostas:
+                sub = chaves_bloco[inicio:fim]
+                for chave, parte in zip(sub, ratear_uso(uso, [tokens[c] for c in sub])):
+                    custos[chave] = {**parte, "reenviados": int(reenviada)}
+                if nao_conformes is None:
+                    # resposta fora do formato: não grava veredictos que não foram emitidos
+                    self.metricas.contar(EVENTO_RESPOSTA_FORA_DO_FORMATO)
+                    log.warning(f"resposta sem o objeto JSON esperado; {len(sub)} parágrafo(s) sem veredicto")
+                    continue
+                nao_conformes = set(nao_conformes)
+                for posicao, chave in enumerate(sub):
+                    if posicao in nao_conformes:
+                        novos[chave] = (VEREDICTO_NAO_CONFORME, [ineditos[chave]])
+                    else:
+                        novos[chave] = (VEREDICTO_CONFORME, [])
+            if config.usar_cache:
+                self.cache_veredictos.salvar_muitos(novos)
+            veredictos.update(novos)
+
+        resultados = []
+        for indice, pagina in enumerate(paginas):
+            uso = _uso_zerado()
+            for chave, _ in pagina:
+                if donos.get(chave) == indice and chave in custos:
+                    _somar_uso(uso, custos.pop(chave))
+            if any(chave not in veredictos for chave, _ in pagina):
+                resultados.append(None)
+                continue
+            trechos_nao_conformes = []
+            nao_conformes = 0
+            for chave, _ in pagina:
+                veredicto, trechos = veredictos[chave]
+                if veredicto == VEREDICTO_NAO_CONFORME:
+                    nao_conformes += 1
+                    trechos_nao_conformes.extend(trechos)
+            resultados.append((trechos_nao_conformes, [len(pagina), len(pagina) - nao_conformes, nao_conformes], uso))
+        return resultados
+
+    def _segmentar(self, textos: list, config: ConfigLLM, capacidade: int) -> list:
+        # Por página, [(chave do veredicto, parágrafo)]: parágrafos relevantes, fatiados para caber em uma requisição
+        data_ref_str = config.data_referencia_str
+        hash_prompt, hash_resumo = hash_texto(config.prompt), self._hash_base_legal(config)
+        paginas = []
+        for texto in textos:
+            with self.metricas.medir(ETAPA_FILTRAGEM, bytes=len(texto)):
+                paragrafos = [
+                    pedaco
+                    for paragrafo in dividir_paragrafos(filtrar_conteudo_relevante(texto, config.termos_irrelevantes))
+                    for pedaco in fatiar_paragrafo(paragrafo, capacidade)
+                ]
+            chaves = [chave_paragrafo(p, hash_prompt, config.modelo, config.temperatura, data_ref_str, hash_resumo)
+                      for p in paragrafos]
+            paginas.append(list(zip(chaves, paragrafos)))
+        return paginas
+
+    def analisar_lote_em_cascata(self, textos: list, config: ConfigLLM, triagem: ConfigTriagem,
+                                 ao_encontrar=None) -> list:
+        # Mesmo contrato de analisar_lote_com_llm, com a triagem em camadas (ver triagem.py): pontuação léxica,
+        # modelo rápido e, só para as páginas marcadas, o modelo grande com o prompt completo. Uma página
+        # resolvida antes do modelo grande tem todos os parágrafos conformes; uma página que o modelo rápido
+        # não conseguiu julgar sobe para o modelo grande.
+        contadores = estatisticas_zeradas()
+        contadores["paginas"] = len(textos)
+        paginas = self._segmentar(textos, config, self.capacidade_entrada(config))
+        julgados = {}
+        if config.usar_cache:
+            julgados = self.cache_veredictos.obter_muitos([chave for pagina in paginas for chave, _ in pagina])
+
+        resultados = [None] * len(textos)
+        ja_julgadas, rapidas, grandes = [], [], []
+        usos_rapidos = {}
+
+        def resolver(indice, uso):
+            total = len(paginas[indice])
+            resultados[indice] = ([], [total, total, 0], uso)
+            contadores["tokens_evitados"] += sum(contar_tokens(paragrafo) for _, paragrafo in paginas[indice])
+
+        for indice, texto in enumerate(textos):
+            with self.metricas.medir(ETAPA_TRIAGEM, bytes=len(texto)) as intervalo:
+                # o julgamento que o modelo grande já fez vale mais que a triagem
+                if paginas[indice] and all(chave in julgados for chave, _ in paginas[indice]):
+                    intervalo["camada"] = CAMADA_JA_JULGADA
+                    ja_julgadas.append(indice)
+                    continue
+                pontuacao = pontuar_risco(texto, triagem.candidatos)
+                if pontuacao < triagem.limiar_lexico:
+                    intervalo["camada"] = CAMADA_LEXICO
+                    contadores["resolvidas_lexico"] += 1
+                    resolver(indice, _uso_zerado())
+                elif pontuacao >= triagem.limiar_direto or not triagem.usar_modelo_rapido:
+                    intervalo["camada"] = CAMADA_MODELO_GRANDE
+                    contadores["escaladas_direto"] += int(pontuacao >= triagem.limiar_direto)
+                    grandes.append(indice)
+                else:
+                    intervalo["camada"] = CAMADA_MODELO_RAPIDO
+                    rapidas.append(indice)
+
+        if rapidas:
+            # prompt curto, sem base legal: o modelo rápido só separa o que precisa de análise
+            config_rapido = replace(config, modelo=triagem.modelo_rapido, prompt=triagem.prompt_rapido,
+                                    resumo_base_legal=None, indice_base_legal=None, streaming=False)
+            inicio = time.perf_counter()
+            triadas = self.analisar_lote_com_llm([textos[i] for i in rapidas], config_rapido)
+            contadores["tempo_modelo_rapido_s"] += time.perf_counter() - inicio
+            contadores["triadas_modelo_rapido"] += len(rapidas)
+            for indice, triada in zip(rapidas, triadas):
+                if triada is None:
+                    grandes.append(indice)
+                    continue
+                contadores["tokens_modelo_rapido"] += triada[2]["enviados"] + triada[2]["recebidos"]
+                if triada[1][2] == 0:
+                    contadores["resolvidas_modelo_rapido"] += 1
+                    resolver(indice, triada[2])
+                else:
+                    usos_rapidos[indice] = triada[2]
+                    grandes.append(indice)
+
+        enviadas = ja_julgadas + sorted(grandes)
+        if enviadas:
+            inicio = time.perf_counter()
+            analises = self.analisar_lote_com_llm(
+                [textos[i] for i in enviadas], config,
+                (lambda posicao, trecho: ao_encontrar(enviadas[posicao], trecho)) if ao_encontrar else None)
+            contadores["tempo_modelo_grande_s"] += time.perf_counter() - inicio
+            contadores["escaladas"] += len(grandes)
+            for indice, analise in zip(enviadas, analises):
+                resultados[indice] = analise
+                if analise is None or indice in ja_julgadas:
+                    continue
+                contadores["tokens_modelo_grande"] += analise[2]["enviados"] + analise[2]["recebidos"]
+                contadores["confirmadas_modelo_grande"] += int(analise[1][2] > 0)
+                if indice in usos_rapidos:
+                    _somar_uso(analise[2], usos_rapidos[indice])
+        contadores["ja_julgadas"] = len(ja_julgadas)
+
+        with self._lock:
+            for chave, valor in contadores.items():
+                self._triagem[chave] += valor
+        return resultados
+
+    def impressao_texto(self, texto: str, config: ConfigLLM) -> str:
+        # Impressão digital do texto como ele chega à LLM (depois de filtrar_conteudo_relevante)
+        return hash_texto(normalizar_paragrafo(filtrar_conteudo_relevante(texto, config.termos_irrelevantes)))
+
+    def chave_snapshot(self, config: ConfigLLM, triagem: ConfigTriagem = None) -> str:
+        # Snapshots só são comparáveis (e herdáveis) entre execuções com a mesma configuração de julgamento
+        partes = [hash_texto(config.prompt), config.modelo, round(float(config.temperatura), 3),
+                  config.data_referencia_str, self._hash_base_legal(config), list(config.termos_irrelevantes)]
+        if triagem is not None and triagem.ativa:
+            partes.append([triagem.limiar_lexico, triagem.limiar_direto, triagem.usar_modelo_rapido,
+                           triagem.modelo_rapido, hash_texto(triagem.prompt_rapido), list(triagem.candidatos)])
+        return hash_texto(json.dumps(partes))
+
+    def _hash_base_legal(self, config: ConfigLLM) -> str:
+        # Entra na chave dos veredictos: resumo ou índice (e quantos dispositivos cada requisição recebe)
+        if config.indice_base_legal is not None:
+            return hash_texto(f"{config.indice_base_legal.hash}:{config.dispositivos_por_chamada}")
+        return hash_texto(config.resumo_base_legal)
+
+    def _dispositivos(self, paragrafos: list, config: ConfigLLM):
+        # Os k dispositivos mais relevantes para o texto da requisição (None sem índice)
+        if config.indice_base_legal is None:
+            return None
+        return config.indice_base_legal.buscar("\n".join(paragrafos), config.dispositivos_por_chamada)
+
+    def _consultar_bloco(self, paragrafos: list, config: ConfigLLM, data_ref_str: str, max_tokens: int = None,
+                         ao_encontrar=None) -> list:
+        # Devolve [(inicio, fim, nao_conformes, uso, reenviada)] cobrindo os parágrafos do bloco, com os índices
+        # não conformes relativos a cada parte (None se a resposta não pôde ser lida). Resposta truncada
+        # (finish_reason == "length") é um JSON incompleto: o bloco é dividido ao meio e reenviado; um
+        # parágrafo sozinho é reenviado com o dobro de max_tokens, até 4x o configurado. reenviada diz se a
+        # parte só foi julgada depois de uma resposta truncada; cada caso é contado em estatisticas_truncamento.
+        # ao_encontrar(posicao) recebe a posição, no bloco, de cada não conforme lido durante o streaming.
+        max_tokens = max_tokens or config.max_tokens_saida
+        nao_conformes, uso, truncada = self._consultar_llm(paragrafos, config, data_ref_str, max_tokens, ao_encontrar)
+        if not truncada:
+            return [(0, len(paragrafos), nao_conformes, uso, False)]
+
+        self._contar_truncamento("respostas_truncadas", EVENTO_RESPOSTA_TRUNCADA)
+        if len(paragrafos) > 1:
+            meio = len(paragrafos) // 2
+            self._contar_truncamento("blocos_divididos", EVENTO_BLOCO_DIVIDIDO)
+            log.info(f"resposta truncada; bloco de {len(paragrafos)} parágrafos dividido em dois")
+            respostas = self._consultar_bloco(paragrafos[:meio], config, data_ref_str, max_tokens, ao_encontrar)
+            segunda = self._consultar_bloco(paragrafos[meio:], config, data_ref_str, max_tokens,
+                                            (lambda posicao: ao_encontrar(posicao + meio)) if ao_encontrar else None)
+            respostas += [(inicio + meio, fim + meio, n, u, r) for inicio, fim, n, u, r in segunda]
+        elif max_tokens < 4 * config.max_tokens_saida:
+            self._contar_truncamento("reenvios_max_tokens", EVENTO_REENVIO_MAX_TOKENS)
+            log.info(f"resposta truncada; parágrafo reenviado com max_tokens={max_tokens * 2}")
+            respostas = self._consultar_bloco(paragrafos, config, data_ref_str, max_tokens * 2, ao_encontrar)
+        else:
+            return [(0, len(paragrafos), nao_conformes, uso, False)]   # aceita o que foi possível interpretar
+
+        # os tokens da tentativa truncada também foram gastos
+        _somar_uso(respostas[0][3], uso)
+        return [(inicio, fim, n, u, True) for inicio, fim, n, u, _ in respostas]
+
+    def _consultar_llm(self, paragrafos: list, config: ConfigLLM, data_ref_str: str, max_tokens: int = None,
+                       ao_encontrar=None):
+        # Devolve (nao_conformes, uso, truncada), com nao_conformes = índices dos parágrafos ou None.
+        # Erros de formato do prompt (ValueError) e da API (ErroLLM) sobem para quem chamou,
+        # que conta o link como falha em vez de somar uma contagem zerada
+        validar_prompt(config.prompt)
+        # prefixo estável (sistema) + parágrafos numerados da página (usuário)
+        with self.metricas.medir(ETAPA_PROMPT) as intervalo:
+            messages = montar_mensagens(config.prompt, numerar_paragrafos(paragrafos), data_ref_str,
+                                        config.resumo_no_prompt, self._dispositivos(paragrafos, config))
+            intervalo["bytes"] = sum(len(m["content"]) for m in messages)
+        parametros = {}
+        if config.streaming and ao_encontrar:
+            avisados = set()
+
+            def ao_receber(parcial):
+                # roda na thread do agendador: só lê os números completos e repassa os novos
+                for indice in ids_parciais(parcial, len(paragrafos)):
+                    if indice not in avisados:
+                        avisados.add(indice)
+                        ao_encontrar(indice)
+
+            parametros = {"stream": True, "ao_receber": ao_receber}
+        with self.metricas.medir(ETAPA_LLM, modelo=config.modelo) as intervalo:
+            response = self.agendador.completar(
+                model=config.modelo,
+                messages=messages,
+                temperature=config.temperatura,
+                max_tokens=max_tokens or config.max_tokens_saida,
+                response_format={"type": "json_object"},   # a resposta é só a lista de números
+                **parametros
+            )
+            uso = _uso_da_resposta(response)
+            intervalo.update({f"tokens_{chave}": valor for chave, valor in uso.items()})
+
+        escolha = response.choices[0]
+        with self.metricas.medir(ETAPA_RESPOSTA) as intervalo:
+            content = (escolha.message.content or "").strip()
+            intervalo["bytes"] = len(content)
+            nao_conformes = interpretar_ids_llm(content, len(paragrafos))
+        self._registrar_prefixo(hash_texto(prefixo_estavel(messages))[:16], uso)
+        return nao_conformes, uso, escolha.finish_reason == "length"
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        RENDERIZAÇÃO ENXUTA COM PLAYWRIGHT (ÚLTIMO RECURSO)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# O Playwright roda com a API assíncrona em um event loop próprio (thread dedicada), com
+# um pool de contextos já criados e reutilizados entre as páginas. Cada contexto aborta
+# imagens, mídia, fontes e rastreadores; a página é considerada pronta quando o seletor de
+# conteúdo aparece (em vez de esperar a rede ficar ociosa) e o banner de consentimento é
+# tratado em paralelo com um único locator combinado. Cada contexto do pool leva junto o
+# navegador que o criou: se o navegador cair, os contextos dele não voltam ao pool, e quem
+# espera por um contexto reavalia o navegador a cada ESPERA_CONTEXTO_S (relançando-o se preciso).
+
+SELETOR_CONTEUDO = 'article, main, [role="main"], #content, .entry-content, .post-content, .noticia-conteudo'
+
+SCRIPT_CONTEUDO = """
+    (seletor) => {
+        const main = document.querySelector(seletor);
+        return (main || document.body).innerText.trim();
+    }
+"""
+
+TIPOS_BLOQUEADOS = {"image", "media", "font", "imageset", "object", "texttrack", "beacon", "csp_report", "ping"}
+
+RE_RASTREADORES = re.compile(
+    r'google-analytics\.com|googletagmanager\.com|doubleclick\.net|facebook\.(net|com)/tr|connect\.facebook\.net|'
+    r'hotjar\.com|clarity\.ms|googlesyndication\.com|adservice\.google|vlibras\.gov\.br|youtube\.com/embed|'
+    r'barra\.sistema\.gov\.br|addthis\.com|sharethis\.com', re.I)
+
+RE_BOTAO_ACEITE = re.compile(r'^\s*(aceitar|aceito|concordar|concordo|ok|continuar|fechar|entendi)\b', re.I)
+
+ESPERA_CONTEXTO_S = 5.0      # espera máxima na fila de contextos antes de conferir o navegador de novo
+MAX_TEMPOS = 1000            # páginas com o tempo de renderização guardado (as mais antigas saem)
+
+USER_AGENT_NAVEGADOR = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0"
+
+log = logging.getLogger(__name__)
+
+
+class RenderizadorPlaywright:
+
+    def __init__(self,
+                 contextos: int = 3,
+                 timeout_navegacao_ms: int = 35000,
+                 timeout_conteudo_ms: int = 8000,
+                 timeout_banner_ms: int = 2000):
+        self.contextos = max(1, contextos)
+        self.timeout_navegacao_ms = timeout_navegacao_ms
+        self.timeout_conteudo_ms = timeout_conteudo_ms
+        self.timeout_banner_ms = timeout_banner_ms
+
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._navegador = None
+        self._fila_contextos = None
+        self._lock_inicio = None
+
+        self._lock_estatisticas = threading.Lock()
+        self._tempos = {}            # url → segundos de renderização (até MAX_TEMPOS, mais recentes)
+        self._bloqueadas = 0
+        self._falhas = 0
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ INTERFACE SÍNCRONA ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def renderizar(self, url: str) -> str:
+        # Devolve o texto visível da área de conteúdo ("" em caso de falha); pode ser chamado de qualquer thread
+        loop = self._get_loop()
+        return asyncio.run_coroutine_threadsafe(self._renderizar(url), loop).result()
+
+    def estatisticas(self) -> dict:
+        with self._lock_estatisticas:
+            tempos = sorted(self._tempos.items(), key=lambda item: item[1], reverse=True)
+            return {
+                "paginas": len(tempos),
+                "falhas": self._falhas,
+                "requisicoes_bloqueadas": self._bloqueadas,
+                "tempo_medio_s": round(sum(t for _, t in tempos) / len(tempos), 2) if tempos else 0.0,
+                "tempo_max_s": round(tempos[0][1], 2) if tempos else 0.0,
+                "mais_lentas": [(url, round(t, 2)) for url, t in tempos[:5]],
+                "tempos_por_pagina": dict(self._tempos),
+            }
+
+    def fechar(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._encerrar(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ EXECUÇÃO NO EVENT LOOP ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="playwright", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def _iniciar(self):
+        # Sobe o navegador e aquece o pool de contextos (também após uma queda do navegador)
+        if self._lock_inicio is None:
+            self._lock_inicio = asyncio.Lock()
+            self._fila_contextos = asyncio.Queue()
+        async with self._lock_inicio:
+            if self._navegador is not None and self._navegador.is_connected():
+                return
+            await self._lancar_navegador()
+
+    async def _lancar_navegador(self):
+        from playwright.async_api import async_playwright  # só carregado quando o fallback é necessário
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._navegador = await self._playwright.firefox.launch(headless=True, timeout=50000)
+        # contextos do navegador anterior são descartados; quem espera na fila recebe os novos.
+        # Contextos em uso no navegador anterior são descartados ao terminar (ver _renderizar)
+        while not self._fila_contextos.empty():
+            self._fila_contextos.get_nowait()
+        for _ in range(self.contextos):
+            contexto = await self._navegador.new_context(
+                user_agent=USER_AGENT_NAVEGADOR,
+                locale="pt-BR",
+                viewport={"width": 1280, "height": 900}
+            )
+            await contexto.route("**/*", self._filtrar_requisicao)
+            self._fila_contextos.put_nowait((self._navegador, contexto))
+
+    async def _encerrar(self):
+        if self._navegador is not None:
+            await self._navegador.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._navegador = self._playwright = None
+
+    async def _filtrar_requisicao(self, route):
+        requisicao = route.request
+        if requisicao.resource_type in TIPOS_BLOQUEADOS or RE_RASTREADORES.search(requisicao.url):
+            with self._lock_estatisticas:
+                self._bloqueadas += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _aguardar_conteudo(self, pagina):
+        try:
+            await pagina.wait_for_selector(SELETOR_CONTEUDO, state="attached", timeout=self.timeout_conteudo_ms)
+        except Exception:
+            pass  # sem área de conteúdo reconhecível: usa o body
+
+    async def _fechar_banner(self, pagina):
+        try:
+            await pagina.get_by_role("button", name=RE_BOTAO_ACEITE).first.click(timeout=self.timeout_banner_ms)
+        except Exception:
+            pass  # página sem banner de consentimento
+
+    async def _obter_contexto(self):
+        # (navegador, contexto) livre do navegador atual; se o navegador cair durante a espera, é relançado
+        while True:
+            await self._iniciar()
+            try:
+                navegador, contexto = await asyncio.wait_for(self._fila_contextos.get(), ESPERA_CONTEXTO_S)
+            except asyncio.TimeoutError:
+                continue
+            if navegador is self._navegador and navegador.is_connected():
+                return navegador, contexto
+
+    async def _renderizar(self, url: str) -> str:
+        navegador, contexto = await self._obter_contexto()
+        inicio = time.perf_counter()
+        pagina = None
+        try:
+            pagina = await contexto.new_page()
+            await pagina.goto(url, wait_until="domcontentloaded", timeout=self.timeout_navegacao_ms)
+            # o banner é tratado enquanto se espera o conteúdo; se não aparecer até lá, não atrasa a página
+            tarefa_banner = asyncio.ensure_future(self._fechar_banner(pagina))
+            await self._aguardar_conteudo(pagina)
+            if not tarefa_banner.done():
+                tarefa_banner.cancel()
+            await asyncio.gather(tarefa_banner, return_exceptions=True)
+
+            # Rolagem leve para lazy-load
+            await pagina.evaluate("window.scrollTo(0, document.body.scrollHeight);")
+            conteudo = await pagina.evaluate(SCRIPT_CONTEUDO, SELETOR_CONTEUDO)
+
+            duracao = time.perf_counter() - inicio
+            with self._lock_estatisticas:
+                self._tempos.pop(url, None)
+                self._tempos[url] = duracao
+                if len(self._tempos) > MAX_TEMPOS:
+                    del self._tempos[next(iter(self._tempos))]
+            log.debug(f"{url} renderizada em {duracao:.1f} s")
+            return conteudo or ""
+
+        except Exception as e:
+            with self._lock_estatisticas:
+                self._falhas += 1
+            log.warning(f"renderização falhou: {url} → {str(e)[:90]}")
+            return ""
+
+        finally:
+            if pagina is not None:
+                try:
+                    await pagina.close()
+                except Exception:
+                    pass
+            # o contexto volta para o pool (cookies de consentimento aceitos continuam valendo),
+            # a menos que o navegador que o criou tenha caído ou sido substituído
+            if navegador is self._navegador and navegador.is_connected():
+                self._fila_contextos.put_nowait((navegador, contexto))
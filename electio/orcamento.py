@@ -0,0 +1,106 @@
+import math
+import re
+import threading
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        ORÇAMENTO DE TOKENS POR REQUISIÇÃO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Cada requisição à LLM tem uma parte fixa (prompt, resumo da base legal, data) e uma parte
+# variável (os parágrafos das páginas). A capacidade da parte variável é o menor entre o
+# limite configurado, a janela de contexto do modelo e o TPM do plano, descontadas a parte
+# fixa e a resposta. Páginas grandes são divididas em blocos que cabem nessa capacidade e
+# páginas pequenas são reunidas no mesmo bloco. A contagem usa o tiktoken quando instalado
+# (aproximação razoável para os modelos do Groq) e, sem ele, uma média de caracteres por token.
+
+JANELA_CONTEXTO = {
+    "llama-3.3-70b-versatile": 131072,
+    "mixtral-8x7b-32768": 32768,
+    "openai/gpt-oss-120b": 131072,
+    "llama-3.1-8b-instant": 131072,
+}
+JANELA_PADRAO = 8192
+
+CARACTERES_POR_TOKEN = 3.5      # média para texto em português sem tokenizador
+MARGEM_SEGURANCA = 0.9          # o tokenizador local não é o mesmo do modelo
+
+RE_FRASES = re.compile(r'(?<=[.!?;:])\s+')
+
+_codificador = None
+_lock = threading.Lock()
+
+
+def _get_codificador():
+    # False quando o tiktoken não está instalado (a busca não é repetida)
+    global _codificador
+    with _lock:
+        if _codificador is None:
+            try:
+                import tiktoken
+                _codificador = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _codificador = False
+        return _codificador
+
+
+def contar_tokens(texto: str) -> int:
+    if not texto:
+        return 0
+    codificador = _get_codificador()
+    if codificador:
+        return len(codificador.encode(texto, disallowed_special=()))
+    return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+
+
+def capacidade_entrada(modelo: str, tokens_fixos: int, max_tokens_saida: int, limite: int, tpm: int = None) -> int:
+    # Tokens de texto de página que cabem em uma requisição
+    teto = JANELA_CONTEXTO.get(modelo, JANELA_PADRAO)
+    if tpm:
+        teto = min(teto, tpm)   # o Groq recusa requisições maiores que o TPM do plano
+    disponivel = int(teto * MARGEM_SEGURANCA) - tokens_fixos - max_tokens_saida
+    return max(100, min(limite, disponivel))
+
+
+def fatiar_paragrafo(paragrafo: str, capacidade: int) -> list:
+    # Parágrafos maiores que a capacidade são divididos por frases (e, em último caso, por tamanho)
+    if contar_tokens(paragrafo) <= capacidade:
+        return [paragrafo]
+    pedacos, atual = [], ""
+    for frase in RE_FRASES.split(paragrafo):
+        candidato = f"{atual} {frase}".strip()
+        if atual and contar_tokens(candidato) > capacidade:
+            pedacos.append(atual)
+            candidato = frase
+        atual = candidato
+    if atual:
+        pedacos.append(atual)
+    # frases isoladas ainda maiores que a capacidade são cortadas por número de caracteres
+    tamanho = int(capacidade * CARACTERES_POR_TOKEN)
+    fatias = []
+    for pedaco in pedacos:
+        if contar_tokens(pedaco) > capacidade:
+            fatias.extend(pedaco[i:i + tamanho] for i in range(0, len(pedaco), tamanho))
+        else:
+            fatias.append(pedaco)
+    return fatias
+
+
+def planejar_blocos(tokens: list, capacidade: int) -> list:
+    # Agrupa itens consecutivos (tokens de cada um) em blocos de até `capacidade`; devolve listas de índices
+    blocos, atual, soma = [], [], 0
+    for indice, quantidade in enumerate(tokens):
+        if atual and soma + quantidade > capacidade:
+            blocos.append(atual)
+            atual, soma = [], 0
+        atual.append(indice)
+        soma += quantidade
+    if atual:
+        blocos.append(atual)
+    return blocos
+
+
+def ratear_uso(uso: dict, pesos: list) -> list:
+    # Divide os tokens de uma requisição entre os itens dela, proporcionalmente aos pesos
+    soma = sum(pesos)
+    fracoes = [peso / soma for peso in pesos] if soma else [1 / len(pesos)] * len(pesos)
+    return [{chave: valor * f for chave, valor in uso.items()} for f in fracoes]
@@ -0,0 +1,333 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from electio.metricas import EVENTO_PIPELINE_CANCELADO, PREFIXO_EVENTO_FALHA
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        PIPELINE CONCORRENTE DE ANÁLISE DOS SITES
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Etapas: descoberta de links → extração de texto → análise pela LLM → agregação.
+# Cada etapa tem o seu próprio pool de threads; a agregação é feita na thread que
+# chama executar_pipeline, que também dispara o callback de progresso.
+# Com um agrupador de duplicatas, só o representante de cada grupo de textos quase
+# idênticos vai à LLM; os demais membros recebem a mesma análise quando ela termina.
+# Os callbacks de resultados parciais (página concluída, site concluído e trecho não
+# conforme recebido durante o streaming) também rodam na thread que chama executar_pipeline.
+
+ETAPA_DESCOBERTA = "descoberta"
+ETAPA_EXTRACAO = "extracao"
+ETAPA_ANALISE = "analise"
+
+INTERVALO_PARCIAIS_S = 0.25     # com ao_encontrar_trecho, frequência de entrega dos trechos recebidos
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ConfigConcorrencia:
+    max_global: int = 16          # requisições de rede simultâneas no total
+    max_por_host: int = 2         # requisições simultâneas para um mesmo domínio
+    workers_descoberta: int = 4
+    workers_extracao: int = 8
+    workers_analise: int = 4      # chamadas simultâneas à LLM
+
+
+class LimitadorHosts:
+    # Semáforo global combinado com um semáforo por domínio
+
+    def __init__(self, max_global: int, max_por_host: int):
+        self._global = threading.BoundedSemaphore(max(1, max_global))
+        self._max_por_host = max(1, max_por_host)
+        self._por_host = {}
+        self._lock = threading.Lock()
+
+    def _semaforo_host(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._por_host:
+                self._por_host[host] = threading.BoundedSemaphore(self._max_por_host)
+            return self._por_host[host]
+
+    @contextmanager
+    def reservar(self, url: str):
+        semaforo_host = self._semaforo_host(urlparse(url).netloc.lower())
+        with semaforo_host:
+            with self._global:
+                yield
+
+
+def agregar_resultado_site(url: str, analises: list, falhas: int = 0, duplicatas: int = 0, links: list = None) -> dict:
+    # Soma as análises (trechos, contagem[, uso]) dos links de um site no formato usado pela tabela e pelo gráfico.
+    # Links que falharam na extração ou na LLM ficam fora do percentual e são contados em "falhas";
+    # "duplicatas" conta os links que herdaram a análise de uma página quase idêntica.
+    # uso = {"enviados", "recebidos", "em_cache"}: tokens da LLM atribuídos ao link (ausente quando não houve
+    # chamada); em_cache é a parte dos enviados que o provedor reaproveitou do cache de prefixo e reenviados
+    # conta os parágrafos do link que voltaram à LLM porque a resposta veio truncada.
+    total_trechos = 0
+    total_conformes = 0
+    total_nao_conformes = 0
+    trechos_nao_conformes = []
+    paginas = []
+
+    for indice, analise in enumerate(analises):
+        trechos_link, contagem = analise[0], analise[1]
+        uso = analise[2] if len(analise) > 2 and analise[2] else {}
+        trechos_nao_conformes.extend(trechos_link or [])
+        if contagem:
+            total_trechos += contagem[0]
+            total_conformes += contagem[1]
+            total_nao_conformes += contagem[2]
+        paginas.append({
+            "url": links[indice] if links else None,
+            "trechos": contagem[0] if contagem else 0,
+            "tokens_enviados": round(uso.get("enviados", 0)),
+            "tokens_recebidos": round(uso.get("recebidos", 0)),
+            "tokens_em_cache": round(uso.get("em_cache", 0)),
+            "paragrafos_reenviados": uso.get("reenviados", 0),
+        })
+
+    if total_trechos == 0:
+        perConformes = 0.0
+    else:
+        perConformes = round((total_conformes / total_trechos) * 100, 1)
+
+    return {
+        "url": url,
+        "conformidade": perConformes,
+        "total_trechos": total_trechos,
+        "conformes": total_conformes,
+        "nao_coformes": total_nao_conformes,
+        "trechos_nao_conformes": trechos_nao_conformes,
+        "falhas": falhas,
+        "duplicatas": duplicatas,
+        "tokens_enviados": sum(p["tokens_enviados"] for p in paginas),
+        "tokens_recebidos": sum(p["tokens_recebidos"] for p in paginas),
+        "tokens_em_cache": sum(p["tokens_em_cache"] for p in paginas),
+        "paragrafos_reenviados": sum(p["paragrafos_reenviados"] for p in paginas),
+        "paginas": paginas
+    }
+
+
+def executar_pipeline(urls: list,
+                      coletar_links,
+                      extrair,
+                      analisar,
+                      config: ConfigConcorrencia = None,
+                      ao_progredir=None,
+                      inicializador_thread=None,
+                      agrupador=None,
+                      analisar_lote=None,
+                      medir=None,
+                      capacidade_lote: int = 0,
+                      ao_concluir_pagina=None,
+                      ao_concluir_site=None,
+                      ao_encontrar_trecho=None,
+                      cancelado=None,
+                      reaproveitar=None,
+                      metricas=None) -> list:
+    # coletar_links(url) -> iterável de links; extrair(link) -> texto; analisar(texto) -> (trechos, contagem[, uso])
+    # ao_progredir(concluidos, total, url) é chamado a cada item de trabalho concluído.
+    # agrupador.agrupar(texto) -> (grupo, novo) deduplica os textos de todos os sites da execução.
+    # analisar_lote(textos) -> [análise ou None], quando informado, recebe várias páginas pequenas de uma
+    # vez: os textos se acumulam até somarem capacidade_lote (medidos por medir(texto)) ou até não haver
+    # mais extrações em andamento. Uma análise None conta como falha do link.
+    # Resultados parciais: ao_concluir_pagina(url, link, análise) a cada página julgada (inclusive as
+    # duplicatas), ao_concluir_site(indice, resultado) quando o site não tem mais trabalho pendente e
+    # ao_encontrar_trecho(url, link, trecho) para cada trecho não conforme que analisar_lote(textos,
+    # ao_encontrar) avisar antes de terminar; esse aviso pode vir de qualquer thread e é repassado daqui.
+    # cancelado() -> bool, consultado a cada INTERVALO_PARCIAIS_S: quando verdadeiro, o trabalho pendente é
+    # descartado e são devolvidos só os sites já concluídos (os demais com o que tiverem até ali).
+    # reaproveitar(url, link, texto) -> análise ou None é consultado para cada texto extraído, antes da
+    # deduplicação: uma análise devolvida (ex.: de um snapshot anterior) conclui a página sem ir à LLM.
+    # metricas (RegistroMetricas), se informado, conta as falhas de cada etapa e o cancelamento.
+    config = config or ConfigConcorrencia()
+    limitador = LimitadorHosts(config.max_global, config.max_por_host)
+
+    def com_limite(funcao, url):
+        with limitador.reservar(url):
+            return funcao(url)
+
+    # análises por site: {indice_link: (link, análise)}, mantidas na ordem dos links ao final
+    analises = [dict() for _ in urls]
+    falhas = [0 for _ in urls]
+    duplicatas = [0 for _ in urls]
+    resultados_grupo = {}      # grupo → análise do representante
+    aguardando = {}            # grupo → [itens] à espera do representante
+    fila_lote = []             # itens (idx_site, idx_link, link, grupo, texto) ainda não enviados
+    tokens_fila = 0
+    total = len(urls)
+    concluidos = 0
+    restantes = [1 for _ in urls]     # trabalho pendente por site (descoberta, depois um por link)
+    encontrados = deque()              # (item, trecho) avisados pelas threads de análise
+
+    pool_descoberta = ThreadPoolExecutor(config.workers_descoberta, thread_name_prefix="descoberta",
+                                         initializer=inicializador_thread)
+    pool_extracao = ThreadPoolExecutor(config.workers_extracao, thread_name_prefix="extracao",
+                                       initializer=inicializador_thread)
+    pool_analise = ThreadPoolExecutor(config.workers_analise, thread_name_prefix="analise",
+                                      initializer=inicializador_thread)
+    pendentes = {}
+
+    def enviar(itens):
+        nonlocal total
+        if analisar_lote is None:
+            futuro = pool_analise.submit(analisar, itens[0][4])
+        elif ao_encontrar_trecho is None:
+            futuro = pool_analise.submit(analisar_lote, [item[4] for item in itens])
+        else:
+            futuro = pool_analise.submit(analisar_lote, [item[4] for item in itens],
+                                         lambda indice, trecho: encontrados.append((itens[indice], trecho)))
+        pendentes[futuro] = (ETAPA_ANALISE, itens)
+        total += 1
+
+    def esvaziar_fila():
+        nonlocal fila_lote, tokens_fila
+        if fila_lote:
+            enviar(fila_lote)
+        fila_lote, tokens_fila = [], 0
+
+    def agendar_analise(item):
+        nonlocal tokens_fila
+        if analisar_lote is None:
+            enviar([item])
+            return
+        tokens = medir(item[4]) if medir else 0
+        if tokens_fila + tokens > capacidade_lote:
+            esvaziar_fila()
+        fila_lote.append(item)
+        tokens_fila += tokens
+
+    def resultado_site(idx_site):
+        ordenadas = [analises[idx_site][i] for i in sorted(analises[idx_site])]
+        return agregar_resultado_site(
+            urls[idx_site], [analise for _, analise in ordenadas], falhas[idx_site], duplicatas[idx_site],
+            links=[link for link, _ in ordenadas])
+
+    def registrar(idx_site, idx_link, link, analise):
+        analises[idx_site][idx_link] = (link, analise)
+        if ao_concluir_pagina:
+            ao_concluir_pagina(urls[idx_site], link, analise)
+
+    def finalizar(idx_site, quantidade=1):
+        # `quantidade` unidades de trabalho do site terminaram (com ou sem sucesso)
+        restantes[idx_site] -= quantidade
+        if restantes[idx_site] == 0 and ao_concluir_site:
+            ao_concluir_site(idx_site, resultado_site(idx_site))
+
+    def concluir_analise(item, valor):
+        idx_site, idx_link, link, grupo, _ = item
+        if valor:
+            registrar(idx_site, idx_link, link, valor)
+        if grupo is None:
+            finalizar(idx_site)
+            return
+        if valor:
+            resultados_grupo[grupo] = valor
+            for idx_membro, idx_link_membro, link_membro, _, _ in aguardando.pop(grupo):
+                # a cópia herda o veredicto, mas não os tokens gastos pelo representante
+                duplicatas[idx_membro] += 1
+                registrar(idx_membro, idx_link_membro, link_membro, valor[:2])
+                finalizar(idx_membro)
+        elif aguardando[grupo]:
+            # o representante falhou: o próximo membro do grupo assume o lugar dele
+            agendar_analise(aguardando[grupo].pop(0))
+        else:
+            del aguardando[grupo]
+        finalizar(idx_site)
+
+    def entregar_encontrados():
+        while encontrados:
+            (idx_site, _, link, _, _), trecho = encontrados.popleft()
+            ao_encontrar_trecho(urls[idx_site], link, trecho)
+
+    try:
+        for idx_site, url in enumerate(urls):
+            futuro = pool_descoberta.submit(com_limite, coletar_links, url)
+            pendentes[futuro] = (ETAPA_DESCOBERTA, (idx_site, url))
+
+        while pendentes:
+            # com trechos parciais, a espera é interrompida periodicamente para entregá-los
+            feitos, _ = wait(pendentes, timeout=INTERVALO_PARCIAIS_S if ao_encontrar_trecho or cancelado else None,
+                             return_when=FIRST_COMPLETED)
+            if cancelado and cancelado():
+                log.info(f"cancelado com {len(pendentes)} etapa(s) pendente(s)")
+                if metricas is not None:
+                    metricas.contar(EVENTO_PIPELINE_CANCELADO)
+                break
+            if ao_encontrar_trecho:
+                entregar_encontrados()
+            for futuro in feitos:
+                etapa, dados = pendentes.pop(futuro)
+                concluidos += 1
+                url = dados[-1][2] if etapa == ETAPA_ANALISE else dados[-1]
+                try:
+                    valor = futuro.result()
+                    erro = False
+                except Exception as e:
+                    log.warning(f"falha na etapa {etapa} → {url}: {str(e)[:90]}")
+                    if metricas is not None:
+                        metricas.contar(PREFIXO_EVENTO_FALHA + etapa)
+                    valor, erro = None, True
+
+                if etapa == ETAPA_DESCOBERTA:
+                    idx_site, _ = dados
+                    links = list(valor) if valor else [url]
+                    for idx, link in enumerate(links):
+                        novo = pool_extracao.submit(com_limite, extrair, link)
+                        pendentes[novo] = (ETAPA_EXTRACAO, (idx_site, idx, link))
+                    total += len(links)
+                    restantes[idx_site] += len(links)
+                    finalizar(idx_site)
+
+                elif etapa == ETAPA_EXTRACAO:
+                    idx_site, idx_link, _ = dados
+                    anterior = reaproveitar(urls[idx_site], url, valor) if reaproveitar and valor else None
+                    if erro:
+                        falhas[idx_site] += 1
+                        finalizar(idx_site)
+                    elif not valor:
+                        finalizar(idx_site)
+                    elif anterior:
+                        registrar(idx_site, idx_link, url, anterior)
+                        finalizar(idx_site)
+                    elif agrupador is None:
+                        agendar_analise((idx_site, idx_link, url, None, valor))
+                    else:
+                        grupo, _ = agrupador.agrupar(valor)
+                        item = (idx_site, idx_link, url, grupo, valor)
+                        if grupo in resultados_grupo:
+                            duplicatas[idx_site] += 1
+                            registrar(idx_site, idx_link, url, resultados_grupo[grupo][:2])
+                            finalizar(idx_site)
+                        elif grupo in aguardando:
+                            aguardando[grupo].append(item)
+                        else:
+                            # primeiro texto do grupo (ou substituto de um representante que falhou)
+                            aguardando[grupo] = []
+                            agendar_analise(item)
+
+                elif etapa == ETAPA_ANALISE:
+                    valores = ([valor] if analisar_lote is None else valor) or [None] * len(dados)
+                    for item, valor_item in zip(dados, valores):
+                        if valor_item is None:
+                            falhas[item[0]] += 1
+                        concluir_analise(item, valor_item)
+
+                if ao_progredir:
+                    ao_progredir(concluidos, total, url)
+
+            # sem descobertas ou extrações em andamento, nada mais vai completar o lote
+            if fila_lote and all(etapa == ETAPA_ANALISE for etapa, _ in pendentes.values()):
+                esvaziar_fila()
+        if ao_encontrar_trecho:
+            entregar_encontrados()
+    finally:
+        for pool in (pool_descoberta, pool_extracao, pool_analise):
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return [resultado_site(idx_site) for idx_site in range(len(urls))]
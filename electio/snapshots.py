@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from electio.cache_http import DIRETORIO_PADRAO
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        SNAPSHOTS POR EXECUÇÃO E REANÁLISE DO QUE MUDOU (MONITORAMENTO)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# No defeso os mesmos portais são varridos todos os dias. Cada execução grava, por página
+# (site + link), a impressão digital do texto que seria enviado à LLM (depois de limpar_texto
+# e filtrar_conteudo_relevante) e o veredicto. No modo delta, uma página cuja impressão é igual
+# à do snapshot anterior herda o veredicto sem passar pela LLM; só as novas ou alteradas são
+# analisadas. O snapshot anterior só vale se a análise for comparável (mesmo prompt, modelo,
+# temperatura, data de referência, base legal e termos), identificada por uma chave de configuração.
+# Ao concluir cada site, o resultado recebe um relatório de mudanças em relação ao snapshot anterior.
+# Com varreduras diárias o arquivo cresceria sem limite: ao abrir cada execução, só os últimos
+# manter_execucoes snapshots de cada site (por chave de configuração) são mantidos.
+
+
+@dataclass
+class ConfigMonitoramento:
+    gravar: bool = True         # grava o snapshot da execução (necessário para o relatório de mudanças)
+    delta: bool = False         # reaproveita o veredicto das páginas inalteradas desde o snapshot anterior
+    manter_execucoes: int = 30  # snapshots guardados por site e configuração; os mais antigos são apagados
+
+
+class RepositorioSnapshots:
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "snapshots.sqlite"), timeout=30,
+                                        check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS execucoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chave TEXT,
+                criada_em REAL
+            );
+            CREATE TABLE IF NOT EXISTS paginas (
+                execucao INTEGER,
+                site TEXT,
+                link TEXT,
+                impressao TEXT,
+                trechos TEXT,
+                contagem TEXT,
+                herdada INTEGER,
+                PRIMARY KEY (execucao, site, link)
+            );
+            CREATE INDEX IF NOT EXISTS paginas_site ON paginas (site, execucao);
+        """)
+
+    def iniciar(self, chave: str, manter: int = None) -> int:
+        # Abre o snapshot de uma execução; chave identifica a configuração da análise.
+        # Com manter, os snapshots mais antigos da mesma chave são apagados antes (ver despejar)
+        if manter:
+            self.despejar(chave, manter)
+        with self._lock:
+            cursor = self._conexao.execute("INSERT INTO execucoes (chave, criada_em) VALUES (?, ?)",
+                                           (chave, time.time()))
+            self._conexao.commit()
+            return cursor.lastrowid
+
+    def despejar(self, chave: str, manter: int):
+        # Mantém, para cada site, só as páginas dos `manter` snapshots mais recentes da chave (um site
+        # varrido com menos frequência não perde o seu snapshot para as execuções de outros sites) e
+        # apaga as execuções que ficaram sem páginas
+        with self._lock:
+            self._conexao.execute("""
+                DELETE FROM paginas WHERE rowid IN (
+                    SELECT linha FROM (
+                        SELECT p.rowid AS linha,
+                               DENSE_RANK() OVER (PARTITION BY p.site ORDER BY p.execucao DESC) AS posicao
+                        FROM paginas p JOIN execucoes e ON e.id = p.execucao
+                        WHERE e.chave = ?)
+                    WHERE posicao > ?)
+            """, (chave, max(1, manter)))
+            self._conexao.execute(
+                "DELETE FROM execucoes WHERE chave = ? AND id NOT IN (SELECT DISTINCT execucao FROM paginas)",
+                (chave,))
+            self._conexao.commit()
+
+    def anterior(self, site: str, chave: str, execucao: int):
+        # Snapshot mais recente do site, com a mesma chave, antes de `execucao`:
+        # (criado_em, {link: (impressao, trechos, contagem)}) ou None
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT e.id, e.criada_em FROM execucoes e JOIN paginas p ON p.execucao = e.id "
+                "WHERE p.site = ? AND e.chave = ? AND e.id < ? ORDER BY e.id DESC LIMIT 1",
+                (site, chave, execucao)).fetchone()
+            if not linha:
+                return None
+            paginas = self._conexao.execute(
+                "SELECT link, impressao, trechos, contagem FROM paginas WHERE execucao = ? AND site = ?",
+                (linha[0], site)).fetchall()
+        return linha[1], {link: (impressao, json.loads(trechos), json.loads(contagem))
+                          for link, impressao, trechos, contagem in paginas}
+
+    def registrar(self, execucao: int, site: str, link: str, impressao: str, analise, herdada: bool):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO paginas (execucao, site, link, impressao, trechos, contagem, herdada) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (execucao, site, link, impressao, json.dumps(analise[0] or [], ensure_ascii=False),
+                 json.dumps(analise[1]), int(herdada)))
+            self._conexao.commit()
+
+
+def relatorio_mudancas(anterior, atuais: dict, herdadas: set, trechos: list):
+    # Compara as páginas julgadas nesta execução ({link: impressao}) com o snapshot anterior do site.
+    # None quando não há snapshot anterior comparável.
+    if anterior is None:
+        return None
+    criado_em, paginas_anteriores = anterior
+    trechos_anteriores = {t for _, trechos_pagina, _ in paginas_anteriores.values() for t in trechos_pagina}
+    novas = [link for link in atuais if link not in paginas_anteriores]
+    alteradas = [link for link, impressao in atuais.items()
+                 if link in paginas_anteriores and paginas_anteriores[link][0] != impressao]
+    return {
+        "snapshot_anterior": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(criado_em)),
+        "novas": novas,
+        "alteradas": alteradas,
+        "inalteradas": len(atuais) - len(novas) - len(alteradas),
+        "reaproveitadas": len(herdadas),
+        # páginas do snapshot anterior que não foram julgadas agora (saíram do site ou da janela do defeso, ou falharam)
+        "ausentes": [link for link in paginas_anteriores if link not in atuais],
+        "trechos_novos": [t for t in dict.fromkeys(trechos) if t not in trechos_anteriores],
+    }
+
+
+class MonitorExecucao:
+    # Estado de uma execução: impressões das páginas extraídas, páginas herdadas e snapshot anterior de cada
+    # site. Os métodos são chamados pelos callbacks do pipeline, todos na thread que o executa.
+
+    def __init__(self, repositorio: RepositorioSnapshots, chave: str, config: ConfigMonitoramento, impressao):
+        # impressao(texto) -> str: hash do texto como ele seria enviado à LLM
+        self.repositorio = repositorio
+        self.chave = chave
+        self.config = config
+        self.impressao = impressao
+        self.execucao = repositorio.iniciar(chave, config.manter_execucoes) if config.gravar else None
+        self._anteriores = {}       # site → snapshot anterior (ou None)
+        self._impressoes = {}       # (site, link) → impressão do texto extraído nesta execução
+        self._atuais = {}           # site → {link: impressão} das páginas julgadas
+        self._herdadas = {}         # site → links que herdaram o veredicto do snapshot anterior
+
+    def _anterior(self, site: str):
+        if site not in self._anteriores:
+            # sem gravar, a execução não tem id: vale o snapshot mais recente
+            limite = self.execucao if self.execucao is not None else 2 ** 62
+            self._anteriores[site] = self.repositorio.anterior(site, self.chave, limite)
+        return self._anteriores[site]
+
+    def reaproveitar(self, site: str, link: str, texto: str):
+        # Gancho reaproveitar do pipeline: (trechos, contagem) do snapshot anterior se o texto não mudou
+        impressao = self.impressao(texto)
+        self._impressoes[(site, link)] = impressao
+        if not self.config.delta:
+            return None
+        anterior = self._anterior(site)
+        if anterior is None or anterior[1].get(link, (None,))[0] != impressao:
+            return None
+        self._herdadas.setdefault(site, set()).add(link)
+        _, trechos, contagem = anterior[1][link]
+        return trechos, contagem
+
+    def concluir_pagina(self, site: str, link: str, analise):
+        impressao = self._impressoes.get((site, link))
+        if impressao is None:
+            return
+        self._atuais.setdefault(site, {})[link] = impressao
+        if self.execucao is not None:
+            self.repositorio.registrar(self.execucao, site, link, impressao, analise,
+                                       link in self._herdadas.get(site, ()))
+
+    def relatorio(self, site: str, resultado: dict):
+        return relatorio_mudancas(self._anterior(site), self._atuais.get(site, {}), self._herdadas.get(site, set()),
+                                  resultado.get("trechos_nao_conformes") or [])
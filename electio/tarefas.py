@@ -0,0 +1,433 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import fields
+from datetime import date
+
+from electio.base_legal import IndiceBaseLegal
+from electio.cache_http import DIRETORIO_PADRAO
+from electio.metricas import servir_prometheus
+from electio.motor import ConfigAnalise, MotorAnalise
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        ANÁLISES EM SEGUNDO PLANO (TAREFAS PERSISTENTES COM CHECKPOINTS)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Uma análise submetida vira uma linha na tabela de tarefas (SQLite no diretório de cache) e é
+# executada por um processo trabalhador separado (python -m electio.tarefas), que não depende
+# da sessão do Streamlit: recarregar a página, mexer em um widget ou fechar o navegador não
+# interrompe a análise. Cada página julgada e cada site concluído é gravado assim que termina;
+# o aplicativo consulta a tabela para mostrar o progresso e os resultados parciais.
+# O trabalhador renova um batimento enquanto executa. Se ele cair (ou a máquina reiniciar),
+# a tarefa fica com o batimento vencido e é retomada pelo próximo trabalhador, pulando os
+# sites já concluídos; os links de sites incompletos são refeitos, mas saem dos caches de
+# páginas e de veredictos. O cancelamento é pedido pela tabela e atendido em até um segundo.
+
+ESTADO_PENDENTE = "pendente"
+ESTADO_EXECUTANDO = "executando"
+ESTADO_CANCELANDO = "cancelando"
+ESTADO_CONCLUIDA = "concluida"
+ESTADO_CANCELADA = "cancelada"
+ESTADO_FALHOU = "falhou"
+ESTADOS_ATIVOS = (ESTADO_PENDENTE, ESTADO_EXECUTANDO, ESTADO_CANCELANDO)
+
+INTERVALO_BATIMENTO_S = 1.0     # batimento da tarefa em execução e consulta do pedido de cancelamento
+TEMPO_ABANDONO_S = 60.0         # batimento mais antigo que isso: o trabalhador caiu e a tarefa é retomada
+TEMPO_TRABALHADOR_S = 15.0      # sem sinal do trabalhador há mais que isso: garantir_trabalhador sobe outro
+MAX_TENTATIVAS = 3              # retomadas após queda antes de a tarefa ser dada como falha
+
+FORMATO_LOG = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+log = logging.getLogger(__name__)
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ CONFIGURAÇÃO EM JSON ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+def config_para_dict(config: ConfigAnalise) -> dict:
+    # Datas em ISO, tuplas em listas e o índice da base legal pelo hash (o trabalhador o recarrega do disco)
+    dados = {}
+    for secao in fields(config):
+        valores = {}
+        for campo in fields(getattr(config, secao.name)):
+            valor = getattr(getattr(config, secao.name), campo.name)
+            if isinstance(valor, date):
+                valor = valor.isoformat()
+            elif isinstance(valor, IndiceBaseLegal):
+                valor = valor.hash
+            elif isinstance(valor, tuple):
+                valor = list(valor)
+            valores[campo.name] = valor
+        dados[secao.name] = valores
+    return dados
+
+
+def config_de_dict(dados: dict, motor: MotorAnalise) -> ConfigAnalise:
+    config = ConfigAnalise()
+    for secao in fields(config):
+        parte = getattr(config, secao.name)
+        for campo in fields(parte):
+            if campo.name not in dados.get(secao.name, {}):
+                continue
+            valor = dados[secao.name][campo.name]
+            if isinstance(getattr(parte, campo.name), tuple):
+                valor = tuple(valor)
+            elif campo.name == "data_referencia" and valor:
+                valor = date.fromisoformat(valor)
+            elif campo.name == "indice_base_legal" and valor:
+                valor = motor.indices_base_legal.carregar(valor)
+                if valor is None:
+                    raise ValueError("o índice da base legal da tarefa não está no diretório de cache")
+            setattr(parte, campo.name, valor)
+    return config
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ TABELA DE TAREFAS ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+class FilaTarefas:
+    # Usada pelo aplicativo (submeter, consultar, cancelar) e pelo trabalhador (reservar, checkpoints)
+
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        # vários processos usam o mesmo arquivo: WAL e espera pelo lock de escrita em vez de erro
+        self._conexao = sqlite3.connect(os.path.join(diretorio, "tarefas.sqlite"), timeout=30,
+                                        check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS tarefas (
+                id TEXT PRIMARY KEY,
+                estado TEXT,
+                urls TEXT,
+                config TEXT,
+                criada_em REAL,
+                iniciada_em REAL,
+                concluida_em REAL,
+                batimento REAL,
+                pid INTEGER,
+                tentativas INTEGER DEFAULT 0,
+                concluidos INTEGER DEFAULT 0,
+                total INTEGER DEFAULT 0,
+                erro TEXT,
+                estatisticas TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sites (
+                tarefa TEXT,
+                indice INTEGER,
+                resultado TEXT,
+                PRIMARY KEY (tarefa, indice)
+            );
+            CREATE TABLE IF NOT EXISTS paginas (
+                tarefa TEXT,
+                url TEXT,
+                link TEXT,
+                trechos TEXT,
+                contagem TEXT,
+                PRIMARY KEY (tarefa, url, link)
+            );
+            CREATE TABLE IF NOT EXISTS trabalhadores (
+                pid INTEGER PRIMARY KEY,
+                sinal REAL
+            );
+        """)
+
+    def _executar(self, sql: str, parametros=()):
+        with self._lock:
+            cursor = self._conexao.execute(sql, parametros)
+            self._conexao.commit()
+            return cursor.rowcount
+
+    def _consultar(self, sql: str, parametros=()) -> list:
+        with self._lock:
+            cursor = self._conexao.execute(sql, parametros)
+            colunas = [c[0] for c in cursor.description]
+            return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ APLICATIVO ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def submeter(self, urls: list, config: ConfigAnalise) -> str:
+        tarefa = uuid.uuid4().hex[:12]
+        self._executar(
+            "INSERT INTO tarefas (id, estado, urls, config, criada_em) VALUES (?, ?, ?, ?, ?)",
+            (tarefa, ESTADO_PENDENTE, json.dumps(urls), json.dumps(config_para_dict(config), ensure_ascii=False),
+             time.time()))
+        return tarefa
+
+    def obter(self, tarefa: str):
+        # Estado, etapas concluídas/total da execução atual, sites concluídos; None se a tarefa não existe
+        linhas = self._consultar(
+            "SELECT id, estado, urls, criada_em, iniciada_em, concluida_em, tentativas, concluidos, total, erro, "
+            "estatisticas, (SELECT COUNT(*) FROM sites WHERE tarefa = tarefas.id) AS sites_concluidos "
+            "FROM tarefas WHERE id = ?", (tarefa,))
+        if not linhas:
+            return None
+        linha = linhas[0]
+        linha["urls"] = json.loads(linha["urls"])
+        linha["estatisticas"] = json.loads(linha["estatisticas"]) if linha["estatisticas"] else None
+        return linha
+
+    def listar(self, limite: int = 20) -> list:
+        return self._consultar(
+            "SELECT id, estado, criada_em, concluida_em, json_array_length(urls) AS sites, "
+            "(SELECT COUNT(*) FROM sites WHERE tarefa = tarefas.id) AS sites_concluidos "
+            "FROM tarefas ORDER BY criada_em DESC LIMIT ?", (limite,))
+
+    def cancelar(self, tarefa: str):
+        # Pendente é cancelada na hora; em execução, o trabalhador encerra no próximo batimento
+        self._executar("UPDATE tarefas SET estado = ?, concluida_em = ? WHERE id = ? AND estado = ?",
+                       (ESTADO_CANCELADA, time.time(), tarefa, ESTADO_PENDENTE))
+        self._executar("UPDATE tarefas SET estado = ? WHERE id = ? AND estado = ?",
+                       (ESTADO_CANCELANDO, tarefa, ESTADO_EXECUTANDO))
+
+    def resultados(self, tarefa: str) -> list:
+        # Resultados agregados dos sites concluídos, na ordem em que foram submetidos
+        return [json.loads(linha["resultado"]) for linha in self._consultar(
+            "SELECT resultado FROM sites WHERE tarefa = ? ORDER BY indice", (tarefa,))]
+
+    def paginas(self, tarefa: str) -> list:
+        # Páginas já julgadas (inclusive de sites ainda em andamento): [{url, link, trechos, contagem}]
+        linhas = self._consultar("SELECT url, link, trechos, contagem FROM paginas WHERE tarefa = ? ORDER BY rowid",
+                                 (tarefa,))
+        for linha in linhas:
+            linha["trechos"] = json.loads(linha["trechos"])
+            linha["contagem"] = json.loads(linha["contagem"])
+        return linhas
+
+    # ◆━━━━━━━━━━━━━━━━━━━━━━━ TRABALHADOR ━━━━━━━━━━━━━━━━━━━━━━━◆
+
+    def reservar(self, pid: int):
+        # A tarefa pendente mais antiga, ou uma em execução cujo trabalhador parou de bater.
+        # Devolve (id, urls, config) ou None; a transação impede que dois trabalhadores peguem a mesma.
+        agora = time.time()
+        with self._lock:
+            try:
+                self._conexao.execute("BEGIN IMMEDIATE")
+                abandonadas = self._conexao.execute(
+                    "SELECT id FROM tarefas WHERE estado IN (?, ?) AND batimento < ? AND tentativas >= ?",
+                    (ESTADO_EXECUTANDO, ESTADO_CANCELANDO, agora - TEMPO_ABANDONO_S, MAX_TENTATIVAS)).fetchall()
+                for (tarefa,) in abandonadas:
+                    self._conexao.execute(
+                        "UPDATE tarefas SET estado = ?, erro = ?, concluida_em = ? WHERE id = ?",
+                        (ESTADO_FALHOU, f"trabalhador interrompido {MAX_TENTATIVAS} vezes", agora, tarefa))
+                # quem caiu durante o cancelamento não é retomado
+                self._conexao.execute(
+                    "UPDATE tarefas SET estado = ?, concluida_em = ? WHERE estado = ? AND batimento < ?",
+                    (ESTADO_CANCELADA, agora, ESTADO_CANCELANDO, agora - TEMPO_ABANDONO_S))
+                linha = self._conexao.execute(
+                    "SELECT id, urls, config FROM tarefas WHERE estado = ? OR (estado = ? AND batimento < ?) "
+                    "ORDER BY criada_em LIMIT 1",
+                    (ESTADO_PENDENTE, ESTADO_EXECUTANDO, agora - TEMPO_ABANDONO_S)).fetchone()
+                if linha:
+                    self._conexao.execute(
+                        "UPDATE tarefas SET estado = ?, pid = ?, batimento = ?, tentativas = tentativas + 1, "
+                        "iniciada_em = COALESCE(iniciada_em, ?) WHERE id = ?",
+                        (ESTADO_EXECUTANDO, pid, agora, agora, linha[0]))
+                self._conexao.commit()
+            except sqlite3.Error:
+                self._conexao.rollback()
+                raise
+        if not linha:
+            return None
+        return linha[0], json.loads(linha[1]), json.loads(linha[2])
+
+    def bater(self, tarefa: str, concluidos: int = None, total: int = None) -> str:
+        # Renova o batimento (e o progresso, se informado) e devolve o estado atual da tarefa
+        if concluidos is None:
+            self._executar("UPDATE tarefas SET batimento = ? WHERE id = ?", (time.time(), tarefa))
+        else:
+            self._executar("UPDATE tarefas SET batimento = ?, concluidos = ?, total = ? WHERE id = ?",
+                           (time.time(), concluidos, total, tarefa))
+        linhas = self._consultar("SELECT estado FROM tarefas WHERE id = ?", (tarefa,))
+        return linhas[0]["estado"] if linhas else ESTADO_CANCELADA
+
+    def sites_concluidos(self, tarefa: str) -> set:
+        return {linha["indice"] for linha in self._consultar("SELECT indice FROM sites WHERE tarefa = ?", (tarefa,))}
+
+    def registrar_pagina(self, tarefa: str, url: str, link: str, analise):
+        self._executar("INSERT OR REPLACE INTO paginas (tarefa, url, link, trechos, contagem) VALUES (?, ?, ?, ?, ?)",
+                       (tarefa, url, link, json.dumps(analise[0] or [], ensure_ascii=False),
+                        json.dumps(analise[1])))
+
+    def registrar_site(self, tarefa: str, indice: int, resultado: dict):
+        self._executar("INSERT OR REPLACE INTO sites (tarefa, indice, resultado) VALUES (?, ?, ?)",
+                       (tarefa, indice, json.dumps(resultado, ensure_ascii=False)))
+
+    def concluir(self, tarefa: str, estado: str, erro: str = None, estatisticas: dict = None):
+        self._executar("UPDATE tarefas SET estado = ?, erro = ?, estatisticas = ?, concluida_em = ? WHERE id = ?",
+                       (estado, erro, json.dumps(estatisticas, ensure_ascii=False) if estatisticas else None,
+                        time.time(), tarefa))
+
+    def sinalizar_trabalhador(self, pid: int):
+        self._executar("INSERT OR REPLACE INTO trabalhadores (pid, sinal) VALUES (?, ?)", (pid, time.time()))
+
+    def remover_trabalhador(self, pid: int):
+        self._executar("DELETE FROM trabalhadores WHERE pid = ?", (pid,))
+
+    def trabalhador_ativo(self) -> bool:
+        return bool(self._consultar("SELECT pid FROM trabalhadores WHERE sinal > ?",
+                                    (time.time() - TEMPO_TRABALHADOR_S,)))
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ PROCESSO TRABALHADOR ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
+
+# Campos das estatísticas do motor que não são contadores acumulados: estados do momento (fila),
+# máximos e razões não se subtraem; as razões são recalculadas a partir dos contadores da tarefa
+NAO_ACUMULADOS = {"fila", "em_andamento", "espera_media_s", "espera_max_s", "taxa", "hosts"}
+
+
+def resumir_estatisticas(antes: dict, depois: dict) -> dict:
+    # O que a tarefa consumiu dos caches e da LLM (diferença dos contadores do motor)
+    def diferenca(secao):
+        return {chave: valor - antes[secao].get(chave, 0) for chave, valor in depois[secao].items()
+                if isinstance(valor, (int, float)) and chave not in NAO_ACUMULADOS}
+
+    llm = diferenca("llm")
+    llm["espera_media_s"] = round(llm["espera_total_s"] / llm["chamadas"], 2) if llm.get("chamadas") else 0.0
+    llm["espera_max_s"] = depois["llm"]["espera_max_s"]      # máximo desde o início do trabalhador
+    duplicatas = diferenca("duplicatas")
+    duplicatas["taxa"] = round(duplicatas["duplicatas"] / duplicatas["textos"], 3) if duplicatas.get("textos") else 0.0
+    # pool de conexões: totais e, por domínio, o que esta tarefa acrescentou
+    por_host = {
+        dominio: {chave: valor - antes["http"]["por_host"].get(dominio, {}).get(chave, 0)
+                  for chave, valor in contadores.items()}
+        for dominio, contadores in depois["http"]["por_host"].items()
+        if contadores != antes["http"]["por_host"].get(dominio)}
+
+    tempos_antes = antes["playwright"]["tempos_por_pagina"]
+    return {
+        "llm": llm,
+        "cache_http": diferenca("cache_http"),
+        "http": {**diferenca("http"), "hosts": len(por_host), "por_host": por_host},
+        "cache_veredictos": diferenca("cache_veredictos"),
+        "duplicatas": duplicatas,
+        "triagem": diferenca("triagem"),
+        "datas": diferenca("datas"),
+        "truncamento": diferenca("truncamento"),
+        "renderizadas": {url: t for url, t in depois["playwright"]["tempos_por_pagina"].items()
+                         if tempos_antes.get(url) != t},
+    }
+
+
+class Trabalhador:
+    # Executa as tarefas da fila, uma por vez, com o mesmo motor (caches e agendador) para todas
+
+    def __init__(self, api_key: str, diretorio: str = DIRETORIO_PADRAO, intervalo_s: float = 2.0):
+        self.fila = FilaTarefas(diretorio)
+        self.motor = MotorAnalise(api_key=api_key, diretorio_cache=diretorio)
+        self.intervalo_s = intervalo_s
+        self.pid = os.getpid()
+
+    def executar(self, uma_vez: bool = False):
+        log.info(f"trabalhador {self.pid} aguardando tarefas em {self.fila.diretorio}")
+        try:
+            while True:
+                self.fila.sinalizar_trabalhador(self.pid)
+                reservada = self.fila.reservar(self.pid)
+                if reservada:
+                    self.executar_tarefa(*reservada)
+                elif uma_vez:
+                    return
+                else:
+                    time.sleep(self.intervalo_s)
+        finally:
+            self.fila.remover_trabalhador(self.pid)
+            self.motor.agendador.fechar()
+
+    def executar_tarefa(self, tarefa: str, urls: list, dados_config: dict):
+        feitos = self.fila.sites_concluidos(tarefa)
+        restantes = [(indice, url) for indice, url in enumerate(urls) if indice not in feitos]
+        log.info(f"{tarefa}: {len(restantes)} de {len(urls)} site(s) a analisar" + (" (retomada)" if feitos else ""))
+
+        cancelar = threading.Event()
+        encerrar = threading.Event()
+        progresso = [0, 0]
+
+        def batimento():
+            # em thread própria: a thread do pipeline pode ficar muito tempo esperando a LLM
+            while not encerrar.wait(INTERVALO_BATIMENTO_S):
+                try:
+                    estado = self.fila.bater(tarefa, *progresso)
+                    self.fila.sinalizar_trabalhador(self.pid)
+                except sqlite3.Error as e:
+                    log.warning(f"falha ao renovar o batimento → {e}")
+                    continue
+                if estado != ESTADO_EXECUTANDO:
+                    cancelar.set()
+
+        def ao_progredir(concluidos, total, url):
+            progresso[:] = [concluidos, total]
+
+        thread = threading.Thread(target=batimento, name=f"batimento-{tarefa}", daemon=True)
+        thread.start()
+        try:
+            config = config_de_dict(dados_config, self.motor)
+            antes = self.motor.estatisticas()
+            self.motor.analisar_sites(
+                [url for _, url in restantes], config,
+                ao_progredir=ao_progredir,
+                ao_concluir_pagina=lambda url, link, analise: self.fila.registrar_pagina(tarefa, url, link, analise),
+                ao_concluir_site=lambda indice, resultado: self.fila.registrar_site(tarefa, restantes[indice][0],
+                                                                                   resultado),
+                cancelado=cancelar.is_set)
+            estatisticas = resumir_estatisticas(antes, self.motor.estatisticas())
+            estatisticas["prefixo"] = self.motor.hash_prefixo(config.llm)
+            # tempos por etapa (p50/p95), camadas de extração e sites mais lentos desta tarefa
+            estatisticas["relatorio"] = self.motor.metricas.relatorio()
+            estado = ESTADO_CANCELADA if cancelar.is_set() else ESTADO_CONCLUIDA
+            self.fila.concluir(tarefa, estado, estatisticas=estatisticas)
+            log.info(f"{tarefa}: {estado}")
+        except Exception as e:
+            log.exception(f"{tarefa}: falhou → {e}")
+            self.fila.concluir(tarefa, ESTADO_FALHOU, erro=str(e))
+        finally:
+            encerrar.set()
+            thread.join()
+
+
+def garantir_trabalhador(api_key: str, diretorio: str = DIRETORIO_PADRAO, fila: FilaTarefas = None) -> bool:
+    # Sobe um trabalhador em segundo plano se nenhum deu sinal recentemente; devolve True se subiu.
+    # O processo fica em outra sessão, então sobrevive ao fim do processo do Streamlit.
+    fila = fila or FilaTarefas(diretorio)
+    if fila.trabalhador_ativo():
+        return False
+    ambiente = dict(os.environ, GROQ_API_KEY=api_key)
+    with open(os.path.join(diretorio, "trabalhador.log"), "a", encoding="utf-8") as log:
+        subprocess.Popen([sys.executable, "-u", "-m", "electio.tarefas", "--diretorio-cache", diretorio],
+                         env=ambiente, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), start_new_session=True)
+    # registra o sinal já na subida, para que duas sessões do aplicativo não subam dois trabalhadores
+    fila.sinalizar_trabalhador(-1)
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m electio.tarefas",
+                                     description="Trabalhador que executa as análises submetidas em segundo plano.")
+    parser.add_argument("--diretorio-cache", default=DIRETORIO_PADRAO)
+    parser.add_argument("--uma-vez", action="store_true", help="sai quando a fila estiver vazia")
+    parser.add_argument("--metricas-porta", type=int, default=int(os.getenv("ELECTIO_METRICAS_PORTA", "0")),
+                        help="serve /metrics (formato do Prometheus) e /relatorio da tarefa em andamento nesta porta")
+    args = parser.parse_args(argv)
+    # a saída do processo vai para trabalhador.log (ver garantir_trabalhador)
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout, format=FORMATO_LOG)
+
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        log.error("Chave da API do Groq não encontrada. Defina a variável de ambiente GROQ_API_KEY.")
+        return 2
+    trabalhador = Trabalhador(api_key, args.diretorio_cache)
+    if args.metricas_porta:
+        servir_prometheus(trabalhador.motor.metricas, args.metricas_porta)
+    trabalhador.executar(uma_vez=args.uma_vez)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        TRIAGEM EM CASCATA (LÉXICO → MODELO RÁPIDO → MODELO GRANDE)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# A maior parte das notícias municipais (campanhas de vacinação, avisos de obras no trânsito,
+# editais) é obviamente conforme. No modo em cascata, cada página passa primeiro por uma pontuação
+# léxica local de risco (nomes de autoridades e candidatos, inaugurações, "gestão do prefeito",
+# superlativos de autopromoção, menções a eleições); páginas abaixo do limiar são conformes sem
+# chamar a LLM. As demais vão a um modelo pequeno e rápido com um prompt curto de alta sensibilidade
+# ("na dúvida, marque"), e só as páginas com algum parágrafo marcado sobem para o modelo grande com
+# o prompt completo. Páginas de pontuação muito alta vão direto ao modelo grande, e páginas cujos
+# parágrafos o modelo grande já julgou (cache de veredictos) usam esse julgamento sem triagem.
+
+MODELO_TRIAGEM = "llama-3.1-8b-instant"
+
+# (expressão sobre o texto em minúsculas, peso); cada expressão conta no máximo MAX_OCORRENCIAS vezes
+PADROES_RISCO = (
+    (r'inaugur\w*', 2.0),
+    (r'gest[aã]o d[oa] (?:atual )?prefeit[oa]', 3.0),
+    (r'(?:nossa|minha) (?:gest[aã]o|administra[cç][aã]o)', 3.0),
+    (r'administra[cç][aã]o d[oa] prefeit[oa]', 2.0),
+    (r'reelei[cç][aã]o|pr[eé]-?candidat\w*|\bcandidat[oa]s?\b', 3.0),
+    (r'campanha eleitoral|\belei[cç](?:[aã]o|[oõ]es)\b|\bvotos?\b|\bvote\b|\bpartido\b|\bcoliga[cç][aã]o\b', 2.0),
+    (r'promessa de campanha|cumpr\w* (?:mais )?uma promessa|compromisso (?:assumido )?(?:pel[oa]|d[oa]) prefeit', 3.0),
+    (r'gra[cç]as (?:ao|[aà]) (?:prefeit|empenho|esfor[cç]o|trabalho d[oa] prefeit)', 3.0),
+    (r'\bentreg\w* (?:mais )?(?:um|uma|o|a|os|as)\b', 1.0),
+    (r'\bhist[oó]ric[oa]\b|\bin[eé]dit[oa]\b|nunca antes|\bmaior (?:obra|investimento|programa)\b', 1.0),
+    (r'primeira[- ]dama', 2.0),
+    (r'\bslogan\b|marca da (?:gest[aã]o|administra[cç][aã]o)', 2.0),
+    (r'distribui[cç][aã]o (?:gratuita )?de (?:bens|cestas|brindes|kits)|\bbrindes?\b|\bsorteio\b', 2.0),
+)
+
+# Autoridade seguida de um nome próprio ("o prefeito João Silva"): avaliada no texto original
+RE_AUTORIDADE_NOMEADA = re.compile(
+    r'\b(?:[Pp]refeit[oa]|[Vv]ice-[Pp]refeit[oa]|[Gg]overnador(?:a)?|[Ss]ecret[áa]ri[oa]|[Vv]ereador(?:a)?|'
+    r'[Dd]eputad[oa]|[Ss]enador(?:a)?)\s+(?:[A-ZÁÉÍÓÚÂÊÔÃÕÇ][a-záéíóúâêôãõç]+\s?){1,3}')
+PESO_AUTORIDADE_NOMEADA = 2.0
+PESO_CANDIDATO = 5.0            # nome informado em ConfigTriagem.candidatos
+MAX_OCORRENCIAS = 2
+
+CAMADA_LEXICO = "lexico"
+CAMADA_JA_JULGADA = "ja_julgada"
+CAMADA_MODELO_RAPIDO = "modelo_rapido"
+CAMADA_MODELO_GRANDE = "modelo_grande"
+
+prompt_triagem = """
+Você faz a triagem de textos publicados em portais de prefeituras e órgãos públicos, antes de uma análise
+detalhada de conformidade com a legislação eleitoral. Seu papel é separar o que precisa de análise.
+
+Marque todo parágrafo que POSSA configurar: promoção pessoal de agente público ou candidato; publicidade
+institucional com nomes, imagens, símbolos ou slogans de autoridades; propaganda eleitoral; menção a candidatos,
+partidos, votos ou eleições; inaugurações, obras ou entregas atribuídas a autoridades; distribuição de bens.
+Na dúvida, marque. Não marque campanhas de utilidade pública (saúde, vacinação, trânsito, defesa civil), avisos
+de serviço, editais e licitações sem exaltação de autoridades, nem parágrafos estruturais (menus, rodapés).
+
+Data do pleito: {data_referencia}
+
+Responda com um objeto JSON {{"nao_conformes": [números dos parágrafos marcados]}} ou {{"nao_conformes": []}}.
+
+Texto (parágrafos numerados):
+\"\"\"{texto}\"\"\"
+
+Responda SOMENTE com o objeto JSON.
+"""
+
+
+@dataclass
+class ConfigTriagem:
+    ativa: bool = False
+    limiar_lexico: float = 2.0      # abaixo desta pontuação a página é conforme sem chamar a LLM
+    limiar_direto: float = 8.0      # a partir desta pontuação a página vai direto ao modelo grande
+    usar_modelo_rapido: bool = True # sem o modelo rápido, tudo o que passa do limiar léxico vai ao modelo grande
+    modelo_rapido: str = MODELO_TRIAGEM
+    prompt_rapido: str = prompt_triagem
+    candidatos: tuple = ()          # nomes de candidatos e autoridades que sempre elevam o risco
+
+
+@lru_cache(maxsize=16)
+def compilar_padroes_risco(candidatos: tuple):
+    padroes = [(re.compile(padrao), peso) for padrao, peso in PADROES_RISCO]
+    nomes = [c.strip().lower() for c in candidatos if c.strip()]
+    if nomes:
+        padroes.append((re.compile(r'\b(?:' + "|".join(re.escape(n) for n in nomes) + r')\b'), PESO_CANDIDATO))
+    return padroes
+
+
+def pontuar_risco(texto: str, candidatos: tuple = ()) -> float:
+    # Soma dos pesos das expressões de risco encontradas (cada uma até MAX_OCORRENCIAS vezes)
+    minusculo = texto.lower()
+    pontuacao = 0.0
+    for padrao, peso in compilar_padroes_risco(tuple(candidatos)):
+        ocorrencias = 0
+        for _ in padrao.finditer(minusculo):
+            ocorrencias += 1
+            if ocorrencias == MAX_OCORRENCIAS:
+                break
+        pontuacao += peso * ocorrencias
+    nomeadas = 0
+    for _ in RE_AUTORIDADE_NOMEADA.finditer(texto):
+        nomeadas += 1
+        if nomeadas == MAX_OCORRENCIAS:
+            break
+    return pontuacao + PESO_AUTORIDADE_NOMEADA * nomeadas
+
+
+def estatisticas_zeradas() -> dict:
+    return {
+        "paginas": 0,
+        "resolvidas_lexico": 0,            # conformes pela pontuação léxica, sem LLM
+        "ja_julgadas": 0,                  # todos os parágrafos já tinham veredicto do modelo grande
+        "triadas_modelo_rapido": 0,
+        "resolvidas_modelo_rapido": 0,     # o modelo rápido não marcou nenhum parágrafo
+        "escaladas": 0,                    # enviadas ao modelo grande (marcadas, diretas ou sem triagem)
+        "escaladas_direto": 0,             # pontuação léxica acima de limiar_direto
+        "confirmadas_modelo_grande": 0,    # escaladas com algum trecho não conforme no modelo grande
+        "tokens_modelo_rapido": 0,
+        "tokens_modelo_grande": 0,
+        "tempo_modelo_rapido_s": 0.0,
+        "tempo_modelo_grande_s": 0.0,
+        "tokens_evitados": 0,              # texto das páginas resolvidas antes do modelo grande
+    }
+
+
+def resumo_triagem(contadores: dict) -> dict:
+    # Taxas por camada e economia estimada: os tokens evitados custariam, no modelo grande, o tempo
+    # médio por token observado nas páginas escaladas
+    paginas = contadores.get("paginas", 0)
+    triadas = contadores.get("triadas_modelo_rapido", 0)
+    escaladas = contadores.get("escaladas", 0)
+    tokens_grande = contadores.get("tokens_modelo_grande", 0)
+    segundos_por_token = contadores.get("tempo_modelo_grande_s", 0.0) / tokens_grande if tokens_grande else 0.0
+    tempo_evitado = contadores.get("tokens_evitados", 0) * segundos_por_token
+    return {
+        "taxa_lexico": contadores.get("resolvidas_lexico", 0) / paginas if paginas else 0.0,
+        "taxa_ja_julgadas": contadores.get("ja_julgadas", 0) / paginas if paginas else 0.0,
+        "taxa_modelo_rapido": contadores.get("resolvidas_modelo_rapido", 0) / triadas if triadas else 0.0,
+        "taxa_escalada": escaladas / paginas if paginas else 0.0,
+        "taxa_confirmacao": contadores.get("confirmadas_modelo_grande", 0) / escaladas if escaladas else 0.0,
+        "tokens_economizados": round(contadores.get("tokens_evitados", 0) - contadores.get("tokens_modelo_rapido", 0)),
+        "tempo_economizado_s": round(tempo_evitado - contadores.get("tempo_modelo_rapido_s", 0.0), 1),
+    }
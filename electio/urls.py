@@ -0,0 +1,38 @@
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        NORMALIZAÇÃO DE URLS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Parâmetros de rastreamento que não mudam o conteúdo da página
+PARAMETROS_RASTREAMENTO = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl", "igshid", "ref", "ref_src", "share",
+}
+
+
+def _parametro_rastreamento(nome: str) -> bool:
+    nome = nome.lower()
+    return nome.startswith("utm_") or nome in PARAMETROS_RASTREAMENTO
+
+
+def normalizar_url(url: str) -> str:
+    # Forma canônica usada como chave de cache e para eliminar duplicatas: esquema e domínio em
+    # minúsculas, sem porta padrão, sem fragmento, sem parâmetros de rastreamento, com a query
+    # ordenada e sem barra final (exceto na raiz)
+    parsed = urlparse(url.strip())
+    esquema = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (esquema == "http" and netloc.endswith(":80")) or (esquema == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    caminho = parsed.path or "/"
+    if len(caminho) > 1:
+        caminho = caminho.rstrip("/") or "/"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                             if not _parametro_rastreamento(k)))
+    return urlunparse((esquema, netloc, caminho, parsed.params, query, ""))
+
+
+def host(url: str) -> str:
+    # Domínio sem "www." e sem porta, para comparar links internos
+    netloc = urlparse(url).netloc.lower().split(":")[0]
+    return netloc[4:] if netloc.startswith("www.") else netloc
@@ -1,17 +1,21 @@
 import streamlit as st
-import trafilatura
-from urllib.parse import urljoin, urlparse
-from groq import Groq
+import json
 import os
+import time
 import pandas as pd
-from lxml import html
-from bs4 import BeautifulSoup
-import json
-import matplotlib.pyplot as plt
-import re
-from groq.types.chat import ChatCompletionUserMessageParam
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
-
+from electio.agendador import ErroLLM
+from electio.cadastro import CadastroSites, ler_arquivo_sites
+from electio.cliente_http import ConfigHTTP
+from electio.datas import ConfigJanela
+from electio.motor import (GROQ_MODELS, TERMOS_IRRELEVANTES, ConfigAnalise, ConfigColeta, ConfigLLM, MotorAnalise,
+                           extrair_subdominio_gov, prompt_padrao, validar_prompt)
+from electio.documentos import EXTENSOES_ACEITAS, ORIGEM_CACHE
+from electio.duplicatas import ConfigDuplicatas
+from electio.pipeline import ConfigConcorrencia
+from electio.snapshots import ConfigMonitoramento
+from electio.triagem import ConfigTriagem, resumo_triagem
+from electio.tarefas import (ESTADO_CANCELADA, ESTADO_FALHOU, ESTADOS_ATIVOS, FilaTarefas,
+                             garantir_trabalhador)
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
@@ -38,25 +42,11 @@ if "GROQ_API_KEY" not in st.session_state:
         st.stop()
     st.session_state.GROQ_API_KEY = api_key
 
-client = Groq(api_key=st.session_state.GROQ_API_KEY)
-
-# ◆━━━━━━━━━━━━━━  LISTA DE MODELOS DE IA ━━━━━━━━━━━━━━━━━━◆
-
-# É possível incluir mais modelos que estão disponíveis no site
-
-GROQ_MODELS = [
-    "llama-3.3-70b-versatile",
-    "mixtral-8x7b-32768",
-    "openai/gpt-oss-120b"
-]
-
-# ◆━━━━  CAMINHOS IRRELEVANTES PARA A BUSCA DE LINKS ━━━━━━━◆
+@st.cache_resource  # um único motor por processo: agendador do Groq, caches em disco e thread do Playwright
+def _get_motor(api_key: str) -> MotorAnalise:
+    return MotorAnalise(api_key=api_key)
 
-LISTA_1 = [
-    '/login', '/cadastro', '/conta', '/privacidade',
-    '/contato', '/sobre', '/equipe', '/assinatura',
-    '/webmail', '/galeria', '/simbolos'
-          ]  # palavras-chave para exclusão na busca de links
+motor = _get_motor(st.session_state.GROQ_API_KEY)
 
 # ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
 #                 CABEÇALHO DA PÁGINA
@@ -121,35 +111,100 @@ with st.expander("🤖 **Configurações do Modelo de IA**", expanded=False):
         # Define o número máximo de caracteres lidos para cada trecho da lido
         quant_caract = st.slider("Quantidade mínima de caracteres", 100, 500, 250, 50, help="Valores menores aumentam a quantidade de trechos para análise.")
 
+    col_conc_global, col_conc_host = st.columns(2)
+    with col_conc_global:
+        # Define quantas requisições de rede podem ocorrer ao mesmo tempo em toda a análise
+        max_conexoes = st.slider("Conexões simultâneas (total)", 1, 64, 16, help="Limite global de downloads em paralelo.")
+    with col_conc_host:
+        # Define quantas requisições simultâneas um mesmo site pode receber
+        max_por_host = st.slider("Conexões simultâneas por site", 1, 8, 2, help="Evita sobrecarregar um mesmo portal.")
+    col_timeout, col_tentativas = st.columns(2)
+    with col_timeout:
+        # Segundos sem receber dados de um portal antes de desistir da tentativa
+        timeout_leitura = st.slider("Tempo limite de leitura (s)", 5, 120, int(ConfigHTTP.timeout_leitura), 5)
+    with col_tentativas:
+        # Timeouts, 429 e 5xx são repetidos com espera exponencial
+        tentativas_http = st.slider("Tentativas por requisição", 1, 6, ConfigHTTP.tentativas)
+    conexoes_abertas = st.slider("Conexões mantidas abertas por domínio", 1, 16, ConfigHTTP.conexoes_por_host,
+                                 help="Reaproveitadas entre as páginas do mesmo portal (keep-alive).")
+    col_chamadas, col_cache = st.columns(2)
+    with col_chamadas:
+        # Define quantas chamadas à LLM podem ocorrer ao mesmo tempo
+        max_chamadas_llm = st.slider("Chamadas simultâneas à LLM", 1, 16, 4)
+    with col_cache:
+        # Parágrafos já julgados com o mesmo prompt, modelo, data e base legal não são reenviados
+        usar_cache_veredictos = st.checkbox("Reutilizar veredictos de parágrafos já analisados", value=True,
+                                            help="Sem esta opção todos os parágrafos são reenviados à LLM.")
+    col_prof, col_atraso = st.columns(2)
+    with col_prof:
+        # Define quantos níveis de páginas de listagem (ex.: /noticias) são seguidos a partir do endereço informado
+        profundidade = st.slider("Profundidade da busca de links", 1, 3, 1,
+                                 help="Sitemaps e feeds RSS são consultados antes das âncoras da página.")
+    with col_atraso:
+        # Define o intervalo mínimo entre requisições ao mesmo site (o Crawl-delay do robots.txt prevalece se maior)
+        atraso_por_host = st.slider("Intervalo entre requisições ao mesmo site (s)", 0.0, 5.0, 0.5, 0.25)
+    # Páginas quase idênticas (listagens, versões de impressão, notícias replicadas) são analisadas uma única vez
+    deduplicar = st.checkbox("Analisar uma única vez páginas quase idênticas", value=True,
+                             help="Vale dentro de cada site e entre sites; as demais cópias recebem o mesmo resultado.")
+    # Monitoramento diário no defeso: páginas com o mesmo texto da última análise (mesma configuração) herdam o veredicto
+    somente_mudancas = st.checkbox("Reanalisar só páginas novas ou alteradas desde a última análise", value=False,
+                                   help="As páginas inalteradas herdam o resultado anterior; cada site recebe um "
+                                        "relatório de mudanças.")
+    # Páginas datadas (JSON-LD, <meta>, "Publicado em", URL) antes da janela do defeso não vão à LLM
+    col_janela, col_meses = st.columns(2)
+    with col_janela:
+        descartar_fora_janela = st.checkbox("Ignorar páginas publicadas fora da janela do defeso", value=True,
+                                            help="Sem esta opção elas ainda são analisadas, mas ficam para o fim da "
+                                                 "seleção de links. Páginas sem data são sempre analisadas.")
+    with col_meses:
+        meses_janela = st.slider("Janela antes do pleito (meses)", 1, 12, ConfigJanela.meses)
+    # Parágrafos com estes termos (palavras inteiras, sem diferenciar maiúsculas) são tratados como menu, rodapé etc.
+    termos_irrelevantes = st.text_area("Termos que descartam um parágrafo (um por linha)",
+                                       value="\n".join(TERMOS_IRRELEVANTES), height=150)
+    termos_irrelevantes = tuple(t.strip() for t in termos_irrelevantes.splitlines() if t.strip())
+    # Triagem em cascata: pontuação léxica local e um modelo pequeno antes do modelo escolhido acima;
+    # só as páginas marcadas pela triagem chegam ao modelo grande
+    usar_triagem = st.checkbox("Triagem em cascata (léxico → modelo rápido → modelo principal)", value=False,
+                               help="Páginas obviamente conformes (vacinação, trânsito, editais) não chegam ao modelo principal.")
+    if usar_triagem:
+        col_triagem_modelo, col_triagem_limiar = st.columns(2)
+        with col_triagem_modelo:
+            modelo_triagem = st.text_input("Modelo rápido da triagem (Groq)", value=ConfigTriagem.modelo_rapido)
+            usar_modelo_rapido = st.checkbox("Usar o modelo rápido", value=True,
+                                             help="Sem ele, tudo o que passa do limiar léxico vai ao modelo principal.")
+        with col_triagem_limiar:
+            limiar_triagem = st.slider("Limiar léxico de risco", 0.0, 10.0, ConfigTriagem.limiar_lexico, 0.5,
+                                       help="Páginas abaixo desta pontuação são conformes sem chamar a LLM.")
+            limiar_direto = st.slider("Limiar para o modelo principal direto", 4.0, 30.0, ConfigTriagem.limiar_direto, 1.0)
+        candidatos = st.text_area("Candidatos e autoridades que elevam o risco (um por linha)", height=100)
+        config_triagem = ConfigTriagem(ativa=True, limiar_lexico=limiar_triagem, limiar_direto=limiar_direto,
+                                       usar_modelo_rapido=usar_modelo_rapido, modelo_rapido=modelo_triagem.strip(),
+                                       candidatos=tuple(c.strip() for c in candidatos.splitlines() if c.strip()))
+    else:
+        config_triagem = ConfigTriagem()
+
 # ◆━━━━━━━━━━━━   ADIÇÃO DE SITES   ━━━━━━━━━━━━━━━━━━━━━━━━◆
 
-# Podem ser adicionado mais de um site
+# Podem ser adicionado mais de um site, um a um ou em lote (CSV/JSON com milhares de portais).
+# A lista fica no cadastro persistente (electio/cadastro.py) e vale entre sessões.
 
 st.markdown("### Adição de Sites")
 
-if "sites_df" not in st.session_state:
-    st.session_state.sites_df = pd.DataFrame(columns=["URL", "Nome do Site"]) # monta a tabela com a lista das URLs
-
-# ◆━━━━━━ EXTRAÇÃO DO SUBDOMÍNIO: MUN.UF.GOV.BR OU UF.GOV.BR ━━━━━━◆
+@st.cache_resource
+def _get_cadastro() -> CadastroSites:
+    return CadastroSites()
 
-def extrair_subdominio_gov(url: str) -> str:   # extrai o subdominio para facilitar a visualização
+cadastro_sites = _get_cadastro()
 
-    parsed = urlparse(url.strip()) # limpa os espaços e desmonta a URL
-    netloc = parsed.netloc.lower()
-
-    if ':' in netloc:
-        netloc = netloc.split(':')[0]
-    if netloc.startswith('www.'):
-        netloc = netloc[4:]
-    if not netloc.endswith('.gov.br'):
-        raise ValueError(f"A URL não termina com .gov.br: {url}")
-    dominio_sem_gov = netloc[:-7]
-    partes = dominio_sem_gov.split('.')
-    if len(partes) >= 2:
-        resultado = '.'.join(partes[-2:])
-    else:
-        resultado = partes[-1]
-    return resultado
+def _avisar_importacao(relatorio: dict):
+    # Mostra o resultado de uma inclusão (individual ou em lote) no cadastro
+    if relatorio["adicionados"]:
+        st.success(f"{relatorio['adicionados']} site(s) adicionado(s).")
+    if relatorio["duplicados"]:
+        st.warning(f"{relatorio['duplicados']} URL(s) já estavam na lista e foram ignoradas.")
+    if not relatorio["invalidos"].empty:
+        st.error(f"{len(relatorio['invalidos'])} URL(s) inválida(s) não foram adicionadas.")
+        st.dataframe(relatorio["invalidos"].head(200), hide_index=True, use_container_width=True)
 
 # ◆━━━━━━━━━━━━━━━━━━━━━━━ ADIÇÃO DE NOVO SITE ━━━━━━━━━━━━━━━━━━━━━━━◆
 
@@ -159,7 +214,7 @@ with st.expander("🌐 sites", expanded=False):
     with col1:
         nova_url = st.text_input(
             "URL do site (ex: https://www.municipio.uf.gov.br/noticias)",
-            placeholder="https://www.exemplo.go.gov.br/noticias -* https:// *- é mandatório",
+            placeholder="https://www.exemplo.go.gov.br/noticias",
             help="Página principal de notícias ou comunicados da administração pública."
         )
 
@@ -167,63 +222,71 @@ with st.expander("🌐 sites", expanded=False):
         if not nova_url.strip():
             st.error("Por favor, insira uma URL válida.")
         else:
-            url_limpa = nova_url.strip().rstrip("/")
-            # Monta o dataframe com as URL/PATH
-            urls_existentes = st.session_state.sites_df["URL"].str.rstrip("/").tolist()
+            _avisar_importacao(cadastro_sites.adicionar(nova_url))
 
-            if url_limpa in urls_existentes:
-                st.error("Esta URL já foi adicionada.")
-            else:
-                nome_exibicao = urlparse(url_limpa).netloc
-                novo_site = pd.DataFrame([{
-                    "URL": url_limpa,
-                    "Nome do Site": nome_exibicao
-                }])
-                st.session_state.sites_df = pd.concat(
-                    [st.session_state.sites_df, novo_site],
-                    ignore_index=True
-                )
-                st.success(f"Site adicionado: {nome_exibicao}")
-                st.rerun()
+    # Importação em lote: uma coluna URL (ou url/site/link) e, opcionalmente, o nome do site
+    arquivo_sites = st.file_uploader("Importar sites em lote (CSV ou JSON)", type=["csv", "json"],
+                                     help="CSV com uma coluna URL (e, se quiser, Nome do Site) ou JSON com uma "
+                                          "lista de URLs ou de objetos {\"url\": ..., \"nome\": ...}.")
+    if arquivo_sites is not None and st.button("Importar arquivo"):
+        try:
+            urls_arquivo, nomes_arquivo = ler_arquivo_sites(arquivo_sites.name, arquivo_sites.getvalue())
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"Não foi possível ler o arquivo: {e}")
+        else:
+            _avisar_importacao(cadastro_sites.importar(urls_arquivo, nomes_arquivo))
 
-# ◆━━━━━━━━━━━━━━━━━━━━━━━ LISTA EDITÁVEL DE SITES ━━━━━━━━━━━━━━━━━━━━━━━◆
+# ◆━━━━━━━━━━━━━━━━━━━━━━━ LISTA PAGINADA DE SITES ━━━━━━━━━━━━━━━━━━━━━━━◆
 
     st.markdown("##### Lista de Sites para Análise")
 
-    if st.session_state.sites_df.empty:
+    if not len(cadastro_sites):
         st.info("Nenhum site adicionado ainda. Use o campo acima para incluir.")
     else:
-        # Aqui são apresentadas as URLs em uma tabela
-        # data_editor com validação de duplicatas e com possibilidade de edição
+        # Só a página visível é lida do cadastro e desenhada: a tabela continua leve com milhares de sites
+        col_filtro, col_tamanho, col_pagina = st.columns([3, 1, 1])
+        with col_filtro:
+            filtro_sites = st.text_input("Filtrar por URL ou nome", placeholder="ex.: go.gov.br ou anapolis")
+        with col_tamanho:
+            por_pagina = st.selectbox("Sites por página", [25, 50, 100, 250], index=1)
+        _, total_filtrados = cadastro_sites.pagina(filtro_sites, 1, 1)
+        total_paginas = max(1, -(-total_filtrados // por_pagina))
+        with col_pagina:
+            pagina_sites = st.number_input("Página", min_value=1, max_value=total_paginas, value=1, step=1)
+
+        pagina_df, _ = cadastro_sites.pagina(filtro_sites, int(pagina_sites), por_pagina)
+        pagina_df.insert(0, "Remover", False)
         edited_df = st.data_editor(
-            st.session_state.sites_df,
-            num_rows="dynamic",
+            pagina_df,
             use_container_width=True,
+            disabled=["chave", "URL"],
+            column_order=["Remover", "URL", "Nome do Site"],
             column_config={
-                "URL": st.column_config.TextColumn(
-                    "URL",
-                    required=True,
-                    help="URL completa da página de notícias"
-                ),
-                "Nome do Site": st.column_config.TextColumn(
-                    "Nome do Site",
-                    required=False,
-                    help="Nome amigável para exibição"
-                )
+                "Remover": st.column_config.CheckboxColumn("Remover", help="Marque para tirar o site da lista"),
+                "URL": st.column_config.TextColumn("URL", help="URL completa da página de notícias"),
+                "Nome do Site": st.column_config.TextColumn("Nome do Site", help="Nome amigável para exibição")
             },
-            hide_index=True
+            hide_index=True,
+            key=f"sites_{filtro_sites}_{por_pagina}_{pagina_sites}"
         )
 
-        # Validação: impedir URLs duplicadas ao editar
-        urls_editadas = edited_df["URL"].str.strip().str.rstrip("/").tolist()
-        if len(urls_editadas) != len(set(urls_editadas)):
-            st.error("⚠️ Atenção: Não é permitido ter URLs duplicadas na lista.")
-        else:
-            # Só atualiza o estado se não houver duplicatas
-            st.session_state.sites_df = edited_df
-            st.success("Lista atualizada com sucesso!")
-        # print(edited_df)
-        st.caption(f"Total de sites: **{len(st.session_state.sites_df)}**")
+        # Nomes editados na página visível vão direto para o cadastro
+        renomeados = edited_df[edited_df["Nome do Site"] != pagina_df["Nome do Site"]]
+        if not renomeados.empty:
+            cadastro_sites.renomear(dict(zip(renomeados["chave"], renomeados["Nome do Site"].fillna(""))))
+
+        col_remover, col_limpar = st.columns(2)
+        with col_remover:
+            marcados = edited_df.loc[edited_df["Remover"], "chave"].tolist()
+            if st.button(f"🗑️ Remover selecionados ({len(marcados)})", disabled=not marcados):
+                cadastro_sites.remover(marcados)
+                st.rerun()
+        with col_limpar:
+            if st.button("Limpar lista"):
+                cadastro_sites.limpar()
+                st.rerun()
+        st.caption(f"Total de sites: **{len(cadastro_sites)}** | filtrados: {total_filtrados} | "
+                   f"página {int(pagina_sites)} de {total_paginas}")
 
 
 # ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ BASE LEGAL ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
@@ -237,62 +300,13 @@ with st.expander("🌐 sites", expanded=False):
 
 
 @st.cache_data(ttl=3600) #decorator para carregar os dados na memória cache e evitar execuções repetidas
+def _resumir_base_legal(base_legal: str, data_referencia: str, modeloIA: str) -> str:
+    return motor.analisar_base_legal(base_legal, data_referencia, modeloIA)
+
 def analisar_base_legal(base_legal: str, data_referencia: str, modeloIA: str) -> str:
-    if not base_legal.strip():
-        return "Nenhuma base legal fornecida."
-
-    prompt_base_legal = f"""
-    
-    [PERSONA] 
-      Você é um jurista especializado em compliance, com experiência em Direito Administrativo, Direito Eleitoral e ética na Administração Pública Federal brasileira. 
-    [/PERSONA] 
-
-    [CONTEXTO] 
-      Dada a base legal completa de referência e considerando como data do pleito a seguinte data informada pelo usuário \"\"\"{data_referencia}\"\"\", 
-    [/CONTEXTO] 
-
-    [TAREFA] 
-      Elabore uma análise jurídica estruturada, hierárquica e densa e das vedações, proibições e condutas vedadas aos agentes públicos no período eleitoral. 
-        1. Calcule e indique expressamente: 
-          - o período de defeso iniciado 6 meses antes da data do pleito; 
-          - o período de defeso iniciado 3 meses antes da data do pleito. 
-        2. Analise rigorosamente as condutas vedadas aplicáveis a cada um desses períodos, tais como: 
-         - propaganda institucional; 
-         - uso de bens e serviços públicos; 
-         - outras vedações previstas na legislação eleitoral. 
-       3. Não considere turnos eleitorais. Todos os prazos devem ser calculados exclusivamente em relação à data do pleito informada. 
-       4. Utilize exatamente a seguinte estrutura de formato markdown (para facilitar parsing): 
-        - **Parágrafos com as Vedações principais** (liste com bullets numerados ou -) 
-        - **Indicações dos Períodos de incidência** (datas relativas à eleição) 
-        - **Parágrafos destacando as Exceções e condutas permitidas** 
-        - **Parágrafos indicando as Sanções típicas** (breve) 
-       5. A análise deve ser fiel à base legal fornecida, eliminando apenas redundâncias e linguagem prolixa, sem prejuízo da precisão jurídica. 
-       Destaque as vedações correspondentes aos dois períodos do defeso eleitoral que antecedem a data do pleito (data_referencia). 
-
- 
-    Base legal completa: 
-    \"\"\"{base_legal}\"\"\" 
-    Responda exclusivamente com o documento da análise estruturada, sem introdução, contextualização inicial ou conclusão. 
-    [/TAREFA] 
-    """ 
-
-    # Carrega o prompt que será passado para análise pela LLM 
-
-    messages = [ChatCompletionUserMessageParam(role="user", content=prompt_base_legal)] 
-    # Carrega o prompt que será passado para análise pela LLM
-    messages = [ChatCompletionUserMessageParam(role="user", content=prompt_base_legal)]
-
-    #Parâmetros utilizados pela LLM via API
     try:
-        response = client.chat.completions.create(
-            model=modeloIA,
-            messages=messages,
-            temperature=0.1,  # baixa criatividade para fidelidade
-            max_tokens=1000
-        )
-        print(response)
-        return response.choices[0].message.content.strip()
-    except Exception as e:
+        return _resumir_base_legal(base_legal, data_referencia, modeloIA)
+    except ErroLLM as e:
         st.warning(f"Erro ao resumir base legal: {e}")
         return base_legal[:8000] + " [resumo truncado devido a erro]"
 
@@ -304,39 +318,51 @@ st.markdown("### **Base Legal**")
 with st.expander("📋 Base Legal", expanded=False):
     st.markdown("Defina o texto de referência legal que será usado na análise de conformidade pelo LLM.")
 
-    # Carregar múltiplos TXT como referência
+    # Carregar múltiplos arquivos como referência (PDF, DOCX e HTML são convertidos pelo docling)
 
-    st.markdown("### Upload arquivos .txt")
-    st.markdown("**Carregue até 2 arquivos .txt** com trechos da lei, resolução, portaria, cartilha etc.")
+    st.markdown("### Upload de arquivos")
+    st.markdown("**Carregue arquivos .txt, .pdf, .docx ou .html** com a lei, resoluções, portarias, cartilhas etc.")
 
-    # faz upload de arquivos do usuário em formato txt
+    # faz upload de arquivos do usuário
     uploaded_txt_files = st.file_uploader(
-        "Selecione arquivos TXT",
-        type=["txt"],
+        "Selecione os arquivos",
+        type=[e.lstrip(".") for e in EXTENSOES_ACEITAS],
         accept_multiple_files=True,
         key="txt_referencia_multi",
-        help="Máximo de 2 arquivos. Todos serão combinados em um único texto para a análise."
+        help="Todos serão combinados em um único texto para a análise. Documentos já convertidos antes "
+             "são lidos do cache."
     )
 
     conteudo_base_legal_referencia = "" #declara como str
 
     if uploaded_txt_files:
-        if len(uploaded_txt_files) > 2:
-            st.error("Limite máximo: 2 arquivos TXT.")
-            uploaded_txt_files = uploaded_txt_files[:2]
-
+        # A conversão roda na thread do docling do motor (sobrevive às reexecuções do script);
+        # aqui só se acompanha o progresso de cada arquivo
+        conversoes = [(file.name, file.getvalue()) for file in uploaded_txt_files]
+        futuros = [(nome, conteudo, motor.documentos.converter(nome, conteudo)) for nome, conteudo in conversoes]
         textos_carregados = []
-        for file in uploaded_txt_files:
+        for nome, conteudo, futuro in futuros:
+            if not futuro.done():
+                barra = st.progress(0.0, text=f"Convertendo {nome}...")
+                while not futuro.done():
+                    feitas, total = motor.documentos.progresso(conteudo)
+                    if total:
+                        barra.progress(feitas / total, text=f"Convertendo {nome}: {feitas}/{total} página(s)")
+                    time.sleep(0.5)
+                barra.empty()
             try:
-                contenteudo_txt = file.read().decode("utf-8") # carrega o arquivo com conteúdo normativo .txt na variável
+                documento = futuro.result()
                 # junta os conteúdo para formar a base legal
-                textos_carregados.append(f"\n\n=== Conteúdo de: {file.name} ===\n{contenteudo_txt}") #lista de conteúdos
-            except Exception as e:
-                st.warning(f"Erro ao ler {file.name}: {e}")
+                textos_carregados.append(f"\n\n=== Conteúdo de: {nome} ===\n{documento.texto}") #lista de conteúdos
+                if documento.paginas:
+                    st.caption(f"{nome}: {documento.paginas} página(s), {len(documento.secoes)} seção(ões)"
+                               f"{' (do cache)' if documento.origem == ORIGEM_CACHE else ''}")
+            except Exception as e:   # docling ausente, arquivo corrompido ou .txt fora de UTF-8
+                st.warning(f"Erro ao ler {nome}: {e}")
 
         if textos_carregados:
             conteudo_base_legal_referencia = "\n".join(textos_carregados) #transfoma a lista textos_carregados em um só conteúdo
-            st.success(f"{len(textos_carregados)} arquivo(s) TXT carregado(s) com sucesso.")
+            st.success(f"{len(textos_carregados)} arquivo(s) carregado(s) com sucesso.")
             st.caption(f"Total de caracteres: {len(conteudo_base_legal_referencia):,}")
 
         # Campo opcional para texto manual
@@ -355,7 +381,24 @@ with st.expander("📋 Base Legal", expanded=False):
                 st.session_state.conteudo_base_legal += "\n\n" + texto_manual.strip()
             st.info("Texto de referência pronto.")
 
-            if st.button("Analisar Base Legal"):
+            # Resumo: a LLM condensa a base inteira, que vai em todas as chamadas.
+            # Dispositivos: a base é indexada por artigo e cada chamada leva só os mais relevantes para o texto,
+            # o que reduz os tokens por chamada e permite bases bem maiores.
+            modo_base_legal = st.radio(
+                "Como usar a base legal na análise",
+                ["Resumo da base legal", "Dispositivos relevantes para cada texto"],
+                key="modo_base_legal",
+                help="Com muitos arquivos, prefira os dispositivos relevantes."
+            )
+            if modo_base_legal == "Dispositivos relevantes para cada texto":
+                st.slider("Dispositivos por chamada", 1, 15, 5, key="dispositivos_por_chamada")
+                indice = motor.indexar_base_legal(st.session_state.conteudo_base_legal)
+                st.caption(f"{len(indice)} dispositivo(s) indexado(s).")
+                st.session_state.indice_base_legal = indice
+            else:
+                st.session_state.indice_base_legal = None
+
+            if modo_base_legal == "Resumo da base legal" and st.button("Analisar Base Legal"):
                 with st.spinner("Analisando a base legal..."):
                     analise_bl = analisar_base_legal(
                         st.session_state.conteudo_base_legal,
@@ -369,245 +412,6 @@ with st.expander("📋 Base Legal", expanded=False):
 
 
 
-# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ FUNÇÕES AUXILIARES ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
-
-# ◆━━━━━━━━━━━━━━━━━━━━━━━ FUNÇÃO PARA COLETA DE LINKS DO SITE ━━━━━━━━━━━━━━━━━━━━━━━◆
-
-def coletar_links_internos(url: str, max_links) -> set:
-    downloaded = trafilatura.fetch_url(url)  # web scraping
-    if not downloaded:
-        return {url}
-    try:
-        tree = html.fromstring(downloaded) # converte em uma árvore de dados hierárquicos
-    except Exception:
-        return {url}
-
-    dominio = urlparse(url).netloc # extrai a parte da rede de uma URL
-    links_validos = {url}
-
-    #Loop para interar sobre todos os atributos href das tags de âncora (<a>) do tree.
-    for href in tree.xpath("//a/@href"): #
-        full = urljoin(url, href.strip())
-        parsed = urlparse(full)
-
-        if parsed.netloc != dominio: # Verifica se o domínio da URL extraída é o mesmo que o domínio da página original
-            continue                 # se for diferente, ignora o link e não coleta o link externo.
-
-        path = parsed.path.lower()
-
-        if any(block in path for block in LISTA_1): # se verdadeiro ignora e não coleta o link
-            continue
-
-        if re.search(r'\.(pdf|jpg|jpeg|png|gif|zip|docx?|xlsx?)$', path): # se verdadeiro ignora e não coleta o link
-            continue
-
-        links_validos.add(full)
-
-        if len(links_validos) >= max_links:
-            break
-
-    return links_validos
-
-# ◆━━━━━━━━━━━━━━━━━━━━━━━ FUNÇÃO PARA EXTRAÇÃO DE TEXTO ━━━━━━━━━━━━━━━━━━━━━━━◆
-
-@st.cache_resource(ttl=3600 * 4)  # Reutiliza browser para economizar de recurso
-def _get_playwright_browser():
-    pw = sync_playwright().start()
-    browser = pw.firefox.launch(headless=True, timeout=50000)
-    return pw, browser
-
-def extrair_texto(url: str, min_length) -> str:
-
-    # Extração robusta para portais .gov.br:
-    # Prioriza velocidade → fallback playwright só se necessário
-
-    # Primeira tentativa -> leve e rápida
-    downloaded = trafilatura.fetch_url(url)
-    if not downloaded:
-        return tentar_playwright(url, min_length)
-
-    # A. Trafilatura otimizado (melhor recall em notícias)
-    text = trafilatura.extract(
-        downloaded,
-        favor_recall=True,
-        favor_precision=True,
-        include_comments=False,
-        include_tables=False,
-        include_formatting=False,
-        output_format="txt",
-        no_fallback=False
-    )
-    if text and len(text.strip()) >= quant_caract:
-        return limpar_texto(text)
-
-    try:
-        soup = BeautifulSoup(downloaded, "lxml")
-        for tag in soup(["script", "style", "noscript", "header", "footer", "nav", "aside", "form"]):
-            tag.decompose()
-        text = soup.get_text(separator="\n", strip=True)
-        text = re.sub(r'\n{3,}', '\n\n', text).strip()
-        if len(text) >= min_length:
-            return limpar_texto(text)
-    except:
-        pass
-
-    # Último recurso: browser real (Playwright)
-    return tentar_playwright(url, min_length)
-
-def tentar_playwright(url: str, min_length: int) -> str:
-    try:
-        pw, browser = _get_playwright_browser()
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0",
-            locale="pt-BR",
-            viewport={"width": 1280, "height": 900}
-        )
-        page = context.new_page()
-
-        page.goto(url, wait_until="domcontentloaded", timeout=35000)
-        try:
-            page.wait_for_load_state("networkidle", timeout=18000)
-        except:
-            pass
-
-        # Rolagem leve para lazy-load
-        page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
-        page.wait_for_timeout(800)
-
-        # Tenta clicar em botões de aceite comuns
-        for text in ["Aceitar", "Concordar", "OK", "Continuar", "Fechar", "Aceito"]:
-            try:
-                page.get_by_role("button", name=re.compile(text, re.I)).first.click(timeout=1800)
-                break
-            except:
-                pass
-
-        # Extrai via seleção de tags se conteúdo principais
-        content = page.evaluate("""
-            () => {
-                const main = document.querySelector('article, main, [role="main"], #content, .entry-content, .post-content, .noticia-conteudo');
-                return (main || document.body).innerText.trim();
-            }
-        """)
-
-        page.close()
-        context.close()
-
-        if content and len(content) >= min_length:
-            return limpar_texto(content)
-
-    except (PWTimeoutError, Exception) as e:
-        print(f"[PLAYWRIGHT falhou] {url} → {str(e)[:90]}")
-
-    finally:
-        # Não fecha o browser global aqui — reutilizado via cache_resource
-        pass
-
-    return ""
-
-
-def limpar_texto(text: str) -> str:
-    if not text:
-        return ""
-    # Remove blocos comuns que vazam em .gov.br
-    text = re.sub(r'(?is)(política de (cookies|privacidade|lgpd)|acessibilidade|transparência ativa|ouvidoria|contato).*?(?=\n{2,}|$)', '', text)
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
-    return text.strip()
-
-# ◆━━━━━━━━━━━━━━━━━━━━━━━ FUNÇÃO PARA FILTRAR CONTEÚDO IRRELEVANTE ━━━━━━━━━━━━━━━━━━━━━━━◆
-
-# O objetivo do é filtrar os conteúdos que não correspondem a conteúdos estruturais da página
-
-def filtrar_conteudo_relevante(texto: str) -> str:
-    if not texto:
-        return ""
-    termos_irrelevantes = [
-        "política de privacidade", "cookies", "lgpd", "acessibilidade", "navegação", "teclas", "tab", "enter",
-        "rolagem", "ctrl", "command", "razão social", "cnpj", "endereço", "contato", "login", "termos de uso",
-        "sobre nós", "rodapé", "footer", "header", "menu", "navegador", "privacidade", "segurança", "captcha",
-        "WhatsApp"
-    ]
-    # Remove seções inteiras que contenham palavras-chave
-    blocos = re.split(r'\n\s*\n', texto)  # separa por parágrafos duplos
-    blocos_filtrados = []
-    for bloco in blocos:
-        if not any(k.lower() in bloco.lower() for k in termos_irrelevantes): # o que não está em bloco irrelevante passa.
-            blocos_filtrados.append(bloco)
-    return "\n\n".join(blocos_filtrados).strip()
-
-
-# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ PROMPT PARA ANÁLISE DE CONTEÚDO DOS SITES ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
-
-prompt_padrao = """
-Você é um jurista especializado em compliance, com larga experiência em Direito Administrativo, Direito Eleitoral e 
-ética na Administração Pública Federal.
-
-Atue de forma técnica, objetiva, fundamentada e neutra, sem emitir juízos políticos ou valorativos.
-[/PERSONA]
-
-[CONTEXTO]
-Durante o período eleitoral, é essencial que a Administração Pública observe rigorosamente as normas legais e éticas aplicáveis
-às comunicações institucionais, bem como as condutas que são vedadas por lei, regulamento, norma etc. 
-
-Para fins desta análise de conformidade, são considerados, EXCLUSIVAMENTE: 
-1 - O texto passado pelo usuário por meio da variável "texto";
-2 - a data do pleito passada por meio da variável "data_referencia"; e 
-3 - O RESUMO PRÉVIO DA BASE LEGAL processado na etapa resumo da base legal.
-
-[FLUXO]
-Com base no texto, execute rigorosamente as seguintes etapas: 
-1 - Divida o texto abaixo em trechos significativos (frases ou parágrafos com ideia completa e autônoma).
-2 - Analise a conformidade de cada trecho com relação ao RESUMO PRÉVIO DA BASE LEGAL.
-3 - Observe rigorosamente a data de início do pleito (data de referência informada pelo usuário) e as vedações correspondentes aos períodos de 3 e 6 meses que antecedem o pleito. As regras estão 
-na resultado do processamento da base legal. 
-
-RESUMO DA BASE LEGAL (referência única para julgar conformidade):
-\"\"\"{resumo_base_legal}\"\"\"
-
-INSTRUÇÕES RESTRIÇÃO SOBRE ELEMENTOS OU TAGs DE CONTEÚDOS EXTRAÍDOS – Desconsidere trechos cujo header traz uma dos seguintes termos:
-- Ignore completamente links ou trechos que iniciem ou contenha de forma estrutural do html os seguintes termos: 
-  'política de privacidade', 'cookies', 'LGPD', 'acessibilidade', 
-  'navegação' '(TAB/ENTER/CTRL)', 'razão social', 'CNPJ', 'endereço', 'termos de uso', 'login'', 
-  'contato', 'rodapé', 'menu', 'header',  'footer', "Acesse", "Serviços", "Órgão Vinculado", "Siga-nos" ou 
-   qualquer elemento estrutural que não seja um texto com não-notícia.
-
-- Foque apenas em notícias, comunicados ou textos institucionais relevantes.
-- Divida o texto em trechos significativos (frases ou parágrafos com ideia completa e autônoma).
-- Classifique cada trecho como "conforme" ou "não_conforme" com base no resumo. Seja muito rigoroso nessa parte, 
-  os trechos com texto "conforme" é considerado para efeito do total de trechos. Ou seja, 
-  o total de trechos deve obrigatoriamente sempre ser igual a soma dos trechos conformes e não conformes.
-- Atenção na data de referencia informada pelo usuário, pois, a partir dela é que se considera os períodos do defeso eleitoral. 
-  Não negligencie essa parte, é indispensável classificar a conformidade com relação aos períodos de defeso. 
-  Exemplo: eventos, acontecimentos ou ações anteriores aos períodos de defeso informados na base legal podem ser desconsiderados. 
-- NÃO escreva NENHUM texto explicativo, introdução, conclusão, comentário ou palavra extra.
-- Retorne EXATAMENTE cada trecho analisado para o processo de contagem, 
-  sem aspas extras, sem JSON, sem formatação adicional.
-_ Para cada trecho não conforme adicione o trecho à lista trechos_nao_conformes.
-- Se não houver nenhum techo não conforme, faça a variável total_conformes ter o valor igual a total_trechos_analisados
-
----------------------- RESULTADO ---------------------------------
-
-A resposta final tem apenas 2 variáveis, trechos_nao_conformes e contagem, e deve-se seguir rigorosamente os seguintes formatos:
-
-trechos_nao_conformes = [["trecho1 não conforme"], ["trecho2 não conforme"], ...]
-
-contagem = [total_trechos_analisados, total_conformes, total_nao_conformes]
-
-Exemplos obrigatórios do formato exato (copie exatamente):
-Se houver 2 não conformes em 10 trechos (8 conformes):
-trechos_nao_conformes = [["Texto do primeiro trecho não conforme"], ["Texto do segundo trecho não conforme"]]
-contagem = [10, 8, 2]
-
-
-Texto para análise:
-\"\"\"{texto}\"\"\"
-
-Data de referência:
-\"\"\"{data_referencia}\"\"\"
-
-Responda SOMENTE com as duas linhas acima. Nada mais.
-"""
-
 st.markdown("### **Prompt**")
 with st.expander("🧠 Prompt", expanded=False):
     st.markdown("#### Prompt para Análise")
@@ -624,104 +428,6 @@ with st.expander("🧠 Prompt", expanded=False):
     )
 
 
-# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
-# ░░░░░░░░░░░░░░░ FUNÇÃO PARA ANÁLISE COM LLM - chamada da API do Groq ░░░░░░░░░░░░░░░░░░░░░
-# ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
-
-
-def analisar_com_llm(texto: str,
-                     model: str,
-                     temperatura: float,
-                     prompt_personalizado: str,
-                     data_referencia):
-
-    # extrai conteúdo relevante
-    texto_filtrado = filtrar_conteudo_relevante(texto)
-    if not texto_filtrado:
-        return [], [0, 0, 0]
-
-    data_ref_str = data_referencia.strftime('%d/%m/%Y') if data_referencia else "não informada"
-
-    try:
-        prompt_completo = prompt_personalizado.format(
-            texto=texto_filtrado,
-            data_referencia=data_ref_str,
-            # resumo_base_legal=st.session_state.get("resumo_base_legal", "Nenhum resumo disponível")
-            resumo_base_legal = st.session_state.get("resumo_base_legal")
-        )
-    except Exception as e:
-        st.error(f"Erro no formato do prompt: {e}")
-        return [], [0, 0, 0]
-
-    try:
-        messages = [ChatCompletionUserMessageParam(role="user", content=prompt_completo)]
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperatura,
-            max_tokens=800
-        )
-
-        content = response.choices[0].message.content.strip()
-
-        #print("=====================================content========================")
-        #print(content)
-        
-        # Armazena os trechos não conformes e realiza a contagem global
-        
-        trechos_nao_conformes = []
-        contagem = [0, 0, 0]
-
-        # Modificação 1: Expressão regular mais flexível
-        match_trechos = re.search(r'trechos_nao_conformes\s*=\s*(\[.*?])', content, re.DOTALL | re.IGNORECASE)
-        if match_trechos:
-            lista_str = match_trechos.group(1)
-            # Limpar aspas e caracteres especiais
-            lista_str = lista_str.replace('“', '"').replace('”', '"').replace("'", '"')
-            # Remover quebras de linha dentro das strings
-            lista_str = re.sub(r'\n', ' ', lista_str)
-            try:
-                lista_trechos = json.loads(lista_str)
-                # Extrair strings das listas internas
-                trechos_nao_conformes = []
-                for item in lista_trechos:
-                    if isinstance(item, list) and len(item) > 0:
-                        trechos_nao_conformes.append(str(item[0]).strip())
-                    elif isinstance(item, str):
-                        trechos_nao_conformes.append(item.strip())
-            except json.JSONDecodeError as e:
-                print("Erro ao parsear trechos:", e, "\nConteúdo bruto:", lista_str)
-                # Fallback: tentar extrair manualmente
-                padrao_fallback = r'\[\s*"([^"]+)"\s*\]'
-                trechos_encontrados = re.findall(padrao_fallback, lista_str)
-                if trechos_encontrados:
-                    trechos_nao_conformes = [t.strip() for t in trechos_encontrados]
-
-        # Modificação 2: Expressão regular para contagem
-        match_contagem = re.search(r'contagem\s*=\s*(\[\s*\d+\s*,\s*\d+\s*,\s*\d+\s*])', content, re.IGNORECASE)
-        
-        contagem = None
-        contagem_str = None
-        
-        if match_contagem:
-            try:
-                contagem_str = match_contagem.group(1)
-                contagem = json.loads(contagem_str)
-            except:
-                print("Erro ao parsear contagem:", match_contagem.group(1))
-                # Fallback: extrair números
-                numeros = re.findall(r'\d+', contagem_str)
-                if len(numeros) >= 3:
-                    contagem = [int(n) for n in numeros[:3]]
-
-        return trechos_nao_conformes, contagem
-
-    except Exception as e:
-        st.warning(f"Erro na chamada ao LLM: {e}")
-        return [], [0, 0, 0]
-
-
-
 # ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
 # ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░ ANÁLISE DOS SITES ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
 # ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
@@ -730,73 +436,208 @@ def analisar_com_llm(texto: str,
 if "resultados" not in st.session_state:
     st.session_state.resultados = []
 
+# A análise roda em um processo trabalhador (electio/tarefas.py), fora da execução do script:
+# recarregar a página ou mexer nos widgets não a interrompe. O aplicativo só submete a tarefa
+# e acompanha, pela tabela de tarefas, o progresso e os resultados já gravados.
+@st.cache_resource
+def _get_fila() -> FilaTarefas:
+    return FilaTarefas()
+
+fila_tarefas = _get_fila()
+
 colAnalisar1, colAnalisar2, colAnalisar3 = st.columns([1, 2, 1])
 with colAnalisar2:
     analisar = st.button("🚀 **Analisar Sites**", type="primary", use_container_width=True)
 
 if analisar:
-    if st.session_state.sites_df.empty:
+    urls_cadastradas = cadastro_sites.urls()
+    if not urls_cadastradas:
         st.error("Adicione pelo menos um site antes de analisar.")
     else:
-        sites = st.session_state.sites_df.to_dict("records")  # ok
-        resultados_analise_llm = []
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        # print(sites)
-        for idx, site in enumerate(sites):
-            url = site["URL"]
-            status_text.text(f"Analisando {idx + 1}/{len(sites)}: {url}")
-            # print(max_links)
-            links = coletar_links_internos(url, max_links=max_links)
-
-            total_trechos = 0
-            total_conformes = 0
-            total_nao_conformes = 0
-            trechos_nao_conformes = []
-
-            # print(links)
-            for link in links:
-                texto = extrair_texto(link, quant_caract)
-                if texto:
-                    trechos_nao_conformes_site, lista_contagem = analisar_com_llm(
-                        texto,
-                        modeloIA,
-                        temperatura,
-                        prompt_personalizado,
-                        st.session_state.data_referencia
-                    )
-                    # Acumula os trechos (lista de strings)
-                    trechos_nao_conformes.extend(trechos_nao_conformes_site)
 
-                    # Acumula contagens
-                    total_trechos += lista_contagem[0]
-                    total_conformes += lista_contagem[1]
-                    total_nao_conformes += lista_contagem[2]
-
-            # Calcula percentual de conformidade da URL
-            if total_trechos == 0:
-                perConformes = 0.0
-            else:
-                perConformes = round((total_conformes / total_trechos) * 100, 1)
-
-            resultados_analise_llm.append({
-
-                "url": url,
-                "conformidade": perConformes,
-                "total_trechos": total_trechos,
-                "conformes": total_conformes,
-                "nao_coformes": total_nao_conformes,
-                "trechos_nao_conformes": trechos_nao_conformes
-
-            })
-            print("_____________________resultados_analise_llm___________________")
-            print(resultados_analise_llm)
-
-            progress_bar.progress((idx + 1) / len(sites))
-
-        status_text.empty()
-        progress_bar.empty()
-        st.session_state.resultados = resultados_analise_llm
+        config_analise = ConfigAnalise(
+            coleta=ConfigColeta(max_links=max_links, min_caracteres=quant_caract,
+                                profundidade=profundidade, atraso_por_host=atraso_por_host),
+            llm=ConfigLLM(
+                modelo=modeloIA,
+                temperatura=temperatura,
+                prompt=prompt_personalizado,
+                data_referencia=st.session_state.data_referencia,
+                # resumo gerado no expander "Base Legal"
+                resumo_base_legal=st.session_state.get("analise_bl"),
+                # ou o índice dos dispositivos, se escolhido no mesmo expander
+                indice_base_legal=st.session_state.get("indice_base_legal"),
+                dispositivos_por_chamada=st.session_state.get("dispositivos_por_chamada", 5),
+                usar_cache=usar_cache_veredictos,
+                termos_irrelevantes=termos_irrelevantes
+            ),
+            concorrencia=ConfigConcorrencia(
+                max_global=max_conexoes,
+                max_por_host=max_por_host,
+                workers_extracao=max_conexoes,
+                workers_analise=max_chamadas_llm
+            ),
+            duplicatas=ConfigDuplicatas(ativo=deduplicar),
+            monitoramento=ConfigMonitoramento(delta=somente_mudancas),
+            triagem=config_triagem,
+            janela=ConfigJanela(meses=meses_janela, descartar=descartar_fora_janela),
+            http=ConfigHTTP(timeout_leitura=timeout_leitura, tentativas=tentativas_http,
+                            conexoes_por_host=conexoes_abertas)
+        )
+        try:
+            validar_prompt(config_analise.llm.prompt)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+
+        st.session_state.tarefa_id = fila_tarefas.submeter(urls_cadastradas, config_analise)
+        garantir_trabalhador(st.session_state.GROQ_API_KEY, fila=fila_tarefas)
+
+
+# ░░░░░░░░░░░░░░░░░░░░░░░░░ ACOMPANHAMENTO DAS ANÁLISES EM SEGUNDO PLANO ░░░░░░░░░░░░░░░░░░░░░░░░░
+
+
+tarefas_recentes = fila_tarefas.listar(10)
+if tarefas_recentes:
+    ids_recentes = [t["id"] for t in tarefas_recentes]
+    rotulos = {t["id"]: f"{time.strftime('%d/%m %H:%M', time.localtime(t['criada_em']))} · "
+                        f"{t['sites_concluidos']}/{t['sites']} site(s) · {t['estado']}" for t in tarefas_recentes}
+    # depois de recarregar a página, a análise mais recente volta para a tela
+    atual = st.session_state.get("tarefa_id")
+    st.session_state.tarefa_id = st.selectbox(
+        "Análise", ids_recentes, index=ids_recentes.index(atual) if atual in ids_recentes else 0,
+        format_func=rotulos.get, help="As análises continuam no servidor mesmo com a página fechada.")
+
+    tarefa = fila_tarefas.obter(st.session_state.tarefa_id)
+    ativa = tarefa["estado"] in ESTADOS_ATIVOS
+    if ativa:
+        garantir_trabalhador(st.session_state.GROQ_API_KEY, fila=fila_tarefas)
+
+    # Só este trecho é redesenhado a cada segundo enquanto a análise está em andamento
+    @st.fragment(run_every=1.0 if ativa else None)
+    def acompanhar_tarefa(tarefa_id: str):
+        tarefa = fila_tarefas.obter(tarefa_id)
+        total_sites = len(tarefa["urls"])
+        if tarefa["estado"] not in ESTADOS_ATIVOS:
+            if st.session_state.get("tarefa_exibida") != tarefa_id:
+                # terminou: os resultados vão para a tabela e o gráfico completos, abaixo
+                st.session_state.tarefa_exibida = tarefa_id
+                st.session_state.resultados = fila_tarefas.resultados(tarefa_id)
+                st.rerun()
+            return
+
+        st.progress(min(tarefa["sites_concluidos"] / total_sites, 1.0) if total_sites else 0.0,
+                    text=f"{tarefa['estado'].capitalize()}: {tarefa['sites_concluidos']}/{total_sites} site(s) | "
+                         f"etapas concluídas {tarefa['concluidos']}/{tarefa['total']}")
+        if st.button("⏹️ Cancelar análise", key=f"cancelar_{tarefa_id}"):
+            fila_tarefas.cancelar(tarefa_id)
+
+        # Resultados parciais: trechos das páginas já julgadas e conformidade dos sites concluídos
+        linhas_parciais = [
+            {"Site": extrair_subdominio_gov(pagina["url"]), "Trecho": trecho, "URL original": pagina["url"]}
+            for pagina in fila_tarefas.paginas(tarefa_id) for trecho in pagina["trechos"]
+        ]
+        if linhas_parciais:
+            st.dataframe(pd.DataFrame(linhas_parciais).drop_duplicates(), hide_index=True, use_container_width=True)
+        sites_concluidos = fila_tarefas.resultados(tarefa_id)
+        if sites_concluidos:
+            st.bar_chart(pd.DataFrame({
+                "Site": [extrair_subdominio_gov(r["url"]) for r in sites_concluidos],
+                "Conformidade (%)": [r["conformidade"] for r in sites_concluidos],
+            }).set_index("Site"))
+
+    acompanhar_tarefa(st.session_state.tarefa_id)
+
+    if tarefa["estado"] == ESTADO_FALHOU:
+        st.error(f"A análise falhou: {tarefa['erro']}")
+    elif tarefa["estado"] == ESTADO_CANCELADA:
+        st.warning(f"Análise cancelada: {tarefa['sites_concluidos']} de {len(tarefa['urls'])} site(s) concluído(s).")
+
+    # estatísticas gravadas pelo trabalhador ao final da tarefa
+    estatisticas = tarefa["estatisticas"]
+    resultados_analise_llm = st.session_state.resultados
+    if not ativa and estatisticas and resultados_analise_llm and st.session_state.get("tarefa_exibida") == tarefa["id"]:
+        total_falhas = sum(r["falhas"] for r in resultados_analise_llm)
+        if total_falhas:
+            st.warning(f"{total_falhas} link(s) não puderam ser analisados e ficaram fora do percentual de conformidade.")
+        estatisticas_llm = estatisticas["llm"]
+        st.caption(f"Chamadas à LLM: {estatisticas_llm['chamadas']} | novas tentativas: {estatisticas_llm['repeticoes']} | "
+                   f"espera média na fila: {estatisticas_llm['espera_media_s']} s (máx. {estatisticas_llm['espera_max_s']} s)")
+        estatisticas_cache = estatisticas["cache_http"]
+        st.caption(f"Páginas do cache: {estatisticas_cache['cache']} | revalidadas (304): {estatisticas_cache['revalidada']} | "
+                   f"baixadas: {estatisticas_cache['rede']} | falhas: {estatisticas_cache['falhas']}")
+        estatisticas_http = estatisticas.get("http")
+        if estatisticas_http and estatisticas_http["requisicoes"]:
+            st.caption(f"Requisições HTTP: {estatisticas_http['requisicoes']} | "
+                       f"conexões abertas: {estatisticas_http['conexoes_abertas']} | "
+                       f"reaproveitadas (keep-alive): {estatisticas_http['conexoes_reaproveitadas']} | "
+                       f"novas tentativas: {estatisticas_http['repeticoes']} | falhas: {estatisticas_http['falhas']}")
+            with st.expander("Conexões por domínio"):
+                st.dataframe(pd.DataFrame.from_dict(estatisticas_http["por_host"], orient="index")
+                             .sort_values("tempo_total_s", ascending=False), use_container_width=True)
+        renderizadas = estatisticas["renderizadas"]
+        if renderizadas:
+            mais_lenta = max(renderizadas, key=renderizadas.get)
+            st.caption(f"Páginas renderizadas pelo Playwright: {len(renderizadas)} | "
+                       f"tempo médio: {sum(renderizadas.values()) / len(renderizadas):.1f} s | "
+                       f"mais lenta: {mais_lenta} ({renderizadas[mais_lenta]:.1f} s)")
+        estatisticas_veredictos = estatisticas["cache_veredictos"]
+        if estatisticas_veredictos["acertos"] or estatisticas_veredictos["faltas"]:
+            st.caption(f"Parágrafos com veredicto reaproveitado: {estatisticas_veredictos['acertos']} | "
+                       f"enviados à LLM: {estatisticas_veredictos['faltas']}")
+        tokens_enviados = sum(r['tokens_enviados'] for r in resultados_analise_llm)
+        tokens_em_cache = sum(r['tokens_em_cache'] for r in resultados_analise_llm)
+        st.caption(f"Tokens enviados à LLM: {tokens_enviados:,} | "
+                   f"recebidos: {sum(r['tokens_recebidos'] for r in resultados_analise_llm):,} | "
+                   f"do cache de prefixo: {tokens_em_cache:,} ({tokens_em_cache / tokens_enviados if tokens_enviados else 0:.0%}) | "
+                   f"prefixo do prompt: {estatisticas['prefixo']}")
+        truncamento = estatisticas.get("truncamento")
+        if truncamento and truncamento.get("respostas_truncadas"):
+            st.caption(f"Respostas truncadas da LLM: {truncamento['respostas_truncadas']} | blocos divididos: "
+                       f"{truncamento['blocos_divididos']} | reenvios com mais max_tokens: "
+                       f"{truncamento['reenvios_max_tokens']}")
+        textos = estatisticas["duplicatas"].get("textos", 0)
+        copias = estatisticas["duplicatas"].get("duplicatas", 0)
+        if textos:
+            st.caption(f"Páginas quase idênticas: {copias} de {textos} "
+                       f"({copias / textos:.0%}) reaproveitaram a análise de outra página")
+        datas = estatisticas.get("datas")
+        if datas and datas.get("paginas"):
+            st.caption(f"Páginas datadas: {datas['datadas']} de {datas['paginas']} | fora da janela do defeso: "
+                       f"{datas['fora_da_janela']} ({datas['descartadas']} sem análise) | links fora da janela na "
+                       f"seleção: {datas['links_fora_da_janela']}")
+        triagem = estatisticas.get("triagem")
+        if triagem and triagem.get("paginas"):
+            resumo = resumo_triagem(triagem)
+            st.caption(f"Triagem: {triagem['paginas']} página(s) | conformes pelo léxico: {resumo['taxa_lexico']:.0%} | "
+                       f"resolvidas pelo modelo rápido: {triagem['resolvidas_modelo_rapido']} de "
+                       f"{triagem['triadas_modelo_rapido']} | enviadas ao modelo principal: {triagem['escaladas']} "
+                       f"({resumo['taxa_escalada']:.0%}), confirmadas: {resumo['taxa_confirmacao']:.0%} | "
+                       f"economia estimada: {resumo['tokens_economizados']:,} tokens, {resumo['tempo_economizado_s']:.0f} s")
+
+        # Diagnóstico: onde a análise gastou o tempo (intervalos medidos pelo trabalhador)
+        relatorio = estatisticas.get("relatorio")
+        if relatorio and relatorio["etapas"]:
+            with st.expander("🩺 Diagnóstico da execução"):
+                st.caption(f"Início: {relatorio['inicio']} | duração: {relatorio['duracao_s']:.0f} s")
+                colunas_etapas = ["intervalos", "erros", "p50_s", "p95_s", "max_s", "total_s", "bytes",
+                                  "tokens_enviados", "tokens_recebidos", "tokens_em_cache"]
+                st.dataframe(pd.DataFrame.from_dict(relatorio["etapas"], orient="index")
+                             .reindex(columns=colunas_etapas).fillna(0).sort_values("total_s", ascending=False),
+                             use_container_width=True)
+                if relatorio["camadas_extracao"]:
+                    st.markdown("Camada que produziu o texto de cada página")
+                    st.bar_chart(pd.Series(relatorio["camadas_extracao"], name="Páginas"))
+                if relatorio["sites_mais_lentos"]:
+                    st.markdown("Sites mais lentos (coleta de links e extração)")
+                    st.dataframe(pd.DataFrame([{"Site": s["site"], "Tempo (s)": s["tempo_s"], **s["etapas"]}
+                                               for s in relatorio["sites_mais_lentos"]]),
+                                 hide_index=True, use_container_width=True)
+                if relatorio.get("eventos"):   # tarefas anteriores aos eventos não têm a chave
+                    st.markdown("Eventos (repetições HTTP, falhas por etapa, blocos que a LLM não analisou)")
+                    st.dataframe(pd.Series(relatorio["eventos"], name="Ocorrências"), use_container_width=True)
+                st.download_button("⬇️ Relatório em JSON", json.dumps(relatorio, ensure_ascii=False, indent=2),
+                                   file_name=f"relatorio_{tarefa['id']}.json", mime="application/json")
 
 
 # ░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░░
@@ -869,10 +710,32 @@ if resultados_para_plot:
     else:
         st.info("Nenhum trecho classificado como 'não conforme' foi encontrado na análise.")
 
+    # Relatório de mudanças em relação à última análise comparável de cada site
+    mudancas = [(r["url"], r["mudancas"]) for r in resultados_para_plot if r.get("mudancas")]
+    if mudancas:
+        st.subheader("🔄 Mudanças desde a última análise")
+        st.dataframe(pd.DataFrame([{
+            "Site": nome_grafico(url),
+            "Análise anterior": m["snapshot_anterior"].replace("T", " "),
+            "Novas": len(m["novas"]),
+            "Alteradas": len(m["alteradas"]),
+            "Inalteradas": m["inalteradas"],
+            "Sem nova análise": m["reaproveitadas"],
+            "Ausentes": len(m["ausentes"]),
+            "Trechos novos": len(m["trechos_novos"]),
+        } for url, m in mudancas]), hide_index=True, use_container_width=True)
+        trechos_novos = [{"Site": nome_grafico(url), "Trecho": t, "URL original": url}
+                         for url, m in mudancas for t in m["trechos_novos"]]
+        if trechos_novos:
+            st.markdown("**Trechos não conformes que não apareciam na análise anterior**")
+            st.dataframe(pd.DataFrame(trechos_novos), hide_index=True, use_container_width=True)
+
     if not df_result.empty:
         col_esq, col_centro, col_dir = st.columns([1, 2, 1])
 
         with col_centro:
+            import matplotlib.pyplot as plt  # carregado só quando há resultados para exibir
+
             fig, ax = plt.subplots(figsize=(10, 5))
 
             sites = df_result["Site"]
@@ -911,6 +774,7 @@ if resultados_para_plot:
 
             plt.tight_layout()
             st.pyplot(fig)
+            plt.close(fig)  # libera a figura; o script é reexecutado a cada interação
 
 # Rodapé
 st.markdown("---")
@@ -0,0 +1,50 @@
+import pytest
+
+from electio.agendador import JANELA_S, LimitesModelo, _EstadoModelo, converter_duracao, estimar_tokens
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        JANELA DE RPM/TPM E CABEÇALHOS DO GROQ
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+@pytest.mark.parametrize("valor, segundos", [
+    ("2m59.56s", 179.56), ("7.66s", 7.66), ("120ms", 0.12), ("1h2m", 3720.0), ("3", 3.0), (None, 0.0), ("", 0.0),
+])
+def test_converter_duracao_nos_formatos_do_groq(valor, segundos):
+    assert converter_duracao(valor) == pytest.approx(segundos)
+
+
+def test_estimar_tokens_soma_caracteres_e_max_tokens():
+    assert estimar_tokens([{"role": "system", "content": "a" * 40}, {"role": "user", "content": "b" * 8}], 100) == 112
+
+
+def test_rpm_esgotado_espera_a_requisicao_mais_antiga_sair_da_janela():
+    estado = _EstadoModelo(LimitesModelo(rpm=2, tpm=10_000))
+    estado.janela.extend([[0.0, 10], [5.0, 10]])
+    assert estado.espera_necessaria(10, agora=10.0) == pytest.approx(JANELA_S - 10.0)
+    # depois de 60 s a primeira sai da janela e a vaga é liberada
+    assert estado.espera_necessaria(10, agora=JANELA_S + 1) == 0.0
+
+
+def test_tpm_espera_so_ate_liberar_tokens_suficientes():
+    estado = _EstadoModelo(LimitesModelo(rpm=100, tpm=1000))
+    estado.janela.extend([[0.0, 400], [10.0, 400], [20.0, 100]])
+    # 900 usados: 500 a mais cabem quando a primeira sair; 600, só quando a segunda também sair
+    assert estado.espera_necessaria(500, agora=30.0) == pytest.approx(0.0 + JANELA_S - 30.0)
+    assert estado.espera_necessaria(600, agora=30.0) == pytest.approx(10.0 + JANELA_S - 30.0)
+    assert estado.espera_necessaria(100, agora=30.0) == 0.0
+
+
+def test_cabecalhos_corrigem_limites_e_bloqueiam_ate_o_reset():
+    estado = _EstadoModelo(LimitesModelo(rpm=30, tpm=6000))
+    estado.aplicar_cabecalhos({
+        "x-ratelimit-limit-requests": "20",
+        "x-ratelimit-limit-tokens": "12000",
+        "x-ratelimit-remaining-requests": "5",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "7.5s",
+    }, agora=100.0)
+    assert (estado.limites.rpm, estado.limites.tpm) == (20, 12000)
+    assert (estado.restante_requisicoes, estado.restante_tokens) == (5, 0)
+    assert estado.bloqueado_ate == pytest.approx(107.5)
+    assert estado.espera_necessaria(1, agora=101.0) == pytest.approx(6.5)
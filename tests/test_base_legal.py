@@ -0,0 +1,46 @@
+from electio.base_legal import CacheIndices, IndiceBaseLegal, dividir_dispositivos, termos
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        DISPOSITIVOS DA BASE LEGAL E BUSCA BM25
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+LEI = """Lei nº 9.504, de 30 de setembro de 1997. Estabelece normas para as eleições.
+Art. 73. São proibidas aos agentes públicos as seguintes condutas:
+VI - nos três meses que antecedem o pleito, autorizar publicidade institucional dos atos e programas.
+Art. 74. Configura abuso de autoridade a infringência do disposto no § 1º do art. 37 da Constituição,
+com promoção pessoal de autoridades em publicidade.
+Art. 77. É proibido a qualquer candidato comparecer a inaugurações de obras públicas."""
+
+
+def test_termos_sem_acentos_e_sem_palavras_vazias():
+    assert termos("A publicitária e a PUBLICITARIA do Município") == ["publicitaria", "publicitaria", "municipio"]
+
+
+def test_um_dispositivo_por_artigo_com_preambulo():
+    passagens = dividir_dispositivos(LEI, fonte="lei.txt")
+    assert [p.titulo for p in passagens] == ["Preâmbulo", "Art. 73", "Art. 74", "Art. 77"]
+    assert passagens[1].formatar().startswith("[lei.txt — Art. 73]\nArt. 73. São proibidas")
+
+
+def test_arquivos_juntados_e_artigos_em_markdown():
+    texto = ("=== Conteúdo de: resolucao.pdf ===\n## Art. 1º Disposição inicial.\n- Art. 2º Outra regra.\n"
+             "=== Conteúdo de: cartilha.docx ===\nTexto corrido sem artigos.")
+    passagens = dividir_dispositivos(texto)
+    assert [(p.fonte, p.titulo) for p in passagens] == [
+        ("resolucao.pdf", "Art. 1º"), ("resolucao.pdf", "Art. 2º"), ("cartilha.docx", "Trecho")]
+
+
+def test_busca_bm25_traz_os_dispositivos_relevantes_na_ordem_da_base():
+    indice = IndiceBaseLegal(dividir_dispositivos(LEI), "hash")
+    assert [p.titulo for p in indice.buscar("O prefeito candidato esteve na inauguração de obras", k=1)] == ["Art. 77"]
+    assert [p.titulo for p in indice.buscar("publicidade institucional com promoção pessoal", k=2)] == \
+        ["Art. 73", "Art. 74"]
+    assert indice.buscar("vacinação contra a gripe", k=3) == []
+
+
+def test_indice_persistido_e_reaproveitado_pelo_hash(tmp_path):
+    indice = CacheIndices(str(tmp_path)).indexar(LEI)
+    recarregado = CacheIndices(str(tmp_path)).carregar(indice.hash)
+    assert recarregado is not None and len(recarregado) == len(indice) == 4
+    assert [p.titulo for p in recarregado.buscar("inaugurações", k=1)] == ["Art. 77"]
+    assert CacheIndices(str(tmp_path)).carregar("outro hash") is None
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+
+from electio.cache_http import ORIGEM_CACHE, ORIGEM_REDE, ORIGEM_REVALIDADA, CacheHTTP
+from electio.cliente_http import ErroRede
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CACHE EM DISCO COM REVALIDAÇÃO CONDICIONAL
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+class ClienteSimulado:
+    # Responde 304 quando recebe If-None-Match com o ETag atual; `falhar` simula um portal fora do ar
+
+    def __init__(self, corpo=b"<html>ok</html>", etag='"v1"'):
+        self.corpo = corpo
+        self.etag = etag
+        self.falhar = False
+        self.pedidos = []
+
+    def get(self, url, headers=None):
+        self.pedidos.append(dict(headers or {}))
+        if self.falhar:
+            raise ErroRede("ConnectionRefusedError: recusada")
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return SimpleNamespace(status=304, data=b"", headers={})
+        return SimpleNamespace(status=200, data=self.corpo, headers={"ETag": self.etag})
+
+
+def test_pagina_fresca_vem_do_disco_e_a_vencida_e_revalidada(tmp_path):
+    cliente = ClienteSimulado()
+    cache = CacheHTTP(str(tmp_path), idade_fresca=600, cliente=cliente)
+
+    assert cache.obter("https://a.gov.br/noticia").origem == ORIGEM_REDE
+    # mesma página com outra grafia da URL (chave normalizada)
+    assert cache.obter("HTTPS://A.gov.br/noticia/?utm_source=x").origem == ORIGEM_CACHE
+    assert len(cliente.pedidos) == 1
+
+    cache.idade_fresca = 0
+    revalidada = cache.obter("https://a.gov.br/noticia")
+    assert revalidada.origem == ORIGEM_REVALIDADA and revalidada.corpo == b"<html>ok</html>"
+    assert cliente.pedidos[-1] == {"If-None-Match": '"v1"'}
+    assert cache.estatisticas() == {ORIGEM_CACHE: 1, ORIGEM_REVALIDADA: 1, ORIGEM_REDE: 1, "falhas": 0}
+
+
+def test_falha_de_rede_devolve_none_ou_propaga(tmp_path):
+    cliente = ClienteSimulado()
+    cliente.falhar = True
+    cache = CacheHTTP(str(tmp_path), cliente=cliente)
+
+    assert cache.obter("https://a.gov.br/") is None
+    with pytest.raises(ErroRede):
+        cache.obter("https://a.gov.br/", propagar_erro_rede=True)
+    assert cache.estatisticas()["falhas"] == 2
+
+
+def test_derivado_vale_so_para_o_mesmo_corpo(tmp_path):
+    cache = CacheHTTP(str(tmp_path), cliente=ClienteSimulado())
+    resposta = cache.obter("https://a.gov.br/noticia")
+    cache.salvar_derivado("https://a.gov.br/noticia", "texto", "texto extraído", resposta.validador)
+
+    assert cache.obter_derivado("https://a.gov.br/noticia", "texto", resposta.validador) == "texto extraído"
+    assert cache.obter_derivado("https://a.gov.br/noticia", "texto", "outro corpo") is None
+    assert cache.obter_derivado("https://a.gov.br/noticia", "renderizado") is None
+
+
+def test_despejar_remove_as_menos_acessadas_acima_do_tamanho(tmp_path):
+    cache = CacheHTTP(str(tmp_path), tamanho_max=25, cliente=ClienteSimulado(corpo=b"x" * 10))
+    for pagina in ("a", "b", "c"):
+        cache.obter(f"https://a.gov.br/{pagina}")
+    cache.obter("https://a.gov.br/a")      # "a" passa a ser a mais recente
+    cache.despejar()
+
+    cache.cliente.falhar = True            # o que sobrou tem de vir do disco
+    assert cache.obter("https://a.gov.br/a") is not None
+    assert cache.obter("https://a.gov.br/c") is not None
+    assert cache.obter("https://a.gov.br/b") is None
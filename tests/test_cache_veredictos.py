@@ -0,0 +1,61 @@
+import json
+import re
+from types import SimpleNamespace
+
+from electio.cache_veredictos import (VEREDICTO_CONFORME, VEREDICTO_NAO_CONFORME, CacheVeredictos, chave_paragrafo,
+                                      dividir_paragrafos)
+from electio.motor import ConfigLLM, MotorAnalise
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        CACHE DE VEREDICTOS POR PARÁGRAFO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+ARGUMENTOS_CHAVE = ("hash do prompt", "llama-3.3-70b-versatile", 0.2, "04/10/2026", "hash do resumo")
+
+
+def test_dividir_paragrafos_ignora_linhas_em_branco():
+    assert dividir_paragrafos("  Um.\n\n\n Dois. \n \nTrês.\n") == ["Um.", "Dois.", "Três."]
+    assert dividir_paragrafos(None) == []
+
+
+def test_chave_ignora_caixa_e_espacos_mas_nao_a_configuracao():
+    chave = chave_paragrafo("O prefeito  inaugurou\na obra.", *ARGUMENTOS_CHAVE)
+    assert chave == chave_paragrafo("o PREFEITO inaugurou a obra.", *ARGUMENTOS_CHAVE)
+    assert chave != chave_paragrafo("O prefeito inaugurou a obra.", "outro prompt", *ARGUMENTOS_CHAVE[1:])
+    assert chave != chave_paragrafo("O prefeito inaugurou a obra.", *ARGUMENTOS_CHAVE[:2], 0.7, *ARGUMENTOS_CHAVE[3:])
+
+
+def test_veredictos_persistem_entre_instancias_e_contam_acertos(tmp_path):
+    cache = CacheVeredictos(str(tmp_path))
+    cache.salvar_muitos({"a": (VEREDICTO_NAO_CONFORME, ["trecho"]), "b": (VEREDICTO_CONFORME, [])})
+
+    outro = CacheVeredictos(str(tmp_path))
+    assert outro.obter_muitos(["a", "b", "c", "a"]) == {"a": (VEREDICTO_NAO_CONFORME, ["trecho"]),
+                                                        "b": (VEREDICTO_CONFORME, [])}
+    assert outro.estatisticas() == {"acertos": 2, "faltas": 1}
+
+
+def test_paragrafo_ja_julgado_nao_volta_a_llm(tmp_path, monkeypatch):
+    enviados = []
+
+    def completar(model, messages, max_tokens, **parametros):
+        paragrafos = re.findall(r'\[\d+\] ([^\n"]*)', messages[-1]["content"])
+        enviados.extend(paragrafos)
+        ids = [n for n, p in enumerate(paragrafos, 1) if "candidato" in p]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"nao_conformes": ids})),
+                                     finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=None))
+
+    motor = MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+    monkeypatch.setattr(motor.agendador, "completar", completar)
+    config = ConfigLLM(resumo_base_legal="resumo", streaming=False)
+
+    primeira = motor.analisar_lote_com_llm(["Vacinação na praça.\n\nO candidato visitou a obra."], config)
+    # a mesma notícia replicada em outro portal, com um parágrafo novo
+    segunda = motor.analisar_lote_com_llm(["O candidato visitou a obra.\n\nFeira no sábado."], config)
+
+    assert enviados == ["Vacinação na praça.", "O candidato visitou a obra.", "Feira no sábado."]
+    assert primeira[0][:2] == (["O candidato visitou a obra."], [2, 1, 1])
+    assert segunda[0][:2] == (["O candidato visitou a obra."], [2, 1, 1])
+    assert motor.cache_veredictos.estatisticas() == {"acertos": 1, "faltas": 3}
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+from electio.cliente_http import ClienteHTTP, ConfigHTTP
+from electio.metricas import EVENTO_HTTP_REPETICAO, RegistroMetricas
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        POOL DE CONEXÕES E REPETIÇÕES
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# O PoolManager simulado abre uma conexão por pool e a reaproveita nas requisições seguintes;
+# esquecer() imita o despejo de um pool quando hosts_no_pool é excedido
+
+
+class PoolSimulado:
+
+    def __init__(self, host):
+        self.scheme, self.host, self.port = "https", host, 443
+        self.num_connections = 0
+        self.num_requests = 0
+
+
+class GerenciadorSimulado:
+
+    def __init__(self, status=()):
+        self.pools = {}
+        self.status = list(status)      # status das próximas respostas (depois, 200)
+
+    def connection_from_url(self, url):
+        nome = url.split("/")[2]
+        return self.pools.setdefault(nome, PoolSimulado(nome))
+
+    def request(self, metodo, url, headers=None):
+        pool = self.connection_from_url(url)
+        pool.num_connections = max(1, pool.num_connections)
+        pool.num_requests += 1
+        status = self.status.pop(0) if self.status else 200
+        return SimpleNamespace(status=status, data=b"ok", headers={"Retry-After": "0"} if status == 429 else {})
+
+    def esquecer(self, nome):
+        del self.pools[nome]
+
+    def clear(self):
+        self.pools.clear()
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    pytest.importorskip("urllib3")
+    cliente = ClienteHTTP()
+    monkeypatch.setattr(cliente, "_get_http", lambda: cliente._http)
+    cliente._http = GerenciadorSimulado()
+    return cliente
+
+
+def _pools_vivos(cliente):
+    return sum(len(pools) for pools in cliente._pools.values())
+
+
+def test_conexoes_reaproveitadas_no_mesmo_pool(cliente):
+    for _ in range(3):
+        cliente.get("https://a.gov.br/noticia")
+    estatisticas = cliente.estatisticas()
+    assert (estatisticas["requisicoes"], estatisticas["conexoes_abertas"], estatisticas["conexoes_reaproveitadas"]) == \
+        (3, 1, 2)
+    assert "enviadas_pool" not in estatisticas["por_host"]["a.gov.br"]
+
+
+def test_configurar_solta_os_pools_e_mantem_os_contadores(cliente):
+    cliente.get("https://a.gov.br/1")
+    cliente.get("https://a.gov.br/2")
+    cliente.configurar(ConfigHTTP(timeout_leitura=1.0))
+    assert cliente._pools == {}
+
+    cliente._http = GerenciadorSimulado()
+    cliente.get("https://a.gov.br/3")
+    estatisticas = cliente.estatisticas()
+    assert (estatisticas["requisicoes"], estatisticas["conexoes_abertas"], estatisticas["conexoes_reaproveitadas"]) == \
+        (3, 2, 1)
+    assert _pools_vivos(cliente) == 1
+
+
+def test_pool_despejado_e_substituido_sem_contar_em_dobro(cliente):
+    cliente.get("https://a.gov.br/1")
+    cliente.get("https://a.gov.br/2")
+    cliente._http.esquecer("a.gov.br")
+    cliente.get("https://a.gov.br/3")
+    assert _pools_vivos(cliente) == 1
+    assert cliente.estatisticas()["conexoes_abertas"] == 2
+
+    cliente.fechar()
+    assert cliente._pools == {} and cliente.estatisticas()["conexoes_reaproveitadas"] == 1
+
+
+def test_status_transitorio_e_repetido_e_contado(cliente):
+    cliente.config = ConfigHTTP(tentativas=3, espera_base_s=0.001, espera_max_s=0.01)
+    cliente.metricas = RegistroMetricas()
+    cliente._http = GerenciadorSimulado(status=[503, 429])
+
+    assert cliente.get("https://a.gov.br/").status == 200
+    estatisticas = cliente.estatisticas()
+    assert (estatisticas["requisicoes"], estatisticas["repeticoes"], estatisticas["falhas"]) == (1, 2, 0)
+    assert cliente.metricas.relatorio()["eventos"] == {EVENTO_HTTP_REPETICAO: 2}
+
+
+def test_tentativas_esgotadas_devolvem_a_ultima_resposta(cliente):
+    cliente.config = ConfigHTTP(tentativas=2, espera_base_s=0.001)
+    cliente._http = GerenciadorSimulado(status=[503, 503])
+
+    assert cliente.get("https://a.gov.br/").status == 503
+    assert cliente.estatisticas()["falhas"] == 1
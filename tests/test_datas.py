@@ -0,0 +1,50 @@
+from datetime import date, datetime, timezone
+
+import pytest
+
+from electio.datas import (ORIGEM_JSONLD, ORIGEM_META, ORIGEM_TEXTO, ORIGEM_URL, data_publicacao, fora_da_janela,
+                           janela_defeso)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        DATA DE PUBLICAÇÃO DAS PÁGINAS E JANELA DO DEFESO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+def _utc(*partes):
+    return datetime(*partes, tzinfo=timezone.utc)
+
+
+def test_janela_vai_de_meses_antes_ate_o_fim_do_dia_do_pleito():
+    assert janela_defeso(date(2026, 10, 4), meses=6) == (_utc(2026, 4, 4), _utc(2026, 10, 4, 23, 59, 59))
+    # virada de ano e dia que não existe no mês de início
+    assert janela_defeso(date(2026, 2, 28), meses=3)[0] == _utc(2025, 11, 28)
+    assert janela_defeso(date(2026, 8, 31), meses=6)[0] == _utc(2026, 2, 28)
+    assert janela_defeso(None) is None
+
+
+def test_fora_da_janela_ignora_paginas_sem_data_e_sem_janela():
+    janela = janela_defeso(date(2026, 10, 4))
+    assert fora_da_janela(_utc(2025, 12, 1), janela)
+    assert not fora_da_janela(_utc(2026, 10, 4, 18), janela)
+    assert not fora_da_janela(None, janela)
+    assert not fora_da_janela(_utc(2020, 1, 1), None)
+
+
+@pytest.mark.parametrize("html, data, origem", [
+    ('<script type="application/ld+json">{"@graph": [{"@type": "WebPage"}, '
+     '{"@type": "NewsArticle", "datePublished": "2026-03-12T10:30:00-03:00"}]}</script>',
+     _utc(2026, 3, 12, 13, 30), ORIGEM_JSONLD),
+    ('<meta property="article:modified_time" content="2026-03-20">'
+     '<meta property="article:published_time" content="2026-03-12">', _utc(2026, 3, 12), ORIGEM_META),
+    ("<time itemprop='datePublished' datetime='2026-03-12T08:00:00Z'>12/03</time>", _utc(2026, 3, 12, 8), ORIGEM_META),
+    ("<span>Publicado em 12/03/2026 10h30, atualizado em 15/03/2026</span>", _utc(2026, 3, 12), ORIGEM_TEXTO),
+    ("<p>Postado em 5 de março de 2026</p>", _utc(2026, 3, 5), ORIGEM_TEXTO),
+    ("<p>Atualizado em 15/03/2026</p>", _utc(2026, 3, 15), ORIGEM_TEXTO),
+])
+def test_data_publicacao_pela_ordem_das_fontes(html, data, origem):
+    assert data_publicacao("https://a.gov.br/noticia", html) == (data, origem)
+
+
+def test_sem_html_a_data_vem_do_caminho_da_url():
+    assert data_publicacao("https://a.gov.br/noticias/2026/03/12/obra") == (_utc(2026, 3, 12), ORIGEM_URL)
+    assert data_publicacao("https://a.gov.br/noticias/obra") == (None, None)
@@ -0,0 +1,32 @@
+from electio.duplicatas import AgrupadorDuplicatas, ConfigDuplicatas, distancia_hamming, simhash
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        AGRUPAMENTO DE PÁGINAS QUASE DUPLICADAS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# notícia estadual longa, replicada pelos portais municipais com uma linha a mais
+NOTICIA = " ".join(f"O bairro {i} recebeu as equipes de vacinação contra a gripe no dia {i % 28 + 1} de março."
+                   for i in range(30))
+
+
+def test_simhash_estavel_e_proximo_para_textos_parecidos():
+    assert simhash(NOTICIA) == simhash(NOTICIA.upper())
+    replicada = NOTICIA + " Fonte: Agência Estadual."
+    assert distancia_hamming(simhash(NOTICIA), simhash(replicada)) <= 3
+    assert distancia_hamming(simhash(NOTICIA), simhash("Edital de licitação para compra de merenda. " * 10)) > 3
+
+
+def test_agrupa_replicas_e_separa_textos_diferentes():
+    agrupador = AgrupadorDuplicatas()
+    assert agrupador.agrupar(NOTICIA) == (0, True)
+    assert agrupador.agrupar(NOTICIA + " Fonte: Agência Estadual.") == (0, False)
+    assert agrupador.agrupar("  " + NOTICIA.upper()) == (0, False)       # cópia exata depois de normalizada
+    assert agrupador.agrupar("Edital de licitação para compra de merenda escolar. " * 10) == (1, True)
+    assert agrupador.estatisticas() == {"textos": 4, "grupos": 2, "duplicatas": 2, "taxa": 0.5}
+
+
+def test_textos_curtos_so_agrupam_com_copias_exatas():
+    agrupador = AgrupadorDuplicatas(ConfigDuplicatas(min_palavras=20))
+    assert agrupador.agrupar("Aviso de pauta.") == (0, True)
+    assert agrupador.agrupar("aviso   de PAUTA.") == (0, False)
+    assert agrupador.agrupar("Aviso de pauta 2.") == (1, True)
@@ -0,0 +1,76 @@
+import json
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import pytest
+
+from electio.fronteira import FronteiraRastreamento, interpretar_feed, interpretar_sitemap
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        SITEMAPS E FEEDS (RSS, ATOM E JSON FEED)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+URL_FEED = "https://prefeitura.sp.gov.br/feed"
+
+
+def test_rss_le_link_e_pubdate():
+    corpo = b"""<rss version="2.0"><channel>
+        <item><link>/noticias/obra</link><pubDate>Tue, 10 Mar 2026 12:00:00 GMT</pubDate></item>
+    </channel></rss>"""
+    assert interpretar_feed(corpo, URL_FEED) == [
+        ("https://prefeitura.sp.gov.br/noticias/obra", datetime(2026, 3, 10, 12, tzinfo=timezone.utc))]
+
+
+def test_atom_usa_o_link_alternate():
+    corpo = b"""<feed xmlns="http://www.w3.org/2005/Atom"><entry>
+        <link rel="self" href="https://prefeitura.sp.gov.br/api/1"/>
+        <link href="https://prefeitura.sp.gov.br/noticias/1"/>
+        <published>2026-03-01T08:00:00Z</published>
+    </entry></feed>"""
+    assert interpretar_feed(corpo, URL_FEED) == [
+        ("https://prefeitura.sp.gov.br/noticias/1", datetime(2026, 3, 1, 8, tzinfo=timezone.utc))]
+
+
+def test_json_feed_le_url_e_data_de_publicacao():
+    corpo = json.dumps({
+        "version": "https://jsonfeed.org/version/1.1",
+        "items": [
+            {"id": "1", "url": "/noticias/a", "date_published": "2026-03-05T10:00:00-03:00"},
+            {"id": "2", "external_url": "https://outro.gov.br/b", "date_modified": "2026-03-06"},
+            {"id": "3", "content_text": "sem link"},
+        ],
+    }).encode()
+    itens = interpretar_feed(b"\n  " + corpo, URL_FEED)
+    assert [url for url, _ in itens] == ["https://prefeitura.sp.gov.br/noticias/a", "https://outro.gov.br/b"]
+    assert itens[0][1] == datetime(2026, 3, 5, 13, tzinfo=timezone.utc)
+    assert itens[1][1] == datetime(2026, 3, 6, tzinfo=timezone.utc)
+
+
+def test_corpo_que_nao_e_feed_levanta_erro_de_leitura():
+    with pytest.raises(ValueError):
+        interpretar_feed(b"{nao e json", URL_FEED)
+    with pytest.raises(ET.ParseError):
+        interpretar_feed(b"<html><body>", URL_FEED)
+
+
+def test_feed_json_invalido_nao_derruba_a_fronteira():
+    class CacheFalso:
+        def obter(self, url):
+            return type("Resposta", (), {"corpo": b"{quebrado"})()
+
+    assert FronteiraRastreamento(CacheFalso())._urls_feed(URL_FEED) == []
+
+
+def test_sitemap_indice_e_urls_com_data_do_google_news():
+    indice = b"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <sitemap><loc>https://a.gov.br/noticias.xml</loc><lastmod>2026-03-01</lastmod></sitemap>
+    </sitemapindex>"""
+    assert interpretar_sitemap(indice) == ([("https://a.gov.br/noticias.xml",
+                                             datetime(2026, 3, 1, tzinfo=timezone.utc))], [])
+
+    urls = b"""<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+                       xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">
+        <url><loc>https://a.gov.br/n/1</loc><lastmod>2026-03-09</lastmod>
+             <news:news><news:publication_date>2026-03-02</news:publication_date></news:news></url>
+    </urlset>"""
+    assert interpretar_sitemap(urls) == ([], [("https://a.gov.br/n/1", datetime(2026, 3, 2, tzinfo=timezone.utc))])
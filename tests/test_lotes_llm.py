@@ -0,0 +1,93 @@
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from electio.metricas import EVENTO_BLOCO_DIVIDIDO, EVENTO_REENVIO_MAX_TOKENS, EVENTO_RESPOSTA_TRUNCADA
+from electio.motor import ConfigLLM, MotorAnalise
+from electio.pipeline import agregar_resultado_site
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        LOTES DE PARÁGRAFOS E RESPOSTAS TRUNCADAS DA LLM
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# A LLM simulada marca como não conformes os parágrafos com "propaganda" e trunca a resposta
+# (finish_reason == "length") de toda requisição com mais de `limite` parágrafos ou com max_tokens abaixo de `minimo`
+
+RE_PARAGRAFO_NUMERADO = re.compile(r'\[\d+\] ([^\n]*)')
+
+
+class LLMSimulada:
+
+    def __init__(self, limite: int = 100, minimo: int = 0):
+        self.limite = limite
+        self.minimo = minimo
+        self.chamadas = []
+
+    def completar(self, model, messages, max_tokens, **parametros):
+        paragrafos = RE_PARAGRAFO_NUMERADO.findall(messages[-1]["content"])
+        self.chamadas.append((len(paragrafos), max_tokens))
+        truncada = len(paragrafos) > self.limite or max_tokens < self.minimo
+        ids = [numero for numero, p in enumerate(paragrafos, 1) if "propaganda" in p.lower()]
+        conteudo = '{"nao_conformes": [' if truncada else json.dumps({"nao_conformes": ids})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo),
+                                     finish_reason="length" if truncada else "stop")],
+            usage=SimpleNamespace(prompt_tokens=10 * len(paragrafos), completion_tokens=5, prompt_tokens_details=None))
+
+
+@pytest.fixture
+def motor(tmp_path):
+    return MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+
+
+def _config(**campos):
+    return ConfigLLM(resumo_base_legal="resumo", usar_cache=False, streaming=False, **campos)
+
+
+def test_paginas_pequenas_dividem_uma_requisicao_e_a_contagem_e_local(motor, monkeypatch):
+    llm = LLMSimulada()
+    monkeypatch.setattr(motor.agendador, "completar", llm.completar)
+    textos = ["Notícia sobre obras.\n\nPropaganda do prefeito candidato.", "Agenda cultural da semana."]
+
+    resultados = motor.analisar_lote_com_llm(textos, _config())
+
+    assert llm.chamadas == [(3, 256)]
+    assert resultados[0][:2] == (["Propaganda do prefeito candidato."], [2, 1, 1])
+    assert resultados[1][:2] == ([], [1, 1, 0])
+    assert resultados[0][2]["reenviados"] == resultados[1][2]["reenviados"] == 0
+
+
+def test_resposta_truncada_divide_o_bloco_e_e_contada(motor, monkeypatch):
+    llm = LLMSimulada(limite=2)
+    monkeypatch.setattr(motor.agendador, "completar", llm.completar)
+    texto = "\n\n".join(["Primeiro parágrafo.", "Propaganda eleitoral.", "Terceiro.", "Quarto parágrafo."])
+
+    [(trechos, contagem, uso)] = motor.analisar_lote_com_llm([texto], _config())
+
+    assert llm.chamadas == [(4, 256), (2, 256), (2, 256)]
+    assert (trechos, contagem) == (["Propaganda eleitoral."], [4, 3, 1])
+    assert uso["reenviados"] == 4
+    assert uso["enviados"] == 40 + 20 + 20      # os tokens da tentativa truncada também contam
+    assert motor.estatisticas()["truncamento"] == {"respostas_truncadas": 1, "blocos_divididos": 1,
+                                                    "reenvios_max_tokens": 0}
+    eventos = motor.metricas.relatorio()["eventos"]
+    assert eventos[EVENTO_RESPOSTA_TRUNCADA] == 1 and eventos[EVENTO_BLOCO_DIVIDIDO] == 1
+
+    site = agregar_resultado_site("https://exemplo.gov.br", [(trechos, contagem, uso)], links=["https://exemplo.gov.br/a"])
+    assert site["paragrafos_reenviados"] == site["paginas"][0]["paragrafos_reenviados"] == 4
+
+
+def test_paragrafo_truncado_e_reenviado_com_o_dobro_de_max_tokens(motor, monkeypatch):
+    llm = LLMSimulada(minimo=1000)
+    monkeypatch.setattr(motor.agendador, "completar", llm.completar)
+
+    [(trechos, contagem, uso)] = motor.analisar_lote_com_llm(["Um só parágrafo."], _config(max_tokens_saida=300))
+
+    # 300 → 600 → 1200 (teto de 4x): a terceira resposta vem completa
+    assert llm.chamadas == [(1, 300), (1, 600), (1, 1200)]
+    assert contagem == [1, 1, 0] and uso["reenviados"] == 1
+    assert motor.estatisticas()["truncamento"] == {"respostas_truncadas": 2, "blocos_divididos": 0,
+                                                    "reenvios_max_tokens": 2}
+    assert motor.metricas.relatorio()["eventos"][EVENTO_REENVIO_MAX_TOKENS] == 2
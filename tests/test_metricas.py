@@ -0,0 +1,69 @@
+import json
+import urllib.request
+
+import pytest
+
+from electio.metricas import (ETAPA_DOWNLOAD, ETAPA_EXTRACAO, EVENTO_HTTP_REPETICAO, RegistroMetricas, percentil,
+                              servir_prometheus, texto_prometheus)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        MEDIÇÃO POR ETAPA E RELATÓRIO DA EXECUÇÃO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+def test_percentil_pelo_posto_mais_proximo():
+    valores = list(range(1, 21))
+    assert percentil(valores, 0.5) == 10
+    assert percentil(valores, 0.95) == 19
+    assert percentil(valores, 1.0) == 20
+    assert percentil([], 0.5) == 0.0
+
+
+def test_relatorio_soma_atributos_conta_camadas_e_ordena_sites():
+    registro = RegistroMetricas()
+    for duracao, site in ((0.1, "a"), (0.3, "b"), (0.2, "b")):
+        registro.registrar(ETAPA_DOWNLOAD, duracao, site, {"bytes": 1000, "origem": "rede"})
+    registro.registrar(ETAPA_EXTRACAO, 0.5, "a", {"camada": "trafilatura"})
+    registro.registrar(ETAPA_EXTRACAO, 0.4, "b", {"camada": "playwright"})
+    with pytest.raises(RuntimeError):
+        with registro.medir(ETAPA_EXTRACAO, "b") as intervalo:
+            intervalo["camada"] = "beautifulsoup"
+            raise RuntimeError("falhou")
+    registro.contar(EVENTO_HTTP_REPETICAO, 2)
+
+    relatorio = registro.relatorio()
+    download = relatorio["etapas"][ETAPA_DOWNLOAD]
+    assert (download["intervalos"], download["bytes"], download["p50_s"], download["max_s"]) == (3, 3000, 0.2, 0.3)
+    assert download["origem"] == {"rede": 3}
+    assert relatorio["etapas"][ETAPA_EXTRACAO]["erros"] == 1
+    assert relatorio["camadas_extracao"] == {"trafilatura": 1, "playwright": 1, "beautifulsoup": 1}
+    assert relatorio["eventos"] == {EVENTO_HTTP_REPETICAO: 2}
+    assert [s["site"] for s in relatorio["sites_mais_lentos"]] == ["b", "a"]
+
+    registro.reiniciar()
+    assert registro.relatorio()["etapas"] == {} and registro.relatorio()["eventos"] == {}
+
+
+def test_texto_prometheus_com_rotulos_escapados():
+    registro = RegistroMetricas()
+    registro.registrar(ETAPA_DOWNLOAD, 0.25, 'site "x"', {"bytes": 10})
+    registro.contar(EVENTO_HTTP_REPETICAO)
+    texto = texto_prometheus(registro.relatorio())
+    assert 'electio_etapa_duracao_segundos{etapa="download",quantile="0.5"} 0.25' in texto
+    assert 'electio_etapa_bytes_total{etapa="download"} 10' in texto
+    assert 'electio_eventos_total{evento="http_repeticoes"} 1' in texto
+    assert 'electio_site_tempo_segundos{site="site \\"x\\""} 0.25' in texto
+
+
+def test_servidor_expoe_metrics_e_relatorio():
+    registro = RegistroMetricas()
+    registro.contar(EVENTO_HTTP_REPETICAO)
+    servidor = servir_prometheus(registro, porta=0)
+    try:
+        base = f"http://127.0.0.1:{servidor.server_port}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as resposta:
+            assert b"electio_eventos_total" in resposta.read()
+        with urllib.request.urlopen(f"{base}/relatorio", timeout=5) as resposta:
+            assert json.load(resposta)["eventos"] == {EVENTO_HTTP_REPETICAO: 1}
+    finally:
+        servidor.shutdown()
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+from electio.metricas import EVENTO_RESPOSTA_FORA_DO_FORMATO
+from electio.motor import (ConfigLLM, MotorAnalise, extrair_subdominio_gov, filtrar_conteudo_relevante,
+                           ids_parciais, interpretar_ids_llm, limpar_texto, numerar_paragrafos)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        LIMPEZA DO TEXTO E LEITURA DA RESPOSTA DA LLM
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+@pytest.mark.parametrize("url, subdominio", [
+    ("https://www.saopaulo.sp.gov.br/noticias", "saopaulo.sp"),
+    ("http://campinas.sp.gov.br:8080/", "campinas.sp"),
+    ("https://sp.gov.br", "sp"),
+])
+def test_extrair_subdominio_gov(url, subdominio):
+    assert extrair_subdominio_gov(url) == subdominio
+
+
+def test_extrair_subdominio_recusa_dominio_fora_do_gov_br():
+    with pytest.raises(ValueError):
+        extrair_subdominio_gov("https://prefeitura.com.br")
+
+
+def test_limpar_texto_remove_do_termo_ate_o_fim_do_paragrafo():
+    texto = "Notícia sobre a obra.\n\nOuvidoria municipal\ntelefone 156\n\n\n\nSegundo parágrafo."
+    assert limpar_texto(texto) == "Notícia sobre a obra.\n\nSegundo parágrafo."
+    assert limpar_texto("") == ""
+
+
+def test_filtrar_conteudo_descarta_paragrafos_com_termos_inteiros():
+    texto = "A tabela de horários foi publicada.\n\nUse a tecla Tab para navegar.\n\nAceite os cookies."
+    # "tab" é um termo irrelevante, mas não casa dentro de "tabela"
+    assert filtrar_conteudo_relevante(texto) == "A tabela de horários foi publicada."
+    assert filtrar_conteudo_relevante(texto, termos=()) == texto
+
+
+def test_numerar_paragrafos_a_partir_de_um():
+    assert numerar_paragrafos(["A.", "B."]) == "[1] A.\n\n[2] B."
+
+
+@pytest.mark.parametrize("resposta, indices", [
+    ('{"nao_conformes": [2, 5]}', [1, 4]),
+    ('{"nao_conformes": []}', []),
+    ('Segue a análise:\n```json\n{"nao_conformes": ["3", 1, 3]}\n```', [0, 2]),
+    ('{"nao_conformes": [0, 1, 9, "x", null]}', [0]),        # fora de 1..total ou não numéricos
+])
+def test_interpretar_ids_llm(resposta, indices):
+    assert interpretar_ids_llm(resposta, total=5) == indices
+
+
+@pytest.mark.parametrize("resposta", ["", "não há trechos", '{"nao_conformes": 3}', '[1, 2]', '{"outro": []}'])
+def test_resposta_fora_do_formato_devolve_none(resposta):
+    assert interpretar_ids_llm(resposta, total=5) is None
+
+
+def test_ids_parciais_so_contam_numeros_fechados():
+    assert ids_parciais('{"nao_conformes": [1, 1', total=20) == [0]
+    assert ids_parciais('{"nao_conformes": [1, 12]', total=20) == [0, 11]
+    assert ids_parciais('{"nao_conformes": [1, 30, 4]}', total=20) == [0, 3]
+    assert ids_parciais('{"nao_conf', total=20) == []
+
+
+def test_resposta_fora_do_formato_nao_grava_veredicto(tmp_path, monkeypatch):
+    respostas = ["Não encontrei problemas.", '{"nao_conformes": []}']
+
+    def completar(model, messages, max_tokens, **parametros):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=respostas.pop(0)), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=None))
+
+    motor = MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+    monkeypatch.setattr(motor.agendador, "completar", completar)
+    config = ConfigLLM(resumo_base_legal="resumo", streaming=False)
+
+    assert motor.analisar_lote_com_llm(["Um parágrafo."], config) == [None]
+    assert motor.metricas.relatorio()["eventos"] == {EVENTO_RESPOSTA_FORA_DO_FORMATO: 1}
+    # sem veredicto gravado, o parágrafo volta à LLM na chamada seguinte
+    [(trechos, contagem, _)] = motor.analisar_lote_com_llm(["Um parágrafo."], config)
+    assert (trechos, contagem, respostas) == ([], [1, 1, 0], [])
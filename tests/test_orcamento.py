@@ -0,0 +1,56 @@
+import pytest
+
+from electio import orcamento
+from electio.orcamento import (JANELA_PADRAO, MARGEM_SEGURANCA, capacidade_entrada, contar_tokens, fatiar_paragrafo,
+                               planejar_blocos, ratear_uso)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        ORÇAMENTO DE TOKENS POR REQUISIÇÃO
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+@pytest.fixture
+def sem_tiktoken(monkeypatch):
+    # contagem por caracteres (3,5 por token), igual com ou sem o tiktoken instalado
+    monkeypatch.setattr(orcamento, "_codificador", False)
+
+
+def test_contar_tokens_sem_tokenizador(sem_tiktoken):
+    assert contar_tokens("") == 0
+    assert contar_tokens("a" * 7) == 2
+    assert contar_tokens("a" * 8) == 3
+
+
+def test_capacidade_e_o_menor_entre_limite_janela_e_tpm():
+    assert capacidade_entrada("llama-3.3-70b-versatile", 1000, 256, limite=4000) == 4000
+    assert capacidade_entrada("llama-3.3-70b-versatile", 1000, 256, limite=50_000, tpm=6000) == \
+        int(6000 * MARGEM_SEGURANCA) - 1000 - 256
+    assert capacidade_entrada("modelo-desconhecido", 0, 0, limite=50_000) == int(JANELA_PADRAO * MARGEM_SEGURANCA)
+    # parte fixa maior que a janela: ainda cabe um bloco mínimo
+    assert capacidade_entrada("modelo-desconhecido", 10_000, 0, limite=4000) == 100
+
+
+def test_planejar_blocos_agrupa_itens_consecutivos():
+    assert planejar_blocos([40, 30, 50, 10, 90], capacidade=100) == [[0, 1], [2, 3], [4]]
+    # um item maior que a capacidade fica sozinho no seu bloco
+    assert planejar_blocos([150, 20], capacidade=100) == [[0], [1]]
+    assert planejar_blocos([], capacidade=100) == []
+
+
+def test_fatiar_paragrafo_por_frases_e_por_tamanho(sem_tiktoken):
+    frases = " ".join(f"Frase número {i} do parágrafo longo." for i in range(20))
+    pedacos = fatiar_paragrafo(frases, capacidade=30)
+    assert len(pedacos) > 1
+    assert all(contar_tokens(p) <= 30 for p in pedacos)
+    assert " ".join(pedacos) == frases
+
+    sem_pontuacao = "x" * 1000
+    fatias = fatiar_paragrafo(sem_pontuacao, capacidade=100)
+    assert "".join(fatias) == sem_pontuacao and all(contar_tokens(f) <= 100 for f in fatias)
+    assert fatiar_paragrafo("Curto.", capacidade=100) == ["Curto."]
+
+
+def test_ratear_uso_proporcional_aos_pesos():
+    partes = ratear_uso({"enviados": 100, "recebidos": 10}, [3, 1])
+    assert partes == [{"enviados": 75.0, "recebidos": 7.5}, {"enviados": 25.0, "recebidos": 2.5}]
+    assert ratear_uso({"enviados": 10}, [0, 0]) == [{"enviados": 5.0}, {"enviados": 5.0}]
@@ -0,0 +1,132 @@
+import threading
+import time
+
+from electio.duplicatas import AgrupadorDuplicatas, ConfigDuplicatas
+from electio.metricas import PREFIXO_EVENTO_FALHA, RegistroMetricas
+from electio.pipeline import (ETAPA_EXTRACAO, ConfigConcorrencia, LimitadorHosts, agregar_resultado_site,
+                              executar_pipeline)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        PIPELINE CONCORRENTE DE ANÁLISE DOS SITES
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+# Sites e páginas simulados: cada site tem dois links, o texto de cada página é o próprio link
+# e a "LLM" marca como não conforme o parágrafo que contém "propaganda"
+
+LINKS = {
+    "https://a.gov.br": ["https://a.gov.br/1", "https://a.gov.br/propaganda"],
+    "https://b.gov.br": ["https://b.gov.br/1", "https://b.gov.br/2"],
+}
+
+
+def _analisar(texto):
+    nao_conformes = [p for p in texto.split("\n\n") if "propaganda" in p]
+    total = len(texto.split("\n\n"))
+    return nao_conformes, [total, total - len(nao_conformes), len(nao_conformes)]
+
+
+def test_agregar_resultado_site_soma_contagens_e_tokens():
+    analises = [(["x"], [4, 3, 1], {"enviados": 10.4, "recebidos": 2, "em_cache": 0, "reenviados": 1}),
+                ([], [2, 2, 0])]
+    site = agregar_resultado_site("https://a.gov.br", analises, falhas=1, links=["l1", "l2"])
+    assert (site["total_trechos"], site["conformes"], site["nao_coformes"]) == (6, 5, 1)
+    assert site["conformidade"] == 83.3
+    assert site["trechos_nao_conformes"] == ["x"] and site["falhas"] == 1
+    assert site["tokens_enviados"] == 10 and site["paragrafos_reenviados"] == 1
+    assert [p["url"] for p in site["paginas"]] == ["l1", "l2"]
+    assert agregar_resultado_site("https://b.gov.br", [])["conformidade"] == 0.0
+
+
+def test_limitador_respeita_o_maximo_por_host():
+    limitador = LimitadorHosts(max_global=8, max_por_host=2)
+    lock = threading.Lock()
+    simultaneas = {"atual": 0, "maximo": 0}
+
+    def baixar():
+        with limitador.reservar("https://a.gov.br/pagina"):
+            with lock:
+                simultaneas["atual"] += 1
+                simultaneas["maximo"] = max(simultaneas["maximo"], simultaneas["atual"])
+            time.sleep(0.02)
+            with lock:
+                simultaneas["atual"] -= 1
+
+    threads = [threading.Thread(target=baixar) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert simultaneas["maximo"] == 2
+
+
+def test_pipeline_analisa_todos_os_links_na_ordem_e_avisa_o_progresso():
+    progresso, sites_concluidos = [], {}
+    resultados = executar_pipeline(
+        list(LINKS), LINKS.get, lambda link: link, _analisar,
+        config=ConfigConcorrencia(workers_extracao=4),
+        ao_progredir=lambda concluidos, total, url: progresso.append((concluidos, total)),
+        ao_concluir_site=lambda indice, resultado: sites_concluidos.setdefault(indice, resultado))
+
+    assert [r["url"] for r in resultados] == list(LINKS)
+    assert [p["url"] for p in resultados[0]["paginas"]] == LINKS["https://a.gov.br"]
+    assert resultados[0]["trechos_nao_conformes"] == ["https://a.gov.br/propaganda"]
+    assert resultados[1]["conformidade"] == 100.0
+    assert progresso[-1] == (10, 10)      # 2 descobertas, 4 extrações e 4 análises
+    assert sorted(sites_concluidos) == [0, 1]
+
+
+def test_falha_de_extracao_conta_para_o_site_e_para_as_metricas():
+    def extrair(link):
+        if link.endswith("/2"):
+            raise RuntimeError("portal fora do ar")
+        return link
+
+    metricas = RegistroMetricas()
+    resultados = executar_pipeline(list(LINKS), LINKS.get, extrair, _analisar, metricas=metricas)
+
+    assert [r["falhas"] for r in resultados] == [0, 1]
+    assert len(resultados[1]["paginas"]) == 1
+    assert metricas.relatorio()["eventos"] == {PREFIXO_EVENTO_FALHA + ETAPA_EXTRACAO: 1}
+
+
+def test_duplicatas_herdam_a_analise_do_representante():
+    texto = " ".join(f"palavra{i}" for i in range(40)) + " propaganda"
+    chamadas = []
+
+    def analisar(t):
+        chamadas.append(t)
+        return _analisar(t)
+
+    links = {"https://a.gov.br": ["https://a.gov.br/1"], "https://b.gov.br": ["https://b.gov.br/1"]}
+    resultados = executar_pipeline(list(links), links.get, lambda link: texto, analisar,
+                                   agrupador=AgrupadorDuplicatas(ConfigDuplicatas()))
+
+    assert len(chamadas) == 1
+    assert [r["duplicatas"] for r in resultados] == [0, 1]
+    assert [r["nao_coformes"] for r in resultados] == [1, 1]
+
+
+def test_lote_reune_paginas_pequenas_e_analise_none_conta_como_falha():
+    lotes = []
+
+    def analisar_lote(textos):
+        lotes.append(len(textos))
+        return [None if texto.endswith("/2") else _analisar(texto) for texto in textos]
+
+    resultados = executar_pipeline(list(LINKS), LINKS.get, lambda link: link, None,
+                                   analisar_lote=analisar_lote, medir=len, capacidade_lote=10_000)
+
+    assert sum(lotes) == 4 and len(lotes) < 4
+    assert [r["falhas"] for r in resultados] == [0, 1]
+
+
+def test_cancelamento_devolve_so_o_que_terminou():
+    liberar = threading.Event()
+
+    def extrair(link):
+        liberar.wait(2)
+        return link
+
+    resultados = executar_pipeline(list(LINKS), LINKS.get, extrair, _analisar, cancelado=lambda: True)
+    liberar.set()
+    assert [r["total_trechos"] for r in resultados] == [0, 0]
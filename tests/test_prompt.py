@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+from electio.motor import (ConfigLLM, MotorAnalise, dividir_prompt, montar_mensagens, prefixo_estavel, prompt_padrao,
+                           validar_prompt)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        PROMPT EM DUAS MENSAGENS E PREFIXO ESTÁVEL
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+PROMPT_SEM_PREFIXO = "Analise {texto} e responda em JSON"
+
+
+def _resposta(conteudo='{"nao_conformes": []}'):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo), finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=100, completion_tokens=5, prompt_tokens_details={"cached_tokens": 40}))
+
+
+@pytest.fixture
+def motor(tmp_path, monkeypatch):
+    motor = MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+    monkeypatch.setattr(motor.agendador, "completar", lambda **parametros: _resposta())
+    return motor
+
+
+def test_dividir_prompt_corta_na_linha_em_branco_antes_do_texto():
+    prefixo, bloco = dividir_prompt("Regras\n\nmais regras\n\nTexto:\n{texto}\nFim")
+    assert prefixo == "Regras\n\nmais regras\n"
+    assert bloco == "\nTexto:\n{texto}\nFim"
+
+
+def test_montar_mensagens_com_prefixo_separa_sistema_e_usuario():
+    mensagens = montar_mensagens(prompt_padrao, "[1] parágrafo", "01/10/2026", "resumo")
+    assert [m["role"] for m in mensagens] == ["system", "user"]
+    assert "resumo" in mensagens[0]["content"] and "01/10/2026" in mensagens[0]["content"]
+    assert "[1] parágrafo" not in mensagens[0]["content"]
+    assert "[1] parágrafo" in mensagens[1]["content"]
+
+
+def test_montar_mensagens_sem_prefixo_envia_so_a_mensagem_do_usuario():
+    mensagens = montar_mensagens(PROMPT_SEM_PREFIXO, "[1] parágrafo", "01/10/2026", "resumo")
+    assert mensagens == [{"role": "user", "content": "Analise [1] parágrafo e responda em JSON"}]
+    assert prefixo_estavel(mensagens) == ""
+
+
+def test_validar_prompt_aceita_os_dois_formatos_e_recusa_sem_texto():
+    validar_prompt(prompt_padrao)
+    validar_prompt(PROMPT_SEM_PREFIXO)
+    with pytest.raises(ValueError):
+        validar_prompt("Responda em JSON")
+    with pytest.raises(ValueError):
+        validar_prompt("Analise {texto}")
+
+
+@pytest.mark.parametrize("prompt", [prompt_padrao, PROMPT_SEM_PREFIXO])
+def test_prefixo_registrado_e_o_mesmo_em_todas_as_chamadas(motor, prompt):
+    config = ConfigLLM(prompt=prompt, resumo_base_legal="resumo", usar_cache=False, streaming=False)
+    motor.analisar_lote_com_llm(["Primeira página com um parágrafo."], config)
+    motor.analisar_lote_com_llm(["Segunda página, outro texto."], config)
+
+    prefixos = motor.estatisticas_prefixos()
+    assert list(prefixos) == [motor.hash_prefixo(config)]
+    assert prefixos[motor.hash_prefixo(config)] == {"chamadas": 2, "tokens_enviados": 200, "tokens_em_cache": 80}
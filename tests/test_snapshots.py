@@ -0,0 +1,68 @@
+from electio.snapshots import ConfigMonitoramento, MonitorExecucao, RepositorioSnapshots
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        SNAPSHOTS, MODO DELTA E LIMPEZA DOS ANTIGOS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+SITE = "https://prefeitura.sp.gov.br"
+
+
+def _executar(repositorio, paginas: dict, delta=False, manter=30, site=SITE, chave="config"):
+    # Simula uma execução do pipeline: {link: texto} julgados como conformes (ou herdados, no delta)
+    monitor = MonitorExecucao(repositorio, chave, ConfigMonitoramento(delta=delta, manter_execucoes=manter),
+                              impressao=lambda texto: texto.upper())
+    herdadas = []
+    for link, texto in paginas.items():
+        analise = monitor.reaproveitar(site, link, texto)
+        if analise is not None:
+            herdadas.append(link)
+        else:
+            analise = (["trecho de " + link] if "propaganda" in texto else [], [1, 1, 0])
+        monitor.concluir_pagina(site, link, analise)
+    trechos = [t for link, texto in paginas.items() if "propaganda" in texto for t in ["trecho de " + link]]
+    return herdadas, monitor.relatorio(site, {"trechos_nao_conformes": trechos})
+
+
+def _execucoes(repositorio):
+    return repositorio._conexao.execute("SELECT chave, COUNT(*) FROM execucoes GROUP BY chave").fetchall()
+
+
+def test_delta_herda_so_as_paginas_inalteradas(tmp_path):
+    repositorio = RepositorioSnapshots(str(tmp_path))
+    _, relatorio = _executar(repositorio, {"/a": "texto a", "/b": "texto b"})
+    assert relatorio is None
+
+    herdadas, relatorio = _executar(repositorio, {"/a": "texto a", "/b": "propaganda", "/c": "novo"}, delta=True)
+    assert herdadas == ["/a"]
+    assert relatorio["novas"] == ["/c"] and relatorio["alteradas"] == ["/b"] and relatorio["inalteradas"] == 1
+    assert relatorio["trechos_novos"] == ["trecho de /b"]
+
+
+def test_snapshot_de_outra_configuracao_nao_e_herdado(tmp_path):
+    repositorio = RepositorioSnapshots(str(tmp_path))
+    _executar(repositorio, {"/a": "texto a"}, chave="prompt antigo")
+    herdadas, relatorio = _executar(repositorio, {"/a": "texto a"}, delta=True, chave="prompt novo")
+    assert herdadas == [] and relatorio is None
+
+
+def test_execucoes_antigas_sao_apagadas_ao_iniciar(tmp_path):
+    repositorio = RepositorioSnapshots(str(tmp_path))
+    for dia in range(5):
+        _executar(repositorio, {"/a": f"texto do dia {dia}"}, manter=2)
+    _executar(repositorio, {"/a": "outra configuração"}, manter=2, chave="outra")
+
+    # as duas anteriores mais a que abriu a limpeza; a outra chave não é afetada
+    assert sorted(_execucoes(repositorio)) == [("config", 3), ("outra", 1)]
+    paginas = repositorio._conexao.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+    assert paginas == 4
+    assert repositorio.anterior(SITE, "config", 2 ** 62)[1]["/a"][0] == "TEXTO DO DIA 4"
+
+
+def test_site_varrido_raramente_mantem_o_seu_snapshot(tmp_path):
+    repositorio = RepositorioSnapshots(str(tmp_path))
+    _executar(repositorio, {"/a": "texto a"}, site="https://raro.gov.br", manter=2)
+    for dia in range(4):
+        _executar(repositorio, {"/x": f"dia {dia}"}, manter=2)
+
+    herdadas, _ = _executar(repositorio, {"/a": "texto a"}, site="https://raro.gov.br", delta=True, manter=2)
+    assert herdadas == ["/a"]
@@ -0,0 +1,133 @@
+import copy
+import time
+from datetime import date
+
+import pytest
+
+from electio.motor import ConfigAnalise, MotorAnalise
+from electio.tarefas import (ESTADO_CANCELADA, ESTADO_CANCELANDO, ESTADO_CONCLUIDA, ESTADO_EXECUTANDO, ESTADO_FALHOU,
+                             MAX_TENTATIVAS, TEMPO_ABANDONO_S, FilaTarefas, Trabalhador, config_de_dict,
+                             config_para_dict, resumir_estatisticas)
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        TAREFAS PERSISTENTES, RETOMADA E ESTATÍSTICAS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+URLS = ["https://a.gov.br", "https://b.gov.br", "https://c.gov.br"]
+
+
+@pytest.fixture
+def motor(tmp_path):
+    return MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+
+
+def _abandonar(fila, tarefa):
+    # o trabalhador que reservou a tarefa parou de bater
+    fila._executar("UPDATE tarefas SET batimento = ? WHERE id = ?", (time.time() - TEMPO_ABANDONO_S - 1, tarefa))
+
+
+def test_config_vai_e_volta_em_json(motor):
+    config = ConfigAnalise()
+    config.llm.data_referencia = date(2026, 10, 4)
+    config.triagem.candidatos = ("Fulano de Tal",)
+    config.coleta.max_links = 12
+
+    dados = config_para_dict(config)
+    assert dados["llm"]["data_referencia"] == "2026-10-04"
+    assert dados["triagem"]["candidatos"] == ["Fulano de Tal"]
+    assert config_de_dict(dados, motor) == config
+
+
+def test_config_com_indice_que_nao_esta_no_cache_e_recusada(motor):
+    dados = config_para_dict(ConfigAnalise())
+    dados["llm"]["indice_base_legal"] = "hash que não existe"
+    with pytest.raises(ValueError):
+        config_de_dict(dados, motor)
+
+
+def test_reservar_pega_a_mais_antiga_uma_vez_so(tmp_path):
+    fila = FilaTarefas(str(tmp_path))
+    primeira = fila.submeter(URLS[:1], ConfigAnalise())
+    segunda = fila.submeter(URLS[1:], ConfigAnalise())
+
+    assert fila.reservar(pid=1)[0] == primeira
+    assert fila.reservar(pid=2)[0] == segunda
+    assert fila.reservar(pid=3) is None
+    assert fila.obter(primeira)["estado"] == ESTADO_EXECUTANDO and fila.obter(primeira)["tentativas"] == 1
+
+
+def test_tarefa_abandonada_e_retomada_ate_o_limite_de_tentativas(tmp_path):
+    fila = FilaTarefas(str(tmp_path))
+    tarefa = fila.submeter(URLS, ConfigAnalise())
+    for tentativa in range(MAX_TENTATIVAS):
+        assert fila.reservar(pid=tentativa)[0] == tarefa
+        assert fila.reservar(pid=99) is None        # ainda batendo: ninguém mais a pega
+        _abandonar(fila, tarefa)
+
+    assert fila.reservar(pid=99) is None
+    assert fila.obter(tarefa)["estado"] == ESTADO_FALHOU
+
+
+def test_cancelamento_pendente_e_em_execucao(tmp_path):
+    fila = FilaTarefas(str(tmp_path))
+    pendente = fila.submeter(URLS, ConfigAnalise())
+    fila.cancelar(pendente)
+    assert fila.obter(pendente)["estado"] == ESTADO_CANCELADA
+
+    em_execucao = fila.submeter(URLS, ConfigAnalise())
+    fila.reservar(pid=1)
+    fila.cancelar(em_execucao)
+    assert fila.bater(em_execucao) == ESTADO_CANCELANDO
+    # o trabalhador caiu durante o cancelamento: a tarefa não é retomada
+    _abandonar(fila, em_execucao)
+    assert fila.reservar(pid=2) is None
+    assert fila.obter(em_execucao)["estado"] == ESTADO_CANCELADA
+
+
+def test_trabalhador_retoma_so_os_sites_nao_concluidos(tmp_path, monkeypatch):
+    trabalhador = Trabalhador(api_key="teste", diretorio=str(tmp_path))
+    fila = trabalhador.fila
+    tarefa = fila.submeter(URLS, ConfigAnalise())
+    fila.reservar(pid=1)
+    fila.registrar_site(tarefa, 1, {"url": URLS[1], "conformidade": 100.0})
+    _abandonar(fila, tarefa)
+
+    analisados = []
+
+    def analisar_sites(urls, config, ao_progredir=None, ao_concluir_pagina=None, ao_concluir_site=None,
+                       cancelado=None):
+        analisados.extend(urls)
+        for indice, url in enumerate(urls):
+            ao_concluir_pagina(url, url + "/noticia", (["trecho"], [2, 1, 1]))
+            ao_concluir_site(indice, {"url": url, "conformidade": 50.0})
+
+    monkeypatch.setattr(trabalhador.motor, "analisar_sites", analisar_sites)
+    trabalhador.executar(uma_vez=True)
+
+    assert analisados == [URLS[0], URLS[2]]
+    assert [r["url"] for r in fila.resultados(tarefa)] == URLS
+    assert [p["trechos"] for p in fila.paginas(tarefa)] == [["trecho"], ["trecho"]]
+    situacao = fila.obter(tarefa)
+    assert situacao["estado"] == ESTADO_CONCLUIDA and situacao["tentativas"] == 2
+    assert "relatorio" in situacao["estatisticas"]
+
+
+def test_resumir_estatisticas_subtrai_contadores_e_recalcula_razoes(motor):
+    antes = motor.estatisticas()
+    antes["llm"].update(chamadas=10, espera_total_s=20.0, espera_max_s=5.0)
+    antes["http"]["por_host"] = {"a.gov.br": {"requisicoes": 3, "bytes": 100}}
+    depois = copy.deepcopy(antes)
+    depois["llm"].update(chamadas=14, espera_total_s=30.0, espera_max_s=7.5, fila=2)
+    depois["duplicatas"].update(textos=10, duplicatas=4, taxa=0.4)
+    depois["truncamento"]["respostas_truncadas"] += 1
+    depois["http"]["por_host"] = {"a.gov.br": {"requisicoes": 5, "bytes": 300},
+                                  "b.gov.br": {"requisicoes": 1, "bytes": 50}}
+
+    resumo = resumir_estatisticas(antes, depois)
+
+    assert resumo["llm"]["chamadas"] == 4 and resumo["llm"]["espera_media_s"] == 2.5
+    assert resumo["llm"]["espera_max_s"] == 7.5 and "fila" not in resumo["llm"]
+    assert resumo["duplicatas"]["taxa"] == 0.4
+    assert resumo["truncamento"]["respostas_truncadas"] == 1
+    assert resumo["http"]["hosts"] == 2
+    assert resumo["http"]["por_host"]["a.gov.br"] == {"requisicoes": 2, "bytes": 200}
@@ -0,0 +1,93 @@
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from electio.motor import ConfigLLM, MotorAnalise
+from electio.triagem import MAX_OCORRENCIAS, MODELO_TRIAGEM, ConfigTriagem, pontuar_risco, resumo_triagem
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        TRIAGEM EM CASCATA (LÉXICO → MODELO RÁPIDO → MODELO GRANDE)
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+CONFORME = "Campanha de vacinação contra a gripe no posto central."
+DUVIDOSA = "A prefeitura inaugurou a nova creche do bairro."
+GRAVE = "O prefeito João Silva, candidato à reeleição, inaugurou a obra, marca da nossa gestão."
+
+
+def test_pontuacao_lexica():
+    assert pontuar_risco(CONFORME) == 0.0
+    assert pontuar_risco(DUVIDOSA) == 2.0
+    assert pontuar_risco(GRAVE) >= ConfigTriagem().limiar_direto
+    # cada expressão conta no máximo MAX_OCORRENCIAS vezes
+    assert pontuar_risco("inauguração " * 10) == 2.0 * MAX_OCORRENCIAS
+
+
+def test_nomes_de_candidatos_elevam_o_risco():
+    texto = "Maria Souza visitou a escola municipal."
+    assert pontuar_risco(texto) == 0.0
+    assert pontuar_risco(texto, ("maria souza",)) == 5.0
+
+
+def test_resumo_triagem_calcula_taxas_e_economia():
+    resumo = resumo_triagem({
+        "paginas": 10, "resolvidas_lexico": 5, "triadas_modelo_rapido": 4, "resolvidas_modelo_rapido": 3,
+        "escaladas": 2, "confirmadas_modelo_grande": 1, "tokens_modelo_rapido": 100, "tokens_modelo_grande": 1000,
+        "tempo_modelo_grande_s": 10.0, "tempo_modelo_rapido_s": 1.0, "tokens_evitados": 800,
+    })
+    assert (resumo["taxa_lexico"], resumo["taxa_modelo_rapido"], resumo["taxa_escalada"]) == (0.5, 0.75, 0.2)
+    assert resumo["taxa_confirmacao"] == 0.5
+    assert resumo["tokens_economizados"] == 700
+    assert resumo["tempo_economizado_s"] == 7.0     # 800 tokens a 0,01 s/token, menos 1 s do modelo rápido
+    assert resumo_triagem({})["taxa_lexico"] == 0.0
+
+
+def test_cada_pagina_para_na_primeira_camada_que_a_resolve(tmp_path, monkeypatch):
+    chamadas = []
+
+    def completar(model, messages, max_tokens, **parametros):
+        paragrafos = re.findall(r'\[\d+\] ([^\n"]*)', messages[-1]["content"])
+        chamadas.append((model, paragrafos))
+        # o modelo rápido não marca nada; o grande marca tudo o que recebe
+        ids = [] if model == MODELO_TRIAGEM else list(range(1, len(paragrafos) + 1))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"nao_conformes": ids})),
+                                     finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=None))
+
+    motor = MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+    monkeypatch.setattr(motor.agendador, "completar", completar)
+    config = ConfigLLM(resumo_base_legal="resumo", streaming=False)
+
+    resultados = motor.analisar_lote_em_cascata([CONFORME, DUVIDOSA, GRAVE], config, ConfigTriagem(ativa=True))
+
+    assert chamadas == [(MODELO_TRIAGEM, [DUVIDOSA]), (config.modelo, [GRAVE])]
+    assert [r[1] for r in resultados] == [[1, 1, 0], [1, 1, 0], [1, 0, 1]]
+    estatisticas = motor.estatisticas_triagem()
+    assert (estatisticas["resolvidas_lexico"], estatisticas["resolvidas_modelo_rapido"],
+            estatisticas["escaladas_direto"], estatisticas["confirmadas_modelo_grande"]) == (1, 1, 1, 1)
+
+    # a mesma página grave já tem veredicto do modelo grande e não passa de novo pela triagem
+    chamadas.clear()
+    motor.analisar_lote_em_cascata([GRAVE], config, ConfigTriagem(ativa=True))
+    assert chamadas == []
+    assert motor.estatisticas_triagem()["ja_julgadas"] == 1
+
+
+@pytest.mark.parametrize("usar_modelo_rapido, modelo", [(True, MODELO_TRIAGEM), (False, ConfigLLM().modelo)])
+def test_sem_modelo_rapido_a_duvida_vai_ao_modelo_grande(tmp_path, monkeypatch, usar_modelo_rapido, modelo):
+    usados = []
+
+    def completar(model, messages, max_tokens, **parametros):
+        usados.append(model)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"nao_conformes": []}'), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_tokens_details=None))
+
+    motor = MotorAnalise(api_key="teste", diretorio_cache=str(tmp_path))
+    monkeypatch.setattr(motor.agendador, "completar", completar)
+    config = ConfigLLM(resumo_base_legal="resumo", streaming=False)
+
+    motor.analisar_lote_em_cascata([DUVIDOSA], config, ConfigTriagem(ativa=True, usar_modelo_rapido=usar_modelo_rapido))
+    assert usados == [modelo]
@@ -0,0 +1,28 @@
+import pytest
+
+from electio.urls import host, normalizar_url
+
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+#        NORMALIZAÇÃO DE URLS
+# ◆━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━◆
+
+
+@pytest.mark.parametrize("url, normalizada", [
+    ("HTTPS://Prefeitura.SP.gov.br:443/Noticias/", "https://prefeitura.sp.gov.br/Noticias"),
+    ("http://a.gov.br:80", "http://a.gov.br/"),
+    ("http://a.gov.br:8080/x", "http://a.gov.br:8080/x"),
+    ("https://a.gov.br/n?b=2&a=1#comentarios", "https://a.gov.br/n?a=1&b=2"),
+    ("https://a.gov.br/n?utm_source=fb&fbclid=x&id=7&UTM_medium=y", "https://a.gov.br/n?id=7"),
+    ("  https://a.gov.br/busca?q=  ", "https://a.gov.br/busca?q="),
+])
+def test_normalizar_url(url, normalizada):
+    assert normalizar_url(url) == normalizada
+
+
+def test_normalizar_url_e_idempotente():
+    url = normalizar_url("https://A.gov.br/x/?utm_campaign=1&p=2")
+    assert normalizar_url(url) == url
+
+
+def test_host_sem_www_e_sem_porta():
+    assert host("https://WWW.Campinas.sp.gov.br:8443/noticias") == "campinas.sp.gov.br"